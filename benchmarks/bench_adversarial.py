@@ -0,0 +1,120 @@
+"""
+Measure the worst-case time of detection patterns on adversarial inputs.
+
+Each input is grown until a scan takes longer than TIME_CAP, and the time per KB
+is reported, without and with the default scan budget of the API.
+
+Run from the project root with: python -m benchmarks.bench_adversarial
+"""
+
+from src.trace_deidentifier.anonymizer.scanners.base import Scanner
+from src.trace_deidentifier.anonymizer.scanners.budget import ScanBudget, ScanGuard
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+
+from .common import measure, print_table
+
+# Sizes in characters, each input stops growing once a scan exceeds the time cap
+SIZES = (1024, 4096, 16384, 65536)
+TIME_CAP = 1.0
+
+# Default budget of the API, see SCAN_MAX_LENGTH and SCAN_BUDGET_POLICY
+BUDGET = ScanBudget(max_length=4096)
+
+# Repeated units without the terminator each pattern needs, and an optional suffix
+CORPUS = {
+    "email": {
+        "a.": ("a.", ""),
+        "a- then a@": ("a-", "a@"),
+        "!#$%": ("!#$%", ""),
+    },
+    "ipv4": {
+        "1.": ("1.", ""),
+        "digits": ("1", ""),
+        "1.1.1": ("1.1.1 ", ""),
+    },
+    "ipv6": {
+        "1:": ("1:", ""),
+        ":": (":", ""),
+        "ffff:": ("ffff:", "g"),
+    },
+    "geo": {
+        "digits": ("1", ""),
+        "digits then °": ("1", "°"),
+        "1.5°N": ("1.5°N ", ""),
+        "{'lat':": ("{'lat': ", ""),
+    },
+}
+
+STRATEGIES = {
+    "email": EmailDetectionStrategy,
+    "ipv4": Ipv4DetectionStrategy,
+    "ipv6": Ipv6DetectionStrategy,
+    "geo": GeoLocationDetectionStrategy,
+}
+
+
+def build(unit: str, suffix: str, size: int) -> str:
+    """
+    Build an adversarial string of a given size.
+
+    :param unit: Repeated unit
+    :param suffix: Appended after the repeated units
+    :param size: Total number of characters
+    :return: The string
+    """
+    body = size - len(suffix)
+    return (unit * (body // len(unit) + 1))[:body] + suffix
+
+
+def worst_case(
+    scanner: Scanner | ScanGuard,
+    unit: str,
+    suffix: str,
+) -> tuple[int, float]:
+    """
+    Grow an input until the time cap is reached, and keep the slowest time per KB.
+
+    :param scanner: Scanner, or guarded scanner, to measure
+    :param unit: Repeated unit of the input
+    :param suffix: Suffix of the input
+    :return: The largest size measured and the worst time per KB, in milliseconds
+    """
+    worst = 0.0
+    for size in SIZES:
+        string = build(unit=unit, suffix=suffix, size=size)
+        elapsed = measure(lambda s=string: scanner.sub("x", s), repeat=1)
+        worst = max(worst, elapsed * 1000 / (size / 1024))
+        if elapsed > TIME_CAP:
+            break
+    return size, worst
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    rows = []
+    for name, strategy in STRATEGIES.items():
+        scanner = strategy().scanner
+        guard = ScanGuard(scanner=scanner, budget=BUDGET)
+        for label, (unit, suffix) in CORPUS[name].items():
+            size, unguarded = worst_case(scanner, unit=unit, suffix=suffix)
+            _, guarded = worst_case(guard, unit=unit, suffix=suffix)
+            rows.append((name, label, size, unguarded, guarded))
+    print_table(
+        headers=("pattern", "input", "max chars", "ms/KB", "guarded ms/KB"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare whole-string and chunked detection on multi-megabyte strings.
+
+Run from the project root with: python -m benchmarks.bench_chunked
+"""
+
+import tracemalloc
+
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.regex_detect import (
+    RegexDetectionStrategy,
+)
+
+from .common import measure, print_table
+
+CHUNK_LENGTH = 65536
+
+TEXT = (
+    "Learner john.doe@company.com completed the module from 2001:db8::8a2e:370:7334 "
+    "at 10.0.0.1, near 45.123°N 2.345°E, see http://example.com/activities/course-001. "
+)
+PROSE = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod. "
+
+INPUTS = {
+    "text 4MB": (TEXT * (4_000_000 // len(TEXT))),
+    "prose 4MB": (PROSE * (4_000_000 // len(PROSE))),
+}
+
+STRATEGIES = {
+    "email": EmailDetectionStrategy,
+    "ipv4": Ipv4DetectionStrategy,
+    "ipv6": Ipv6DetectionStrategy,
+    "geo": GeoLocationDetectionStrategy,
+}
+
+
+def peak_memory(strategy: RegexDetectionStrategy, string: str) -> float:
+    """
+    Measure the peak memory allocated while replacing matches in a string.
+
+    :param strategy: The strategy to measure
+    :param string: The string to process
+    :return: The peak memory, in MB
+    """
+    tracemalloc.start()
+    try:
+        strategy.substituter.sub("x", string)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    rows = []
+    for name, strategy_class in STRATEGIES.items():
+        whole = strategy_class()
+        chunked = strategy_class(chunk_length=CHUNK_LENGTH)
+        for label, string in INPUTS.items():
+            rows.append(
+                (
+                    name,
+                    label,
+                    measure(lambda s=string, w=whole: w.substituter.sub("x", s)) * 1000,
+                    measure(lambda s=string, c=chunked: c.substituter.sub("x", s))
+                    * 1000,
+                    peak_memory(whole, string),
+                    peak_memory(chunked, string),
+                ),
+            )
+    print_table(
+        headers=(
+            "pattern",
+            "input",
+            "whole ms",
+            "chunked ms",
+            "whole MB",
+            "chunked MB",
+        ),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
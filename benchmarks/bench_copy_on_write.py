@@ -0,0 +1,133 @@
+"""
+Compare anonymizing a deep copy of a statement with anonymizing a copy-on-write view of it.
+
+Both leave the original statement unchanged. Peak memory is the most allocated
+while anonymizing, copy included, and kept memory is what the anonymized
+statement holds on top of the original one.
+
+Run from the project root with: python -m benchmarks.bench_copy_on_write
+"""
+
+import copy
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .common import measure, print_table
+
+ENTRY = {
+    "id": "http://example.com/activities/question-{}",
+    "response": "The mean is 42, the median 40",
+    "score": 0.75,
+    "tags": ["quiz", "statistics", "week 3"],
+}
+
+# Number of entries of each statement, about 150 bytes each
+SIZES = (100, 1000, 10000)
+
+
+def statement(entries: int) -> dict:
+    """
+    Build a statement with many result entries, one of them holding an email.
+
+    :param entries: Number of entries
+    :return: The statement data
+    """
+    items = [
+        {**ENTRY, "id": ENTRY["id"].format(i), "tags": [*ENTRY["tags"]]}
+        for i in range(entries)
+    ]
+    items[entries // 2]["response"] = "Ask john.doe@company.com"
+    return {
+        "actor": {"mbox": "mailto:john.doe@company.com", "name": "John Doe"},
+        "verb": {"id": "http://adlnet.gov/expapi/verbs/answered"},
+        "object": {"id": "http://example.com/activities/quiz"},
+        "result": {"extensions": {"http://example.com/entries": items}},
+    }
+
+
+def memory(func: Callable[[], Any]) -> tuple[float, float]:
+    """
+    Measure the memory allocated by a function call.
+
+    :param func: The function to measure
+    :return: The peak memory allocated during the call, and the memory still held
+        by its result, in KB
+    """
+    tracemalloc.start()
+    result = func()
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / 1024, kept / 1024
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    anonymizer = Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+            Ipv6DetectionStrategy(),
+            GeoLocationDetectionStrategy(),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+    )
+    rows = []
+    for size in SIZES:
+        trace = Trace.model_construct(data=statement(entries=size))
+
+        def deep(t: Trace = trace) -> Trace:
+            result = Trace.model_construct(data=copy.deepcopy(t.data))
+            anonymizer.anonymize(trace=result)
+            return result
+
+        def cow(t: Trace = trace) -> Trace:
+            return anonymizer.anonymize_copy(trace=t)[0]
+
+        rows.append(
+            (
+                size,
+                measure(deep, repeat=3) * 1000,
+                measure(cow, repeat=3) * 1000,
+                *memory(deep),
+                *memory(cow),
+            ),
+        )
+    print_table(
+        headers=(
+            "entries",
+            "deepcopy ms",
+            "cow ms",
+            "deepcopy peak KB",
+            "deepcopy kept KB",
+            "cow peak KB",
+            "cow kept KB",
+        ),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
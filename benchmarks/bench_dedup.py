@@ -0,0 +1,161 @@
+"""
+Compare the bulk anonymization time of statements with and without batch deduplication.
+
+Statements of a batch share a few activity definitions and context activities,
+as exports of a course do, and a share of them are exact duplicates, as left by
+retries and replays. Each run goes through the JSON Lines stream, so parsing and
+serialization are included in every column.
+
+Run from the project root with: python -m benchmarks.bench_dedup
+"""
+
+import io
+import json
+import random
+
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.dedup import BatchDeduplicator
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.cli.bulk import BulkAnonymizer
+
+from .common import measure, print_table
+
+BATCH_SIZE = 2000
+ACTIVITIES = 20
+DUPLICATE_SHARES = (0.0, 0.2, 0.5)
+WINDOW = 1024
+
+
+def definition(index: int) -> dict:
+    """
+    Build the definition of an activity of the course, with long texts.
+
+    :param index: Number of the activity
+    :return: The activity definition
+    """
+    return {
+        "name": {"en-US": f"Module {index}: descriptive statistics"},
+        "description": {
+            "en-US": (
+                f"Module {index} covers means, medians and variances, with exercises "
+                "on real data sets. Questions go to teacher@school.org, replies "
+                "within 48 hours. " * 4
+            ),
+        },
+        "type": "http://adlnet.gov/expapi/activities/module",
+        "interactionType": "choice",
+        "choices": [
+            {"id": f"choice-{c}", "description": {"en-US": f"Answer {c} of {index}"}}
+            for c in range(8)
+        ],
+    }
+
+
+def batch(duplicate_share: float, seed: int = 0) -> str:
+    """
+    Build a JSON Lines batch of statements sharing their activity definitions.
+
+    :param duplicate_share: Share of the statements repeating an earlier one
+    :param seed: Seed of the random choices
+    :return: The batch, one statement per line
+    """
+    rng = random.Random(seed)
+    lines: list[str] = []
+    for i in range(BATCH_SIZE):
+        if lines and rng.random() < duplicate_share:
+            lines.append(rng.choice(lines))
+            continue
+        activity = rng.randrange(ACTIVITIES)
+        statement = {
+            "actor": {"mbox": f"mailto:learner{i}@school.org", "name": f"L {i}"},
+            "verb": {"id": "http://adlnet.gov/expapi/verbs/answered"},
+            "object": {
+                "id": f"http://example.com/activities/module-{activity}",
+                "definition": definition(activity),
+            },
+            "result": {"response": f"choice-{i % 8}", "success": True},
+            "context": {
+                "registration": f"ec531277-b57b-4c15-8d91-{i:012d}",
+                "contextActivities": {
+                    "parent": [
+                        {
+                            "id": "http://example.com/activities/course",
+                            "definition": definition(-1),
+                        },
+                    ],
+                },
+            },
+            "timestamp": f"2024-05-18T05:{i // 60 % 60:02d}:{i % 60:02d}.000+00:00",
+        }
+        lines.append(json.dumps(statement))
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    anonymizer = Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            RemoveFieldsStrategy(),
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+            Ipv6DetectionStrategy(),
+            GeoLocationDetectionStrategy(),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+    )
+    rows = []
+    for share in DUPLICATE_SHARES:
+        text = batch(duplicate_share=share)
+
+        def run(text: str = text, window: int = 0) -> BatchDeduplicator | None:
+            deduplicator = BatchDeduplicator(window=window) if window else None
+            BulkAnonymizer(anonymizer=anonymizer, deduplicator=deduplicator).run(
+                source=io.StringIO(text),
+                target=io.StringIO(),
+            )
+            return deduplicator
+
+        stats = run(window=WINDOW).stats
+        rows.append(
+            (
+                f"{share:.0%}",
+                measure(run, repeat=3) * 1000,
+                measure(lambda run=run: run(window=WINDOW), repeat=3) * 1000,
+                f"{stats.statement_ratio:.0%}",
+                f"{stats.value_ratio:.0%}",
+            ),
+        )
+    print_table(
+        headers=(
+            "duplicates",
+            "no dedup ms",
+            "dedup ms",
+            "statements reused",
+            "strings reused",
+        ),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare the memory and parsing time of a batch of statements with and without interning.
+
+The statements of the dedup benchmark batch, which share their activity
+definitions as exports of a course do, are parsed into traces as the bulk
+command does, and kept in memory together. The memory is measured with
+tracemalloc, the table of the interning decoder included, and the parsing
+time in a separate run.
+
+Run from the project root with: python -m benchmarks.bench_interning
+"""
+
+import json
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.utils import utils_json
+
+from .bench_dedup import batch
+from .common import measure, print_table
+
+BATCH_SIZES = (256, 2000)
+
+
+def parse(lines: list[str], loads: Callable[[str], Any]) -> list[Trace]:
+    """
+    Parse statements into traces.
+
+    :param lines: The JSON text of each statement
+    :param loads: The function parsing a JSON text
+    :return: The traces
+    """
+    return [Trace.model_validate({"data": loads(line)}) for line in lines]
+
+
+def memory(lines: list[str], loads: Callable[[str], Any]) -> int:
+    """
+    Measure the memory taken by the parsed traces.
+
+    :param lines: The JSON text of each statement
+    :param loads: The function parsing a JSON text
+    :return: The memory allocated and still in use, in bytes
+    """
+    tracemalloc.start()
+    try:
+        traces = parse(lines, loads)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del traces
+    return size
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    lines = batch(duplicate_share=0.0).splitlines()
+    # Warm up, so that allocations made once per process are not measured
+    parse(lines[:10], json.loads)
+    rows = []
+    for size in BATCH_SIZES:
+        chunk = lines[:size]
+        decoder = utils_json.InterningDecoder()
+        for name, loads in (("plain", json.loads), ("interned", decoder.loads)):
+            decoder.clear()
+            used = memory(chunk, loads)
+            elapsed = measure(lambda chunk=chunk, loads=loads: parse(chunk, loads))
+            rows.append((size, name, used / size / 1024, elapsed * 1000))
+    print_table(
+        headers=("statements", "parsing", "KiB per statement", "ms"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
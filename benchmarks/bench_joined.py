@@ -0,0 +1,93 @@
+"""
+Compare scanning the short strings of a batch one by one and within a joined buffer.
+
+Each detection pattern is called on every string, or once on the strings joined
+with a separator, for strings of growing lengths, most without any match. The
+prefilter is left out, so that only the call overhead differs. The strategies
+scan strings within a joined buffer only up to the length where it pays off.
+
+Run from the project root with: python -m benchmarks.bench_joined
+"""
+
+from src.trace_deidentifier.anonymizer.scanners.batch import scan_joined
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+
+from .common import measure, print_table
+
+STRINGS = 20000
+LENGTHS = (4, 8, 16, 32, 64)
+SEPARATOR = "\x00"
+
+
+def strings(length: int) -> list[str]:
+    """
+    Build distinct strings of a given length, one in twenty holding an email or an IP address.
+
+    :param length: Length of the strings
+    :return: The strings
+    """
+    values = []
+    for i in range(STRINGS):
+        value = f"{i}-" + "choice of the learner " * (length // 8 + 1)
+        if i % 20 == 0:
+            value = f"{i}@a.org 10.0.{i % 256}.1 ::1 " + value
+        values.append(value[:length])
+    return values
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    strategies = (
+        EmailDetectionStrategy(),
+        Ipv4DetectionStrategy(),
+        Ipv6DetectionStrategy(),
+        GeoLocationDetectionStrategy(),
+    )
+    rows = []
+    for length in LENGTHS:
+        values = strings(length)
+        for strategy in strategies:
+            scanner, repl = strategy.scanner, strategy.replacement
+
+            def one_by_one(scanner=scanner, repl=repl, values=values) -> None:  # noqa: ANN001
+                for value in values:
+                    scanner.sub(repl=repl, string=value)
+
+            def joined(strategy=strategy, values=values) -> None:  # noqa: ANN001
+                scan_joined(
+                    scanner=strategy.scanner,
+                    strings=values,
+                    repl=strategy.replacement,
+                    separator=SEPARATOR,
+                )
+
+            by_one = measure(one_by_one, repeat=7)
+            by_buffer = measure(joined, repeat=7)
+            rows.append(
+                (
+                    length,
+                    type(strategy).__name__,
+                    by_one * 1000,
+                    by_buffer * 1000,
+                    f"{by_one / by_buffer:.1f}x",
+                ),
+            )
+    print_table(
+        headers=("length", "strategy", "one by one ms", "joined ms", "speedup"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
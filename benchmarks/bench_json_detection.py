@@ -0,0 +1,106 @@
+"""
+Compare detection on parsed statements and directly on their JSON text, for large statements.
+
+The parsed column includes parsing the text and serializing the result, which
+detection on the text does without.
+
+Run from the project root with: python -m benchmarks.bench_json_detection
+"""
+
+import json
+
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.common.utils import utils_dict, utils_json
+
+from .common import measure, print_table
+
+DETECTORS = [
+    EmailDetectionStrategy(),
+    Ipv4DetectionStrategy(),
+    Ipv6DetectionStrategy(),
+    GeoLocationDetectionStrategy(),
+]
+
+ENTRY = {
+    "id": "http://example.com/activities/question-{}",
+    "response": "Answered from 10.0.0.1, contact john.doe@company.com",
+    "comment": "Café à 45.123°N 2.345°E,\n second line",
+    "score": 0.75,
+    "tags": ["quiz", "statistics", "week 3"],
+}
+
+# Number of entries of each statement, about 250 bytes each
+SIZES = (100, 1000, 10000)
+
+
+def statement(entries: int) -> str:
+    """
+    Build the JSON text of a statement with many result entries.
+
+    :param entries: Number of entries
+    :return: The JSON text, with non-ASCII characters escaped
+    """
+    items = [{**ENTRY, "id": ENTRY["id"].format(i)} for i in range(entries)]
+    return json.dumps(
+        {
+            "actor": {"mbox": "mailto:anonymous@anonymous.org"},
+            "verb": {"id": "http://adlnet.gov/expapi/verbs/answered"},
+            "object": {"id": "http://example.com/activities/quiz"},
+            "result": {"extensions": {"http://example.com/entries": items}},
+        },
+    )
+
+
+def detect_parsed(text: str) -> str:
+    """
+    Parse a statement, run every detector on the parsed data and serialize it.
+
+    :param text: The JSON text
+    :return: The anonymized JSON text
+    """
+    data = json.loads(text)
+    for detector in DETECTORS:
+        utils_dict.regex_replace(data, detector.substituter, detector.replacement)
+    return json.dumps(data)
+
+
+def detect_text(text: str) -> str:
+    """
+    Run every detector directly on the JSON text of a statement, in a single pass.
+
+    :param text: The JSON text
+    :return: The anonymized JSON text
+    """
+    return utils_json.regex_replace_json(
+        text=text,
+        replacements=[(d.substituter, d.replacement) for d in DETECTORS],
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    rows = []
+    for size in SIZES:
+        text = statement(entries=size)
+        parsed = measure(lambda t=text: detect_parsed(t), repeat=3)
+        raw = measure(lambda t=text: detect_text(t), repeat=3)
+        rows.append((size, len(text) // 1024, parsed * 1000, raw * 1000))
+    print_table(
+        headers=("entries", "KB", "parsed ms", "text ms"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
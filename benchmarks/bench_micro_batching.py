@@ -0,0 +1,155 @@
+"""
+Measure the throughput and latency of concurrent single-trace requests, with and without micro-batching.
+
+Clients send statements one at a time, each waiting for its response before
+sending the next, to the service in this process. Without micro-batching, each
+statement goes through every strategy on its own; with it, the statements of
+concurrent requests are collected for up to the delay and anonymized together,
+in an executor. The table gives the number of statements anonymized per
+second and the latency percentiles of the requests, for several numbers of
+concurrent clients and delays.
+
+Run from the project root with: python -m benchmarks.bench_micro_batching
+"""
+
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.api.dependencies import (
+    get_anonymizer,
+    get_idempotency_marker,
+    get_micro_batcher,
+    get_result_cache,
+)
+from src.trace_deidentifier.api.micro_batching import MicroBatcher
+from src.trace_deidentifier.api.routers.anonymize import router
+
+from .bench_dedup import batch
+from .common import print_table
+
+CLIENTS = (1, 16, 64)
+DELAYS = (0.0, 0.002, 0.005)
+MAX_SIZE = 64
+STATEMENTS = 1000
+
+
+def build_app(anonymizer: Anonymizer, max_delay: float) -> FastAPI:
+    """
+    Build the service with the anonymizer, micro-batching as given.
+
+    :param anonymizer: The anonymizer of the service
+    :param max_delay: Longest time a statement waits for others, in seconds, 0 to
+        disable micro-batching
+    :return: The app
+    """
+    batcher = (
+        MicroBatcher(max_delay=max_delay, max_size=MAX_SIZE) if max_delay else None
+    )
+    app = FastAPI()
+    app.dependency_overrides[get_anonymizer] = lambda: anonymizer
+    app.dependency_overrides[get_idempotency_marker] = lambda: None
+    app.dependency_overrides[get_result_cache] = lambda: None
+    app.dependency_overrides[get_micro_batcher] = lambda: batcher
+    app.include_router(router)
+    return app
+
+
+async def run(
+    app: FastAPI,
+    statements: list[dict],
+    clients: int,
+) -> tuple[list[float], float]:
+    """
+    Send every statement alone, from several concurrent clients.
+
+    :param app: The service
+    :param statements: The statements, shared between the clients
+    :param clients: Number of concurrent clients
+    :return: The latency of each request, and the time of the run, in seconds
+    """
+    transport = httpx.ASGITransport(app=app)
+    queue = iter(statements)
+    latencies: list[float] = []
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+    ) as client:
+
+        async def send() -> None:
+            for data in queue:
+                start = time.perf_counter()
+                await client.post("/anonymize", json={"trace": {"data": data}})
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(clients)))
+        return latencies, time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    anonymizer = Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            RemoveFieldsStrategy(),
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+            Ipv6DetectionStrategy(),
+            GeoLocationDetectionStrategy(),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+    )
+    statements = [
+        json.loads(line)
+        for line in batch(duplicate_share=0.0).splitlines()[:STATEMENTS]
+    ]
+    rows = []
+    for clients in CLIENTS:
+        for max_delay in DELAYS:
+            app = build_app(anonymizer=anonymizer, max_delay=max_delay)
+            latencies, elapsed = asyncio.run(
+                run(app=app, statements=statements, clients=clients),
+            )
+            percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            rows.append(
+                (
+                    clients,
+                    f"{max_delay * 1000:g}" if max_delay else "off",
+                    len(statements) / elapsed,
+                    percentiles[49] * 1000,
+                    percentiles[98] * 1000,
+                ),
+            )
+    print_table(
+        headers=("clients", "delay ms", "statements/s", "p50 ms", "p99 ms"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare the anonymization time of statements embedding base64 payloads, with and without opaque payload handling.
+
+Run from the project root with: python -m benchmarks.bench_opaque
+"""
+
+import base64
+import copy
+import os
+
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.scanners.budget import ScanBudget
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.opaque_values import (
+    OpaqueValuesStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .common import measure, print_table
+
+# Size of the embedded payload, before encoding
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def statement(size: int) -> dict:
+    """
+    Build a statement embedding a screenshot as a base64 data URI.
+
+    :param size: Size of the screenshot, in bytes
+    :return: The statement data
+    """
+    screenshot = base64.b64encode(os.urandom(size)).decode()
+    return {
+        "verb": {"id": "http://adlnet.gov/expapi/verbs/answered"},
+        "result": {
+            "response": "Contact me at jane@doe.com",
+            "extensions": {
+                "http://example.com/extensions/screenshot": (
+                    f"data:image/png;base64,{screenshot}"
+                ),
+            },
+        },
+    }
+
+
+def build(*, opaque: bool) -> Anonymizer:
+    """
+    Build an anonymizer with the detection strategies of the API.
+
+    :param opaque: Whether to handle opaque payloads before detection
+    :return: The anonymizer
+    """
+    budget = ScanBudget(max_length=4096)
+    return Anonymizer(
+        strategies=[
+            *([OpaqueValuesStrategy()] if opaque else []),
+            EmailDetectionStrategy(budget=budget),
+            Ipv4DetectionStrategy(budget=budget),
+            Ipv6DetectionStrategy(budget=budget),
+            GeoLocationDetectionStrategy(budget=budget),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    anonymizers = (build(opaque=False), build(opaque=True))
+    rows = []
+    for size in SIZES:
+        data = statement(size)
+        times = [
+            measure(
+                lambda a=anonymizer, d=data: a.anonymize(
+                    Trace.model_construct(data=copy.deepcopy(d)),
+                ),
+                repeat=3,
+            )
+            * 1000
+            for anonymizer in anonymizers
+        ]
+        rows.append((size // 1000, *times))
+    print_table(headers=("payload KB", "ms", "opaque skipped ms"), rows=rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare the size and serialization time of anonymized statements and of their JSON Patch.
+
+Statements hold many result entries, and personal data in the actor and in one
+entry only.
+
+Run from the project root with: python -m benchmarks.bench_patch
+"""
+
+import json
+
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .bench_copy_on_write import SIZES, statement
+from .common import measure, print_table
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    anonymizer = Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+    )
+    rows = []
+    for size in SIZES:
+        trace = Trace.model_construct(data=statement(entries=size))
+        report = anonymizer.anonymize(trace=trace, patch=True)
+        operations = report.patch.operations
+        full = measure(lambda t=trace: json.dumps(t.data), repeat=3)
+        patch = measure(lambda o=operations: json.dumps(o), repeat=3)
+        rows.append(
+            (
+                size,
+                len(json.dumps(trace.data)),
+                len(json.dumps(operations)),
+                full * 1000,
+                patch * 1000,
+            ),
+        )
+    print_table(
+        headers=("entries", "trace bytes", "patch bytes", "trace ms", "patch ms"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
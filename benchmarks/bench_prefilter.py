@@ -0,0 +1,156 @@
+"""
+Compare the batch anonymization time of detection strategies with and without the prefilter.
+
+Statements of a batch have as many strings as exports usually do, few of which
+hold an IP address. The first table compares computing the prefilter masks one
+string at a time and with NumPy array operations, to find the number of strings
+from which vectorizing pays off. The second one compares anonymizing batches
+without prefilter, and with it, vectorized above that number. NumPy must be
+installed.
+
+Run from the project root with: python -m benchmarks.bench_prefilter
+"""
+
+import random
+from copy import deepcopy
+
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.scanners import prefilter
+from src.trace_deidentifier.anonymizer.scanners.prefilter import PrefilterRule
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.regex_detect import (
+    RegexDetectionStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .common import measure, print_table
+
+BATCH_SIZES = (16, 64, 256, 1024, 4096)
+STRING_COUNTS = (4, 16, 32, 64, 128, 1024, 16384)
+# Strings of a statement, from identifiers to free text
+STRINGS = (
+    "http://adlnet.gov/expapi/verbs/answered",
+    "ec531277-b57b-4c15-8d91-{i:012d}",
+    "2024-05-18T05:{m:02d}:{s:02d}.000+00:00",
+    "Learner {i} answered the question of module {m}",
+    "choice-{m}",
+    "The answer of learner {i} is correct, well done! See module {m} for more",
+)
+
+
+def batch(size: int, seed: int = 0) -> list[dict]:
+    """
+    Build statements with mostly clean strings, and an email or address in a few.
+
+    :param size: Number of statements
+    :param seed: Seed of the random choices
+    :return: The statement data
+    """
+    rng = random.Random(seed)
+    statements = []
+    for i in range(size):
+        values = [
+            s.format(i=i, m=i // 60 % 60, s=i % 60) for s in STRINGS for _ in range(2)
+        ]
+        if rng.random() < 0.05:  # noqa: PLR2004
+            values[rng.randrange(len(values))] += f" from 10.0.{i % 256}.1"
+        statements.append({"result": {"extensions": dict(enumerate(values))}})
+    return statements
+
+
+def unfiltered(
+    strategy: type[RegexDetectionStrategy],
+) -> type[RegexDetectionStrategy]:
+    """
+    Derive a detection strategy without prefilter.
+
+    :param strategy: The detection strategy class
+    :return: The same strategy, scanning every string
+    """
+    return type(f"Unfiltered{strategy.__name__}", (strategy,), {"PREFILTER": ()})
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    strategies = (
+        EmailDetectionStrategy,
+        Ipv4DetectionStrategy,
+        Ipv6DetectionStrategy,
+    )
+    logger = LoguruLogger(level=LogLevel.WARNING)
+    prefiltered = Anonymizer(strategies=[s() for s in strategies], logger=logger)
+    scanned = Anonymizer(
+        strategies=[unfiltered(s)() for s in strategies],
+        logger=logger,
+    )
+    rules = (PrefilterRule("@"),)
+    rows = []
+    for count in STRING_COUNTS:
+        strings = [f"Answer {i} of the module, see the course" for i in range(count)]
+        rows.append(
+            (
+                count,
+                measure(lambda s=strings: masks_one_by_one(s, rules), number=20) * 1e6,
+                measure(
+                    lambda s=strings: prefilter._vectorized_mask(s, rules),  # noqa: SLF001
+                    number=20,
+                )
+                * 1e6,
+            ),
+        )
+    print_table(headers=("strings", "one by one us", "numpy us"), rows=rows)
+    print()
+
+    rows = []
+    for size in BATCH_SIZES:
+        data = batch(size)
+
+        def run(anonymizer: Anonymizer, data: list[dict] = data) -> None:
+            anonymizer.anonymize_batch(
+                traces=[Trace.model_construct(data=deepcopy(d)) for d in data],
+            )
+
+        rows.append(
+            (
+                size,
+                measure(lambda run=run: run(scanned), repeat=5) * 1000,
+                measure(lambda run=run: run(prefiltered), repeat=5) * 1000,
+            ),
+        )
+    print_table(
+        headers=("statements", "no prefilter ms", "prefilter ms"),
+        rows=rows,
+    )
+
+
+def masks_one_by_one(
+    strings: list[str],
+    rules: tuple[PrefilterRule, ...],
+) -> list[bool]:
+    """
+    Compute the candidate masks without NumPy.
+
+    :param strings: The strings to check
+    :param rules: The prefilter rules
+    :return: The masks
+    """
+    threshold = prefilter.VECTORIZE_MIN_STRINGS
+    prefilter.VECTORIZE_MIN_STRINGS = None
+    try:
+        return prefilter.candidate_mask(strings=strings, rules=rules)
+    finally:
+        prefilter.VECTORIZE_MIN_STRINGS = threshold
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Compare the anonymization time of statements with and without the detection prescreen.
+
+Each statement is parsed from its JSON text before every run, as the API does,
+so the parsing time is included in both columns.
+
+Run from the project root with: python -m benchmarks.bench_prescreen
+"""
+
+import json
+
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.scanners.budget import ScanBudget
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .common import measure, print_table
+
+STATEMENT = {
+    "actor": {"objectType": "Agent", "name": "John Doe", "mbox": "mailto:john@doe.com"},
+    "verb": {
+        "id": "http://adlnet.gov/expapi/verbs/completed",
+        "display": {"en-US": "completed"},
+    },
+    "object": {
+        "id": "http://example.com/activities/course-001",
+        "definition": {
+            "name": {"en-US": "Introduction to statistics"},
+            "description": {"en-US": "First module of the course, with a final quiz"},
+            "extensions": {
+                "http://id.tincanapi.com/extension/ip-address": "10.0.0.1",
+                "http://example.com/extensions/duration": "PT1H30M",
+            },
+        },
+    },
+    "result": {"completion": True, "score": {"scaled": 0.85}, "response": "B"},
+    "context": {
+        "registration": "ec531277-b57b-4c15-8d91-d292c5b2b8f7",
+        "contextActivities": {
+            "parent": [{"id": "http://example.com/activities/course"}],
+        },
+        "language": "en-US",
+    },
+    "timestamp": "2024-05-18T05:32:34.804+00:00",
+    "version": "1.0.3",
+}
+
+INPUTS = {
+    "nothing to detect": STATEMENT,
+    "email in response": {
+        **STATEMENT,
+        "result": {"response": "Contact me at jane@doe.com"},
+    },
+}
+
+
+def build(*, prescreen: bool) -> Anonymizer:
+    """
+    Build an anonymizer with the strategies of the API.
+
+    :param prescreen: Whether to prescreen detection
+    :return: The anonymizer
+    """
+    budget = ScanBudget(max_length=4096)
+    return Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            RemoveFieldsStrategy(),
+            EmailDetectionStrategy(budget=budget),
+            Ipv4DetectionStrategy(budget=budget),
+            Ipv6DetectionStrategy(budget=budget),
+            GeoLocationDetectionStrategy(budget=budget),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+        prescreen=prescreen,
+    )
+
+
+def run(anonymizer: Anonymizer, raw: str) -> None:
+    """
+    Parse and anonymize a statement.
+
+    :param anonymizer: The anonymizer
+    :param raw: The JSON text of the statement
+    """
+    trace = Trace.model_construct(data=json.loads(raw))
+    anonymizer.anonymize(trace=trace, raw=raw)
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    screened, unscreened = build(prescreen=True), build(prescreen=False)
+    rows = []
+    for label, statement in INPUTS.items():
+        raw = json.dumps(statement, ensure_ascii=False)
+        times = [
+            measure(lambda a=anonymizer, r=raw: run(a, r), number=1000) * 1e6
+            for anonymizer in (unscreened, screened)
+        ]
+        rows.append((label, len(raw), *times))
+    print_table(
+        headers=("statement", "bytes", "µs", "prescreened µs"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
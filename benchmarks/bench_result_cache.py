@@ -0,0 +1,84 @@
+"""
+Compare rerunning a bulk export with and without the persistent result cache.
+
+The first run with the cache anonymizes every statement and stores its output,
+reruns read the outputs back. Deduplication is disabled, so only the cache
+avoids anonymizing statements again.
+
+Run from the project root with: python -m benchmarks.bench_result_cache
+"""
+
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.result_cache import ResultCache
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.cli.bulk import BulkAnonymizer
+
+from .bench_dedup import batch
+from .common import measure, print_table
+
+# Size limit of the cache, large enough for every output of the batch
+MAX_SIZE = 1 << 30
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    anonymizer = Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            RemoveFieldsStrategy(),
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+            Ipv6DetectionStrategy(),
+            GeoLocationDetectionStrategy(),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+    )
+    text = batch(duplicate_share=0.0)
+
+    def run(cache: ResultCache | None = None) -> None:
+        BulkAnonymizer(anonymizer=anonymizer, cache=cache).run(
+            source=io.StringIO(text),
+            target=io.StringIO(),
+        )
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(path=Path(directory) / "cache.sqlite", max_size=MAX_SIZE)
+        start = time.perf_counter()
+        run(cache)
+        first = time.perf_counter() - start
+        rows = [
+            ("no cache", measure(run, repeat=3) * 1000),
+            ("first run, storing", first * 1000),
+            ("rerun, reading", measure(lambda: run(cache), repeat=3) * 1000),
+        ]
+        print_table(headers=("run", "ms"), rows=rows)
+        print(f"hit rate: {cache.stats.hit_rate:.0%}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare the regex and scanner detection engines.
+
+Run from the project root with: python -m benchmarks.bench_scanners
+"""
+
+from src.trace_deidentifier.anonymizer.scanners.base import DetectionEngine
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+
+from .common import measure, print_table
+
+TEXT = (
+    "Learner john.doe@company.com completed the module from 2001:db8::8a2e:370:7334 "
+    "at 2013-05-18T05:32:34.804+00:00, see http://example.com/activities/course-001. "
+)
+
+INPUTS = {
+    "email": {
+        "text x100": TEXT * 100,
+        "'a.' x5000, no '@'": "a." * 5000,
+        "'a.' x5000 then '@'": "a." * 5000 + "@",
+        "'a.' x20000, no '@'": "a." * 20000,
+    },
+    "ipv6": {
+        "text x100": TEXT * 100,
+        "'1:' x5000": "1:" * 5000,
+        "'1:' x20000 then '.'": "1:" * 20000 + "1.",
+        "':: ' x5000": ":: " * 5000,
+    },
+}
+
+STRATEGIES = {"email": EmailDetectionStrategy, "ipv6": Ipv6DetectionStrategy}
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    rows = []
+    for name, strategy in STRATEGIES.items():
+        regex = strategy(engine=DetectionEngine.REGEX).scanner
+        scanner = strategy(engine=DetectionEngine.SCANNER).scanner
+        for label, string in INPUTS[name].items():
+            regex_time = measure(lambda s=string, e=regex: e.sub("x", s), repeat=3)
+            scanner_time = measure(lambda s=string, e=scanner: e.sub("x", s), repeat=3)
+            rows.append(
+                (
+                    name,
+                    label,
+                    len(string),
+                    regex_time * 1000,
+                    scanner_time * 1000,
+                    regex_time / scanner_time,
+                ),
+            )
+    print_table(
+        headers=("pattern", "input", "chars", "regex ms", "scanner ms", "speedup"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
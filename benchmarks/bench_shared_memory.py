@@ -0,0 +1,272 @@
+"""
+Compare handing batches to worker processes as pickled statements and in shared memory.
+
+A plain process pool pickles the parsed statements of each slice to a worker,
+and their anonymized data back. The shared memory pool writes the JSON text of
+the batch once in a segment, and workers write their outputs in segments of
+their own, so only names, offsets and lengths are pickled. The first table
+measures the transfer alone, with workers sending back what they received as
+is, and the second the whole anonymization of the batch, from JSON lines to
+JSON lines. Both pools have the same number of workers, started beforehand.
+
+Run from the project root with: python -m benchmarks.bench_shared_memory
+"""
+
+import itertools
+import json
+import multiprocessing
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any
+
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.cli.pool import SharedMemoryPool
+from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.utils import utils_json
+
+from .bench_dedup import batch
+from .common import measure, print_table
+
+PROCESSES = 2
+BATCH_SIZES = (16, 64, 256, 1024)
+
+# Anonymizer of the worker process of the plain pool
+_worker: dict[str, Anonymizer] = {}
+
+
+def build_anonymizer() -> Anonymizer:
+    """
+    Build the anonymizer with the strategies of the service.
+
+    :return: The anonymizer
+    """
+    return Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            RemoveFieldsStrategy(),
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+            Ipv6DetectionStrategy(),
+            GeoLocationDetectionStrategy(),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+    )
+
+
+def init_worker() -> None:
+    """Build the anonymizer of a worker process of the plain pool."""
+    _worker["anonymizer"] = build_anonymizer()
+
+
+def echo(statements: list[Any]) -> list[Any]:
+    """
+    Send back statements as received, in a worker process.
+
+    :param statements: The statement data
+    :return: The same statement data
+    """
+    return statements
+
+
+def echo_segment(name: str, offset: int, length: int) -> tuple[str, int]:
+    """
+    Copy a slice of a shared memory segment to a new segment, in a worker process.
+
+    :param name: Name of the segment holding the slice
+    :param offset: Offset of the slice in the segment
+    :param length: Length of the slice, in bytes
+    :return: The name of the new segment, and its length
+    """
+    segment = shared_memory.SharedMemory(name=name, track=False)
+    output = shared_memory.SharedMemory(create=True, size=max(length, 1), track=False)
+    output.buf[:length] = segment.buf[offset : offset + length]
+    segment.close()
+    output.close()
+    return output.name, length
+
+
+def anonymize(statements: list[Any]) -> list[Any]:
+    """
+    Anonymize statements as a batch, in a worker process of the plain pool.
+
+    :param statements: The statement data
+    :return: The anonymized statement data
+    """
+    traces = [Trace.model_validate({"data": data}) for data in statements]
+    _worker["anonymizer"].anonymize_batch(traces=traces)
+    return [trace.data for trace in traces]
+
+
+def pickled(
+    executor: ProcessPoolExecutor,
+    statements: Sequence[Any],
+    task: Callable[[list[Any]], list[Any]],
+) -> list[Any]:
+    """
+    Hand parsed statements to a plain pool, one slice per worker.
+
+    :param executor: The plain pool
+    :param statements: The statement data
+    :param task: The task of the workers
+    :return: The data each worker sent back, in order
+    """
+    size = -(-len(statements) // PROCESSES)
+    futures = [
+        executor.submit(task, list(chunk))
+        for chunk in itertools.batched(statements, size, strict=False)
+    ]
+    return [data for future in futures for data in future.result()]
+
+
+def pickled_anonymization(
+    executor: ProcessPoolExecutor,
+    lines: Sequence[str],
+) -> list[str]:
+    """
+    Anonymize JSON lines in a plain pool, parsing and serializing them in this process.
+
+    :param executor: The plain pool
+    :param lines: The JSON text of each statement
+    :return: The JSON text of each anonymized statement
+    """
+    statements = [json.loads(line) for line in lines]
+    return [
+        utils_json.dump_compact(data)
+        for data in pickled(executor=executor, statements=statements, task=anonymize)
+    ]
+
+
+def shared(executor: ProcessPoolExecutor, lines: Sequence[str]) -> list[str]:
+    """
+    Hand JSON lines to workers copying them back, one slice per worker, in shared memory.
+
+    :param executor: The pool of the workers
+    :param lines: The JSON text of each statement
+    :return: The JSON text each worker sent back, in order
+    """
+    buffer = "\n".join(lines).encode()
+    starts = [0, *itertools.accumulate(len(line.encode()) + 1 for line in lines)]
+    size = -(-len(lines) // PROCESSES)
+    bounds = [*range(0, len(lines), size), len(lines)]
+    segment = shared_memory.SharedMemory(create=True, size=len(buffer))
+    segment.buf[: len(buffer)] = buffer
+    futures = [
+        executor.submit(
+            echo_segment,
+            segment.name,
+            starts[first],
+            starts[last] - starts[first] - 1,
+        )
+        for first, last in itertools.pairwise(bounds)
+    ]
+    outputs = []
+    for future in futures:
+        name, length = future.result()
+        output = shared_memory.SharedMemory(name=name)
+        outputs.extend(bytes(output.buf[:length]).decode().split("\n"))
+        output.close()
+        output.unlink()
+    segment.close()
+    segment.unlink()
+    return outputs
+
+
+def speedup_row(
+    size: int,
+    by_pickle: Callable[[], Any],
+    by_segment: Callable[[], Any],
+) -> tuple[int, float, float, str]:
+    """
+    Measure both ways of handing a batch to workers.
+
+    :param size: Number of statements of the batch
+    :param by_pickle: Function handing the batch as pickled statements
+    :param by_segment: Function handing the batch in shared memory
+    :return: The row of the table
+    """
+    pickle_time = measure(by_pickle)
+    segment_time = measure(by_segment)
+    return (
+        size,
+        pickle_time * 1000,
+        segment_time * 1000,
+        f"{pickle_time / segment_time:.1f}x",
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    context = multiprocessing.get_context("spawn")
+    lines = batch(duplicate_share=0.0).splitlines()
+    statements = [json.loads(line) for line in lines]
+    transfer_rows = []
+    anonymization_rows = []
+    with (
+        ProcessPoolExecutor(PROCESSES, mp_context=context) as echo_executor,
+        ProcessPoolExecutor(
+            PROCESSES,
+            mp_context=context,
+            initializer=init_worker,
+        ) as executor,
+        SharedMemoryPool(factory=build_anonymizer, processes=PROCESSES) as pool,
+    ):
+        # Start the workers, so that their startup is not measured
+        pickled_anonymization(executor=executor, lines=lines[:64])
+        shared(executor=echo_executor, lines=lines[:64])
+        pool.anonymize(lines=lines[:64])
+        for size in BATCH_SIZES:
+            transfer_rows.append(
+                speedup_row(
+                    size=size,
+                    by_pickle=lambda size=size: pickled(
+                        executor=echo_executor,
+                        statements=statements[:size],
+                        task=echo,
+                    ),
+                    by_segment=lambda size=size: shared(
+                        executor=echo_executor,
+                        lines=lines[:size],
+                    ),
+                ),
+            )
+            anonymization_rows.append(
+                speedup_row(
+                    size=size,
+                    by_pickle=lambda size=size: pickled_anonymization(
+                        executor=executor,
+                        lines=lines[:size],
+                    ),
+                    by_segment=lambda size=size: pool.anonymize(lines=lines[:size]),
+                ),
+            )
+    headers = ("statements", "pickled ms", "shared memory ms", "speedup")
+    print("Transfer only")
+    print_table(headers=headers, rows=transfer_rows)
+    print()
+    print("Anonymization")
+    print_table(headers=headers, rows=anonymization_rows)
+
+
+if __name__ == "__main__":
+    main()
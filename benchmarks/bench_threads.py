@@ -0,0 +1,102 @@
+"""
+Measure how the batch anonymization time scales with the number of threads.
+
+A batch of statements is split between threads, each anonymizing its slice
+strategy by strategy. With the GIL, threads take turns and the time stays
+flat at best; on a free-threaded build of Python, they run on every core.
+Run it with both interpreters to compare, e.g. python3.13 and python3.13t.
+Each measurement anonymizes a fresh copy of the batch, parsed beforehand.
+
+Run from the project root with: python -m benchmarks.bench_threads
+"""
+
+import json
+import os
+import sys
+import sysconfig
+
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.anonymizer.threaded import ThreadedAnonymizer
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .bench_dedup import batch
+from .common import measure, print_table
+
+THREADS = (1, 2, 4, 8)
+REPEAT = 3
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(
+        f"Python {sys.version.split()[0]}, "
+        f"{'free-threaded' if free_threaded else 'standard'} build, "
+        f"GIL {'enabled' if gil else 'disabled'}, {os.cpu_count()} CPUs",
+    )
+    anonymizer = Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            RemoveFieldsStrategy(),
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+            Ipv6DetectionStrategy(),
+            GeoLocationDetectionStrategy(),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+    )
+    lines = batch(duplicate_share=0.0).splitlines()
+    rows = []
+    single = None
+    for threads in THREADS:
+        batches = iter(
+            [
+                [Trace.model_validate({"data": json.loads(line)}) for line in lines]
+                for _ in range(REPEAT)
+            ],
+        )
+        with ThreadedAnonymizer(anonymizer=anonymizer, threads=threads) as threaded:
+            elapsed = measure(
+                lambda threaded=threaded, batches=batches: threaded.anonymize_batch(
+                    traces=next(batches),
+                ),
+                repeat=REPEAT,
+            )
+        single = single or elapsed
+        rows.append(
+            (
+                threads,
+                elapsed * 1000,
+                len(lines) / elapsed,
+                f"{single / elapsed:.1f}x",
+            ),
+        )
+    print_table(
+        headers=("threads", "ms", "statements/s", "speedup"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
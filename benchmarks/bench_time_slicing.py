@@ -0,0 +1,168 @@
+"""
+Measure the latency of single-trace requests served while a large batch is anonymized.
+
+A worker serves its requests on one event loop. Processed at once, a batch holds
+the loop until done, and single-trace requests arriving meanwhile wait for it.
+Processed in time slices, the batch lets them run between its chunks. Requests
+are sent to the service in this process, a single trace every 20 milliseconds
+for as long as the batch takes at once, and the table gives their latency
+percentiles and the time of the batch, for several time slices. Latencies are
+measured from the time each request was due, so that requests held back by a
+busy event loop count their wait.
+
+Run from the project root with: python -m benchmarks.bench_time_slicing
+"""
+
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from logger import LogLevel, LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.api.dependencies import (
+    get_anonymizer,
+    get_deduplicator,
+    get_idempotency_marker,
+    get_result_cache,
+    get_time_slicer,
+)
+from src.trace_deidentifier.api.routers.anonymize import router
+from src.trace_deidentifier.api.time_slicing import TimeSlicer
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .bench_dedup import batch
+from .common import print_table
+
+TIME_SLICES = (0.0, 0.005, 0.02, 0.05)
+REQUEST_INTERVAL = 0.02
+
+
+def build_app(anonymizer: Anonymizer, time_slice: float) -> FastAPI:
+    """
+    Build the service with the anonymizer, slicing batches as given.
+
+    :param anonymizer: The anonymizer of the service
+    :param time_slice: Target duration of a chunk, in seconds, 0 to process at once
+    :return: The app
+    """
+    slicer = TimeSlicer(time_slice=time_slice) if time_slice else None
+    app = FastAPI()
+    app.dependency_overrides[get_anonymizer] = lambda: anonymizer
+    app.dependency_overrides[get_idempotency_marker] = lambda: None
+    app.dependency_overrides[get_result_cache] = lambda: None
+    app.dependency_overrides[get_deduplicator] = lambda: None
+    app.dependency_overrides[get_time_slicer] = lambda: slicer
+    app.include_router(router)
+    return app
+
+
+async def run(
+    app: FastAPI,
+    statements: list[dict],
+    requests: int,
+) -> tuple[list[float], float]:
+    """
+    Send a batch and, while it runs, single-trace requests at a steady pace.
+
+    :param app: The service
+    :param statements: The statements of the batch, the first one also sent alone
+    :param requests: Number of single-trace requests
+    :return: The latency of each single-trace request, and the time of the batch,
+        in seconds
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+    ) as client:
+        single = {"trace": {"data": statements[0]}}
+        await client.post("/anonymize", json=single)
+
+        async def timed_single(due: float) -> float:
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await client.post("/anonymize", json=single)
+            return time.perf_counter() - due
+
+        async def timed_batch() -> float:
+            start = time.perf_counter()
+            await client.post(
+                "/anonymize/batch",
+                json={"traces": [{"data": data} for data in statements]},
+            )
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        singles = [
+            asyncio.create_task(timed_single(due=start + i * REQUEST_INTERVAL))
+            for i in range(requests)
+        ]
+        batch_time = await timed_batch()
+        return list(await asyncio.gather(*singles)), batch_time
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    anonymizer = Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            RemoveFieldsStrategy(),
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+            Ipv6DetectionStrategy(),
+            GeoLocationDetectionStrategy(),
+        ],
+        logger=LoguruLogger(level=LogLevel.WARNING),
+    )
+    statements = [json.loads(line) for line in batch(duplicate_share=0.0).splitlines()]
+    start = time.perf_counter()
+    anonymizer.anonymize_batch(
+        traces=[Trace.model_validate({"data": data}) for data in statements],
+    )
+    requests = int((time.perf_counter() - start) / REQUEST_INTERVAL)
+    rows = []
+    for time_slice in TIME_SLICES:
+        app = build_app(anonymizer=anonymizer, time_slice=time_slice)
+        latencies, batch_time = asyncio.run(
+            run(app=app, statements=statements, requests=requests),
+        )
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        rows.append(
+            (
+                f"{time_slice * 1000:g}" if time_slice else "off",
+                len(latencies),
+                percentiles[49] * 1000,
+                percentiles[98] * 1000,
+                max(latencies) * 1000,
+                batch_time * 1000,
+            ),
+        )
+    print_table(
+        headers=("slice ms", "requests", "p50 ms", "p99 ms", "max ms", "batch ms"),
+        rows=rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
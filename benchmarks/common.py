@@ -0,0 +1,52 @@
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, number: int = 1) -> float:
+    """
+    Measure the best execution time of a function.
+
+    :param func: The function to measure
+    :param repeat: Number of measurements, the best one is kept
+    :param number: Number of calls per measurement
+    :return: The best time of one call, in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+    """
+    Print rows as an aligned text table.
+
+    :param headers: Column titles
+    :param rows: Table rows, with one value per column
+    """
+    cells = [list(map(str, headers)), *([format_cell(v) for v in row] for row in rows)]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for index, row in enumerate(cells):
+        print(
+            "  ".join(
+                cell.rjust(width) for cell, width in zip(row, widths, strict=True)
+            ),
+        )
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
+
+
+def format_cell(value: Any) -> str:
+    """
+    Format a table cell, with a fixed precision for floats.
+
+    :param value: The value to format
+    :return: The formatted value
+    """
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
@@ -0,0 +1,359 @@
+import atexit
+import fcntl
+import hashlib
+import json
+import random
+import tempfile
+import threading
+from collections.abc import (
+    Hashable,
+    Iterable,
+    Iterator,
+    MutableMapping,
+    MutableSequence,
+)
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import StrEnum
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from logger import LoggableMixin, LoggerContract
+
+from src.trace_deidentifier.common.metrics import REGISTRY
+from src.trace_deidentifier.common.utils.utils_dict import WILDCARD
+
+ADAPTIVE_SCANS = REGISTRY.counter(
+    name="deidentifier_adaptive_scans_total",
+    description="Statements handled by adaptive targeting, by scan mode",
+    labels=("mode",),
+)
+ADAPTIVE_SKIPPED_FIELDS = REGISTRY.counter(
+    name="deidentifier_adaptive_skipped_fields_total",
+    description="String fields left out of detection by adaptive targeting",
+)
+ADAPTIVE_DISCOVERED_PATHS = REGISTRY.counter(
+    name="deidentifier_adaptive_discovered_paths_total",
+    description="Paths with detected values found by sampled full scans of learned shapes",
+)
+
+
+class ScanMode(StrEnum):
+    """Detection scope of a statement under adaptive targeting."""
+
+    FULL = "full"  # Every string field is scanned, and detected paths are learned
+    TARGETED = "targeted"  # Only the learned paths of the shape are scanned
+
+
+def iter_string_fields(
+    data: Any,
+    path: str = "",
+) -> Iterator[tuple[str, Any, Hashable]]:
+    """
+    Yield every string field of a JSON value, with its path.
+
+    :param data: The JSON value
+    :param path: Dotted path of the value, where list indices are written '*'
+    :return: An iterator over the path, the container and the key or index of each field
+    """
+    if isinstance(data, MutableMapping):
+        items = ((f"{path}.{key}" if path else str(key), key) for key in data)
+    elif isinstance(data, MutableSequence):
+        items = (
+            (f"{path}.{WILDCARD}" if path else WILDCARD, i) for i in range(len(data))
+        )
+    else:
+        return
+    for field_path, key in items:
+        value = data[key]
+        if isinstance(value, str):
+            yield field_path, data, key
+        else:
+            yield from iter_string_fields(value, path=field_path)
+
+
+def shape_of(paths: Iterable[str]) -> str:
+    """
+    Identify the shape of a statement from the paths of its string fields.
+
+    :param paths: Paths of the string fields, in any order
+    :return: A short digest of the set of paths
+    """
+    digest = hashlib.blake2b("\n".join(sorted(set(paths))).encode(), digest_size=8)
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class LearnedShape:
+    """
+    What adaptive targeting knows about a statement shape.
+
+    :param scans: Number of full scans of statements of this shape
+    :param paths: Paths where detection strategies ever changed a value
+    """
+
+    scans: int = 0
+    paths: set[str] = field(default_factory=set)
+
+
+class AdaptiveTargeting(LoggableMixin):
+    """
+    Learn, per statement shape, which string fields hold detected values.
+
+    The shape of a statement is the set of paths of its string fields, so any
+    statement with a field never seen in its shape is a new shape. Each shape is
+    fully scanned until it was seen `warmup` times, then only its learned paths
+    are scanned, except for a sample of statements that are still fully scanned
+    to find new paths. Learned state is shared by the threads of a process.
+
+    When a JSON file is given, the state is saved to it by a background thread,
+    every `save_interval` seconds once a path is learned or a shape starts being
+    targeted, and at exit, never while anonymizing. Several processes may share
+    the file: each save locks it, merges the state found in it, and writes a
+    temporary file of its own before replacing the file with it.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        warmup: int = 20,
+        state_file: Path | None = None,
+        save_interval: float = 5.0,
+        logger: LoggerContract | None = None,
+    ) -> None:
+        """
+        Initialize the learned state, loading it from its file if it exists.
+
+        :param sample_rate: Fraction of statements of learned shapes still fully scanned
+        :param warmup: Number of full scans of a shape before it is targeted
+        :param state_file: JSON file where the learned state is kept, defaults to memory only
+        :param save_interval: Time between saves of a changed state, in seconds
+        :param logger: LoggerContract instance reporting failed saves
+        """
+        self.sample_rate = sample_rate
+        self.warmup = warmup
+        self.state_file = state_file
+        self.save_interval = save_interval
+        self.shapes: dict[str, LearnedShape] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._random = random.Random()  # noqa: S311
+        self._changed = False
+        self._saver: threading.Thread | None = None
+        self._closed = threading.Event()
+        if logger is not None:
+            self.logger = logger
+        if state_file is not None:
+            self.shapes = self._load()
+
+    def plan(self, shape: str) -> frozenset[str] | None:
+        """
+        Decide which fields of a statement are scanned.
+
+        :param shape: The shape of the statement
+        :return: The paths to scan, or None to scan every field
+        """
+        with self._lock:
+            learned = self.shapes.get(shape)
+            if (
+                learned is None
+                or learned.scans < self.warmup
+                or self._random.random() < self.sample_rate
+            ):
+                return None
+            return frozenset(learned.paths)
+
+    def learn(self, shape: str, paths: Iterable[str]) -> set[str]:
+        """
+        Record the outcome of a full scan.
+
+        :param shape: The shape of the statement
+        :param paths: Paths where detection strategies changed a value
+        :return: The paths that were not known yet for this shape
+        """
+        with self._lock:
+            learned = self.shapes.setdefault(shape, LearnedShape())
+            learned.scans += 1
+            discovered = set(paths) - learned.paths
+            learned.paths |= discovered
+            if learned.scans > self.warmup and discovered:
+                ADAPTIVE_DISCOVERED_PATHS.inc(len(discovered))
+            if (discovered or learned.scans == self.warmup) and self.state_file:
+                self._changed = True
+                self._start_saver()
+        return discovered
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Get the learned state, e.g. for inspection.
+
+        :return: The number of full scans and the learned paths of each shape
+        """
+        with self._lock:
+            return {
+                shape: {"scans": learned.scans, "paths": sorted(learned.paths)}
+                for shape, learned in self.shapes.items()
+            }
+
+    def save(self) -> None:
+        """
+        Write the learned state to its file, if changed, merged with the file state.
+
+        Failures are logged, and the state is saved again at the next attempt.
+        """
+        if self.state_file is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._changed:
+                    return
+                self._changed = False
+            try:
+                with self._file_lock():
+                    saved = self._load()
+                    with self._lock:
+                        self._merge(saved)
+                        state = {
+                            shape: {
+                                "scans": learned.scans,
+                                "paths": sorted(learned.paths),
+                            }
+                            for shape, learned in self.shapes.items()
+                        }
+                    self._write(state)
+            except (OSError, ValueError, KeyError) as error:
+                with self._lock:
+                    self._changed = True
+                self.logger.warning(
+                    "Adaptive targeting state not saved",
+                    {"file": str(self.state_file), "error": str(error)},
+                )
+
+    def close(self) -> None:
+        """Stop the background saves, and save the learned state a last time."""
+        self._closed.set()
+        if self._saver is not None:
+            self._saver.join()
+        self.save()
+
+    def _start_saver(self) -> None:
+        """Start the thread saving the learned state, unless it runs already."""
+        if self._saver is not None:
+            return
+        self._saver = threading.Thread(
+            target=self._save_periodically,
+            name="adaptive-targeting-saver",
+            daemon=True,
+        )
+        self._saver.start()
+        atexit.register(self.save)
+
+    def _save_periodically(self) -> None:
+        """Save the learned state every save interval, until closed."""
+        while not self._closed.wait(self.save_interval):
+            self.save()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """
+        Hold the lock of the state file, shared by the processes saving to it.
+
+        :yield: Once the lock is held
+        """
+        with self.state_file.with_name(f"{self.state_file.name}.lock").open("a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self) -> dict[str, LearnedShape]:
+        """
+        Read the learned state saved in the file, if it can be read.
+
+        A file that cannot be read is logged and ignored, so learning starts over
+        and the file is replaced at the next save.
+
+        :return: The learned state of each shape, empty if the file is missing or
+            cannot be read
+        """
+        if not self.state_file.exists():
+            return {}
+        try:
+            return self._read()
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as error:
+            self.logger.warning(
+                "Adaptive targeting state not loaded",
+                {"file": str(self.state_file), "error": str(error)},
+            )
+            return {}
+
+    def _read(self) -> dict[str, LearnedShape]:
+        """
+        Read the learned state saved in the file.
+
+        :return: The learned state of each shape
+        """
+        return {
+            shape: LearnedShape(scans=entry["scans"], paths=set(entry["paths"]))
+            for shape, entry in json.loads(
+                self.state_file.read_text("utf-8"),
+            ).items()
+        }
+
+    def _merge(self, saved: dict[str, LearnedShape]) -> None:
+        """
+        Add the state saved by other processes to the learned state.
+
+        Paths are united, and the largest number of full scans is kept, since
+        every process reads the scans of the others back from the file.
+
+        :param saved: The learned state of each shape, as saved in the file
+        """
+        for shape, other in saved.items():
+            learned = self.shapes.setdefault(shape, LearnedShape())
+            learned.scans = max(learned.scans, other.scans)
+            learned.paths |= other.paths
+
+    def _write(self, state: dict[str, dict[str, Any]]) -> None:
+        """
+        Replace the file with the state at once, through a temporary file of this writer.
+
+        :param state: The number of full scans and the learned paths of each shape
+        """
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=self.state_file.parent,
+            prefix=f"{self.state_file.name}.",
+            suffix=".tmp",
+            delete=False,
+        ) as temporary:
+            json.dump(state, temporary)
+        try:
+            Path(temporary.name).replace(self.state_file)
+        except OSError:
+            Path(temporary.name).unlink(missing_ok=True)
+            raise
+
+
+@cache
+def load_targeting(
+    sample_rate: float,
+    state_file: Path | None,
+    logger: LoggerContract | None = None,
+) -> AdaptiveTargeting:
+    """
+    Create the learned state once per process, so every request shares it.
+
+    :param sample_rate: Fraction of statements of learned shapes still fully scanned
+    :param state_file: JSON file where the learned state is kept
+    :param logger: LoggerContract instance reporting failed saves
+    :return: The learned state
+    """
+    return AdaptiveTargeting(
+        sample_rate=sample_rate,
+        state_file=state_file,
+        logger=logger,
+    )
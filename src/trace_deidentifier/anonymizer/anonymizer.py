@@ -1,11 +1,63 @@
-from collections.abc import Sequence
+import hashlib
+import json
+from collections import Counter
+from collections.abc import Collection, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any
 
 from logger import LoggableMixin, LoggerContract
 
 from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.utils import utils_cow, utils_json
 
-from .exceptions import AnonymizationError
-from .strategies.base import BaseAnonymizationStrategy
+from .deadline import DEADLINE_EXCEEDED, Deadline, DeadlinePolicy, deadline_scope
+from .dedup import deduplicated
+from .document import TraceDocument
+from .exceptions import AnonymizationError, StatementRejectedError
+from .patch import PatchRecorder
+from .prescreen import PRESCREEN_TOTAL, Prescreen, PrescreenOutcome
+from .report import AnonymizationReport, report_scope
+from .strategies.base import BaseAnonymizationStrategy, logger_scope
+from .strategies.regex_detect import RegexDetectionStrategy
+
+
+@dataclass(slots=True)
+class _BatchItem:
+    """
+    State of a trace anonymized in a batch.
+
+    :param trace: The trace
+    :param raw: The JSON text the trace data was parsed from, if known
+    :param report: The report of the trace
+    :param deadline: The deadline of the trace, paused outside of its scope
+    :param errors: Errors of the strategies that failed on the trace
+    :param rejected: The error of the strategy that refused the trace, if any
+    """
+
+    trace: Trace
+    raw: str | bytes | None
+    report: AnonymizationReport
+    deadline: Deadline | None
+    errors: list[str] = field(default_factory=list)
+    rejected: StatementRejectedError | None = None
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        """
+        Make the report and deadline of the trace current, counting time against its deadline.
+
+        :yield: Nothing
+        """
+        if self.deadline is not None:
+            self.deadline.resume()
+        try:
+            with report_scope(self.report), deadline_scope(self.deadline):
+                yield
+        finally:
+            if self.deadline is not None:
+                self.deadline.pause()
 
 
 class Anonymizer(LoggableMixin):
@@ -15,6 +67,9 @@ class Anonymizer(LoggableMixin):
         self,
         strategies: Sequence[BaseAnonymizationStrategy],
         logger: LoggerContract,
+        deadline: float | None = None,
+        deadline_policy: DeadlinePolicy = DeadlinePolicy.REDACT,
+        prescreen: bool = False,
     ) -> None:
         """
         Initialize the anonymizer with a list of anonymization strategies.
@@ -23,34 +78,480 @@ class Anonymizer(LoggableMixin):
 
         :param strategies: List of anonymization strategies to apply
         :param logger: LoggerContract instance to use
+        :param deadline: Time budget of each trace, in seconds, defaults to no limit
+        :param deadline_policy: Fail-safe applied to a trace exceeding its deadline
+        :param prescreen: Whether to skip detection strategies for traces whose JSON
+            text has nothing they could match, when that text is provided
         :raises ValueError: If no strategies are provided
         """
         if not strategies:
             raise ValueError("At least one anonymization strategy must be provided")
         self.strategies = strategies
+        self._names = self._name_strategies(strategies)
+        self.deadline = deadline
+        self.deadline_policy = deadline_policy
+        self.prescreen = self._build_prescreen() if prescreen else None
 
         self.logger = logger
-        for strategy in self.strategies:
-            strategy.logger = self.logger
 
-    def anonymize(self, trace: Trace) -> None:
+    @staticmethod
+    def _name_strategies(
+        strategies: Sequence[BaseAnonymizationStrategy],
+    ) -> dict[int, str]:
+        """
+        Name each strategy after its class, numbering repeated classes from the second one.
+
+        :param strategies: The strategies, in order
+        :return: The name of each strategy, by strategy identity
+        """
+        counts: Counter[str] = Counter()
+        names = {}
+        for strategy in strategies:
+            name = type(strategy).__name__
+            counts[name] += 1
+            names[id(strategy)] = (
+                name if counts[name] == 1 else f"{name}#{counts[name]}"
+            )
+        return names
+
+    def _build_prescreen(self) -> Prescreen | None:
+        """
+        Gather the candidate patterns of the detection strategies into a prescreen.
+
+        :return: The prescreen, or None without detection strategies
+        """
+        detectors = [
+            s for s in self.strategies if isinstance(s, RegexDetectionStrategy)
+        ]
+        if not detectors:
+            return None
+        return Prescreen(
+            patterns=[c for detector in detectors for c in detector.candidates],
+            max_length=min(
+                (d.budget.max_length for d in detectors if d.budget),
+                default=None,
+            ),
+        )
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """
+        Get the fingerprint of the rule set, which changes with any rule of any strategy.
+
+        :return: The SHA-256 digest of the strategies and their rules, in hexadecimal
+        """
+        rules = [[type(s).__qualname__, s.describe_rules()] for s in self.strategies]
+        text = json.dumps(rules, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    @cached_property
+    def rules(self) -> dict[str, Any]:
+        """
+        Get the rules of each strategy, as JSON data, in order.
+
+        :return: The description of the rules of each strategy, by strategy name
+        """
+        return {
+            self._names[id(s)]: json.loads(json.dumps(s.describe_rules(), default=str))
+            for s in self.strategies
+        }
+
+    def may_affect(
+        self,
+        data: Any,
+        previous_rules: Mapping[str, Any],
+        applied: Collection[str],
+    ) -> bool:
+        """
+        Check whether the rule set could anonymize a trace unlike a previous one.
+
+        Each strategy whose rules changed is asked whether it could change the
+        trace differently, knowing whether its previous rules changed it. A
+        trace changed by a removed strategy, or anonymized in another order, is
+        always affected.
+
+        :param data: The trace data, as received
+        :param previous_rules: The rules of each strategy of the previous rule set,
+            as given by rules
+        :param applied: Names of the strategies of the previous rule set that
+            changed the trace
+        :return: True if the trace may give another output
         """
-        Apply all anonymization strategies to a trace.
+        rules = self.rules
+        if [n for n in previous_rules if n in rules] != [
+            n for n in rules if n in previous_rules
+        ]:
+            return True
+        if any(name in applied for name in previous_rules.keys() - rules.keys()):
+            return True
+        return any(
+            strategy.may_affect(
+                data=data,
+                previous=previous_rules.get(name),
+                applied=name in applied,
+            )
+            for strategy in self.strategies
+            if previous_rules.get(name := self._names[id(strategy)]) != rules[name]
+        )
+
+    def anonymize(
+        self,
+        trace: Trace,
+        raw: str | bytes | None = None,
+        patch: bool = False,
+    ) -> AnonymizationReport:
+        """
+        Apply all anonymization strategies to a trace, within its deadline.
 
         :param trace: The trace to anonymize
+        :param raw: The JSON text the trace data was parsed from, to prescreen it
+        :param patch: Whether to record the changes as a JSON Patch, in the report
+        :return: The report of what was done to the trace
+        :raises StatementRejectedError: If a strategy refuses the trace, remaining strategies are skipped
         :raises AnonymizationError: If any strategy fails to anonymize the trace
         """
-        errors = []
+        return self._process(
+            document=TraceDocument(trace=trace),
+            raw=raw,
+            detect_on_text=False,
+            patch=PatchRecorder(root=trace.data) if patch else None,
+        )
+
+    def anonymize_batch(
+        self,
+        traces: Sequence[Trace],
+        raws: Sequence[str | bytes | None] | None = None,
+        patch: bool = False,
+    ) -> list[AnonymizationReport | AnonymizationError]:
+        """
+        Apply all anonymization strategies to several traces, strategy by strategy.
+
+        Each strategy gets every trace still to process at once, so its setup and
+        logging happen once per batch, while each trace keeps its own report and
+        deadline, whose time budget only counts the time spent on it. Errors are
+        captured for each trace: a failing trace gets the error anonymize would
+        raise instead of its report, and the other traces are not affected.
+
+        :param traces: The traces to anonymize
+        :param raws: The JSON text each trace data was parsed from, to prescreen it
+        :param patch: Whether to record the changes as a JSON Patch, in the reports
+        :return: The report of each trace, or the error that stopped it: a
+            StatementRejectedError if a strategy refused it, or an
+            AnonymizationError if any strategy failed
+        """
+        items = [
+            _BatchItem(
+                trace=trace,
+                raw=raw,
+                report=AnonymizationReport(
+                    patch=PatchRecorder(root=trace.data) if patch else None,
+                ),
+                deadline=self._start_deadline(),
+            )
+            for trace, raw in zip(
+                traces,
+                raws if raws is not None else [None] * len(traces),
+                strict=True,
+            )
+        ]
+        for item in items:
+            if item.deadline is not None:
+                item.deadline.pause()
+
         for strategy in self.strategies:
+            live = [item for item in items if item.rejected is None]
+            pending = [
+                item
+                for item in live
+                if not self._prescreened_out(
+                    strategy=strategy,
+                    raw=item.raw,
+                    report=item.report,
+                )
+            ]
+            self.logger.info(
+                "Apply strategy",
+                {
+                    "strategy": type(strategy).__name__,
+                    "traces": len(pending),
+                    "skipped": len(live) - len(pending),
+                },
+            )
+            if not pending:
+                continue
+            changes = [item.report.changes for item in pending]
+            with logger_scope(self.logger):
+                errors = strategy.anonymize_batch(
+                    traces=[item.trace for item in pending],
+                    scope=lambda index, pending=pending: pending[index].scope(),
+                )
+            for item, before, error in zip(pending, changes, errors, strict=True):
+                if isinstance(error, StatementRejectedError):
+                    item.rejected = error
+                elif error is not None:
+                    item.errors.append(str(error))
+                if item.report.changes > before:
+                    item.report.applied.add(self._names[id(strategy)])
+
+        return [self._complete(item) for item in items]
+
+    def _complete(self, item: "_BatchItem") -> AnonymizationReport | AnonymizationError:
+        """
+        Complete the anonymization of a trace of a batch.
+
+        :param item: The trace, once every strategy was applied
+        :return: The report of the trace, or the error that stopped it
+        """
+        try:
+            if item.rejected is not None:
+                return item.rejected
+            if item.errors:
+                return AnonymizationError(
+                    f"Failed to anonymize trace: {'; '.join(item.errors)}",
+                )
+            for callback in item.report.on_complete:
+                callback()
+            return item.report
+        finally:
+            self._close_deadline(report=item.report, deadline=item.deadline)
+
+    def anonymize_copy(
+        self,
+        trace: Trace,
+        raw: str | bytes | None = None,
+    ) -> tuple[Trace, AnonymizationReport]:
+        """
+        Apply all anonymization strategies to a copy of a trace, leaving the trace as is.
+
+        Strategies work on a copy-on-write view of the trace data: only the
+        dictionaries and lists along changed paths are copied, and the anonymized
+        trace shares every unchanged part with the original one, so neither must
+        be modified afterwards.
+
+        :param trace: The trace to anonymize, left unchanged
+        :param raw: The JSON text the trace data was parsed from, to prescreen it
+        :return: The anonymized trace, and the report of what was done to it
+        :raises StatementRejectedError: If a strategy refuses the trace, remaining strategies are skipped
+        :raises AnonymizationError: If any strategy fails to anonymize the trace
+        """
+        view = utils_cow.wrap(trace.data)
+        report = self._process(
+            document=TraceDocument(trace=Trace.model_construct(data=view)),
+            raw=raw,
+            detect_on_text=False,
+        )
+        return Trace.model_construct(data=view.build()), report
+
+    def anonymize_json(self, text: str | bytes) -> str:
+        """
+        Apply all anonymization strategies to the JSON text of a trace's data.
+
+        Consecutive detection strategies work directly on the text, in a single pass,
+        and other strategies on the parsed data, so the text is only parsed or
+        serialized when switching from one kind of strategy to the other. The text
+        is not validated. This is an entry point for library users: it is about as
+        fast as anonymize on the parsed data, and the service and bulk command use
+        anonymize_batch instead.
+
+        Every string value is scanned on the text, so the result only matches that
+        of anonymize with the default detection targeting and without adaptive
+        targeting: fields given the skip policy are scanned too, and adaptive
+        targeting does a full scan.
+
+        :param text: The JSON text of the trace data
+        :return: The JSON text of the anonymized trace data
+        :raises StatementRejectedError: If a strategy refuses the trace, remaining strategies are skipped
+        :raises AnonymizationError: If any strategy fails to anonymize the trace
+        """
+        if isinstance(text, bytes):
+            text = text.decode()
+        document = TraceDocument(text=text)
+        self._process(document=document, raw=text, detect_on_text=True)
+        return document.text
+
+    def _process(
+        self,
+        document: TraceDocument,
+        raw: str | bytes | None,
+        *,
+        detect_on_text: bool,
+        patch: PatchRecorder | None = None,
+    ) -> AnonymizationReport:
+        """
+        Apply all anonymization strategies to a trace document, within its deadline.
+
+        :param document: The trace to anonymize
+        :param raw: The JSON text the trace data was parsed from, to prescreen it
+        :param detect_on_text: Whether detection strategies work on the JSON text
+        :param patch: Recorder of the changes made to the parsed trace, if requested
+        :return: The report of what was done to the trace
+        :raises StatementRejectedError: If a strategy refuses the trace, remaining strategies are skipped
+        :raises AnonymizationError: If any strategy fails to anonymize the trace
+        """
+        deadline = self._start_deadline()
+        report = AnonymizationReport(detection_on_text=detect_on_text, patch=patch)
+        try:
+            with (
+                logger_scope(self.logger),
+                report_scope(report),
+                deadline_scope(deadline),
+            ):
+                self._apply_strategies(
+                    document=document,
+                    raw=raw,
+                    report=report,
+                    detect_on_text=detect_on_text,
+                )
+            for callback in report.on_complete:
+                callback()
+        finally:
+            self._close_deadline(report=report, deadline=deadline)
+        return report
+
+    def _start_deadline(self) -> Deadline | None:
+        """
+        Start the deadline of a trace.
+
+        :return: The deadline, or None without time budget
+        """
+        if self.deadline is None:
+            return None
+        return Deadline(seconds=self.deadline, policy=self.deadline_policy)
+
+    def _close_deadline(
+        self,
+        report: AnonymizationReport,
+        deadline: Deadline | None,
+    ) -> None:
+        """
+        Record in the report of a trace whether its deadline was exceeded.
+
+        :param report: The report of the trace
+        :param deadline: The deadline of the trace, if any
+        """
+        if deadline is not None and deadline.exceeded:
+            report.deadline_exceeded = True
+            DEADLINE_EXCEEDED.inc(policy=deadline.policy)
+            self.logger.warning(
+                "Processing deadline exceeded",
+                {"deadline": self.deadline, "policy": deadline.policy},
+            )
+
+    def _apply_strategies(
+        self,
+        document: TraceDocument,
+        raw: str | bytes | None,
+        report: AnonymizationReport,
+        *,
+        detect_on_text: bool,
+    ) -> None:
+        """
+        Apply all anonymization strategies to a trace, in sequence.
+
+        :param document: The trace to anonymize
+        :param raw: The JSON text the trace data was parsed from, if known
+        :param report: The report of the trace
+        :param detect_on_text: Whether detection strategies work on the JSON text
+        :raises StatementRejectedError: If a strategy refuses the trace, remaining strategies are skipped
+        :raises AnonymizationError: If any strategy fails to anonymize the trace
+        """
+        errors = []
+        for strategies, on_text in self._steps(
+            raw=raw,
+            report=report,
+            detect_on_text=detect_on_text,
+        ):
+            changes = report.changes
+            text = document.text if on_text else None
             try:
                 self.logger.info(
                     "Apply strategy",
-                    {"strategy": type(strategy).__name__},
+                    {"strategy": ", ".join(type(s).__name__ for s in strategies)},
                 )
-                strategy.anonymize(trace=trace)
+                if on_text:
+                    document.text = utils_json.regex_replace_json(
+                        text=text,
+                        replacements=[
+                            (deduplicated(s.substituter), s.replacement)
+                            for s in strategies
+                        ],
+                    )
+                else:
+                    strategies[0].anonymize(trace=document.trace)
+            except StatementRejectedError:
+                raise
             except Exception as e:
                 errors.append(str(e))
                 continue
+            # Changes on the text are not counted, nor told apart by strategy
+            changed = (document.text != text) if on_text else report.changes > changes
+            if changed:
+                report.applied.update(self._names[id(s)] for s in strategies)
 
         if errors:
             raise AnonymizationError(f"Failed to anonymize trace: {'; '.join(errors)}")
+
+    def _steps(
+        self,
+        raw: str | bytes | None,
+        report: AnonymizationReport,
+        *,
+        detect_on_text: bool,
+    ) -> Iterator[tuple[list[BaseAnonymizationStrategy], bool]]:
+        """
+        Yield the strategies to apply, in order, skipping detection when prescreened.
+
+        Steps are yielded lazily, so the prescreen, run at the first detection
+        strategy, knows the values dropped by the strategies applied before it.
+        Consecutive detection strategies working on the JSON text are grouped into
+        a single step: each string value is then decoded once, and every strategy
+        is applied to it in order, which gives the same result as applying them
+        one after the other.
+
+        :param raw: The JSON text the trace data was parsed from, if known
+        :param report: The report of the trace
+        :param detect_on_text: Whether detection strategies work on the JSON text
+        :return: An iterator over the strategies of each step, and whether they work
+            on the JSON text
+        """
+        detectors: list[RegexDetectionStrategy] = []
+        for strategy in self.strategies:
+            if self._prescreened_out(strategy=strategy, raw=raw, report=report):
+                self.logger.debug(
+                    "Skip strategy, nothing to detect",
+                    {"strategy": type(strategy).__name__},
+                )
+                continue
+            if detect_on_text and isinstance(strategy, RegexDetectionStrategy):
+                detectors.append(strategy)
+                continue
+            if detectors:
+                yield detectors, True
+                detectors = []
+            yield [strategy], False
+        if detectors:
+            yield detectors, True
+
+    def _prescreened_out(
+        self,
+        strategy: BaseAnonymizationStrategy,
+        raw: str | bytes | None,
+        report: AnonymizationReport,
+    ) -> bool:
+        """
+        Check whether a strategy is skipped for a trace, as a detection strategy with nothing to detect.
+
+        The prescreen runs at the first detection strategy, so it knows the
+        values dropped by the strategies applied before it.
+
+        :param strategy: The strategy about to be applied
+        :param raw: The JSON text the trace data was parsed from, if known
+        :param report: The report of the trace
+        :return: True if the strategy must be skipped
+        """
+        if not isinstance(strategy, RegexDetectionStrategy):
+            return False
+        if report.prescreen is None and self.prescreen and raw is not None:
+            report.prescreen = self.prescreen.check(raw=raw, dropped=report.dropped)
+            PRESCREEN_TOTAL.inc(outcome=report.prescreen)
+        return report.prescreen == PrescreenOutcome.SKIPPED
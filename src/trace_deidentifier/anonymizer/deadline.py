@@ -0,0 +1,126 @@
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import StrEnum
+
+from src.trace_deidentifier.common.metrics import REGISTRY
+
+from .exceptions import DeadlineExceededError
+
+DEADLINE_EXCEEDED = REGISTRY.counter(
+    name="deidentifier_deadline_exceeded_total",
+    description="Statements whose processing deadline was exceeded",
+    labels=("policy",),
+)
+
+
+class DeadlinePolicy(StrEnum):
+    """Fail-safe applied once the processing deadline of a statement is exceeded."""
+
+    REDACT = "redact"  # Redact every string that was not scanned yet
+    REJECT = "reject"  # Refuse the whole statement
+
+
+class Deadline:
+    """
+    Time budget of a statement, checked cooperatively while it is processed.
+
+    Detection strategies check it before each string and between the windows of
+    long strings, so an exceeded deadline is noticed within one scan call. It can
+    be paused while other statements are processed, so only the time spent on
+    the statement counts.
+    """
+
+    def __init__(
+        self,
+        seconds: float,
+        policy: DeadlinePolicy = DeadlinePolicy.REDACT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Start the deadline.
+
+        :param seconds: Time budget, from now
+        :param policy: Fail-safe applied once the deadline is exceeded
+        :param clock: Monotonic clock, in seconds
+        """
+        self.seconds = seconds
+        self.policy = policy
+        self.clock = clock
+        self.expires_at = clock() + seconds
+        self.exceeded = False
+        self._paused_at: float | None = None
+
+    def pause(self) -> None:
+        """Stop counting time, until resumed."""
+        if self._paused_at is None:
+            self._paused_at = self.clock()
+
+    def resume(self) -> None:
+        """Count time again, postponing the expiry by the time spent paused."""
+        if self._paused_at is not None:
+            self.expires_at += self.clock() - self._paused_at
+            self._paused_at = None
+
+    def expired(self) -> bool:
+        """
+        Check whether the deadline is exceeded, once exceeded it stays so.
+
+        :return: True if the time budget is spent
+        """
+        if not self.exceeded and self.clock() >= self.expires_at:
+            self.exceeded = True
+        return self.exceeded
+
+    def check(self) -> None:
+        """
+        Raise if the deadline is exceeded.
+
+        :raises DeadlineExceededError: If the time budget is spent
+        """
+        if self.expired():
+            raise DeadlineExceededError(
+                f"Statement processing exceeded its deadline of {self.seconds}s",
+            )
+
+
+_current_deadline: ContextVar[Deadline | None] = ContextVar(
+    "current_deadline",
+    default=None,
+)
+
+
+def current_deadline() -> Deadline | None:
+    """
+    Get the deadline of the statement being processed.
+
+    :return: The deadline, or None outside of a deadline scope
+    """
+    return _current_deadline.get()
+
+
+def check_deadline() -> None:
+    """
+    Raise if the deadline of the statement being processed is exceeded.
+
+    :raises DeadlineExceededError: If the time budget is spent
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline | None) -> Iterator[Deadline | None]:
+    """
+    Make a deadline the current one for the duration of the block.
+
+    :param deadline: The deadline, or None for no limit
+    :yield: The deadline
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
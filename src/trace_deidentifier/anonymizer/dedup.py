@@ -0,0 +1,309 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from enum import StrEnum
+from typing import Any
+
+from src.trace_deidentifier.common.metrics import REGISTRY
+from src.trace_deidentifier.common.types import JsonType, Substituter
+from src.trace_deidentifier.common.utils import utils_json
+
+from .deadline import current_deadline
+
+DEDUP_TOTAL = REGISTRY.counter(
+    name="deidentifier_dedup_total",
+    description="Statements and detected strings of batches, by level and outcome",
+    labels=("level", "outcome"),
+)
+
+# Strings remembered for each statement of the window
+VALUES_PER_STATEMENT = 32
+
+
+class DedupLevel(StrEnum):
+    """Level at which batches are deduplicated."""
+
+    STATEMENT = "statement"  # Whole statements, anonymized once
+    VALUE = "value"  # Strings, scanned once by each detection strategy
+
+
+class DedupOutcome(StrEnum):
+    """Outcome of the lookup of a statement or a string in a batch."""
+
+    UNIQUE = "unique"  # Processed
+    DUPLICATE = "duplicate"  # Identical to one processed before, result reused
+
+
+@dataclass(slots=True)
+class DedupStats:
+    """
+    Counts of the statements and detected strings of a batch, and of their duplicates.
+
+    :param statements: Statements looked up
+    :param duplicate_statements: Statements identical to an earlier one of the window
+    :param values: Strings looked up by detection strategies
+    :param duplicate_values: Strings already scanned by the same strategy
+    """
+
+    statements: int = 0
+    duplicate_statements: int = 0
+    values: int = 0
+    duplicate_values: int = 0
+
+    @property
+    def statement_ratio(self) -> float:
+        """
+        Get the share of statements whose result was reused.
+
+        :return: The ratio, between 0 and 1
+        """
+        return self.duplicate_statements / self.statements if self.statements else 0.0
+
+    @property
+    def value_ratio(self) -> float:
+        """
+        Get the share of strings whose scan result was reused.
+
+        :return: The ratio, between 0 and 1
+        """
+        return self.duplicate_values / self.values if self.values else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class PendingResult:
+    """
+    Placeholder for the result of a statement anonymized along others, not known yet.
+
+    Statements anonymized together are all looked up before any is anonymized, so
+    a duplicate of an earlier statement of the same batch finds this placeholder,
+    and gets the result of that statement once the batch is anonymized.
+
+    :param index: Position of the statement in its batch
+    """
+
+    index: int
+
+
+class BatchDeduplicator:
+    """
+    Content-hash deduplication of the statements of a batch, and of their strings.
+
+    Bulk exports hold exact duplicate statements, from retries and replays, and
+    many repeated subtrees, such as activity definitions. A statement identical
+    to a recent one of the batch gets its result, without being anonymized again.
+    Fields are handled according to their path, so a repeated subtree still goes
+    through every strategy, but detection strategies, which do the most work,
+    scan each of its strings once per batch.
+
+    Memory is bounded by the window: the results of the last `window` distinct
+    statements are kept, and the scan results of up to `VALUES_PER_STATEMENT`
+    strings per statement of the window. Lookups are locked, so the threads
+    anonymizing the slices of a batch can share the deduplicator.
+    """
+
+    def __init__(self, window: int) -> None:
+        """
+        Initialize the deduplicator of a batch.
+
+        :param window: Number of distinct statements whose results are kept
+        """
+        self.window = window
+        self.stats = DedupStats()
+        self._statements: OrderedDict[str, Any] = OrderedDict()
+        self._values: OrderedDict[tuple[int, str, str], str] = OrderedDict()
+        self._substituters: dict[int, DeduplicatedSubstituter] = {}
+        self._published = DedupStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data: JsonType) -> str:
+        """
+        Get the content hash of a statement, the same for any order of its keys.
+
+        :param data: The statement data
+        :return: The SHA-256 digest of the canonical JSON text, in hexadecimal
+        """
+        return utils_json.content_hash(data)
+
+    def get(self, key: str) -> Any:
+        """
+        Get the result of an identical statement processed earlier in the window.
+
+        :param key: The content hash of the statement
+        :return: The result, or None if the statement is new
+        """
+        with self._lock:
+            self.stats.statements += 1
+            result = self._statements.get(key)
+            if result is not None:
+                self._statements.move_to_end(key)
+                self.stats.duplicate_statements += 1
+            return result
+
+    def put(self, key: str, result: Any) -> None:
+        """
+        Keep the result of a statement, for its duplicates, evicting the oldest one.
+
+        :param key: The content hash of the statement, as given before processing it
+        :param result: The result, never None
+        """
+        with self._lock:
+            self._statements[key] = result
+            if len(self._statements) > self.window:
+                self._statements.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        """
+        Forget the result of a statement, or its placeholder, when it must not be reused.
+
+        :param key: The content hash of the statement
+        """
+        with self._lock:
+            self._statements.pop(key, None)
+
+    def publish(self) -> None:
+        """Add the lookups made since the last call to the deduplication metrics."""
+        with self._lock:
+            stats, published = replace(self.stats), self._published
+            self._published = stats
+        for level, total, duplicates in (
+            (
+                DedupLevel.STATEMENT,
+                stats.statements - published.statements,
+                stats.duplicate_statements - published.duplicate_statements,
+            ),
+            (
+                DedupLevel.VALUE,
+                stats.values - published.values,
+                stats.duplicate_values - published.duplicate_values,
+            ),
+        ):
+            DEDUP_TOTAL.inc(
+                total - duplicates,
+                level=level,
+                outcome=DedupOutcome.UNIQUE,
+            )
+            DEDUP_TOTAL.inc(duplicates, level=level, outcome=DedupOutcome.DUPLICATE)
+
+    def substituter(self, substituter: Substituter) -> Substituter:
+        """
+        Get a substituter reusing the results of another within the batch.
+
+        :param substituter: The substituter of a detection strategy
+        :return: The deduplicated substituter, the same for a given substituter
+        """
+        with self._lock:
+            deduplicated = self._substituters.get(id(substituter))
+            if deduplicated is None:
+                deduplicated = DeduplicatedSubstituter(
+                    substituter=substituter,
+                    deduplicator=self,
+                )
+                self._substituters[id(substituter)] = deduplicated
+            return deduplicated
+
+    def scan(self, substituter: Substituter, repl: str, string: str) -> str:
+        """
+        Replace the matches of a substituter in a string, once per batch.
+
+        Results of strings redacted by an exceeded deadline are not kept, as they
+        do not hold for other statements. Threads scanning the same new string at
+        once may both scan it.
+
+        :param substituter: The substituter to apply
+        :param repl: Replacement string
+        :param string: The string to process
+        :return: The string with all matches replaced
+        """
+        key = (id(substituter), repl, string)
+        with self._lock:
+            self.stats.values += 1
+            result = self._values.get(key)
+            if result is not None:
+                self._values.move_to_end(key)
+                self.stats.duplicate_values += 1
+                return result
+        result = substituter.sub(repl=repl, string=string)
+        deadline = current_deadline()
+        if deadline is None or not deadline.exceeded:
+            with self._lock:
+                self._values[key] = result
+                if len(self._values) > self.window * VALUES_PER_STATEMENT:
+                    self._values.popitem(last=False)
+        return result
+
+
+class DeduplicatedSubstituter:
+    """Substituter scanning each string once per batch, reusing its earlier results."""
+
+    def __init__(
+        self,
+        substituter: Substituter,
+        deduplicator: BatchDeduplicator,
+    ) -> None:
+        """
+        Initialize the substituter.
+
+        :param substituter: The substituter to apply to new strings
+        :param deduplicator: The deduplicator of the batch, keeping the results
+        """
+        self.substituter = substituter
+        self.deduplicator = deduplicator
+
+    def sub(self, repl: str, string: str) -> str:
+        """
+        Replace all matches in a string, or reuse the result for an identical one.
+
+        :param repl: Replacement string
+        :param string: The string to process
+        :return: The string with all matches replaced
+        """
+        return self.deduplicator.scan(
+            substituter=self.substituter,
+            repl=repl,
+            string=string,
+        )
+
+
+_current_deduplicator: ContextVar[BatchDeduplicator | None] = ContextVar(
+    "current_deduplicator",
+    default=None,
+)
+
+
+def deduplicated(substituter: Substituter) -> Substituter:
+    """
+    Get the substituter to use for the batch being processed.
+
+    :param substituter: The substituter of a detection strategy
+    :return: The substituter deduplicated within the batch, or the substituter
+        itself outside of a batch
+    """
+    deduplicator = _current_deduplicator.get()
+    if deduplicator is None:
+        return substituter
+    return deduplicator.substituter(substituter)
+
+
+@contextmanager
+def dedup_scope(
+    deduplicator: BatchDeduplicator | None,
+) -> Iterator[BatchDeduplicator | None]:
+    """
+    Make a deduplicator the current one for the duration of the block.
+
+    Its lookups are added to the deduplication metrics at the end of the block.
+
+    :param deduplicator: The deduplicator of the batch, or None to disable it
+    :yield: The deduplicator
+    """
+    token = _current_deduplicator.set(deduplicator)
+    try:
+        yield deduplicator
+    finally:
+        _current_deduplicator.reset(token)
+        if deduplicator is not None:
+            deduplicator.publish()
@@ -0,0 +1,249 @@
+import json
+import re
+from collections.abc import Iterator, Mapping, MutableMapping, MutableSequence
+from dataclasses import dataclass
+from enum import StrEnum
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from src.trace_deidentifier.common.utils.utils_dict import WILDCARD
+
+
+class FieldPolicy(StrEnum):
+    """
+    Detection policy of a field of a trace.
+
+    Besides skip and scan, every policy names a strict format: a field following
+    its format is skipped, any other value is scanned.
+    """
+
+    SKIP = "skip"  # Never scanned, subtree included
+    SCAN = "scan"  # Always scanned
+    UUID = "uuid"
+    TIMESTAMP = "timestamp"  # ISO 8601 date and time
+    DURATION = "duration"  # ISO 8601 duration
+    VERSION = "version"  # xAPI version number
+    IRI = "iri"  # Hierarchical IRI on a named host
+
+
+# Formats of the check policies. None of them allows the characters every
+# detected value contains: '@' for emails, '°', whitespace or "{'" for
+# coordinates, several ':' for IPv6 addresses, and four dotted numbers for
+# IPv4 addresses. A value following one of them can hold nothing to detect.
+FIELD_FORMATS: dict[FieldPolicy, re.Pattern] = {
+    FieldPolicy.UUID: re.compile(
+        r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
+    ),
+    FieldPolicy.TIMESTAMP: re.compile(
+        r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{1,9})?(?:Z|[+-]\d{2}:\d{2})?",
+    ),
+    FieldPolicy.DURATION: re.compile(
+        r"P(?:\d+(?:\.\d+)?[YMWD])*(?:T(?:\d+(?:\.\d+)?[HMS])+)?",
+    ),
+    FieldPolicy.VERSION: re.compile(r"\d{1,3}\.\d{1,3}(?:\.\d{1,3})?"),
+    FieldPolicy.IRI: re.compile(
+        r"(?!.*\.\d{1,3}\.\d{1,3}\.\d)"
+        r"[a-zA-Z][a-zA-Z0-9+.-]*://[a-zA-Z][a-zA-Z0-9-]*(?:\.[a-zA-Z0-9-]+)*"
+        r"(?::\d{1,5})?(?:[/?#][^\s\"@:°{}\\]*)?",
+    ),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class DetectionSchema:
+    """
+    Declarative detection policies of the fields of a trace.
+
+    :param fields: Dotted paths of fields with their policy, where '*' matches any
+        dictionary key or list index. Fields without a policy are scanned.
+    """
+
+    fields: tuple[tuple[str, FieldPolicy], ...] = ()
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "DetectionSchema":
+        """
+        Build a schema from a mapping, e.g. a parsed JSON configuration.
+
+        :param data: Mapping of dotted paths to policy names
+        :return: The corresponding schema
+        :raises ValueError: If a policy is unknown
+        """
+        unknown = {str(policy) for policy in data.values()} - set(FieldPolicy)
+        if unknown:
+            raise ValueError(f"Unknown detection policies: {sorted(unknown)}")
+        return cls(
+            fields=tuple((path, FieldPolicy(policy)) for path, policy in data.items()),
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> "DetectionSchema":
+        """
+        Load a schema from a JSON file.
+
+        :param path: Path of the JSON file
+        :return: The corresponding schema
+        :raises TypeError: If the file content is not a JSON object
+        :raises ValueError: If a policy is unknown
+        """
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, Mapping):
+            raise TypeError("Detection schema file must contain a JSON object")
+        return cls.from_mapping(data)
+
+    def merge(self, other: "DetectionSchema") -> "DetectionSchema":
+        """
+        Combine two schemas.
+
+        :param other: Schema whose policies override those of this schema
+        :return: A new schema with the fields of both
+        """
+        return DetectionSchema(
+            fields=tuple({**dict(self.fields), **dict(other.fields)}.items()),
+        )
+
+
+class SchemaNode:
+    """
+    Compiled form of a DetectionSchema, as a tree of path segments.
+
+    Wildcard segments are merged into the named segments next to them when
+    compiling, so each field of a trace leads to a single node, and a policy set
+    on a named path takes precedence over one set through a wildcard.
+    """
+
+    __slots__ = ("children", "policy", "wildcard")
+
+    def __init__(self) -> None:
+        """Initialize an empty node."""
+        self.children: dict[str, SchemaNode] = {}
+        self.wildcard: SchemaNode | None = None
+        self.policy: FieldPolicy | None = None
+
+    @classmethod
+    def compile(cls, schema: DetectionSchema) -> "SchemaNode":
+        """
+        Compile a schema into a tree.
+
+        :param schema: The schema to compile
+        :return: The root node of the tree
+        """
+        root = cls()
+        for path, policy in schema.fields:
+            node = root
+            for key in path.split("."):
+                if key == WILDCARD:
+                    node.wildcard = node.wildcard or cls()
+                    node = node.wildcard
+                else:
+                    node = node.children.setdefault(key, cls())
+            node.policy = policy
+        _determinize(root)
+        return root
+
+    def child(self, key: str | int) -> "SchemaNode | None":
+        """
+        Get the node of a field of a value at this node.
+
+        :param key: The dictionary key or list index of the field
+        :return: The node, or None if no path goes through the field
+        """
+        return (
+            self.children.get(key, self.wildcard)
+            if isinstance(key, str)
+            else self.wildcard
+        )
+
+    def skips(self, value: Any) -> bool:
+        """
+        Check whether detection can leave the value of this node as is.
+
+        :param value: The value found at this node
+        :return: True if the value must not be scanned
+        """
+        if self.policy is None or self.policy == FieldPolicy.SCAN:
+            return False
+        if self.policy == FieldPolicy.SKIP:
+            return True
+        return (
+            isinstance(value, str)
+            and FIELD_FORMATS[self.policy].fullmatch(value) is not None
+        )
+
+    def iter_skipped(self, data: Any) -> Iterator[tuple[Any, str | int]]:
+        """
+        Yield the fields of a value at this node that detection can leave as is.
+
+        Only the fields on the paths of the schema are visited.
+
+        :param data: The value found at this node
+        :return: An iterator over the container and key or index of each field
+        """
+        if isinstance(data, MutableMapping):
+            if self.wildcard is not None:
+                fields = [(key, self.child(key)) for key in data]
+            else:
+                fields = [(k, node) for k, node in self.children.items() if k in data]
+        elif isinstance(data, MutableSequence) and self.wildcard is not None:
+            fields = [(i, self.wildcard) for i in range(len(data))]
+        else:
+            return
+        for key, node in fields:
+            value = data[key]
+            if node.skips(value):
+                yield data, key
+            else:
+                yield from node.iter_skipped(value)
+
+
+def _absorb(target: SchemaNode, source: SchemaNode) -> None:
+    """
+    Add the paths of a tree to another one, keeping the policies already set.
+
+    :param target: The tree to add paths to
+    :param source: The tree to add, left unchanged
+    """
+    if target.policy is None:
+        target.policy = source.policy
+    for key, child in source.children.items():
+        _absorb(target.children.setdefault(key, SchemaNode()), child)
+    if source.wildcard is not None:
+        target.wildcard = target.wildcard or SchemaNode()
+        _absorb(target.wildcard, source.wildcard)
+
+
+def _determinize(node: SchemaNode) -> None:
+    """
+    Merge the wildcard of each node of a tree into its named children.
+
+    :param node: The root node of the tree
+    """
+    for child in node.children.values():
+        if node.wildcard is not None:
+            _absorb(child, node.wildcard)
+        _determinize(child)
+    if node.wildcard is not None:
+        _determinize(node.wildcard)
+
+
+@cache
+def compile_schema(schema: DetectionSchema) -> SchemaNode:
+    """
+    Compile a schema once per process.
+
+    :param schema: Schema to compile
+    :return: The root node of the compiled tree
+    """
+    return SchemaNode.compile(schema)
+
+
+@cache
+def load_schema_file(path: Path) -> DetectionSchema:
+    """
+    Load a schema file once per process.
+
+    :param path: Path of the JSON file
+    :return: The loaded schema
+    """
+    return DetectionSchema.from_file(path)
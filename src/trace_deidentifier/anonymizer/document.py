@@ -0,0 +1,64 @@
+import json
+
+from src.trace_deidentifier.common.models.trace import Trace
+
+
+class TraceDocument:
+    """
+    Trace held either as parsed data or as JSON text, converted only when needed.
+
+    Strategies editing fixed fields work on the parsed trace, while detection
+    strategies can work on the text. Only one form is kept at a time: getting the
+    trace hands out a mutable object, which makes the text stale, and getting the
+    text is meant to be followed by setting the edited text.
+    """
+
+    def __init__(self, trace: Trace | None = None, text: str | None = None) -> None:
+        """
+        Initialize the document from one of its forms.
+
+        The text is not validated, as it is expected to come from a validated trace
+        or to be validated by the caller.
+
+        :param trace: The parsed trace
+        :param text: The JSON text of the trace data
+        :raises ValueError: If not exactly one form is provided
+        """
+        if (trace is None) == (text is None):
+            raise ValueError("Exactly one of trace and text must be provided")
+        self._trace = trace
+        self._text = text
+
+    @property
+    def trace(self) -> Trace:
+        """
+        Get the parsed trace, parsing the text if needed.
+
+        :return: The trace
+        """
+        if self._trace is None:
+            self._trace = Trace.model_construct(data=json.loads(self._text))
+            self._text = None
+        return self._trace
+
+    @property
+    def text(self) -> str:
+        """
+        Get the JSON text of the trace data, serializing the trace if needed.
+
+        :return: The JSON text
+        """
+        if self._text is None:
+            self._text = json.dumps(self._trace.data, ensure_ascii=False)
+            self._trace = None
+        return self._text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        """
+        Replace the JSON text of the trace data.
+
+        :param text: The new JSON text
+        """
+        self._text = text
+        self._trace = None
@@ -1,2 +1,14 @@
 class AnonymizationError(Exception):
     """Base exception for anonymization errors."""
+
+
+class StatementRejectedError(AnonymizationError):
+    """Exception raised when a statement is refused instead of being anonymized."""
+
+
+class ScanBudgetExceededError(StatementRejectedError):
+    """Exception raised when a string exceeds the scan budget and the policy is to reject the statement."""
+
+
+class DeadlineExceededError(StatementRejectedError):
+    """Exception raised when a statement exceeds its processing deadline."""
@@ -0,0 +1,171 @@
+import json
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from functools import cache, lru_cache
+from pathlib import Path
+from typing import Any
+
+# Key marking the end of a rule in a trie node, never clashes with a character
+_TERMINAL = ""
+
+type TrieNode = dict[str, TrieNode]
+
+
+@dataclass(frozen=True, slots=True)
+class ExtensionRules:
+    """
+    Declarative rules describing which extensions must be removed from a trace.
+
+    :param exact: Extension IRIs removed when they match exactly
+    :param suffixes: Extension IRIs removed when they end with one of these values
+    :param prefixes: Extension IRIs removed when they start with one of these values
+    :param paths: Dotted paths of the objects holding an 'extensions' field,
+        where '*' matches any dictionary key or list index
+    """
+
+    exact: frozenset[str] = field(default_factory=frozenset)
+    suffixes: frozenset[str] = field(default_factory=frozenset)
+    prefixes: frozenset[str] = field(default_factory=frozenset)
+    paths: tuple[str, ...] = ()
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "ExtensionRules":
+        """
+        Build rules from a mapping, e.g. a parsed JSON configuration.
+
+        :param data: Mapping with optional 'exact', 'suffixes', 'prefixes' and 'paths' lists
+        :return: The corresponding rules
+        :raises ValueError: If an unknown key is present
+        """
+        unknown = set(data) - {"exact", "suffixes", "prefixes", "paths"}
+        if unknown:
+            raise ValueError(f"Unknown extension rule keys: {sorted(unknown)}")
+        return cls(
+            exact=frozenset(data.get("exact", ())),
+            suffixes=frozenset(data.get("suffixes", ())),
+            prefixes=frozenset(data.get("prefixes", ())),
+            paths=tuple(data.get("paths", ())),
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> "ExtensionRules":
+        """
+        Load rules from a JSON file.
+
+        :param path: Path of the JSON file
+        :return: The corresponding rules
+        :raises TypeError: If the file content is not a JSON object
+        :raises ValueError: If the JSON object contains unknown keys
+        """
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, Mapping):
+            raise TypeError("Extension rules file must contain a JSON object")
+        return cls.from_mapping(data)
+
+    def merge(self, other: "ExtensionRules") -> "ExtensionRules":
+        """
+        Combine two rule sets.
+
+        :param other: Rules to add to this rule set
+        :return: A new rule set containing the rules and paths of both
+        """
+        return ExtensionRules(
+            exact=self.exact | other.exact,
+            suffixes=self.suffixes | other.suffixes,
+            prefixes=self.prefixes | other.prefixes,
+            paths=tuple(dict.fromkeys(self.paths + other.paths)),
+        )
+
+
+class ExtensionRuleIndex:
+    """
+    Compiled form of ExtensionRules answering "should this IRI be removed?".
+
+    Exact rules live in a hash set, prefix rules in a trie and suffix rules in a
+    trie of reversed suffixes, so a lookup walks the IRI at most once whatever
+    the number of rules. Decisions are memoized per IRI.
+    """
+
+    def __init__(self, rules: ExtensionRules, cache_size: int = 4096) -> None:
+        """
+        Compile the rules into lookup structures.
+
+        :param rules: Rules to compile
+        :param cache_size: Maximum number of memoized IRI decisions
+        """
+        self.rules = rules
+        self._exact = frozenset(rules.exact)
+        self._prefixes = self._build_trie(rules.prefixes)
+        self._suffixes = self._build_trie(suffix[::-1] for suffix in rules.suffixes)
+        self.matches = lru_cache(maxsize=cache_size)(self._evaluate)
+
+    @staticmethod
+    def _build_trie(words: Iterable[str]) -> TrieNode:
+        """
+        Build a character trie from a list of words, ignoring empty ones.
+
+        :param words: Words to insert
+        :return: The root node of the trie
+        """
+        root: TrieNode = {}
+        for word in words:
+            if not word:
+                continue
+            node = root
+            for char in word:
+                node = node.setdefault(char, {})
+            node[_TERMINAL] = {}
+        return root
+
+    @staticmethod
+    def _walk(root: TrieNode, chars: Iterable[str]) -> bool:
+        """
+        Check whether a sequence of characters starts with a word of the trie.
+
+        :param root: The root node of the trie
+        :param chars: Characters to walk through
+        :return: True if a complete word was found along the walk
+        """
+        node = root
+        for char in chars:
+            if _TERMINAL in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return _TERMINAL in node
+
+    def _evaluate(self, iri: str) -> bool:
+        """
+        Evaluate the rules against an IRI, without memoization.
+
+        :param iri: The extension IRI
+        :return: True if the extension should be removed
+        """
+        return (
+            iri in self._exact
+            or (bool(self._suffixes) and self._walk(self._suffixes, reversed(iri)))
+            or (bool(self._prefixes) and self._walk(self._prefixes, iri))
+        )
+
+
+@cache
+def compile_rules(rules: ExtensionRules) -> ExtensionRuleIndex:
+    """
+    Compile rules once per process, so every strategy instance shares the index and its cache.
+
+    :param rules: Rules to compile
+    :return: The compiled index
+    """
+    return ExtensionRuleIndex(rules=rules)
+
+
+@cache
+def load_rules_file(path: Path) -> ExtensionRules:
+    """
+    Load a rules file once per process.
+
+    :param path: Path of the JSON file
+    :return: The loaded rules
+    """
+    return ExtensionRules.from_file(path)
@@ -0,0 +1,102 @@
+from logger import LoggerContract
+
+from src.trace_deidentifier.infrastructure.config.contract import ConfigContract
+
+from .adaptive import AdaptiveTargeting, load_targeting
+from .anonymizer import Anonymizer
+from .detection_schema import load_schema_file
+from .extension_rules import load_rules_file
+from .scanners.budget import ScanBudget
+from .strategies.adaptive_targeting import AdaptiveTargetingStrategy
+from .strategies.detect_emails import EmailDetectionStrategy
+from .strategies.detect_geolocations import GeoLocationDetectionStrategy
+from .strategies.detect_ipsv4 import Ipv4DetectionStrategy
+from .strategies.detect_ipsv6 import Ipv6DetectionStrategy
+from .strategies.opaque_values import OpaqueValuesStrategy
+from .strategies.remove_fields import RemoveFieldsStrategy
+from .strategies.replace_values import ReplaceSensitiveValuesStrategy
+from .strategies.target_detection import DetectionTargetingStrategy
+
+
+def load_adaptive_targeting(
+    config: ConfigContract,
+    logger: LoggerContract | None = None,
+) -> AdaptiveTargeting | None:
+    """
+    Get the learned state of adaptive targeting, shared by the process.
+
+    :param config: The application configuration
+    :param logger: LoggerContract instance reporting failed saves of the state
+    :return: The learned state, or None if adaptive targeting is disabled
+    """
+    if not config.get_adaptive_targeting():
+        return None
+    return load_targeting(
+        sample_rate=config.get_adaptive_sample_rate(),
+        state_file=config.get_adaptive_state_file(),
+        logger=logger,
+    )
+
+
+def build_anonymizer(
+    config: ConfigContract,
+    logger: LoggerContract,
+    adaptive_targeting: AdaptiveTargeting | None = None,
+) -> Anonymizer:
+    """
+    Build the anonymizer with every strategy, as configured.
+
+    :param config: The application configuration
+    :param logger: LoggerContract instance to use
+    :param adaptive_targeting: The learned state of adaptive targeting, None if disabled
+    :return: A configured Anonymizer instance with all required strategies
+    """
+    extension_rules = RemoveFieldsStrategy.DEFAULT_RULES
+    if rules_file := config.get_extension_rules_file():
+        extension_rules = extension_rules.merge(load_rules_file(rules_file))
+
+    detection_schema = DetectionTargetingStrategy.DEFAULT_SCHEMA
+    if schema_file := config.get_detection_schema_file():
+        detection_schema = detection_schema.merge(load_schema_file(schema_file))
+
+    engine = config.get_detection_engine()
+    budget = None
+    if max_length := config.get_scan_max_length():
+        budget = ScanBudget(
+            max_length=max_length,
+            policy=config.get_scan_budget_policy(),
+        )
+    chunk_length = config.get_scan_chunk_length()
+
+    return Anonymizer(
+        strategies=[
+            ReplaceSensitiveValuesStrategy(),
+            RemoveFieldsStrategy(rules=extension_rules),
+            DetectionTargetingStrategy(schema=detection_schema),
+            OpaqueValuesStrategy(
+                policies=config.get_opaque_policies(),
+                min_length=config.get_opaque_min_length(),
+            ),
+            *(
+                [AdaptiveTargetingStrategy(targeting=adaptive_targeting)]
+                if adaptive_targeting
+                else []
+            ),
+            EmailDetectionStrategy(
+                engine=engine,
+                budget=budget,
+                chunk_length=chunk_length,
+            ),
+            Ipv4DetectionStrategy(budget=budget, chunk_length=chunk_length),
+            Ipv6DetectionStrategy(
+                engine=engine,
+                budget=budget,
+                chunk_length=chunk_length,
+            ),
+            GeoLocationDetectionStrategy(budget=budget, chunk_length=chunk_length),
+        ],
+        logger=logger,
+        deadline=config.get_processing_deadline(),
+        deadline_policy=config.get_deadline_policy(),
+        prescreen=config.get_detection_prescreen(),
+    )
@@ -0,0 +1,152 @@
+import hashlib
+import hmac
+import json
+from collections.abc import Mapping, MutableMapping
+from enum import StrEnum
+from typing import Any
+
+from src.trace_deidentifier.common.metrics import REGISTRY
+
+from .patch import PatchRecorder
+
+IDEMPOTENCY_MARKERS = REGISTRY.counter(
+    name="deidentifier_idempotency_markers_total",
+    description="Statements received with an idempotency marker, by outcome",
+    labels=("outcome",),
+)
+
+# Context extension holding the marker of anonymized statements
+MARKER_EXTENSION = "https://github.com/inokufu/trace-deidentifier/extensions/marker"
+
+
+class MarkerOutcome(StrEnum):
+    """Outcome of the check of the idempotency marker of a statement."""
+
+    VERIFIED = "verified"  # Returned untouched, without being anonymized again
+    MISMATCHED = "mismatched"  # Other rule set, or content changed since marked
+
+
+class IdempotencyMarker:
+    """
+    Integrity-protected marker of the rule set that anonymized a statement.
+
+    Statements are stamped with a context extension holding the fingerprint of
+    the rule set and an HMAC of the fingerprint and of the statement content.
+    A statement coming back with a valid marker of the same rule set was already
+    anonymized by it, and can be returned untouched. Without the secret key, a
+    marker cannot be forged nor moved to another statement.
+    """
+
+    def __init__(self, key: bytes, fingerprint: str) -> None:
+        """
+        Initialize the marker.
+
+        :param key: Secret key of the HMAC
+        :param fingerprint: Fingerprint of the rule set anonymizing statements
+        """
+        self.key = key
+        self.fingerprint = fingerprint
+
+    def _digest(self, data: Mapping[str, Any]) -> str:
+        """
+        Compute the HMAC of a statement, leaving its marker out.
+
+        :param data: The statement data
+        :return: The HMAC, in hexadecimal
+        """
+        content = json.dumps(
+            _canonical(data),
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        message = f"{self.fingerprint}\n{content}".encode()
+        return hmac.new(self.key, message, hashlib.sha256).hexdigest()
+
+    def verify(self, data: Mapping[str, Any]) -> bool:
+        """
+        Check whether a statement was already anonymized by the rule set.
+
+        :param data: The statement data
+        :return: True if the statement holds a valid marker of the rule set
+        """
+        marker = _find_marker(data)
+        if marker is None:
+            return False
+        valid = (
+            isinstance(marker, Mapping)
+            and marker.get("fingerprint") == self.fingerprint
+            and isinstance(marker.get("hmac"), str)
+            and hmac.compare_digest(marker["hmac"], self._digest(data))
+        )
+        IDEMPOTENCY_MARKERS.inc(
+            outcome=MarkerOutcome.VERIFIED if valid else MarkerOutcome.MISMATCHED,
+        )
+        return valid
+
+    def stamp(
+        self,
+        data: MutableMapping[str, Any],
+        patch: PatchRecorder | None = None,
+    ) -> None:
+        """
+        Add the marker of the rule set to an anonymized statement, replacing any other.
+
+        :param data: The anonymized statement data
+        :param patch: JSON Patch of the statement, to add the change to
+        """
+        marker = {"fingerprint": self.fingerprint, "hmac": self._digest(data)}
+        context = data.get("context")
+        if not isinstance(context, MutableMapping):
+            container, key = data, "context"
+            value = {"extensions": {MARKER_EXTENSION: marker}}
+        elif not isinstance(context.get("extensions"), MutableMapping):
+            container, key = context, "extensions"
+            value = {MARKER_EXTENSION: marker}
+        else:
+            container, key, value = context["extensions"], MARKER_EXTENSION, marker
+        if patch is not None:
+            patch.add(container=container, key=key, value=value)
+        container[key] = value
+
+
+def _find_marker(data: Mapping[str, Any]) -> Any:
+    """
+    Get the marker of a statement.
+
+    :param data: The statement data
+    :return: The marker, or None if the statement has none
+    """
+    context = data.get("context")
+    if not isinstance(context, Mapping):
+        return None
+    extensions = context.get("extensions")
+    if not isinstance(extensions, Mapping):
+        return None
+    return extensions.get(MARKER_EXTENSION)
+
+
+def _canonical(data: Mapping[str, Any]) -> Mapping[str, Any]:
+    """
+    Get the content of a statement covered by its marker, without copying it deeply.
+
+    The marker is left out, and so are an empty context and empty context
+    extensions, which stamping a statement may add.
+
+    :param data: The statement data
+    :return: The statement data without marker
+    """
+    context = data.get("context")
+    if not isinstance(context, Mapping):
+        return data
+    context = dict(context)
+    extensions = context.get("extensions")
+    if isinstance(extensions, Mapping):
+        extensions = {k: v for k, v in extensions.items() if k != MARKER_EXTENSION}
+        context["extensions"] = extensions
+        if not extensions:
+            del context["extensions"]
+    canonical = {k: v for k, v in data.items() if k != "context"}
+    if context:
+        canonical["context"] = context
+    return canonical
@@ -0,0 +1,68 @@
+import re
+from enum import StrEnum
+
+from src.trace_deidentifier.common.metrics import REGISTRY
+
+OPAQUE_VALUES = REGISTRY.counter(
+    name="deidentifier_opaque_values_total",
+    description="Long opaque strings found before detection, by kind and policy applied",
+    labels=("kind", "policy"),
+)
+
+
+class OpaqueKind(StrEnum):
+    """Kind of opaque payload a string can hold."""
+
+    HEX = "hex"
+    BASE64 = "base64"  # Standard or URL-safe, possibly in a data URI
+    BINARY = "binary"  # Mostly control characters, e.g. bytes decoded as text
+
+
+class OpaquePolicy(StrEnum):
+    """Treatment of an opaque string before detection."""
+
+    SCAN = "scan"  # Scanned as any other string
+    SKIP = "skip"  # Left as is, without being scanned
+    DROP = "drop"  # Removed from the trace
+    HASH = "hash"  # Replaced with its SHA-256 digest
+
+
+_HEX = re.compile(r"[0-9a-fA-F]+")
+
+# The optional data URI prefix cannot hold four dotted numbers, so that, like
+# the payload, it has none of the characters detected values are made of
+_BASE64 = re.compile(
+    r"(?:data:(?![^,]*\.\d{1,3}\.\d{1,3}\.\d)[\w.+/-]+(?:;[\w.+-]+=[\w.+-]+)*;base64,)?"
+    r"[A-Za-z0-9+/_-]+={0,2}",
+)
+
+# Control characters other than whitespace, and the replacement character of
+# undecodable bytes
+_BINARY = re.compile(r"[\x00-\x08\x0e-\x1f\x7f\ufffd]")
+
+# Characters looked at to tell binary-like strings, and the fraction of them
+# that must be binary
+BINARY_SAMPLE = 4096
+BINARY_RATIO = 0.1
+
+
+def classify(value: str) -> OpaqueKind | None:
+    """
+    Tell whether a string holds an opaque payload rather than text.
+
+    Hex and base64 strings are recognized as a whole, and contain none of '@',
+    ':', '.', whitespace or '°', so detection strategies could find nothing in
+    them. Binary-like strings are recognized on their first characters only,
+    and may still contain text.
+
+    :param value: The string to classify
+    :return: The kind of payload, or None for text
+    """
+    if _HEX.fullmatch(value):
+        return OpaqueKind.HEX
+    if _BASE64.fullmatch(value):
+        return OpaqueKind.BASE64
+    sample = value[:BINARY_SAMPLE]
+    if sample and len(_BINARY.findall(sample)) >= len(sample) * BINARY_RATIO:
+        return OpaqueKind.BINARY
+    return None
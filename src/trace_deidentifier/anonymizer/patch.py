@@ -0,0 +1,152 @@
+from collections.abc import Hashable, Mapping, MutableSequence
+from typing import Any
+
+
+def escape_pointer_token(key: Hashable) -> str:
+    """
+    Escape a dictionary key or list index as a JSON Pointer reference token.
+
+    See RFC 6901, section 4: '~' is written '~0' and '/' is written '~1'.
+
+    :param key: The key or index
+    :return: The escaped token
+    """
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+class PatchRecorder:
+    """
+    RFC 6902 JSON Patch of the changes made to a trace, recorded as they are made.
+
+    Strategies tell the recorder the container and key of each field they replace
+    or remove, and the recorder turns it into an operation on the path of the
+    field at that time, so applying the operations in order to the original
+    trace data gives the anonymized one. Containers are located through an index
+    of the parent of each container, built on the first change, and kept up to
+    date when list items are removed.
+
+    A field that cannot be located leaves the patch incomplete: it is then
+    replaced by a single operation replacing the whole document.
+    """
+
+    def __init__(self, root: Any) -> None:
+        """
+        Initialize the recorder.
+
+        :param root: The trace data the changes are made to
+        """
+        self.root = root
+        self.complete = True
+        self._operations: list[dict[str, Any]] = []
+        # Identity of each container, to the container, its parent and its key
+        self._parents: dict[int, tuple[Any, Any, Hashable]] | None = None
+        # Replacements since the last removal, to update rather than repeat
+        self._replaced: dict[tuple[int, Hashable], dict[str, Any]] = {}
+
+    @property
+    def operations(self) -> list[dict[str, Any]]:
+        """
+        Get the operations recorded so far.
+
+        :return: The JSON Patch operations, in order
+        """
+        if not self.complete:
+            return [{"op": "replace", "path": "", "value": self.root}]
+        return self._operations
+
+    def replace(self, container: Any, key: Hashable, value: Any) -> None:
+        """
+        Record that a field was given a new value.
+
+        :param container: The dictionary or list holding the field
+        :param key: The key or index of the field
+        :param value: The new value
+        """
+        operation = self._replaced.get((id(container), key))
+        if operation is not None:
+            operation["value"] = value
+            return
+        path = self._pointer(container=container, key=key)
+        if path is not None:
+            operation = {"op": "replace", "path": path, "value": value}
+            self._operations.append(operation)
+            self._replaced[id(container), key] = operation
+
+    def add(self, container: Any, key: Hashable, value: Any) -> None:
+        """
+        Record that a dictionary key is set, possibly a new one, before it is set.
+
+        :param container: The dictionary the key is set in
+        :param key: The key
+        :param value: The value of the key
+        """
+        path = self._pointer(container=container, key=key)
+        if path is not None:
+            self._operations.append({"op": "add", "path": path, "value": value})
+            self._replaced.clear()
+
+    def remove(self, container: Any, key: Hashable) -> None:
+        """
+        Record that a field was removed, once it is removed.
+
+        :param container: The dictionary or list that held the field
+        :param key: The key or index the field had
+        """
+        path = self._pointer(container=container, key=key)
+        if path is None:
+            return
+        self._operations.append({"op": "remove", "path": path})
+        self._replaced.clear()
+        if isinstance(container, MutableSequence) and self._parents is not None:
+            # Items after the removed one moved back by one index
+            for index in range(key, len(container)):
+                item = container[index]
+                if id(item) in self._parents:
+                    self._parents[id(item)] = (item, container, index)
+
+    def _pointer(self, container: Any, key: Hashable) -> str | None:
+        """
+        Get the JSON Pointer of a field, marking the patch incomplete if it is unknown.
+
+        :param container: The dictionary or list holding the field
+        :param key: The key or index of the field
+        :return: The JSON Pointer, or None if the patch is incomplete
+        """
+        if not self.complete:
+            return None
+        if self._parents is None:
+            self._parents = _index_containers(self.root)
+        tokens = [escape_pointer_token(key)]
+        while container is not self.root:
+            entry = self._parents.get(id(container))
+            if entry is None or entry[0] is not container:
+                self.complete = False
+                return None
+            _, container, key = entry
+            tokens.append(escape_pointer_token(key))
+        return "/" + "/".join(reversed(tokens))
+
+
+def _index_containers(root: Any) -> dict[int, tuple[Any, Any, Hashable]]:
+    """
+    Index the parent of every container nested in a value.
+
+    :param root: The value to index
+    :return: The identity of each nested container, to the container, its parent
+        and its key or index in the parent
+    """
+    parents = {}
+    stack = [root]
+    while stack:
+        container = stack.pop()
+        if isinstance(container, Mapping):
+            items = container.items()
+        elif isinstance(container, MutableSequence):
+            items = enumerate(container)
+        else:
+            continue
+        for key, value in items:
+            if isinstance(value, Mapping | MutableSequence):
+                parents[id(value)] = (value, container, key)
+                stack.append(value)
+    return parents
@@ -0,0 +1,108 @@
+import re
+from collections.abc import Iterable, Sequence
+from enum import StrEnum
+from typing import Any
+
+from src.trace_deidentifier.common.metrics import REGISTRY
+from src.trace_deidentifier.common.utils import utils_dict
+
+PRESCREEN_TOTAL = REGISTRY.counter(
+    name="deidentifier_prescreen_total",
+    description="Statements checked by the detection prescreen, by outcome",
+    labels=("outcome",),
+)
+
+# Closing quote of an object key
+_KEY_END = re.compile(r'"\s*:')
+
+
+class PrescreenOutcome(StrEnum):
+    """Outcome of the detection prescreen of a statement."""
+
+    SKIPPED = "skipped"  # No string value can match, detection is skipped
+    SCANNED = "scanned"  # A string value may match, detection runs
+    UNSUPPORTED = "unsupported"  # The statement cannot be prescreened, detection runs
+
+
+class Prescreen:
+    """
+    Check the serialized statement once for anything detection patterns could match.
+
+    Candidate patterns, one of which matches within every detected value, are run
+    over the JSON text of the statement, without parsing it again. Values
+    replaced or removed before detection are discounted: when every candidate
+    found belongs to them, no remaining value can match and detection can be
+    skipped.
+
+    String values appear verbatim between double quotes as long as the text has
+    no escape sequence, so a candidate, which cannot match a double quote, is
+    found in the whole text exactly as in each string on its own. Statements
+    with escape sequences are not prescreened.
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[re.Pattern],
+        max_length: int | None = None,
+    ) -> None:
+        """
+        Initialize the prescreen.
+
+        :param patterns: Candidate patterns of the detection strategies that may be skipped
+        :param max_length: Longest run of characters between double quotes that is
+            prescreened, statements with a longer one are not prescreened.
+            Defaults to no limit.
+        """
+        self.patterns = list(patterns)
+        self.max_length = max_length
+
+    def check(self, raw: str | bytes, dropped: Sequence[Any]) -> PrescreenOutcome:
+        """
+        Check whether detection can be skipped for a statement.
+
+        :param raw: The JSON text the statement was parsed from
+        :param dropped: Values of the statement replaced or removed since it was parsed
+        :return: The outcome of the prescreen
+        """
+        text = raw.decode() if isinstance(raw, bytes) else raw
+        if "\\" in text:
+            return PrescreenOutcome.UNSUPPORTED
+        strings = list(utils_dict.iter_strings(dropped))
+        if self.max_length is not None and (
+            max(map(len, text.split('"'))) > self.max_length
+            or any(len(string) > self.max_length for string in strings)
+        ):
+            return PrescreenOutcome.UNSUPPORTED
+
+        for pattern in self.patterns:
+            allowance = sum(len(pattern.findall(string)) for string in strings)
+            if self._count_in_values(pattern, text, limit=allowance) != allowance:
+                return PrescreenOutcome.SCANNED
+        return PrescreenOutcome.SKIPPED
+
+    @staticmethod
+    def _count_in_values(pattern: re.Pattern, text: str, limit: int) -> int:
+        """
+        Count the matches of a candidate pattern inside the string values of a JSON text.
+
+        :param pattern: The candidate pattern
+        :param text: The JSON text, without escape sequences
+        :param limit: Count above which counting stops
+        :return: The number of matches in string values, at most limit + 1
+        """
+        found = 0
+        quotes = 0
+        position = 0
+        for match in pattern.finditer(text):
+            quotes += text.count('"', position, match.start())
+            position = match.start()
+            if quotes % 2 == 0:
+                # Outside of strings, e.g. in numbers
+                continue
+            if _KEY_END.match(text, text.find('"', position)):
+                # Keys are not scanned by detection strategies
+                continue
+            found += 1
+            if found > limit:
+                break
+        return found
@@ -0,0 +1,191 @@
+from collections.abc import Callable, Hashable, Iterator
+from collections.abc import Set as AbstractSet
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from .patch import PatchRecorder
+from .prescreen import PrescreenOutcome
+
+
+@dataclass(slots=True)
+class AnonymizationReport:
+    """
+    Record of what the anonymization of a trace did.
+
+    Strategies editing fixed fields record the values they replace or remove,
+    so the detection prescreen can tell them apart from the values that remain,
+    and the fields they write, which detection strategies leave as is.
+    Detection strategies record the fields they change, when working on the
+    parsed trace only. Every change is also added to the JSON Patch of the trace,
+    when one is requested.
+
+    :param dropped: Values replaced or removed from the trace, in order
+    :param clean: Fields left as is by detection strategies, as the identity of
+        their container and their key
+    :param detected: Fields changed by detection strategies, as the identity of
+        their container and their key
+    :param changed: Whether a replaced or removed value altered the trace
+    :param changes: Number of values replaced, removed or changed by detection
+    :param applied: Names of the strategies that changed the trace, as given by
+        the anonymizer
+    :param prescreen: Outcome of the detection prescreen, None if it did not run
+    :param detection_on_text: Whether detection strategies work on the JSON text,
+        where neither clean nor detected fields are tracked
+    :param on_complete: Callbacks run once every strategy was applied without error
+    :param patch: JSON Patch of the changes made to the parsed trace, None if
+        not requested
+    :param deadline_exceeded: Whether the processing deadline was exceeded, so the
+        result only holds for this run
+    :param targeted: Whether detection only scanned the fields learned for the
+        shape of the trace, so the result only holds for this run
+    """
+
+    dropped: list[Any] = field(default_factory=list)
+    clean: set[tuple[int, Hashable]] = field(default_factory=set)
+    detected: set[tuple[int, Hashable]] = field(default_factory=set)
+    changed: bool = False
+    changes: int = 0
+    applied: set[str] = field(default_factory=set)
+    prescreen: PrescreenOutcome | None = None
+    detection_on_text: bool = False
+    on_complete: list[Callable[[], None]] = field(default_factory=list)
+    patch: PatchRecorder | None = None
+    deadline_exceeded: bool = False
+    targeted: bool = False
+
+    @property
+    def detection_skipped(self) -> bool:
+        """
+        Check whether detection strategies were skipped by the prescreen.
+
+        :return: True if no detection strategy ran
+        """
+        return self.prescreen == PrescreenOutcome.SKIPPED
+
+    @property
+    def final(self) -> bool:
+        """
+        Check whether the result holds for the rule set, so it can be reused.
+
+        :return: True if the deadline was met and detection scanned every field
+        """
+        return not self.deadline_exceeded and not self.targeted
+
+    @property
+    def unchanged(self) -> bool:
+        """
+        Check whether the trace is exactly as it was received.
+
+        :return: True if nothing was altered and detection was skipped
+        """
+        return not self.changed and self.detection_skipped
+
+
+_current_report: ContextVar[AnonymizationReport | None] = ContextVar(
+    "current_report",
+    default=None,
+)
+
+
+def current_report() -> AnonymizationReport | None:
+    """
+    Get the report of the trace being anonymized.
+
+    :return: The report, or None outside of a report scope
+    """
+    return _current_report.get()
+
+
+@contextmanager
+def report_scope(report: AnonymizationReport) -> Iterator[AnonymizationReport]:
+    """
+    Make a report the current one for the duration of the block.
+
+    :param report: The report of the trace being anonymized
+    :yield: The report
+    """
+    token = _current_report.set(report)
+    try:
+        yield report
+    finally:
+        _current_report.reset(token)
+
+
+def record_replaced(old: Any, new: Any, container: Any, key: Hashable) -> None:
+    """
+    Record that a value of the trace being anonymized was overwritten.
+
+    :param old: The value before replacement
+    :param new: The replacement value
+    :param container: The dictionary or list holding the value
+    :param key: The key or index of the value
+    """
+    report = _current_report.get()
+    if report is not None:
+        report.dropped.append(old)
+        if old == new:
+            return
+        report.changed = True
+        report.changes += 1
+        if report.patch is not None:
+            report.patch.replace(container=container, key=key, value=new)
+
+
+def record_removed(value: Any, container: Any, key: Hashable) -> None:
+    """
+    Record that a value was removed from the trace being anonymized, once removed.
+
+    :param value: The removed value
+    :param container: The dictionary or list that held the value
+    :param key: The key or index the value had
+    """
+    report = _current_report.get()
+    if report is not None:
+        report.dropped.append(value)
+        report.changed = True
+        report.changes += 1
+        if report.patch is not None:
+            report.patch.remove(container=container, key=key)
+
+
+def record_clean(container: Any, key: Hashable) -> None:
+    """
+    Record that a field of the trace being anonymized holds a known-safe value.
+
+    The field is identified by its container, which must stay alive while the
+    trace is anonymized, so detection strategies can skip it.
+
+    :param container: The dictionary or list holding the field
+    :param key: The key or index of the field
+    """
+    report = _current_report.get()
+    if report is not None:
+        report.clean.add((id(container), key))
+
+
+def clean_fields() -> AbstractSet[tuple[int, Hashable]]:
+    """
+    Get the fields of the trace being anonymized that hold known-safe values.
+
+    :return: The fields, as the identity of their container and their key,
+        empty outside of a report scope
+    """
+    report = _current_report.get()
+    return report.clean if report is not None else frozenset()
+
+
+def record_detected(container: Any, key: Hashable) -> None:
+    """
+    Record that a detection strategy changed a field of the trace being anonymized.
+
+    :param container: The dictionary or list holding the field
+    :param key: The key or index of the field
+    """
+    report = _current_report.get()
+    if report is not None:
+        report.detected.add((id(container), key))
+        report.changes += 1
+        if report.patch is not None:
+            report.patch.replace(container=container, key=key, value=container[key])
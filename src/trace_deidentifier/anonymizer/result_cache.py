@@ -0,0 +1,302 @@
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from enum import StrEnum
+from functools import cache
+from pathlib import Path
+
+from src.trace_deidentifier.common.metrics import REGISTRY
+from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.utils import utils_json
+
+from .anonymizer import Anonymizer
+from .exceptions import AnonymizationError
+from .report import AnonymizationReport
+
+RESULT_CACHE_LOOKUPS = REGISTRY.counter(
+    name="deidentifier_result_cache_total",
+    description="Lookups of statements in the persistent result cache, by outcome",
+    labels=("outcome",),
+)
+
+# Share of the maximum size left once entries are evicted, so eviction does not
+# run again on the next insertion
+EVICTION_TARGET = 0.9
+
+# Age of the last use of an output from which a hit records its use again, so
+# that reading outputs back does not write to the file on every statement
+USE_RESOLUTION_NS = 60 * 10**9
+
+# Uses recorded in a single transaction, rather than one write per hit
+USE_BATCH_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    output TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (key, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+
+class CacheOutcome(StrEnum):
+    """Outcome of the lookup of a statement in the result cache."""
+
+    HIT = "hit"  # Anonymized output reused
+    MISS = "miss"  # Statement anonymized, and its output stored
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """
+    Counts of the lookups of a result cache, since it was opened.
+
+    :param hits: Lookups that found the anonymized output
+    :param misses: Lookups that found nothing
+    :param evicted: Entries removed to stay within the maximum size
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evicted: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Get the share of lookups that found the anonymized output.
+
+        :return: The rate, between 0 and 1
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    Persistent cache of anonymized statements, kept in a SQLite file.
+
+    Entries map the content hash of a statement and the fingerprint of a rule
+    set to the JSON text of the statement anonymized by that rule set, so a rule
+    change never gives a stale output, and reprocessing unchanged statements
+    comes down to reading them. Outputs of statements whose processing deadline
+    was exceeded are not stored. Once the outputs exceed the maximum size, the
+    least recently used ones are evicted. The last use of an output is only
+    recorded to the minute, by batches of hits, so reading outputs back seldom
+    writes. The file may be shared by the worker processes of the service and
+    the bulk command.
+    """
+
+    def __init__(self, path: Path, max_size: int) -> None:
+        """
+        Open the cache, creating its file if needed.
+
+        :param path: The SQLite file of the cache
+        :param max_size: Maximum size of the stored outputs, in bytes
+        """
+        self.path = path
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._uses: dict[tuple[str, str], int] = {}
+        self._connection = sqlite3.connect(
+            path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._size = self._stored_size()
+
+    def _stored_size(self) -> int:
+        """
+        Get the size of the stored outputs, including those of other processes.
+
+        :return: The size, in bytes
+        """
+        (size,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results",
+        ).fetchone()
+        return size
+
+    def get(self, key: str, fingerprint: str) -> str | None:
+        """
+        Get the anonymized output of a statement.
+
+        :param key: The content hash of the statement
+        :param fingerprint: The fingerprint of the rule set anonymizing it
+        :return: The JSON text of the anonymized statement, or None if not stored
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT output, used FROM results WHERE key = ? AND fingerprint = ?",
+                (key, fingerprint),
+            ).fetchone()
+            if row is not None:
+                now = time.time_ns()
+                if now - row[1] >= USE_RESOLUTION_NS:
+                    self._uses[key, fingerprint] = now
+                    if len(self._uses) >= USE_BATCH_SIZE:
+                        self._record_uses()
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+        RESULT_CACHE_LOOKUPS.inc(
+            outcome=CacheOutcome.HIT if row is not None else CacheOutcome.MISS,
+        )
+        return row[0] if row is not None else None
+
+    def put(self, key: str, fingerprint: str, output: str) -> None:
+        """
+        Store the anonymized output of a statement, evicting older ones if needed.
+
+        An output already stored, by this process or another one, is kept as is,
+        since the same statement and rule set give the same output.
+
+        :param key: The content hash of the statement, before anonymization
+        :param fingerprint: The fingerprint of the rule set that anonymized it
+        :param output: The JSON text of the anonymized statement
+        """
+        size = len(output.encode())
+        with self._lock:
+            inserted = self._connection.execute(
+                "INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, fingerprint, output, size, time.time_ns()),
+            ).rowcount
+            if not inserted:
+                return
+            self._size += size
+            if self._size > self.max_size:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used outputs, down to the eviction target."""
+        self._record_uses()
+        self._size = self._stored_size()
+        excess = self._size - int(self.max_size * EVICTION_TARGET)
+        if excess <= 0:
+            return
+        rowids = []
+        for rowid, size in self._connection.execute(
+            "SELECT rowid, size FROM results ORDER BY used",
+        ):
+            if excess <= 0:
+                break
+            rowids.append((rowid,))
+            excess -= size
+            self._size -= size
+        self._connection.executemany("DELETE FROM results WHERE rowid = ?", rowids)
+        self.stats.evicted += len(rowids)
+
+    def _record_uses(self) -> None:
+        """Write the pending uses of outputs to the file, in a single transaction."""
+        if not self._uses:
+            return
+        self._connection.execute("BEGIN")
+        self._connection.executemany(
+            "UPDATE results SET used = ? WHERE key = ? AND fingerprint = ?",
+            [
+                (used, key, fingerprint)
+                for (key, fingerprint), used in self._uses.items()
+            ],
+        )
+        self._connection.execute("COMMIT")
+        self._uses.clear()
+
+    def anonymize(
+        self,
+        anonymizer: Anonymizer,
+        trace: Trace,
+        raw: str | bytes | None = None,
+    ) -> AnonymizationReport:
+        """
+        Anonymize a trace, or give it the stored output of the same statement.
+
+        :param anonymizer: The anonymizer, whose fingerprint identifies its rule set
+        :param trace: The trace to anonymize
+        :param raw: The JSON text the trace data was parsed from, to prescreen it
+        :return: The report of what was done to the trace, which only tells it was
+            changed when the stored output is reused
+        :raises StatementRejectedError: If a strategy refuses the trace
+        :raises AnonymizationError: If any strategy fails to anonymize the trace
+        """
+        key = utils_json.content_hash(trace.data)
+        output = self.get(key=key, fingerprint=anonymizer.fingerprint)
+        if output is not None:
+            trace.data = json.loads(output)
+            return AnonymizationReport(changed=True)
+        report = anonymizer.anonymize(trace=trace, raw=raw)
+        if report.final:
+            self.put(
+                key=key,
+                fingerprint=anonymizer.fingerprint,
+                output=utils_json.dump_compact(trace.data),
+            )
+        return report
+
+    def anonymize_batch(
+        self,
+        anonymizer: Anonymizer,
+        traces: Sequence[Trace],
+        raws: Sequence[str | bytes | None] | None = None,
+    ) -> list[AnonymizationReport | AnonymizationError]:
+        """
+        Anonymize several traces together, except those whose output is stored.
+
+        :param anonymizer: The anonymizer, whose fingerprint identifies its rule set
+        :param traces: The traces to anonymize
+        :param raws: The JSON text each trace data was parsed from, to prescreen it
+        :return: The report of each trace, which only tells it was changed when the
+            stored output is reused, or the error that stopped it
+        """
+        keys = [utils_json.content_hash(trace.data) for trace in traces]
+        results: list[AnonymizationReport | AnonymizationError | None] = [None] * len(
+            traces,
+        )
+        missed = []
+        for index, (trace, key) in enumerate(zip(traces, keys, strict=True)):
+            output = self.get(key=key, fingerprint=anonymizer.fingerprint)
+            if output is not None:
+                trace.data = json.loads(output)
+                results[index] = AnonymizationReport(changed=True)
+            else:
+                missed.append(index)
+        reports = anonymizer.anonymize_batch(
+            traces=[traces[index] for index in missed],
+            raws=[raws[index] for index in missed] if raws is not None else None,
+        )
+        for index, report in zip(missed, reports, strict=True):
+            results[index] = report
+            if isinstance(report, AnonymizationReport) and report.final:
+                self.put(
+                    key=keys[index],
+                    fingerprint=anonymizer.fingerprint,
+                    output=utils_json.dump_compact(traces[index].data),
+                )
+        return results
+
+    def close(self) -> None:
+        """Record the pending uses of outputs, and close the SQLite file."""
+        with self._lock:
+            self._record_uses()
+            self._connection.close()
+
+
+@cache
+def load_result_cache(path: Path, max_size: int) -> ResultCache:
+    """
+    Open the result cache once per process, so every request shares it.
+
+    :param path: The SQLite file of the cache
+    :param max_size: Maximum size of the stored outputs, in bytes
+    :return: The result cache
+    """
+    return ResultCache(path=path, max_size=max_size)
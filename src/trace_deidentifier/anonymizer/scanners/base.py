@@ -0,0 +1,99 @@
+import re
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from enum import StrEnum
+
+
+class DetectionEngine(StrEnum):
+    """Engine used by detection strategies to find sensitive values in strings."""
+
+    REGEX = "regex"
+    SCANNER = "scanner"
+
+
+class Scanner(ABC):
+    """
+    Matcher finding non-overlapping occurrences of a pattern in a string.
+
+    It exposes the subset of re.Pattern used by detection strategies, so a
+    regex and a hand-written scanner can be used interchangeably.
+    """
+
+    @abstractmethod
+    def spans(
+        self,
+        string: str,
+        pos: int = 0,
+        endpos: int | None = None,
+    ) -> Iterator[tuple[int, int]]:
+        """
+        Find the spans of all non-overlapping matches, from left to right.
+
+        As with re.Pattern.finditer, characters before pos are visible to
+        lookbehind checks, while the string is considered to end at endpos.
+
+        :param string: The string to scan
+        :param pos: Index where the search starts
+        :param endpos: Index where the search stops, defaults to the end of the string
+        :return: An iterator over (start, end) tuples
+        """
+        raise NotImplementedError
+
+    def sub(self, repl: str, string: str) -> str:
+        """
+        Replace all matches with a literal replacement.
+
+        :param repl: Replacement string
+        :param string: The string to process
+        :return: The string with all matches replaced
+        """
+        parts = []
+        last = 0
+        for start, end in self.spans(string):
+            parts.append(string[last:start])
+            parts.append(repl)
+            last = end
+        if not parts:
+            return string
+        parts.append(string[last:])
+        return "".join(parts)
+
+    def search(self, string: str) -> bool:
+        """
+        Check whether the string contains at least one match.
+
+        :param string: The string to scan
+        :return: True if a match was found
+        """
+        return next(self.spans(string), None) is not None
+
+
+class RegexScanner(Scanner):
+    """Scanner backed by a compiled regex."""
+
+    def __init__(self, pattern: re.Pattern) -> None:
+        """
+        Initialize the scanner with a compiled regex.
+
+        :param pattern: The compiled regex
+        """
+        self.pattern = pattern
+
+    def spans(
+        self,
+        string: str,
+        pos: int = 0,
+        endpos: int | None = None,
+    ) -> Iterator[tuple[int, int]]:
+        """Inherited from Scanner.spans."""
+        if endpos is None:
+            endpos = len(string)
+        return (match.span() for match in self.pattern.finditer(string, pos, endpos))
+
+    def sub(self, repl: str, string: str) -> str:
+        """Inherited from Scanner.sub."""
+        return self.pattern.sub(repl, string)
+
+    def search(self, string: str) -> bool:
+        """Inherited from Scanner.search."""
+        return self.pattern.search(string) is not None
@@ -0,0 +1,143 @@
+import operator
+from bisect import bisect_left
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import accumulate
+
+from src.trace_deidentifier.common.types import Substituter
+
+from .base import Scanner
+
+# Longest string scanned within a joined buffer. Longer strings are scanned one
+# by one, as the overhead of a call is small compared to their scan, see the
+# bench_joined benchmark.
+JOIN_MAX_LENGTH = 64
+
+
+def scan_joined(
+    scanner: Scanner,
+    strings: Sequence[str],
+    repl: str,
+    separator: str,
+) -> dict[str, str]:
+    """
+    Replace the matches of a scanner in many strings, scanning them in one call.
+
+    The strings are joined with a separator that no match can contain, and that
+    look-around checks of the pattern handle as the start or end of a string, so
+    each match of the joined buffer is a match of one string. Matches are mapped
+    back to their string from its offset in the buffer, and only strings with a
+    match are rebuilt. Strings holding the separator must not be given.
+
+    :param scanner: The scanner to apply
+    :param strings: The distinct strings to process
+    :param repl: Replacement string, inserted literally
+    :param separator: The separator of the strings
+    :return: The result of each string, by string
+    """
+    results = dict(zip(strings, strings, strict=True))
+    if not strings:
+        return results
+    joined = separator.join(strings)
+    # Index of the separator following each string, or of the end of the buffer
+    bounds = list(
+        map(
+            operator.add,
+            accumulate(map(len, strings)),
+            range(0, len(strings) * len(separator), len(separator)),
+        ),
+    )
+    spans: dict[int, list[tuple[int, int]]] = {}
+    for start, end in scanner.spans(joined):
+        index = bisect_left(bounds, start)
+        if end > bounds[index]:
+            # A match crossing the separator, which is then not suitable: the
+            # strings it covers are left to be scanned one by one
+            for crossed in range(index, bisect_left(bounds, end) + 1):
+                results.pop(strings[crossed], None)
+                spans.pop(crossed, None)
+            continue
+        offset = bounds[index] - len(strings[index])
+        spans.setdefault(index, []).append((start - offset, end - offset))
+    for index, string_spans in spans.items():
+        if strings[index] in results:
+            results[strings[index]] = _replace_spans(
+                string=strings[index],
+                spans=string_spans,
+                repl=repl,
+            )
+    return results
+
+
+def _replace_spans(string: str, spans: Sequence[tuple[int, int]], repl: str) -> str:
+    """
+    Replace spans of a string.
+
+    :param string: The string
+    :param spans: The spans to replace, from left to right, not overlapping
+    :param repl: Replacement string
+    :return: The string with its spans replaced
+    """
+    parts = []
+    last = 0
+    for start, end in spans:
+        parts.append(string[last:start])
+        parts.append(repl)
+        last = end
+    parts.append(string[last:])
+    return "".join(parts)
+
+
+class BatchSubstituter:
+    """
+    Substituter reusing the results of strings computed for a whole batch.
+
+    Within a batch scope, strings whose result was found beforehand, such as
+    those the prefilter cleared or those scanned within a joined buffer, get it
+    without being scanned. Other strings, and every string outside a scope, are
+    handed to the substituter.
+    """
+
+    def __init__(self, substituter: Substituter) -> None:
+        """
+        Initialize the substituter.
+
+        :param substituter: The substituter scanning strings one by one
+        """
+        self.substituter = substituter
+
+    def sub(self, repl: str, string: str) -> str:
+        """
+        Replace all matches in a string, or give its result found for the batch.
+
+        :param repl: Replacement string
+        :param string: The string to process
+        :return: The string with all matches replaced
+        """
+        batch = _current_batch.get()
+        if batch is not None and batch[0] is self:
+            result = batch[1].get(string)
+            if result is not None:
+                return result
+        return self.substituter.sub(repl=repl, string=string)
+
+    @contextmanager
+    def scope(self, results: Mapping[str, str]) -> Iterator[None]:
+        """
+        Make results found for a batch the current ones, for the duration of the block.
+
+        :param results: The result of strings of the batch, by string, all with
+            the replacement the substituter is called with
+        :yield: Nothing
+        """
+        token = _current_batch.set((self, results))
+        try:
+            yield
+        finally:
+            _current_batch.reset(token)
+
+
+_current_batch: ContextVar[tuple[BatchSubstituter, Mapping[str, str]] | None] = (
+    ContextVar("current_batch", default=None)
+)
@@ -0,0 +1,125 @@
+import re
+from dataclasses import dataclass
+from enum import StrEnum
+
+from src.trace_deidentifier.anonymizer.deadline import DeadlinePolicy, current_deadline
+from src.trace_deidentifier.anonymizer.exceptions import (
+    DeadlineExceededError,
+    ScanBudgetExceededError,
+)
+from src.trace_deidentifier.common.types import Substituter
+
+from .base import Scanner
+from .chunked import ChunkedScanner
+
+REDACTED = "[REDACTED]"
+
+
+class BudgetPolicy(StrEnum):
+    """Fallback applied to a string longer than the scan budget."""
+
+    REDACT = "redact"  # Replace the whole string, without scanning it
+    REJECT = "reject"  # Refuse the whole statement
+    CHUNK = "chunk"  # Scan the string in bounded windows
+
+
+@dataclass(frozen=True, slots=True)
+class ScanBudget:
+    """
+    Per-string limit on the work of a detection pattern.
+
+    A running regex cannot be interrupted, so the budget bounds the length of
+    the text handed to the pattern in one call, which bounds its worst-case time.
+
+    :param max_length: Longest string scanned in one call, in characters
+    :param policy: Fallback applied to longer strings
+    :param overlap: Characters scanned past each window with the chunk policy, for
+        patterns whose matches have no maximum length. Matches shorter than this
+        are never split.
+    """
+
+    max_length: int
+    policy: BudgetPolicy = BudgetPolicy.CHUNK
+    overlap: int = 256
+
+
+class ScanGuard:
+    """Substituter applying a scan budget before delegating to a scanner."""
+
+    def __init__(
+        self,
+        scanner: Scanner,
+        budget: ScanBudget,
+        max_match_length: int | None = None,
+        boundary: re.Pattern | None = None,
+    ) -> None:
+        """
+        Initialize the guard.
+
+        :param scanner: The scanner protected by the budget
+        :param budget: The scan budget
+        :param max_match_length: Longest match of the pattern, including its
+            look-ahead, used as overlap between windows when known
+        :param boundary: Pattern matching characters no match can contain,
+            where windows are preferably cut
+        """
+        self.scanner = scanner
+        self.budget = budget
+        self.chunked = ChunkedScanner(
+            scanner=scanner,
+            window=budget.max_length,
+            overlap=max_match_length or budget.overlap,
+            boundary=boundary,
+        )
+
+    def sub(self, repl: str, string: str) -> str:
+        """
+        Replace all matches, applying the budget policy to strings that are too long.
+
+        :param repl: Replacement string
+        :param string: The string to process
+        :return: The string with all matches replaced, or redacted
+        :raises ScanBudgetExceededError: If the string is too long and the policy is to reject
+        """
+        if len(string) <= self.budget.max_length:
+            return self.scanner.sub(repl=repl, string=string)
+        if self.budget.policy == BudgetPolicy.REDACT:
+            return REDACTED
+        if self.budget.policy == BudgetPolicy.REJECT:
+            raise ScanBudgetExceededError(
+                f"String of {len(string)} characters exceeds the scan budget "
+                f"of {self.budget.max_length} characters",
+            )
+        return self.chunked.sub(repl=repl, string=string)
+
+
+class DeadlineGuard:
+    """Substituter applying the fail-safe policy of the current deadline."""
+
+    def __init__(self, substituter: Substituter) -> None:
+        """
+        Initialize the guard.
+
+        :param substituter: The substituter scanning strings before the deadline
+        """
+        self.substituter = substituter
+
+    def sub(self, repl: str, string: str) -> str:
+        """
+        Replace all matches, or redact the string once the deadline is exceeded.
+
+        :param repl: Replacement string
+        :param string: The string to process
+        :return: The string with all matches replaced, or redacted
+        :raises DeadlineExceededError: If the deadline is exceeded and the policy is to reject
+        """
+        deadline = current_deadline()
+        if deadline is None:
+            return self.substituter.sub(repl=repl, string=string)
+        try:
+            deadline.check()
+            return self.substituter.sub(repl=repl, string=string)
+        except DeadlineExceededError:
+            if deadline.policy == DeadlinePolicy.REJECT:
+                raise
+            return REDACTED
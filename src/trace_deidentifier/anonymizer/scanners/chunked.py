@@ -0,0 +1,95 @@
+import re
+from collections.abc import Iterator
+
+from src.trace_deidentifier.anonymizer.deadline import check_deadline
+
+from .base import Scanner
+
+
+class ChunkedScanner(Scanner):
+    """
+    Scanner running another scanner over bounded windows of a string.
+
+    Each window of `window` characters is scanned with up to `overlap` extra
+    characters of look-ahead, and only matches starting inside the window are
+    kept. When a boundary character, which no match can contain or look at, is
+    found in the look-ahead, the window is cut there instead and all its matches
+    are kept.
+
+    Results are identical to a whole-string scan when the overlap covers the
+    longest match of the pattern, including its look-ahead, or is unlimited.
+    With a smaller overlap, a single call of the underlying scanner never sees
+    more than `window + overlap` characters, but matches longer than the overlap
+    may be truncated at a window edge where no boundary is found.
+
+    The deadline of the statement being processed is checked before each window.
+    """
+
+    def __init__(
+        self,
+        scanner: Scanner,
+        window: int,
+        overlap: int | None,
+        boundary: re.Pattern | None = None,
+    ) -> None:
+        """
+        Initialize the chunked scanner.
+
+        :param scanner: The scanner run on each window
+        :param window: Number of characters where matches may start, per window
+        :param overlap: Number of characters scanned past the end of each window,
+            None to scan up to the next boundary or the end of the string
+        :param boundary: Pattern matching characters that cannot be part of a match,
+            nor of its look-around
+        :raises ValueError: If the window is not positive or the overlap is negative
+        """
+        if window <= 0:
+            raise ValueError("Chunk window must be positive")
+        if overlap is not None and overlap < 0:
+            raise ValueError("Chunk overlap must not be negative")
+        self.scanner = scanner
+        self.window = window
+        self.overlap = overlap
+        self.boundary = boundary
+
+    def spans(
+        self,
+        string: str,
+        pos: int = 0,
+        endpos: int | None = None,
+    ) -> Iterator[tuple[int, int]]:
+        """Inherited from Scanner.spans."""
+        end_of_string = len(string) if endpos is None else min(endpos, len(string))
+        cursor = pos
+        while cursor < end_of_string:
+            check_deadline()
+            window_end = min(cursor + self.window, end_of_string)
+            scan_end = (
+                end_of_string
+                if self.overlap is None
+                else min(window_end + self.overlap, end_of_string)
+            )
+            cut = self.boundary and self.boundary.search(string, window_end, scan_end)
+            if cut:
+                # No match crosses the boundary, every match before it is final
+                yield from self.scanner.spans(string, cursor, cut.start())
+                cursor = cut.start()
+                continue
+
+            if scan_end == end_of_string:
+                # The rest of the string is visible, matches are final
+                yield from self.scanner.spans(string, cursor, end_of_string)
+                return
+
+            for start, end in self.scanner.spans(string, cursor, scan_end):
+                if start >= window_end:
+                    break
+                yield start, end
+                cursor = end
+            cursor = max(cursor, window_end)
+
+    def sub(self, repl: str, string: str) -> str:
+        """Inherited from Scanner.sub, strings fitting in one window are scanned directly."""
+        if len(string) <= self.window:
+            return self.scanner.sub(repl=repl, string=string)
+        return super().sub(repl=repl, string=string)
@@ -0,0 +1,86 @@
+import string as ascii_chars
+from collections.abc import Iterator
+
+from .base import Scanner
+
+# Characters allowed in the local part, and in domain labels
+LOCAL_CHARS = frozenset(
+    ascii_chars.ascii_letters + ascii_chars.digits + ".!#$%&'*+/=?^_`{|}~-",
+)
+ALNUM_CHARS = frozenset(ascii_chars.ascii_letters + ascii_chars.digits)
+LABEL_CHARS = ALNUM_CHARS | {"-"}
+
+# A label is one alphanumeric character, optionally followed by up to 62
+# alphanumeric characters or hyphens ending with an alphanumeric character
+MAX_LABEL_TAIL = 62
+
+
+class EmailScanner(Scanner):
+    """
+    Linear-time scanner equivalent to the email detection regex.
+
+    Matches are anchored on '@': the local part is expanded to the left, and the
+    domain to the right label by label. Every character is examined a bounded
+    number of times, whatever the input, so the scanner cannot backtrack
+    catastrophically on long runs of local-part characters.
+    """
+
+    def spans(
+        self,
+        string: str,
+        pos: int = 0,
+        endpos: int | None = None,
+    ) -> Iterator[tuple[int, int]]:
+        """Inherited from Scanner.spans."""
+        end_of_string = len(string) if endpos is None else min(endpos, len(string))
+        last_end = pos
+        at = string.find("@", pos, end_of_string)
+        while at != -1:
+            start = at
+            while start > last_end and string[start - 1] in LOCAL_CHARS:
+                start -= 1
+            if start < at and at + 1 < end_of_string and string[at + 1] in ALNUM_CHARS:
+                end = self._domain_end(string, at + 1, end_of_string)
+                yield start, end
+                last_end = end
+                at = string.find("@", end, end_of_string)
+            else:
+                at = string.find("@", at + 1, end_of_string)
+
+    @classmethod
+    def _domain_end(cls, string: str, start: int, end_of_string: int) -> int:
+        """
+        Find the end of the domain starting at a given index.
+
+        :param string: The scanned string
+        :param start: Index of the first character of the domain, which is alphanumeric
+        :param end_of_string: Index where the string is considered to end
+        :return: Index after the last character of the domain
+        """
+        end = cls._label_end(string, start, end_of_string)
+        while (
+            end + 1 < end_of_string
+            and string[end] == "."
+            and string[end + 1] in ALNUM_CHARS
+        ):
+            end = cls._label_end(string, end + 1, end_of_string)
+        return end
+
+    @staticmethod
+    def _label_end(string: str, start: int, end_of_string: int) -> int:
+        """
+        Find the end of the longest label starting at a given index.
+
+        :param string: The scanned string
+        :param start: Index of the first character of the label, which is alphanumeric
+        :param end_of_string: Index where the string is considered to end
+        :return: Index after the last character of the label
+        """
+        last_alnum = start
+        limit = min(end_of_string, start + 1 + MAX_LABEL_TAIL)
+        index = start + 1
+        while index < limit and (char := string[index]) in LABEL_CHARS:
+            if char in ALNUM_CHARS:
+                last_alnum = index
+            index += 1
+        return last_alnum + 1
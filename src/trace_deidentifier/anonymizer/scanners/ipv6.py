@@ -0,0 +1,124 @@
+from collections import deque
+from collections.abc import Iterator
+
+from .base import Scanner
+
+HEX_CHARS = frozenset("0123456789abcdefABCDEF")
+
+# Each group is at most 4 hex digits followed by ':', and an address has 2 to 7 groups
+MAX_GROUP_DIGITS = 4
+MIN_GROUPS = 2
+MAX_GROUPS = 7
+
+
+def _is_word(char: str) -> bool:
+    r"""
+    Check whether a character matches the regex '\w' class.
+
+    :param char: The character to check
+    :return: True if the character is alphanumeric or an underscore
+    """
+    return char.isalnum() or char == "_"
+
+
+class Ipv6Scanner(Scanner):
+    """
+    Linear-time scanner equivalent to the IPv6 detection regex.
+
+    Matches are anchored on ':'. From the first colon of a candidate, the chain of
+    'hex{0,4}:' groups is walked once, then the trailing digits and the
+    boundaries are checked. Since every group start of a chain shares the same
+    end, a failed chain is skipped as a whole instead of being retried from
+    each of its groups.
+    """
+
+    def spans(
+        self,
+        string: str,
+        pos: int = 0,
+        endpos: int | None = None,
+    ) -> Iterator[tuple[int, int]]:
+        """Inherited from Scanner.spans."""
+        end_of_string = len(string) if endpos is None else min(endpos, len(string))
+        colon = string.find(":", pos, end_of_string)
+        while colon != -1:
+            start = colon
+            while (
+                start > 0
+                and colon - start <= MAX_GROUP_DIGITS
+                and string[start - 1] in HEX_CHARS
+            ):
+                start -= 1
+            if (
+                start < pos
+                or colon - start > MAX_GROUP_DIGITS
+                or (start > 0 and _is_word(string[start - 1]))
+            ):
+                colon = string.find(":", colon + 1, end_of_string)
+                continue
+
+            groups, last_starts, end, is_valid = self._walk_chain(
+                string,
+                start,
+                end_of_string,
+            )
+            if (
+                is_valid
+                and groups >= MIN_GROUPS
+                and self._is_valid_end(string, end, end_of_string)
+            ):
+                # Only the last 7 groups fit in a match, earlier starts cannot succeed
+                yield last_starts[0], end
+            # Every group of the chain shares the same end, so none can start another match
+            colon = string.find(":", max(end, colon + 1), end_of_string)
+
+    @staticmethod
+    def _walk_chain(
+        string: str,
+        start: int,
+        end_of_string: int,
+    ) -> tuple[int, deque[int], int, bool]:
+        """
+        Walk a chain of 'hex{0,4}:' groups followed by trailing hex digits.
+
+        :param string: The scanned string
+        :param start: Index of the first group
+        :param end_of_string: Index where the string is considered to end
+        :return: The number of groups, the start index of the last 7 groups, the
+            index where the walk stopped, and whether the trailing digits are
+            valid, i.e. at most 4 of them
+        """
+        groups = 0
+        group_starts: deque[int] = deque(maxlen=MAX_GROUPS)
+        index = start
+        while True:
+            digits_end = index
+            while (
+                digits_end < end_of_string
+                and digits_end - index <= MAX_GROUP_DIGITS
+                and string[digits_end] in HEX_CHARS
+            ):
+                digits_end += 1
+            if digits_end - index > MAX_GROUP_DIGITS:
+                return groups, group_starts, digits_end, False
+            if digits_end < end_of_string and string[digits_end] == ":":
+                groups += 1
+                group_starts.append(index)
+                index = digits_end + 1
+            else:
+                return groups, group_starts, digits_end, True
+
+    @staticmethod
+    def _is_valid_end(string: str, end: int, end_of_string: int) -> bool:
+        """
+        Check that a chain ends properly, i.e. isn't followed by a word character, ':' or '.'.
+
+        :param string: The scanned string
+        :param end: Index after the chain
+        :param end_of_string: Index where the string is considered to end
+        :return: True if a match can end at this index
+        """
+        if end == end_of_string:
+            return True
+        char = string[end]
+        return not (_is_word(char) or char in ":.")
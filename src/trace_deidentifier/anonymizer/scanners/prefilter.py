@@ -0,0 +1,88 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is an optional extra
+    np = None
+
+# Number of distinct strings from which the masks are computed with NumPy, where
+# it starts to pay off for the strings of statements, see the bench_prefilter
+# benchmark. None to never vectorize.
+VECTORIZE_MIN_STRINGS: int | None = 64
+
+
+@dataclass(frozen=True, slots=True)
+class PrefilterRule:
+    """
+    Character that a string must hold for a pattern to match in it.
+
+    :param character: The character
+    :param count: Least number of occurrences of it
+    """
+
+    character: str
+    count: int = 1
+
+
+def candidate_mask(
+    strings: Sequence[str],
+    rules: Sequence[PrefilterRule],
+) -> list[bool]:
+    """
+    Tell, for each string, whether it holds any of the rules, so a pattern may match in it.
+
+    Strings are checked one by one, or, when NumPy is installed and there are at
+    least VECTORIZE_MIN_STRINGS of them, with vectorized NumPy operations. Both
+    give the same masks.
+
+    :param strings: The strings to check
+    :param rules: Rules, one of which every string with a match holds
+    :return: For each string, True if it holds a rule
+    """
+    if (
+        np is not None
+        and VECTORIZE_MIN_STRINGS is not None
+        and len(strings) >= VECTORIZE_MIN_STRINGS
+    ):
+        return _vectorized_mask(strings=strings, rules=rules)
+    return [
+        any(string.count(rule.character) >= rule.count for rule in rules)
+        for string in strings
+    ]
+
+
+def _vectorized_mask(
+    strings: Sequence[str],
+    rules: Sequence[PrefilterRule],
+) -> list[bool]:
+    """
+    Compute the candidate mask of strings with NumPy array operations.
+
+    The strings are concatenated into one array of code points, whose
+    occurrences of each rule character are counted per string from the offsets
+    where strings end, so long strings are not padded as in a string array.
+
+    :param strings: The strings to check
+    :param rules: Rules, one of which every string with a match holds
+    :return: For each string, True if it holds a rule
+    """
+    codes = np.frombuffer(
+        "".join(strings).encode("utf-32-le", "surrogatepass"),
+        dtype=np.uint32,
+    )
+    ends = np.fromiter(
+        accumulate(map(len, strings)),
+        dtype=np.int64,
+        count=len(strings),
+    )
+    mask = np.zeros(len(strings), dtype=bool)
+    for rule in rules:
+        owners = np.searchsorted(
+            ends,
+            np.flatnonzero(codes == ord(rule.character)),
+            side="right",
+        )
+        mask |= np.bincount(owners, minlength=len(strings)) >= rule.count
+    return mask.tolist()
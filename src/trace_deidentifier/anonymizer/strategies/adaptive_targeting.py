@@ -0,0 +1,103 @@
+from collections.abc import Hashable
+from typing import Any
+
+from src.trace_deidentifier.anonymizer.adaptive import (
+    ADAPTIVE_SCANS,
+    ADAPTIVE_SKIPPED_FIELDS,
+    AdaptiveTargeting,
+    ScanMode,
+    iter_string_fields,
+    shape_of,
+)
+from src.trace_deidentifier.anonymizer.report import (
+    AnonymizationReport,
+    current_report,
+    record_clean,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .base import BaseAnonymizationStrategy
+
+
+class AdaptiveTargetingStrategy(BaseAnonymizationStrategy):
+    """
+    Strategy to restrict detection to the fields that held detected values in statements of the same shape.
+
+    Statements of a learned shape are only scanned on the paths learned for this
+    shape, other string fields are marked clean. Other statements are fully
+    scanned, and the paths of the fields changed by detection are learned once
+    every strategy was applied. Statements anonymized as JSON text are left out,
+    as the fields changed by detection are not known there. The result of a
+    targeted statement is flagged in its report, so it is neither cached nor
+    stamped.
+    """
+
+    def __init__(self, targeting: AdaptiveTargeting) -> None:
+        """
+        Initialize the strategy with the learned state.
+
+        :param targeting: Learned state, shared by every strategy of the process
+        """
+        super().__init__()
+        self.targeting = targeting
+
+    def describe_rules(self) -> dict[str, Any]:
+        """Inherited from BaseAnonymizationStrategy.describe_rules."""
+        return {
+            "adaptive": True,
+            "sample_rate": self.targeting.sample_rate,
+            "warmup": self.targeting.warmup,
+        }
+
+    def anonymize(self, trace: Trace) -> None:
+        """Inherited from BaseAnonymizationStrategy.anonymize."""
+        report = current_report()
+        if report is None or report.detection_on_text:
+            return
+
+        fields = list(iter_string_fields(trace.data))
+        shape = shape_of(path for path, _, _ in fields)
+        targets = self.targeting.plan(shape)
+        if targets is None:
+            ADAPTIVE_SCANS.inc(mode=ScanMode.FULL)
+            paths = {(id(container), key): path for path, container, key in fields}
+            report.on_complete.append(
+                lambda: self._learn(shape=shape, paths=paths, report=report),
+            )
+            return
+
+        ADAPTIVE_SCANS.inc(mode=ScanMode.TARGETED)
+        report.targeted = True
+        skipped = 0
+        for path, container, key in fields:
+            if path not in targets:
+                record_clean(container=container, key=key)
+                skipped += 1
+        ADAPTIVE_SKIPPED_FIELDS.inc(skipped)
+        self.logger.debug(
+            "Targeted detection",
+            {"shape": shape, "paths": sorted(targets), "skipped": skipped},
+        )
+
+    def _learn(
+        self,
+        shape: str,
+        paths: dict[tuple[int, Hashable], str],
+        report: AnonymizationReport,
+    ) -> None:
+        """
+        Learn the paths of the fields changed by detection in a fully scanned statement.
+
+        :param shape: The shape of the statement
+        :param paths: Path of every string field, by identity of its container and key
+        :param report: The report of the statement
+        """
+        discovered = self.targeting.learn(
+            shape=shape,
+            paths=(paths[f] for f in report.detected if f in paths),
+        )
+        if discovered:
+            self.logger.info(
+                "Detection paths learned",
+                {"shape": shape, "paths": sorted(discovered)},
+            )
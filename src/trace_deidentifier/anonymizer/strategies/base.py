@@ -1,12 +1,44 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any
 
-from logger import LoggableMixin
+from logger import LoggableMixin, LoggerContract
 
 from src.trace_deidentifier.common.models.trace import Trace
 
 
 class BaseAnonymizationStrategy(ABC, LoggableMixin):
-    """Abstract base class for anonymization strategies."""
+    """
+    Abstract base class for anonymization strategies.
+
+    Strategies keep no state of their own once built, so one instance can be
+    shared by several anonymizers, and applied by several threads at once.
+    They log with the logger of the anonymizer applying them.
+    """
+
+    @property
+    def logger(self) -> LoggerContract:
+        """
+        Get the logger of the strategy.
+
+        :return: The logger of the anonymizer applying the strategy, if any,
+            else the one set on the strategy
+        """
+        logger = _current_logger.get()
+        if logger is not None:
+            return logger
+        return self.__dict__.get("_logger") or super().logger
+
+    @logger.setter
+    def logger(self, logger: LoggerContract) -> None:
+        """
+        Set the logger of the strategy, used when no anonymizer applies it.
+
+        :param logger: The logger
+        """
+        self._logger = logger
 
     @abstractmethod
     def anonymize(self, trace: Trace) -> None:
@@ -16,3 +48,107 @@ class BaseAnonymizationStrategy(ABC, LoggableMixin):
         :param trace: The trace to anonymize
         """
         raise NotImplementedError
+
+    def anonymize_batch(
+        self,
+        traces: Sequence[Trace],
+        scope: Callable[[int], AbstractContextManager[Any]] | None = None,
+    ) -> list[Exception | None]:
+        """
+        Anonymize several traces, one after the other by default.
+
+        Strategies override it to do their setup and logging once per batch
+        rather than once per trace, then anonymize each trace with _anonymize_each.
+
+        :param traces: The traces to anonymize
+        :param scope: Gives the context each trace is anonymized in, from its
+            index, such as its report and deadline. Defaults to no context.
+        :return: The error raised by each trace, None for traces anonymized
+        """
+        return self._anonymize_each(
+            traces=traces,
+            anonymize=self.anonymize,
+            scope=scope,
+        )
+
+    @staticmethod
+    def _anonymize_each(
+        traces: Sequence[Trace],
+        anonymize: Callable[[Trace], None],
+        scope: Callable[[int], AbstractContextManager[Any]] | None,
+    ) -> list[Exception | None]:
+        """
+        Anonymize each trace of a batch in its context, capturing its error.
+
+        Any error is captured, as the anonymizer does for a single trace, so a
+        failing trace does not stop the others.
+
+        :param traces: The traces to anonymize
+        :param anonymize: Anonymizes a trace
+        :param scope: Gives the context of each trace from its index, if any
+        :return: The error raised by each trace, None for traces anonymized
+        """
+        errors: list[Exception | None] = []
+        for index, trace in enumerate(traces):
+            with scope(index) if scope else nullcontext():
+                try:
+                    anonymize(trace)
+                except Exception as e:  # noqa: BLE001
+                    errors.append(e)
+                else:
+                    errors.append(None)
+        return errors
+
+    def describe_rules(self) -> dict[str, Any]:
+        """
+        Describe the rules that decide how the strategy changes traces.
+
+        The description is part of the fingerprint of a rule set, so any change
+        in the output of the strategy must come with a change in its description.
+
+        :return: The rules, as JSON-serializable data. Defaults to no rules, for
+            strategies whose output only depends on their class.
+        """
+        return {}
+
+    def may_affect(
+        self,
+        data: Any,  # noqa: ARG002
+        previous: dict[str, Any] | None,  # noqa: ARG002
+        applied: bool,  # noqa: ARG002
+    ) -> bool:
+        """
+        Check whether the strategy could change a trace unlike a previous version of its rules.
+
+        Used to reprocess only the traces a rule change can affect, so it may give
+        false positives but never false negatives.
+
+        :param data: The trace data, as received
+        :param previous: The description of the previous rules, as JSON data, or
+            None if the strategy is new
+        :param applied: Whether the previous rules changed the trace
+        :return: True if the output of the trace may differ. Defaults to True,
+            for strategies whose rule changes may affect any trace.
+        """
+        return True
+
+
+_current_logger: ContextVar[LoggerContract | None] = ContextVar(
+    "current_logger",
+    default=None,
+)
+
+
+@contextmanager
+def logger_scope(logger: LoggerContract) -> Iterator[None]:
+    """
+    Make strategies log with a logger for the duration of the block.
+
+    :param logger: The logger of the anonymizer applying the strategies
+    :yield: Nothing
+    """
+    token = _current_logger.set(logger)
+    try:
+        yield
+    finally:
+        _current_logger.reset(token)
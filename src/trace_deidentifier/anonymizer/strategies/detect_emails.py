@@ -1,3 +1,8 @@
+from src.trace_deidentifier.anonymizer.scanners.base import DetectionEngine
+from src.trace_deidentifier.anonymizer.scanners.budget import ScanBudget
+from src.trace_deidentifier.anonymizer.scanners.email import EmailScanner
+from src.trace_deidentifier.anonymizer.scanners.prefilter import PrefilterRule
+
 from .regex_detect import RegexDetectionStrategy
 
 
@@ -9,9 +14,31 @@ class EmailDetectionStrategy(RegexDetectionStrategy):
     which is a simplified version of the RFC 5322
     """
 
-    def __init__(self) -> None:
-        """Initialize the email detection strategy with a regex pattern, and replace most common formats with 'anonymous@anonymous.org'."""
+    # Neither the local part nor the number of domain labels is bounded, so long
+    # strings can only be cut on characters that no email contains
+    BOUNDARY = r"[^a-zA-Z0-9.!#$%&\'*+\/=?^_`{|}~@-]"
+    CANDIDATES = (r"@[a-zA-Z0-9]",)
+    PREFILTER = (PrefilterRule("@"),)
+    SEPARATOR = "\x00"
+
+    def __init__(
+        self,
+        engine: DetectionEngine = DetectionEngine.REGEX,
+        budget: ScanBudget | None = None,
+        chunk_length: int | None = None,
+    ) -> None:
+        """
+        Initialize the email detection strategy with a regex pattern, and replace most common formats with 'anonymous@anonymous.org'.
+
+        :param engine: Engine used to find emails. The scanner engine finds the same
+            matches as the regex, in linear time.
+        :param budget: Limit on the length of strings scanned in one call, defaults to no limit
+        :param chunk_length: Strings longer than this are scanned in windows, defaults to no chunking
+        """
         super().__init__(
-            pattern=r"[a-zA-Z0-9.!#$%&\'*+\/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*",
+            pattern=r"[a-zA-Z0-9.!#$%&\'*+\/=?^_`{|}~-]++@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*",
             replacement="anonymous@anonymous.org",
+            scanner=EmailScanner() if engine == DetectionEngine.SCANNER else None,
+            budget=budget,
+            chunk_length=chunk_length,
         )
@@ -1,3 +1,5 @@
+from src.trace_deidentifier.anonymizer.scanners.budget import ScanBudget
+
 from .regex_detect import RegexDetectionStrategy
 
 
@@ -8,7 +10,17 @@ class GeoLocationDetectionStrategy(RegexDetectionStrategy):
     Only matches patterns that contain both latitude and longitude together, to avoid false positives.
     """
 
-    def __init__(self) -> None:
+    BOUNDARY = r"[^\d\s.,:\'\"{}°A-Zaglnot-]"
+    # Inside a JSON string without escape sequences, the JSON format uses single quotes
+    CANDIDATES = ("°", r"\{'lat", r"[A-Z]\s++\d{6}\s++\d{7}")
+    # No prefilter, since UTM coordinates hold no fixed character, and no joined
+    # scanning, slower for this pattern than scanning strings one by one
+
+    def __init__(
+        self,
+        budget: ScanBudget | None = None,
+        chunk_length: int | None = None,
+    ) -> None:
         """
         Initialize coordinate detection matching coordinate pairs.
 
@@ -16,19 +28,28 @@ class GeoLocationDetectionStrategy(RegexDetectionStrategy):
         - DMS pairs (e.g. "48°51'24"N 2°21'08"E")
         - JSON format (e.g. {"lat": 45.123, "lng": 2.345})
         - UTM format (e.g. "31U 430959 5239573")
+
+        Quantifiers followed by a character they cannot match are possessive: giving
+        characters back could never lead to a match, and it made long digit runs
+        backtrack in cubic time.
+
+        :param budget: Limit on the length of strings scanned in one call, defaults to no limit
+        :param chunk_length: Strings longer than this are scanned in windows, defaults to no chunking
         """
         patterns = [
             # Decimal degrees with cardinal directions
-            r"-?\d+\.?\d*°[NS][\s,]+-?\d+\.?\d*°[EW]",  # 45.123°N 2.345°E
+            r"-?\d++(?:\.\d*+)?°[NS][\s,]++-?\d++(?:\.\d*+)?°[EW]",  # 45.123°N 2.345°E
             # Complete DMS pairs
-            r"\d{1,3}°\d{1,2}\'(?:\d{1,2}(?:\.\d+)?)?\"[NS][\s,]+\d{1,3}°\d{1,2}\'(?:\d{1,2}(?:\.\d+)?)?\"[EW]",  # 48°51'24"N 2°21'08"E
+            r"\d{1,3}°\d{1,2}\'(?:\d{1,2}(?:\.\d++)?)?\"[NS][\s,]++\d{1,3}°\d{1,2}\'(?:\d{1,2}(?:\.\d++)?)?\"[EW]",  # 48°51'24"N 2°21'08"E
             # JSON format
-            r'\{["\']lat["\']:\s*-?\d+\.?\d*,\s*["\'](?:lon|lng)["\']:\s*-?\d+\.?\d*\}',  # {"lat":45.123,"lng":2.345}
+            r'\{["\']lat["\']:\s*+-?\d++(?:\.\d*+)?,\s*+["\'](?:lon|lng)["\']:\s*+-?\d++(?:\.\d*+)?\}',  # {"lat":45.123,"lng":2.345}
             # UTM format
-            r"\d{2}\s*[A-Z]\s+\d{6}\s+\d{7}",  # 31U 430959 5239573
+            r"\d{2}\s*+[A-Z]\s++\d{6}\s++\d{7}",  # 31U 430959 5239573
         ]
         pattern = "|".join(f"(?:{p})" for p in patterns)
         super().__init__(
             pattern=pattern,
             replacement='{"lat":0,"lon":0}',
+            budget=budget,
+            chunk_length=chunk_length,
         )
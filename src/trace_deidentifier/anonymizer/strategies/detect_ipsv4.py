@@ -1,16 +1,34 @@
+from src.trace_deidentifier.anonymizer.scanners.budget import ScanBudget
+from src.trace_deidentifier.anonymizer.scanners.prefilter import PrefilterRule
+
 from .regex_detect import RegexDetectionStrategy
 
 
 class Ipv4DetectionStrategy(RegexDetectionStrategy):
     """Strategy to replace IPv4 addresses in all fields."""
 
-    def __init__(self) -> None:
+    MAX_MATCH_LENGTH = 15
+    BOUNDARY = r"[^\d.]"
+    CANDIDATES = (r"\.\d{1,3}\.\d{1,3}\.\d",)
+    PREFILTER = (PrefilterRule(".", count=3),)
+    SEPARATOR = "\x00"
+
+    def __init__(
+        self,
+        budget: ScanBudget | None = None,
+        chunk_length: int | None = None,
+    ) -> None:
         """
         Initialize IPv4 detection with patterns matching common IP formats.
 
         Prioritizes catching potential IP addresses over strict validation to ensure better privacy protection.
+
+        :param budget: Limit on the length of strings scanned in one call, defaults to no limit
+        :param chunk_length: Strings longer than this are scanned in windows, defaults to no chunking
         """
         super().__init__(
             pattern=r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}",
             replacement="0.0.0.0",  # noqa: S104
+            budget=budget,
+            chunk_length=chunk_length,
         )
@@ -1,16 +1,42 @@
+from src.trace_deidentifier.anonymizer.scanners.base import DetectionEngine
+from src.trace_deidentifier.anonymizer.scanners.budget import ScanBudget
+from src.trace_deidentifier.anonymizer.scanners.ipv6 import Ipv6Scanner
+from src.trace_deidentifier.anonymizer.scanners.prefilter import PrefilterRule
+
 from .regex_detect import RegexDetectionStrategy
 
 
 class Ipv6DetectionStrategy(RegexDetectionStrategy):
     """Strategy to replace IPv6 addresses in all fields."""
 
-    def __init__(self) -> None:
+    # 7 groups of 4 digits and a colon, 4 trailing digits, and the look-ahead character
+    MAX_MATCH_LENGTH = 40
+    BOUNDARY = r"[^\w:.]"
+    # Addresses from their first colon, without the digits before it nor the look-behind
+    CANDIDATES = (r":(?:[0-9a-fA-F]{0,4}:){1,6}[0-9a-fA-F]{0,4}(?![\w:.])",)
+    PREFILTER = (PrefilterRule(":", count=2),)
+    SEPARATOR = "\x00"
+
+    def __init__(
+        self,
+        engine: DetectionEngine = DetectionEngine.REGEX,
+        budget: ScanBudget | None = None,
+        chunk_length: int | None = None,
+    ) -> None:
         """
         Initialize IPv6 detection with patterns matching common IP formats.
 
         Prioritizes catching potential IP addresses over strict validation to ensure better privacy protection.
+
+        :param engine: Engine used to find addresses. The scanner engine finds the
+            same matches as the regex, in linear time.
+        :param budget: Limit on the length of strings scanned in one call, defaults to no limit
+        :param chunk_length: Strings longer than this are scanned in windows, defaults to no chunking
         """
         super().__init__(
             pattern=r"(?<![\w])(::[0-9a-fA-F]{1,4}|([0-9a-fA-F]{0,4}:){2,7}[0-9a-fA-F]{0,4})(?![\w:.])",
             replacement="::",
+            scanner=Ipv6Scanner() if engine == DetectionEngine.SCANNER else None,
+            budget=budget,
+            chunk_length=chunk_length,
         )
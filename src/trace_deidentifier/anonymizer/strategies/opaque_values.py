@@ -0,0 +1,132 @@
+import hashlib
+from collections.abc import Hashable, Mapping, MutableMapping, MutableSequence
+from typing import Any, ClassVar
+
+from src.trace_deidentifier.anonymizer.opaque import (
+    OPAQUE_VALUES,
+    OpaqueKind,
+    OpaquePolicy,
+    classify,
+)
+from src.trace_deidentifier.anonymizer.report import (
+    record_clean,
+    record_removed,
+    record_replaced,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .base import BaseAnonymizationStrategy
+
+
+class OpaqueValuesStrategy(BaseAnonymizationStrategy):
+    """
+    Strategy to handle long opaque strings, such as base64 blobs, before detection.
+
+    Each kind of opaque payload gets its own policy: skipped strings are marked
+    clean, so detection strategies do not scan them, dropped strings are removed
+    from the trace, and hashed strings are replaced with their SHA-256 digest.
+    """
+
+    DEFAULT_POLICIES: ClassVar[Mapping[OpaqueKind, OpaquePolicy]] = {
+        OpaqueKind.HEX: OpaquePolicy.SKIP,
+        OpaqueKind.BASE64: OpaquePolicy.SKIP,
+        OpaqueKind.BINARY: OpaquePolicy.SCAN,
+    }
+
+    def __init__(
+        self,
+        policies: Mapping[OpaqueKind, OpaquePolicy] | None = None,
+        min_length: int = 256,
+    ) -> None:
+        """
+        Initialize the strategy with the policy of each kind of payload.
+
+        :param policies: Policy of each kind of payload, kinds not given keep
+            their default policy
+        :param min_length: Length from which strings are classified, shorter ones
+            are always scanned
+        """
+        super().__init__()
+        self.policies = {**self.DEFAULT_POLICIES, **(policies or {})}
+        self.min_length = min_length
+
+    def anonymize(self, trace: Trace) -> None:
+        """Inherited from BaseAnonymizationStrategy.anonymize."""
+        self._handle(trace.data)
+
+    def describe_rules(self) -> dict[str, Any]:
+        """Inherited from BaseAnonymizationStrategy.describe_rules."""
+        return {"policies": self.policies, "min_length": self.min_length}
+
+    def _handle(self, data: Any) -> None:
+        """
+        Recursively apply the policies to the opaque strings of a value.
+
+        :param data: The value to process
+        """
+        if isinstance(data, MutableMapping):
+            keys = list(data)
+        elif isinstance(data, MutableSequence):
+            keys = list(range(len(data)))
+        else:
+            return
+
+        dropped = []
+        kept = []
+        for key in keys:
+            value = data[key]
+            if not isinstance(value, str):
+                self._handle(value)
+                continue
+            policy = self._apply_policy(data=data, key=key)
+            if policy == OpaquePolicy.DROP:
+                dropped.append(key)
+            elif policy in (OpaquePolicy.SKIP, OpaquePolicy.HASH):
+                kept.append(key)
+
+        # Remove list items from the end, so the indices left are still valid
+        for key in reversed(dropped):
+            record_removed(value=data.pop(key), container=data, key=key)
+        # Then mark the strings kept, at their index once list items are removed
+        for key in kept:
+            if isinstance(key, int):
+                record_clean(container=data, key=key - sum(d < key for d in dropped))
+            else:
+                record_clean(container=data, key=key)
+
+    def _apply_policy(self, data: Any, key: Hashable) -> OpaquePolicy | None:
+        """
+        Apply its policy to a string if it is opaque, except dropping it and marking it clean.
+
+        :param data: The dictionary or list holding the string
+        :param key: The key or index of the string
+        :return: The policy of the string, or None if it is text
+        """
+        value = data[key]
+        if len(value) < self.min_length:
+            return None
+        kind = classify(value)
+        if kind is None:
+            return None
+        policy = self.policies[kind]
+        OPAQUE_VALUES.inc(kind=kind, policy=policy)
+        self.logger.debug(
+            "Opaque value found",
+            {"kind": kind, "policy": policy, "length": len(value)},
+        )
+        if policy == OpaquePolicy.HASH:
+            self._hash(data=data, key=key)
+        return policy
+
+    @staticmethod
+    def _hash(data: Any, key: Hashable) -> None:
+        """
+        Replace a string with its SHA-256 digest.
+
+        :param data: The dictionary or list holding the string
+        :param key: The key or index of the string
+        """
+        value = data[key]
+        digest = f"sha256:{hashlib.sha256(value.encode()).hexdigest()}"
+        data[key] = digest
+        record_replaced(old=value, new=digest, container=data, key=key)
@@ -1,7 +1,29 @@
 import re
 from abc import ABC
+from collections.abc import Callable, Sequence
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any, ClassVar
 
+from src.trace_deidentifier.anonymizer.dedup import deduplicated
+from src.trace_deidentifier.anonymizer.report import clean_fields, record_detected
+from src.trace_deidentifier.anonymizer.scanners.base import RegexScanner, Scanner
+from src.trace_deidentifier.anonymizer.scanners.batch import (
+    JOIN_MAX_LENGTH,
+    BatchSubstituter,
+    scan_joined,
+)
+from src.trace_deidentifier.anonymizer.scanners.budget import (
+    DeadlineGuard,
+    ScanBudget,
+    ScanGuard,
+)
+from src.trace_deidentifier.anonymizer.scanners.chunked import ChunkedScanner
+from src.trace_deidentifier.anonymizer.scanners.prefilter import (
+    PrefilterRule,
+    candidate_mask,
+)
 from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.types import Substituter
 from src.trace_deidentifier.common.utils import utils_dict
 
 from .base import BaseAnonymizationStrategy
@@ -10,26 +32,243 @@ from .base import BaseAnonymizationStrategy
 class RegexDetectionStrategy(BaseAnonymizationStrategy, ABC):
     """Base class for strategies that replace values in a trace using regex patterns."""
 
-    def __init__(self, pattern: str, replacement: str) -> None:
+    # Longest match of the pattern, including the characters checked by its
+    # look-ahead, or None if unbounded
+    MAX_MATCH_LENGTH: ClassVar[int | None] = None
+
+    # Regex matching the characters that can be part of no match nor of its
+    # look-around, where long strings can be cut
+    BOUNDARY: ClassVar[str | None] = None
+
+    # Cheap regexes, one of which matches within every match of the pattern,
+    # without matching a double quote. Each starts with a fixed character, so
+    # the regex engine can search for it quickly. Defaults to the pattern itself.
+    CANDIDATES: ClassVar[tuple[str, ...]] = ()
+
+    # Rules, one of which every string with a match holds, checked for all the
+    # strings of a batch at once to skip those that cannot match. Defaults to
+    # no prefilter.
+    PREFILTER: ClassVar[tuple[PrefilterRule, ...]] = ()
+
+    # Character that no match contains, and that look-around checks of the
+    # pattern handle as the start or end of a string, used to scan the short
+    # strings of a batch within a joined buffer. Defaults to scanning them one
+    # by one.
+    SEPARATOR: ClassVar[str | None] = None
+
+    def __init__(
+        self,
+        pattern: str,
+        replacement: str,
+        scanner: Scanner | None = None,
+        budget: ScanBudget | None = None,
+        chunk_length: int | None = None,
+    ) -> None:
         """
         Initialize the strategy with a regex pattern and a replacement value.
 
         :param pattern: Regex pattern to match
         :param replacement: Replacement value for matching patterns
+        :param scanner: Scanner equivalent to the pattern, used instead of the regex
+            engine to find matches. Defaults to the regex itself.
+        :param budget: Limit on the length of strings scanned in one call, with the
+            fallback for longer strings. Defaults to no limit.
+        :param chunk_length: Strings longer than this are scanned in windows of this
+            length, with the same results as a whole-string scan. Defaults to no chunking.
         """
         super().__init__()
         self.pattern = re.compile(pattern=pattern)
         self.replacement = replacement
+        self.scanner = scanner or RegexScanner(pattern=self.pattern)
+        self.budget = budget
+        self.chunk_length = chunk_length
+        self.boundary = re.compile(self.BOUNDARY) if self.BOUNDARY else None
+        self.candidates = [re.compile(c) for c in self.CANDIDATES] or [self.pattern]
+        self.batched: BatchSubstituter | None = None
+        self.substituter = self._build_substituter()
+
+    def _build_substituter(self) -> Substituter:
+        """
+        Wrap the scanner with chunking, the scan budget and the batch results, when configured, and the deadline check.
+
+        :return: The object replacing matches in each string
+        """
+        scanner = self.scanner
+        if self.chunk_length:
+            scanner = ChunkedScanner(
+                scanner=scanner,
+                window=self.chunk_length,
+                overlap=self.MAX_MATCH_LENGTH,
+                boundary=self.boundary,
+            )
+        substituter: Substituter = scanner
+        if self.budget:
+            substituter = ScanGuard(
+                scanner=scanner,
+                budget=self.budget,
+                max_match_length=self.MAX_MATCH_LENGTH,
+                boundary=self.boundary,
+            )
+        if self.PREFILTER or self.SEPARATOR:
+            self.batched = BatchSubstituter(substituter=substituter)
+            substituter = self.batched
+        return DeadlineGuard(substituter=substituter)
+
+    def describe_rules(self) -> dict[str, Any]:
+        """
+        Inherited from BaseAnonymizationStrategy.describe_rules.
+
+        The scanner and chunking find the same matches as the pattern, so only the
+        budget, whose fallback may redact strings, is described with it.
+        """
+        return {
+            "pattern": self.pattern.pattern,
+            "replacement": self.replacement,
+            "budget": (
+                {"max_length": self.budget.max_length, "policy": self.budget.policy}
+                if self.budget
+                else None
+            ),
+        }
+
+    def may_affect(
+        self,
+        data: Any,
+        previous: dict[str, Any] | None,
+        applied: bool,
+    ) -> bool:
+        """
+        Inherited from BaseAnonymizationStrategy.may_affect.
+
+        Traces the previous rules changed, or whose strings were scanned with
+        another budget, are affected. Otherwise, only traces with a string where
+        a candidate of the pattern is found may be.
+        """
+        if previous is not None and (
+            applied or previous.get("budget") != self.describe_rules()["budget"]
+        ):
+            return True
+        return any(
+            candidate.search(string)
+            for string in utils_dict.iter_strings(data)
+            for candidate in self.candidates
+        )
 
     def anonymize(self, trace: Trace) -> None:
-        """Inherited from BaseAnonymizationStrategy.anonymize."""
+        """
+        Inherited from BaseAnonymizationStrategy.anonymize.
+
+        Fields written with known-safe values by earlier strategies are not scanned,
+        and strings already scanned in the batch being processed are not scanned again.
+        """
+        self._log_configuration()
+        self._replace(trace=trace, pattern=deduplicated(self.substituter))
+
+    def anonymize_batch(
+        self,
+        traces: Sequence[Trace],
+        scope: Callable[[int], AbstractContextManager[Any]] | None = None,
+    ) -> list[Exception | None]:
+        """
+        Inherited from BaseAnonymizationStrategy.anonymize_batch.
+
+        The configuration is logged, and the scanner looked up in the batch
+        deduplicator, once for the whole batch. With a prefilter, strings of the
+        batch that cannot match are found at once, and not scanned. With a
+        separator, short strings of the batch are scanned within a joined buffer.
+        """
+        self._log_configuration(traces=len(traces))
+        pattern = deduplicated(self.substituter)
+        with self._batch_scope(traces=traces):
+            return self._anonymize_each(
+                traces=traces,
+                anonymize=lambda trace: self._replace(trace=trace, pattern=pattern),
+                scope=scope,
+            )
+
+    def _batch_scope(self, traces: Sequence[Trace]) -> AbstractContextManager[Any]:
+        """
+        Find the results of strings of a batch at once, when the strategy can.
+
+        :param traces: The traces of the batch
+        :return: The context manager of the batch scope
+        """
+        if self.batched is None:
+            return nullcontext()
+        return self.batched.scope(results=self._batch_results(traces=traces))
+
+    def _batch_results(self, traces: Sequence[Trace]) -> dict[str, str]:
+        """
+        Find the results of the strings of a batch cleared by the prefilter, or short enough to be joined.
+
+        Strings longer than a scan budget are left to the budget, so they are
+        never cleared nor joined.
+
+        :param traces: The traces of the batch
+        :return: The result of strings, by string
+        """
+        limit = self.budget.max_length if self.budget else None
+        strings = [
+            string
+            for string in dict.fromkeys(
+                string
+                for trace in traces
+                for string in utils_dict.iter_strings(trace.data)
+            )
+            if limit is None or len(string) <= limit
+        ]
+        results = {}
+        if self.PREFILTER:
+            mask = candidate_mask(strings=strings, rules=self.PREFILTER)
+            results = {
+                s: s
+                for s, candidate in zip(strings, mask, strict=True)
+                if not candidate
+            }
+            strings = [
+                s for s, candidate in zip(strings, mask, strict=True) if candidate
+            ]
+        if self.SEPARATOR:
+            limit = min(JOIN_MAX_LENGTH, self.chunk_length or JOIN_MAX_LENGTH)
+            results |= scan_joined(
+                scanner=self.scanner,
+                strings=[
+                    s for s in strings if len(s) <= limit and self.SEPARATOR not in s
+                ],
+                repl=self.replacement,
+                separator=self.SEPARATOR,
+            )
+        return results
+
+    def _log_configuration(self, traces: int = 1) -> None:
+        """
+        Log how the strategy scans strings.
+
+        :param traces: Number of traces about to be scanned
+        """
         self.logger.debug(
             "Apply regex replacement",
-            {"pattern": self.pattern, "replacement": self.replacement},
+            {
+                "pattern": self.pattern,
+                "replacement": self.replacement,
+                "scanner": type(self.scanner).__name__,
+                "budget": self.budget,
+                "chunk_length": self.chunk_length,
+                "traces": traces,
+            },
         )
 
+    def _replace(self, trace: Trace, pattern: Substituter) -> None:
+        """
+        Replace the matches of a trace, skipping the fields known to be safe.
+
+        :param trace: The trace to anonymize
+        :param pattern: The substituter finding matches in each string
+        """
         utils_dict.regex_replace(
             data=trace.data,
-            pattern=self.pattern,
+            pattern=pattern,
             value=self.replacement,
+            skip=clean_fields(),
+            on_replace=record_detected,
         )
@@ -1,6 +1,12 @@
-from collections.abc import MutableMapping
-from typing import ClassVar
+from collections.abc import Callable, MutableMapping, Sequence
+from contextlib import AbstractContextManager
+from typing import Any, ClassVar
 
+from src.trace_deidentifier.anonymizer.extension_rules import (
+    ExtensionRules,
+    compile_rules,
+)
+from src.trace_deidentifier.anonymizer.report import record_removed
 from src.trace_deidentifier.common.models.trace import Trace
 from src.trace_deidentifier.common.utils import utils_dict
 
@@ -10,58 +16,183 @@ from .base import BaseAnonymizationStrategy
 class RemoveFieldsStrategy(BaseAnonymizationStrategy):
     """Strategy to remove non-required fields with sensitive values."""
 
-    EXTENSIONS_TO_REMOVE: ClassVar[frozenset[str]] = {
-        "browser-info",
-        "ip-address",
-        "invitee",
-        "observer",
-        "referrer",
-        "tweet",
-        "geojson",
-        "latitude",
-        "longitude",
-        "location",
-    }
-
-    EXTENSION_PATHS: ClassVar[frozenset[str]] = {
+    EXTENSIONS_TO_REMOVE: ClassVar[frozenset[str]] = frozenset(
+        {
+            "browser-info",
+            "ip-address",
+            "invitee",
+            "observer",
+            "referrer",
+            "tweet",
+            "geojson",
+            "latitude",
+            "longitude",
+            "location",
+        },
+    )
+
+    EXTENSION_PATHS: ClassVar[tuple[str, ...]] = (
         "context",
         "object.definition",
         "result",
-    }
+        # Single activity or list of activities in context activities
+        "context.contextActivities.*.definition",
+        "context.contextActivities.*.*.definition",
+        # SubStatement
+        "object.context",
+        "object.object.definition",
+        "object.result",
+        "object.context.contextActivities.*.definition",
+        "object.context.contextActivities.*.*.definition",
+    )
+
+    DEFAULT_RULES: ClassVar[ExtensionRules] = ExtensionRules(
+        suffixes=EXTENSIONS_TO_REMOVE,
+        paths=EXTENSION_PATHS,
+    )
+
+    def __init__(self, rules: ExtensionRules | None = None) -> None:
+        """
+        Initialize the strategy with extension removal rules.
+
+        :param rules: Rules selecting the extensions to remove, defaults to DEFAULT_RULES.
+            Rules without paths are looked up in EXTENSION_PATHS.
+        """
+        super().__init__()
+        rules = rules or self.DEFAULT_RULES
+        if not rules.paths:
+            rules = rules.merge(ExtensionRules(paths=self.EXTENSION_PATHS))
+        self.rules = rules
+        self.index = compile_rules(rules)
+        self._paths = [path.split(".") for path in rules.paths]
 
     def anonymize(self, trace: Trace) -> None:
         """Inherited from BaseAnonymizationStrategy.anonymize."""
-        for path in self.EXTENSION_PATHS:
-            if obj := utils_dict.get_nested_field(
-                data=trace.data,
-                keys=path.split("."),
-            ):
-                self.logger.debug("Path found in trace", {"path": path})
+        self._remove_extensions(data=trace.data, log=True)
+
+    def anonymize_batch(
+        self,
+        traces: Sequence[Trace],
+        scope: Callable[[int], AbstractContextManager[Any]] | None = None,
+    ) -> list[Exception | None]:
+        """
+        Inherited from BaseAnonymizationStrategy.anonymize_batch.
+
+        Removals are logged once for the whole batch, rather than one by one.
+        """
+        removed = 0
+
+        def anonymize(trace: Trace) -> None:
+            nonlocal removed
+            removed += self._remove_extensions(data=trace.data, log=False)
+
+        errors = self._anonymize_each(traces=traces, anonymize=anonymize, scope=scope)
+        self.logger.debug(
+            "Remove extensions",
+            {"traces": len(traces), "removed": removed},
+        )
+        return errors
+
+    def _remove_extensions(self, data: Any, *, log: bool) -> int:
+        """
+        Remove the extensions matching the rules from every configured path.
+
+        :param data: The trace data
+        :param log: Whether to log each path and extension found
+        :return: The number of extensions removed
+        """
+        removed = 0
+        for path, keys in zip(self.rules.paths, self._paths, strict=True):
+            for obj in utils_dict.iter_nested_fields(data=data, keys=keys):
+                if not isinstance(obj, MutableMapping):
+                    continue
+                if log:
+                    self.logger.debug("Path found in trace", {"path": path})
+                removed += self._remove_from(obj=obj, path=path, log=log)
+        return removed
+
+    def _remove_from(self, obj: MutableMapping, path: str, *, log: bool) -> int:
+        """
+        Remove the extensions of an object matching the rules, and its extensions field if left empty.
+
+        :param obj: The object holding an 'extensions' field
+        :param path: The path of the object
+        :param log: Whether to log each extension found
+        :return: The number of extensions removed
+        """
+        extensions = obj.get("extensions")
+        if not isinstance(extensions, MutableMapping) or not extensions:
+            return 0
+        if log:
+            self.logger.debug("Extensions found in path", {"path": path})
+        extensions_to_remove = [
+            ext_url for ext_url in extensions if self._should_remove_extension(ext_url)
+        ]
+        for ext in extensions_to_remove:
+            if log:
+                self.logger.debug("Remove extension", {"extension": ext})
+            record_removed(
+                value=extensions.pop(ext, None),
+                container=extensions,
+                key=ext,
+            )
+
+        # Delete empty 'extensions' field
+        if not extensions:
+            if log:
+                self.logger.debug("Remove empty field extensions", {"path": path})
+            record_removed(
+                value=obj.pop("extensions", None),
+                container=obj,
+                key="extensions",
+            )
+        return len(extensions_to_remove)
+
+    def describe_rules(self) -> dict[str, Any]:
+        """Inherited from BaseAnonymizationStrategy.describe_rules."""
+        return {
+            "exact": sorted(self.rules.exact),
+            "suffixes": sorted(self.rules.suffixes),
+            "prefixes": sorted(self.rules.prefixes),
+            "paths": list(self.rules.paths),
+        }
+
+    def may_affect(
+        self,
+        data: Any,
+        previous: dict[str, Any] | None,
+        applied: bool,  # noqa: ARG002
+    ) -> bool:
+        """
+        Inherited from BaseAnonymizationStrategy.may_affect.
+
+        Only traces with an extension removed by either the previous or the new
+        rules, but not by both, are affected, as long as paths did not change.
+        """
+        if previous is None:
+            index = None
+        elif previous.get("paths") != list(self.rules.paths):
+            return True
+        else:
+            index = compile_rules(ExtensionRules.from_mapping(previous))
+        for keys in self._paths:
+            for obj in utils_dict.iter_nested_fields(data=data, keys=keys):
+                if not isinstance(obj, MutableMapping):
+                    continue
                 extensions = obj.get("extensions")
-                if isinstance(extensions, MutableMapping) and extensions:
-                    self.logger.debug("Extensions found in path", {"path": path})
-                    extensions_to_remove = [
-                        ext_url
-                        for ext_url in extensions
-                        if self._should_remove_extension(ext_url)
-                    ]
-                    for ext in extensions_to_remove:
-                        self.logger.debug("Remove extension", {"extension": ext})
-                        extensions.pop(ext, None)
-
-                    # Delete empty 'extensions' field
-                    if not extensions:
-                        self.logger.debug(
-                            "Remove empty field extensions",
-                            {"path": path},
-                        )
-                        obj.pop("extensions", None)
+                if not isinstance(extensions, MutableMapping):
+                    continue
+                for ext_url in extensions:
+                    removed = index is not None and index.matches(ext_url)
+                    if self._should_remove_extension(ext_url) != removed:
+                        return True
+        return False
 
     def _should_remove_extension(self, extension_url: str) -> bool:
         """
-        Check if an extension URL ends with any of the sensitive extension names.
+        Check if an extension URL matches any of the removal rules.
 
         :param extension_url: The full extension URL to check
         :return: True if the extension should be removed, False otherwise
         """
-        return any(extension_url.endswith(ext) for ext in self.EXTENSIONS_TO_REMOVE)
+        return self.index.matches(extension_url)
@@ -1,6 +1,7 @@
 from collections.abc import Mapping, MutableSequence
 from typing import Any, ClassVar
 
+from src.trace_deidentifier.anonymizer.report import record_clean, record_replaced
 from src.trace_deidentifier.common.models.trace import Trace
 from src.trace_deidentifier.common.utils import utils_dict
 
@@ -29,6 +30,10 @@ class ReplaceSensitiveValuesStrategy(BaseAnonymizationStrategy):
         """Inherited from BaseAnonymizationStrategy.anonymize."""
         self._anonymize_part(trace.data)
 
+    def describe_rules(self) -> dict[str, Any]:
+        """Inherited from BaseAnonymizationStrategy.describe_rules."""
+        return {"fields": self.FIELDS_TO_REPLACE}
+
     def _anonymize_part(self, data: Mapping[str, Any]) -> None:
         """
         Recursively anonymize a part of the trace.
@@ -99,12 +104,22 @@ class ReplaceSensitiveValuesStrategy(BaseAnonymizationStrategy):
         :param fields_to_replace: Dictionary mapping field paths to their replacement values
         """
         for field, value in fields_to_replace.items():
+            keys = field.split(".")
+            old_value = utils_dict.get_nested_field(data=target, keys=keys)
             replaced = utils_dict.replace_nested_field(
                 data=target,
-                keys=field.split("."),
+                keys=keys,
                 value=value,
             )
             if replaced:
+                container = utils_dict.get_nested_field(data=target, keys=keys[:-1])
+                record_replaced(
+                    old=old_value,
+                    new=value,
+                    container=container,
+                    key=keys[-1],
+                )
+                record_clean(container=container, key=keys[-1])
                 self.logger.debug(
                     "Replaced field in trace",
                     {"field": field, "value": value},
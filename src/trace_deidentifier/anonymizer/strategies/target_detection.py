@@ -0,0 +1,70 @@
+from typing import Any, ClassVar
+
+from src.trace_deidentifier.anonymizer.detection_schema import (
+    DetectionSchema,
+    FieldPolicy,
+    compile_schema,
+)
+from src.trace_deidentifier.anonymizer.report import record_clean
+from src.trace_deidentifier.common.models.trace import Trace
+
+from .base import BaseAnonymizationStrategy
+
+
+class DetectionTargetingStrategy(BaseAnonymizationStrategy):
+    """
+    Strategy to keep detection strategies applied after it off fields with strict formats.
+
+    Fields whose policy is to skip them, or that follow the format their policy
+    names, are marked clean, so detection strategies do not scan them. The trace
+    itself is left as is.
+    """
+
+    DEFAULT_SCHEMA: ClassVar[DetectionSchema] = DetectionSchema.from_mapping(
+        {
+            "id": FieldPolicy.UUID,
+            "timestamp": FieldPolicy.TIMESTAMP,
+            "stored": FieldPolicy.TIMESTAMP,
+            "version": FieldPolicy.VERSION,
+            "verb.id": FieldPolicy.IRI,
+            "object.id": FieldPolicy.IRI,
+            "object.definition.type": FieldPolicy.IRI,
+            "result.duration": FieldPolicy.DURATION,
+            "context.registration": FieldPolicy.UUID,
+            "context.statement.id": FieldPolicy.UUID,
+            # Single activity or list of activities in context activities
+            "context.contextActivities.*.id": FieldPolicy.IRI,
+            "context.contextActivities.*.*.id": FieldPolicy.IRI,
+            "context.contextActivities.*.definition.type": FieldPolicy.IRI,
+            "context.contextActivities.*.*.definition.type": FieldPolicy.IRI,
+            # SubStatement
+            "object.timestamp": FieldPolicy.TIMESTAMP,
+            "object.verb.id": FieldPolicy.IRI,
+            "object.object.id": FieldPolicy.IRI,
+            "object.object.definition.type": FieldPolicy.IRI,
+            "object.result.duration": FieldPolicy.DURATION,
+            "object.context.registration": FieldPolicy.UUID,
+            "object.context.contextActivities.*.id": FieldPolicy.IRI,
+            "object.context.contextActivities.*.*.id": FieldPolicy.IRI,
+        },
+    )
+
+    def __init__(self, schema: DetectionSchema | None = None) -> None:
+        """
+        Initialize the strategy with the detection policies of the fields.
+
+        :param schema: Policies of the fields, defaults to DEFAULT_SCHEMA
+        """
+        super().__init__()
+        self.schema = schema or self.DEFAULT_SCHEMA
+        self.root = compile_schema(self.schema)
+
+    def anonymize(self, trace: Trace) -> None:
+        """Inherited from BaseAnonymizationStrategy.anonymize."""
+        for container, key in self.root.iter_skipped(trace.data):
+            self.logger.debug("Field excluded from detection", {"field": key})
+            record_clean(container=container, key=key)
+
+    def describe_rules(self) -> dict[str, Any]:
+        """Inherited from BaseAnonymizationStrategy.describe_rules."""
+        return {"fields": dict(self.schema.fields)}
@@ -1,25 +1,34 @@
-from fastapi import Request
+from fastapi import Depends, Request
 
+from src.trace_deidentifier.anonymizer.adaptive import AdaptiveTargeting
 from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
-from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
-    EmailDetectionStrategy,
+from src.trace_deidentifier.anonymizer.dedup import BatchDeduplicator
+from src.trace_deidentifier.anonymizer.factory import (
+    build_anonymizer,
+    load_adaptive_targeting,
 )
-from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
-    GeoLocationDetectionStrategy,
-)
-from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
-    Ipv4DetectionStrategy,
-)
-from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
-    Ipv6DetectionStrategy,
-)
-from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
-    RemoveFieldsStrategy,
-)
-from src.trace_deidentifier.anonymizer.strategies.replace_values import (
-    ReplaceSensitiveValuesStrategy,
+from src.trace_deidentifier.anonymizer.idempotency import IdempotencyMarker
+from src.trace_deidentifier.anonymizer.result_cache import (
+    ResultCache,
+    load_result_cache,
 )
 
+from .micro_batching import MicroBatcher, load_micro_batcher
+from .time_slicing import TimeSlicer, load_time_slicer
+
+
+async def get_adaptive_targeting(request: Request) -> AdaptiveTargeting | None:
+    """
+    FastAPI dependency to get the learned state of adaptive targeting.
+
+    :param request: The FastAPI request object
+    :returns: The learned state shared by the process, or None if adaptive targeting is disabled
+    """
+    return load_adaptive_targeting(
+        config=request.state.config,
+        logger=request.state.logger,
+    )
+
 
 async def get_anonymizer(request: Request) -> Anonymizer:
     """
@@ -28,14 +37,84 @@ async def get_anonymizer(request: Request) -> Anonymizer:
     :param request: The FastAPI request object
     :returns: A configured Anonymizer instance with all required strategies
     """
-    return Anonymizer(
-        strategies=[
-            ReplaceSensitiveValuesStrategy(),
-            RemoveFieldsStrategy(),
-            EmailDetectionStrategy(),
-            Ipv4DetectionStrategy(),
-            Ipv6DetectionStrategy(),
-            GeoLocationDetectionStrategy(),
-        ],
+    return build_anonymizer(
+        config=request.state.config,
         logger=request.state.logger,
+        adaptive_targeting=await get_adaptive_targeting(request),
+    )
+
+
+async def get_idempotency_marker(
+    request: Request,
+    anonymizer: Anonymizer = Depends(get_anonymizer),
+) -> IdempotencyMarker | None:
+    """
+    FastAPI dependency to get the idempotency marker of the rule set of the anonymizer.
+
+    :param request: The FastAPI request object
+    :param anonymizer: The anonymizer of the request, whose rule set is marked
+    :returns: The marker, or None if no idempotency key is configured
+    """
+    key = request.state.config.get_idempotency_key()
+    if key is None:
+        return None
+    return IdempotencyMarker(key=key, fingerprint=anonymizer.fingerprint)
+
+
+async def get_deduplicator(request: Request) -> BatchDeduplicator | None:
+    """
+    FastAPI dependency to get the deduplicator of a batch of traces.
+
+    :param request: The FastAPI request object
+    :returns: A deduplicator for the batch, or None if deduplication is disabled
+    """
+    window = request.state.config.get_dedup_window()
+    if not window:
+        return None
+    return BatchDeduplicator(window=window)
+
+
+async def get_time_slicer(request: Request) -> TimeSlicer | None:
+    """
+    FastAPI dependency to get the slicer of the processing of batches.
+
+    :param request: The FastAPI request object
+    :returns: The slicer shared by the process, or None if batches are processed at once
+    """
+    time_slice = request.state.config.get_batch_time_slice()
+    if not time_slice:
+        return None
+    return load_time_slicer(time_slice=time_slice)
+
+
+async def get_micro_batcher(request: Request) -> MicroBatcher | None:
+    """
+    FastAPI dependency to get the micro-batcher of single-trace requests.
+
+    :param request: The FastAPI request object
+    :returns: The micro-batcher shared by the process, or None if single traces
+        are anonymized on their own
+    """
+    max_delay = request.state.config.get_micro_batch_delay()
+    if not max_delay:
+        return None
+    return load_micro_batcher(
+        max_delay=max_delay,
+        max_size=request.state.config.get_micro_batch_max_size(),
+    )
+
+
+async def get_result_cache(request: Request) -> ResultCache | None:
+    """
+    FastAPI dependency to get the persistent result cache.
+
+    :param request: The FastAPI request object
+    :returns: The result cache shared by the process, or None if disabled
+    """
+    path = request.state.config.get_result_cache_file()
+    if path is None:
+        return None
+    return load_result_cache(
+        path=path,
+        max_size=request.state.config.get_result_cache_max_size(),
     )
@@ -2,7 +2,11 @@ from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from logger import LogLevel
 
-from src.trace_deidentifier.anonymizer.exceptions import AnonymizationError
+from src.trace_deidentifier.anonymizer.exceptions import (
+    AnonymizationError,
+    DeadlineExceededError,
+    ScanBudgetExceededError,
+)
 from src.trace_deidentifier.common.exceptions import InvalidTraceError
 
 
@@ -25,6 +29,8 @@ class ExceptionHandler:
             TypeError: status.HTTP_500_INTERNAL_SERVER_ERROR,
             InvalidTraceError: status.HTTP_400_BAD_REQUEST,
             AnonymizationError: status.HTTP_500_INTERNAL_SERVER_ERROR,
+            ScanBudgetExceededError: status.HTTP_422_UNPROCESSABLE_ENTITY,
+            DeadlineExceededError: status.HTTP_422_UNPROCESSABLE_ENTITY,
         }
 
     def configure(self, app: FastAPI) -> None:
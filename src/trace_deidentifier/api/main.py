@@ -8,6 +8,8 @@ from src.trace_deidentifier.infrastructure.config.settings import Settings
 
 from .exception_handler import ExceptionHandler
 from .routers.anonymize import router as anonymize_router
+from .routers.metrics import router as metrics_router
+from .routers.targeting import router as targeting_router
 
 config = Settings()
 
@@ -45,3 +47,5 @@ exception_handler = ExceptionHandler()
 exception_handler.configure(app=app)
 
 app.include_router(router=anonymize_router)
+app.include_router(router=metrics_router)
+app.include_router(router=targeting_router)
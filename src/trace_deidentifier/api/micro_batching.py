@@ -0,0 +1,175 @@
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from functools import cache, partial
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.exceptions import AnonymizationError
+from src.trace_deidentifier.anonymizer.report import AnonymizationReport
+from src.trace_deidentifier.anonymizer.result_cache import ResultCache
+from src.trace_deidentifier.common.models.trace import Trace
+
+
+@dataclass(frozen=True, slots=True)
+class _Pending:
+    """A trace waiting for its micro-batch, with the future of its request."""
+
+    trace: Trace
+    raw: bytes | None
+    future: asyncio.Future[AnonymizationReport]
+
+
+@dataclass(slots=True)
+class _MicroBatch:
+    """The traces collected for the same rule set and output, until flushed."""
+
+    anonymizer: Anonymizer
+    cache: ResultCache | None
+    patch: bool
+    timer: asyncio.TimerHandle
+    pending: list[_Pending] = field(default_factory=list)
+
+
+class MicroBatcher:
+    """
+    Anonymize the traces of concurrent single-trace requests together.
+
+    The first trace opens a micro-batch, which collects the traces of other
+    requests until it holds max_size traces or max_delay has passed since. The
+    micro-batch is then anonymized together, strategy by strategy, in an
+    executor so the event loop keeps collecting the next one, and each request
+    is given its own report, or the error that stopped its trace. Traces are
+    only batched with traces of the same rule set and output.
+    """
+
+    def __init__(
+        self,
+        max_delay: float,
+        max_size: int,
+        executor: Executor | None = None,
+    ) -> None:
+        """
+        Initialize the micro-batcher.
+
+        :param max_delay: Longest time a trace waits for others, in seconds
+        :param max_size: Most traces of a micro-batch
+        :param executor: Executor anonymizing the micro-batches, the default
+            executor of the event loop if None
+        """
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self.executor = executor
+        self._batches: dict[tuple[str, bool], _MicroBatch] = {}
+
+    async def anonymize(
+        self,
+        anonymizer: Anonymizer,
+        cache: ResultCache | None,
+        trace: Trace,
+        raw: bytes | None,
+        patch: bool,
+    ) -> AnonymizationReport:
+        """
+        Anonymize a trace along with the traces of concurrent requests.
+
+        :param anonymizer: The anonymizer to use, unless the micro-batch was
+            opened by another request with the same rule set
+        :param cache: The persistent result cache, if enabled
+        :param trace: The trace to anonymize
+        :param raw: The JSON text the trace data was parsed from, to prescreen it
+        :param patch: Whether to record the changes as a JSON Patch, in the report
+        :return: The report of what was done to the trace
+        :raises AnonymizationError: If the anonymization of the trace fails
+        """
+        loop = asyncio.get_running_loop()
+        key = (anonymizer.fingerprint, patch)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _MicroBatch(
+                anonymizer=anonymizer,
+                cache=cache,
+                patch=patch,
+                timer=loop.call_later(self.max_delay, self._flush, key),
+            )
+        future = loop.create_future()
+        batch.pending.append(_Pending(trace=trace, raw=raw, future=future))
+        if len(batch.pending) >= self.max_size:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: tuple[str, bool]) -> None:
+        """
+        Close a micro-batch and hand it to the executor.
+
+        :param key: The rule set fingerprint and output of the micro-batch
+        """
+        batch = self._batches.pop(key)
+        batch.timer.cancel()
+        done = asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            self._process,
+            batch,
+        )
+        done.add_done_callback(partial(self._resolve, batch))
+
+    @staticmethod
+    def _process(
+        batch: _MicroBatch,
+    ) -> list[AnonymizationReport | AnonymizationError]:
+        """
+        Anonymize the traces of a micro-batch together, in the executor.
+
+        The result cache is not used for JSON Patches, which are recorded while the
+        strategies change the traces.
+
+        :param batch: The micro-batch
+        :return: The report of each trace, or the error that stopped it
+        """
+        traces = [pending.trace for pending in batch.pending]
+        raws = [pending.raw for pending in batch.pending]
+        if batch.cache is not None and not batch.patch:
+            return batch.cache.anonymize_batch(
+                anonymizer=batch.anonymizer,
+                traces=traces,
+                raws=raws,
+            )
+        return batch.anonymizer.anonymize_batch(
+            traces=traces,
+            raws=raws,
+            patch=batch.patch,
+        )
+
+    @staticmethod
+    def _resolve(
+        batch: _MicroBatch,
+        done: asyncio.Future[list[AnonymizationReport | AnonymizationError]],
+    ) -> None:
+        """
+        Give each request of a micro-batch its result, unless it gave up waiting.
+
+        :param batch: The micro-batch
+        :param done: The future of the anonymization of the micro-batch
+        """
+        for index, pending in enumerate(batch.pending):
+            if pending.future.done():
+                continue
+            if done.cancelled():
+                pending.future.cancel()
+            elif (error := done.exception()) is not None:
+                pending.future.set_exception(error)
+            elif isinstance(result := done.result()[index], AnonymizationError):
+                pending.future.set_exception(result)
+            else:
+                pending.future.set_result(result)
+
+
+@cache
+def load_micro_batcher(max_delay: float, max_size: int) -> MicroBatcher:
+    """
+    Create the micro-batcher once per process, so every request shares it.
+
+    :param max_delay: Longest time a trace waits for others, in seconds
+    :param max_size: Most traces of a micro-batch
+    :return: The micro-batcher
+    """
+    return MicroBatcher(max_delay=max_delay, max_size=max_size)
@@ -1,34 +1,415 @@
-from fastapi import APIRouter
+from collections.abc import Sequence
+
+from fastapi import APIRouter, Request, Response
 from fastapi.params import Depends
+from fastapi.responses import JSONResponse
 
 from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
-from src.trace_deidentifier.api.dependencies import get_anonymizer
+from src.trace_deidentifier.anonymizer.dedup import (
+    BatchDeduplicator,
+    PendingResult,
+    dedup_scope,
+)
+from src.trace_deidentifier.anonymizer.exceptions import AnonymizationError
+from src.trace_deidentifier.anonymizer.idempotency import IdempotencyMarker
+from src.trace_deidentifier.anonymizer.patch import PatchRecorder
+from src.trace_deidentifier.anonymizer.prescreen import PrescreenOutcome
+from src.trace_deidentifier.anonymizer.report import AnonymizationReport
+from src.trace_deidentifier.anonymizer.result_cache import ResultCache
+from src.trace_deidentifier.api.dependencies import (
+    get_anonymizer,
+    get_deduplicator,
+    get_idempotency_marker,
+    get_micro_batcher,
+    get_result_cache,
+    get_time_slicer,
+)
+from src.trace_deidentifier.api.micro_batching import MicroBatcher
 from src.trace_deidentifier.api.schemas import (
+    JSON_PATCH_MEDIA_TYPE,
+    AnonymizeBatchPatchResponseModel,
+    AnonymizeBatchRequestModel,
+    AnonymizeBatchResponseModel,
     AnonymizeTraceRequestModel,
     AnonymizeTraceResponseModel,
+    ResponseFormat,
 )
+from src.trace_deidentifier.api.time_slicing import TimeSlicer
+from src.trace_deidentifier.common.models.trace import Trace
 
 router = APIRouter(prefix="/anonymize")
 
 
+def _wants_patch(request: Request, output: ResponseFormat | None) -> bool:
+    """
+    Check whether the client asked for JSON Patches rather than whole traces.
+
+    :param request: The request, whose Accept header may ask for JSON Patches
+    :param output: The format asked for in the query, which takes precedence
+    :return: True if the response must hold JSON Patches
+    """
+    if output is not None:
+        return output == ResponseFormat.PATCH
+    return JSON_PATCH_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _reuse_results(  # noqa: PLR0913
+    *,
+    marker: IdempotencyMarker | None,
+    deduplicator: BatchDeduplicator | None,
+    traces: list[Trace],
+    keys: list[str],
+    reports: list[AnonymizationReport | None],
+    patch: bool,
+) -> tuple[list[int], dict[int, int]]:
+    """
+    Give the traces of a batch the result of an identical trace, or of their marker.
+
+    Traces left to anonymize are given a placeholder in the deduplicator, so
+    their duplicates in the batch are found.
+
+    :param marker: The idempotency marker of the rule set, if enabled
+    :param deduplicator: The deduplicator of the batch, if enabled
+    :param traces: The traces of the batch
+    :param keys: The content hash of each trace, empty without deduplicator
+    :param reports: The report of each trace, set for the traces given a result
+    :param patch: Whether the reports must hold JSON Patches
+    :return: The index of each trace to anonymize, and the index of the trace
+        to anonymize whose result each duplicate gets, by index of the duplicate
+    """
+    pending: list[int] = []
+    duplicates: dict[int, int] = {}
+    for index, trace in enumerate(traces):
+        duplicate = deduplicator.get(keys[index]) if deduplicator else None
+        if isinstance(duplicate, PendingResult):
+            duplicates[index] = duplicate.index
+        elif duplicate is not None:
+            trace.data, reports[index] = duplicate
+        elif marker is not None and marker.verify(trace.data):
+            reports[index] = _marked_report(trace=trace, patch=patch)
+        else:
+            pending.append(index)
+            if deduplicator:
+                deduplicator.put(keys[index], PendingResult(index=index))
+    return pending, duplicates
+
+
+def _remember(
+    deduplicator: BatchDeduplicator,
+    key: str,
+    trace: Trace,
+    result: AnonymizationReport | AnonymizationError,
+) -> None:
+    """
+    Keep the result of a trace for its duplicates, unless it must not be reused.
+
+    :param deduplicator: The deduplicator of the batch
+    :param key: The content hash of the trace, before anonymization
+    :param trace: The anonymized trace
+    :param result: The report of the trace, or the error that stopped it
+    """
+    if isinstance(result, AnonymizationError) or result.deadline_exceeded:
+        deduplicator.discard(key)
+    else:
+        deduplicator.put(key, (trace.data, result))
+
+
+def _marked_report(trace: Trace, patch: bool) -> AnonymizationReport:
+    """
+    Build the report of a trace already anonymized by the rule set.
+
+    :param trace: The trace, holding a valid marker of the rule set
+    :param patch: Whether the report must hold a JSON Patch, then empty
+    :return: The report, telling nothing was scanned nor changed
+    """
+    return AnonymizationReport(
+        prescreen=PrescreenOutcome.SKIPPED,
+        patch=PatchRecorder(root=trace.data) if patch else None,
+    )
+
+
+async def _anonymize(  # noqa: PLR0913
+    *,
+    anonymizer: Anonymizer,
+    marker: IdempotencyMarker | None,
+    cache: ResultCache | None,
+    batcher: MicroBatcher | None,
+    trace: Trace,
+    raw: bytes | None,
+    patch: bool,
+) -> AnonymizationReport:
+    """
+    Anonymize a trace and stamp it, unless it holds a valid marker of the rule set.
+
+    The result cache is not used for JSON Patches, which are recorded while the
+    strategies change the trace. A trace whose detection was targeted is not
+    stamped, as fields left out of the scan may still hold sensitive values.
+
+    :param anonymizer: The anonymizer to use
+    :param marker: The idempotency marker of the rule set, if enabled
+    :param cache: The persistent result cache, if enabled
+    :param batcher: The micro-batcher of concurrent traces, None to anonymize the
+        trace on its own
+    :param trace: The trace to anonymize
+    :param raw: The JSON text the trace data was parsed from, to prescreen it
+    :param patch: Whether to record the changes as a JSON Patch, in the report
+    :return: The report of what was done to the trace
+    :raises AnonymizationError: If the anonymization process fails
+    """
+    if marker is not None and marker.verify(trace.data):
+        return _marked_report(trace=trace, patch=patch)
+    if batcher is not None:
+        report = await batcher.anonymize(
+            anonymizer=anonymizer,
+            cache=cache,
+            trace=trace,
+            raw=raw,
+            patch=patch,
+        )
+    elif cache is not None and not patch:
+        report = cache.anonymize(anonymizer=anonymizer, trace=trace, raw=raw)
+    else:
+        report = anonymizer.anonymize(trace=trace, raw=raw, patch=patch)
+    if marker is not None and not report.targeted:
+        marker.stamp(data=trace.data, patch=report.patch)
+        report.changed = True
+    return report
+
+
+async def _anonymize_batch(  # noqa: PLR0913
+    *,
+    anonymizer: Anonymizer,
+    marker: IdempotencyMarker | None,
+    cache: ResultCache | None,
+    deduplicator: BatchDeduplicator | None,
+    slicer: TimeSlicer | None,
+    traces: list[Trace],
+    patch: bool,
+) -> list[AnonymizationReport]:
+    """
+    Anonymize the traces of a batch together, and stamp them, as _anonymize does.
+
+    A trace identical to an earlier one of the batch gets its result. Other
+    traces are anonymized together, strategy by strategy, unless they hold a
+    valid marker of the rule set, in chunks letting other requests run between
+    them when a slicer is given.
+
+    :param anonymizer: The anonymizer to use
+    :param marker: The idempotency marker of the rule set, if enabled
+    :param cache: The persistent result cache, if enabled
+    :param deduplicator: The deduplicator of the batch, if enabled
+    :param slicer: The slicer of the processing, None to process it at once
+    :param traces: The traces to anonymize
+    :param patch: Whether to record the changes as JSON Patches, in the reports
+    :return: The report of each trace
+    :raises AnonymizationError: If the anonymization of a trace fails, the first
+        error of the batch
+    """
+    reports: list[AnonymizationReport | None] = [None] * len(traces)
+    keys = [deduplicator.key(trace.data) for trace in traces] if deduplicator else []
+    pending, duplicates = _reuse_results(
+        marker=marker,
+        deduplicator=deduplicator,
+        traces=traces,
+        keys=keys,
+        reports=reports,
+        patch=patch,
+    )
+    batch = [traces[index] for index in pending]
+
+    def process(
+        chunk: Sequence[Trace],
+    ) -> list[AnonymizationReport | AnonymizationError]:
+        """
+        Anonymize a chunk of the pending traces together.
+
+        :param chunk: The traces of the chunk
+        :return: The report of each trace, or the error that stopped it
+        """
+        if cache is not None and not patch:
+            return cache.anonymize_batch(anonymizer=anonymizer, traces=chunk)
+        return anonymizer.anonymize_batch(traces=chunk, patch=patch)
+
+    results = (
+        await slicer.run(items=batch, process=process) if slicer else process(batch)
+    )
+    for index, result in zip(pending, results, strict=True):
+        if (
+            isinstance(result, AnonymizationReport)
+            and marker is not None
+            and not result.targeted
+        ):
+            marker.stamp(data=traces[index].data, patch=result.patch)
+            result.changed = True
+        reports[index] = result
+        if deduplicator:
+            _remember(
+                deduplicator=deduplicator,
+                key=keys[index],
+                trace=traces[index],
+                result=result,
+            )
+    error = next((r for r in results if isinstance(r, AnonymizationError)), None)
+    if error is not None:
+        raise error
+
+    for index, first in duplicates.items():
+        if reports[first].deadline_exceeded:
+            reports[index] = await _anonymize(
+                anonymizer=anonymizer,
+                marker=marker,
+                cache=cache,
+                batcher=None,
+                trace=traces[index],
+                raw=None,
+                patch=patch,
+            )
+        else:
+            traces[index].data, reports[index] = traces[first].data, reports[first]
+    return reports
+
+
+async def _is_echoable(request: Request) -> bool:
+    """
+    Check whether the request body has the exact shape of the response.
+
+    Fields ignored by the request model would be sent back with the body, so it
+    is only echoed when it holds nothing but the trace data.
+
+    :param request: The request, whose JSON body was already parsed by FastAPI
+    :return: True if the body can be returned as the response
+    """
+    payload = await request.json()
+    return (
+        isinstance(payload, dict)
+        and payload.keys() == {"trace"}
+        and isinstance(payload["trace"], dict)
+        and payload["trace"].keys() == {"data"}
+    )
+
+
 @router.post(
     "",
     tags=["Trace anonymization"],
-    description="Anonymize an input trace.",
+    description=(
+        "Anonymize an input trace. With `output=patch`, or an Accept header of "
+        f"`{JSON_PATCH_MEDIA_TYPE}`, the response is a JSON Patch turning the input "
+        "trace data into the anonymized one."
+    ),
     status_code=200,
+    response_model=AnonymizeTraceResponseModel,
 )
-async def anonymize_trace(
+async def anonymize_trace(  # noqa: PLR0913
+    request: Request,
     query: AnonymizeTraceRequestModel,
+    *,
+    output: ResponseFormat | None = None,
     anonymizer: Anonymizer = Depends(get_anonymizer),
-) -> AnonymizeTraceResponseModel:
+    marker: IdempotencyMarker | None = Depends(get_idempotency_marker),
+    cache: ResultCache | None = Depends(get_result_cache),
+    batcher: MicroBatcher | None = Depends(get_micro_batcher),
+) -> AnonymizeTraceResponseModel | Response:
     """
     Anonymize a trace by applying configured anonymization strategies.
 
+    The request body is handed to the anonymizer so detection can be prescreened
+    on it, and sent back as is when the trace needs no change at all, or was
+    already anonymized by the same rule set. When micro-batching is enabled, the
+    trace is anonymized together with those of concurrent requests.
+
+    :param request: The FastAPI request, holding the raw body
     :param query: The request containing the trace to anonymize
+    :param output: Form of the anonymized trace, defaults to the Accept header
     :param anonymizer: The anonymizer instance to use (injected by FastAPI)
-    :returns: The response containing the anonymized trace
+    :param marker: The idempotency marker of the rule set, None if disabled
+        (injected by FastAPI)
+    :param cache: The persistent result cache, None if disabled (injected by FastAPI)
+    :param batcher: The micro-batcher of concurrent traces, None if disabled
+        (injected by FastAPI)
+    :returns: The response containing the anonymized trace, or its JSON Patch
     :raises AnonymizationError: If the anonymization process fails
     """
+    body = await request.body()
     input_trace = query.trace
-    anonymizer.anonymize(trace=input_trace)
+    patch = _wants_patch(request=request, output=output)
+    report = await _anonymize(
+        anonymizer=anonymizer,
+        marker=marker,
+        cache=cache,
+        batcher=batcher,
+        trace=input_trace,
+        raw=body,
+        patch=patch,
+    )
+    if patch:
+        return JSONResponse(
+            content=report.patch.operations,
+            media_type=JSON_PATCH_MEDIA_TYPE,
+        )
+    if report.unchanged and await _is_echoable(request):
+        return Response(content=body, media_type="application/json")
     return AnonymizeTraceResponseModel(trace=input_trace)
+
+
+@router.post(
+    "/batch",
+    tags=["Trace anonymization"],
+    description=(
+        "Anonymize a batch of input traces. Identical traces of the batch are "
+        "anonymized once. With `output=patch`, or an Accept header of "
+        f"`{JSON_PATCH_MEDIA_TYPE}`, the response holds a JSON Patch for each trace "
+        "instead of the anonymized trace."
+    ),
+    status_code=200,
+    response_model=AnonymizeBatchResponseModel | AnonymizeBatchPatchResponseModel,
+)
+async def anonymize_batch(  # noqa: PLR0913
+    request: Request,
+    query: AnonymizeBatchRequestModel,
+    *,
+    output: ResponseFormat | None = None,
+    anonymizer: Anonymizer = Depends(get_anonymizer),
+    marker: IdempotencyMarker | None = Depends(get_idempotency_marker),
+    cache: ResultCache | None = Depends(get_result_cache),
+    deduplicator: BatchDeduplicator | None = Depends(get_deduplicator),
+    slicer: TimeSlicer | None = Depends(get_time_slicer),
+) -> AnonymizeBatchResponseModel | AnonymizeBatchPatchResponseModel:
+    """
+    Anonymize a batch of traces by applying configured anonymization strategies.
+
+    Traces are anonymized together, strategy by strategy. A trace identical to an
+    earlier one of the batch gets its result, and strings repeated across traces
+    are scanned once by each detection strategy. Traces are anonymized in
+    chunks of about a time slice, so other requests of the worker run between
+    them.
+
+    :param request: The FastAPI request, holding the Accept header
+    :param query: The request containing the traces to anonymize
+    :param output: Form of the anonymized traces, defaults to the Accept header
+    :param anonymizer: The anonymizer instance to use (injected by FastAPI)
+    :param marker: The idempotency marker of the rule set, None if disabled
+        (injected by FastAPI)
+    :param cache: The persistent result cache, None if disabled (injected by FastAPI)
+    :param deduplicator: The deduplicator of the batch, None if disabled
+        (injected by FastAPI)
+    :param slicer: The slicer of the processing, None if disabled (injected by
+        FastAPI)
+    :returns: The response containing the anonymized traces, or their JSON Patches
+    :raises AnonymizationError: If the anonymization of a trace fails
+    """
+    patch = _wants_patch(request=request, output=output)
+    with dedup_scope(deduplicator):
+        reports = await _anonymize_batch(
+            anonymizer=anonymizer,
+            marker=marker,
+            cache=cache,
+            deduplicator=deduplicator,
+            slicer=slicer,
+            traces=query.traces,
+            patch=patch,
+        )
+    if patch:
+        return AnonymizeBatchPatchResponseModel(
+            patches=[report.patch.operations for report in reports],
+        )
+    return AnonymizeBatchResponseModel(traces=query.traces)
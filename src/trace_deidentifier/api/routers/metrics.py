@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.trace_deidentifier.common.metrics import REGISTRY
+
+router = APIRouter(prefix="/metrics")
+
+
+@router.get(
+    "",
+    tags=["Monitoring"],
+    description="Expose service metrics in the Prometheus text format.",
+    status_code=200,
+    response_class=PlainTextResponse,
+)
+async def get_metrics() -> str:
+    """
+    Render the metrics of the current process.
+
+    :returns: The metrics, in the Prometheus text exposition format
+    """
+    return REGISTRY.render()
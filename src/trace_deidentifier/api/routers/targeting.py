@@ -0,0 +1,33 @@
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.params import Depends
+
+from src.trace_deidentifier.anonymizer.adaptive import AdaptiveTargeting
+from src.trace_deidentifier.api.dependencies import get_adaptive_targeting
+
+router = APIRouter(prefix="/targeting")
+
+
+@router.get(
+    "",
+    tags=["Monitoring"],
+    description="Expose the fields learned per statement shape by adaptive targeting.",
+    status_code=200,
+)
+async def get_targeting(
+    targeting: AdaptiveTargeting | None = Depends(get_adaptive_targeting),
+) -> dict[str, dict[str, Any]]:
+    """
+    Render the learned state of adaptive targeting in the current process.
+
+    :param targeting: The learned state (injected by FastAPI)
+    :returns: The number of full scans and the learned paths of each shape
+    :raises HTTPException: If adaptive targeting is disabled
+    """
+    if targeting is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Adaptive targeting is disabled",
+        )
+    return targeting.snapshot()
@@ -1,7 +1,20 @@
+from enum import StrEnum
+from typing import Any
+
 from pydantic import BaseModel, Field
 
 from src.trace_deidentifier.common.models.trace import Trace
 
+# Media type of RFC 6902 JSON Patch documents
+JSON_PATCH_MEDIA_TYPE = "application/json-patch+json"
+
+
+class ResponseFormat(StrEnum):
+    """Form of the anonymized traces in responses."""
+
+    TRACE = "trace"  # The whole anonymized trace
+    PATCH = "patch"  # A JSON Patch turning the input trace data into the anonymized one
+
 
 class AnonymizeTraceRequestModel(BaseModel):
     """
@@ -69,3 +82,39 @@ class AnonymizeTraceResponseModel(BaseModel):
             },
         ],
     )
+
+
+class AnonymizeBatchRequestModel(BaseModel):
+    """
+    Model for batch anonymization request.
+
+    Attributes:
+        traces (list[Trace]): The input traces, in xAPI format
+    """
+
+    traces: list[Trace] = Field(description="Input traces")
+
+
+class AnonymizeBatchResponseModel(BaseModel):
+    """
+    Model for batch anonymization response.
+
+    Attributes:
+        traces (list[Trace]): The anonymized traces, in the order of the request
+    """
+
+    traces: list[Trace] = Field(description="Anonymized output traces")
+
+
+class AnonymizeBatchPatchResponseModel(BaseModel):
+    """
+    Model for batch anonymization response, as JSON Patches.
+
+    Attributes:
+        patches (list[list[dict[str, Any]]]): The JSON Patch of each trace data,
+            in the order of the request
+    """
+
+    patches: list[list[dict[str, Any]]] = Field(
+        description="JSON Patch of each input trace data",
+    )
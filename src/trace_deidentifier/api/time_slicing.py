@@ -0,0 +1,100 @@
+import asyncio
+import time
+from collections.abc import Callable, Sequence
+from functools import cache
+from typing import Any
+
+# Items of the first chunk, before the time of an item is known
+INITIAL_CHUNK_SIZE = 8
+
+# Most items of a chunk, however fast they are
+MAX_CHUNK_SIZE = 1024
+
+# Weight of the last chunk in the running estimate of the time of an item
+SMOOTHING = 0.3
+
+
+class TimeSlicer:
+    """
+    Process a batch in chunks lasting about a time slice, yielding to the event loop between chunks.
+
+    Batches are processed inline by the async handlers, so a large batch would
+    hold the event loop of the worker, and every other request it serves, until
+    done. Processing it in chunks lets other requests run between them, so they
+    wait for at most about a time slice. The size of the chunks follows a running
+    estimate of the time of an item, shared by the batches of the process.
+    """
+
+    def __init__(
+        self,
+        time_slice: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the slicer.
+
+        :param time_slice: Target duration of a chunk, in seconds
+        :param clock: Monotonic clock, in seconds
+        """
+        self.time_slice = time_slice
+        self.clock = clock
+        self.item_time: float | None = None
+
+    @property
+    def chunk_size(self) -> int:
+        """
+        Get the number of items of the next chunk.
+
+        :return: The items expected to be processed within the time slice
+        """
+        if not self.item_time:
+            return INITIAL_CHUNK_SIZE
+        return max(1, min(MAX_CHUNK_SIZE, int(self.time_slice / self.item_time)))
+
+    async def run(
+        self,
+        items: Sequence[Any],
+        process: Callable[[Sequence[Any]], list[Any]],
+    ) -> list[Any]:
+        """
+        Process items chunk by chunk, letting other tasks run between chunks.
+
+        :param items: The items to process
+        :param process: Processes a chunk of items, giving a result per item
+        :return: The result of each item, in order
+        """
+        results: list[Any] = []
+        start = 0
+        while start < len(items):
+            chunk = items[start : start + self.chunk_size]
+            began = self.clock()
+            results.extend(process(chunk))
+            self._learn(elapsed=self.clock() - began, count=len(chunk))
+            start += len(chunk)
+            if start < len(items):
+                await asyncio.sleep(0)
+        return results
+
+    def _learn(self, elapsed: float, count: int) -> None:
+        """
+        Update the estimate of the time of an item with a processed chunk.
+
+        :param elapsed: Time taken by the chunk, in seconds
+        :param count: Number of items of the chunk
+        """
+        item_time = elapsed / count
+        if self.item_time is None:
+            self.item_time = item_time
+        else:
+            self.item_time += SMOOTHING * (item_time - self.item_time)
+
+
+@cache
+def load_time_slicer(time_slice: float) -> TimeSlicer:
+    """
+    Create the slicer once per process, so every batch shares its estimate.
+
+    :param time_slice: Target duration of a chunk, in seconds
+    :return: The slicer
+    """
+    return TimeSlicer(time_slice=time_slice)
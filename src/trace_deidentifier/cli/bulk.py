@@ -0,0 +1,644 @@
+import argparse
+import itertools
+import json
+import multiprocessing.util
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TextIO
+
+from logger import LoguruLogger
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.dedup import (
+    BatchDeduplicator,
+    PendingResult,
+    dedup_scope,
+)
+from src.trace_deidentifier.anonymizer.exceptions import AnonymizationError
+from src.trace_deidentifier.anonymizer.factory import (
+    build_anonymizer,
+    load_adaptive_targeting,
+)
+from src.trace_deidentifier.anonymizer.result_cache import ResultCache
+from src.trace_deidentifier.anonymizer.threaded import ThreadedAnonymizer
+from src.trace_deidentifier.common.exceptions import InvalidTraceError
+from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.utils import utils_json
+from src.trace_deidentifier.infrastructure.config.settings import Settings
+
+from .pool import SharedMemoryPool
+
+# Lines anonymized together by default
+DEFAULT_BATCH_SIZE = 256
+
+
+@dataclass(slots=True)
+class BulkStats:
+    """
+    Counts of the statements of a bulk run.
+
+    :param statements: Statements read, blank lines excluded
+    :param failed: Statements that could not be parsed or anonymized, left out
+    :param skipped: Statements given their previous output, since no rule change
+        could affect them
+    """
+
+    statements: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class StatementOutput:
+    """
+    Output of the anonymization of a statement.
+
+    :param text: The JSON text of the anonymized statement
+    :param applied: Names of the strategies that changed the statement, None if
+        unknown, as for outputs read from the result cache
+    :param final: Whether the output holds for the rule set, False when the
+        processing deadline was exceeded or detection was targeted
+    """
+
+    text: str
+    applied: list[str] | None
+    final: bool = True
+
+
+class PreviousRecords:
+    """
+    Records written by an earlier run in records mode, read along the statements they were made from.
+
+    The records of a statement are reused when the statement is unchanged, and
+    no rule change may affect it.
+    """
+
+    def __init__(self, source: TextIO) -> None:
+        """
+        Read the header of the records.
+
+        :param source: The records, as written in records mode
+        :raises ValueError: If the source does not start with a records header
+        """
+        self._lines = (line for line in source if line.strip())
+        header = json.loads(next(self._lines, "null"))
+        if not isinstance(header, dict) or "rules" not in header:
+            raise ValueError("Previous output is not a records file")
+        self.fingerprint: str = header["fingerprint"]
+        self.rules: dict[str, Any] = header["rules"]
+        self.reused = 0
+
+    def next_record(self) -> dict[str, Any] | None:
+        """
+        Read the record of the next statement.
+
+        :return: The record, or None if there is none or it is not valid JSON
+        """
+        line = next(self._lines, None)
+        try:
+            return json.loads(line) if line is not None else None
+        except ValueError:
+            return None
+
+    def reuse(
+        self,
+        record: dict[str, Any] | None,
+        anonymizer: Anonymizer,
+        data: Any,
+        key: str,
+    ) -> StatementOutput | None:
+        """
+        Get the previous output of a statement, if the rules of the anonymizer give the same.
+
+        :param record: The record of the statement, as read by next_record
+        :param anonymizer: The anonymizer of the run
+        :param data: The statement data, as received
+        :param key: The content hash of the statement
+        :return: The previous output, or None if the statement must be anonymized
+        """
+        if (
+            record is None
+            or record.get("key") != key
+            or record.get("fingerprint") != self.fingerprint
+            or "data" not in record
+        ):
+            return None
+        applied = record.get("applied")
+        if self.fingerprint != anonymizer.fingerprint and anonymizer.may_affect(
+            data=data,
+            previous_rules=self.rules,
+            applied=self.rules.keys() if applied is None else applied,
+        ):
+            return None
+        self.reused += 1
+        return StatementOutput(
+            text=utils_json.dump_compact(record["data"]),
+            applied=applied,
+        )
+
+
+class BulkAnonymizer:
+    """
+    Anonymize JSON Lines streams of statements, in chunks of lines.
+
+    Each line holds the data of a trace, and gives a line with the anonymized
+    data, in order. Lines that cannot be anonymized are logged and left out, so
+    no statement is written as received. The statements of a chunk are
+    anonymized together, strategy by strategy, and share their equal keys and
+    string values in memory. With a pool of worker processes, the statements
+    to anonymize of a chunk are split between the workers, which parse and
+    validate them. With threads, they are split between the threads instead,
+    which pays off on free-threaded builds of Python.
+
+    In records mode, the output starts with a header holding the fingerprint
+    and the rules of the rule set, and each statement gives a record with its
+    content hash, the fingerprint, the names of the strategies that changed it
+    and its anonymized data. Records of statements that cannot be anonymized
+    hold the error instead, and those of statements past their processing
+    deadline have no fingerprint, so records stay aligned with the statements
+    and are only reused when they hold for a rule set.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        anonymizer: Anonymizer,
+        deduplicator: BatchDeduplicator | None = None,
+        cache: ResultCache | None = None,
+        *,
+        records: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        intern: bool = True,
+        pool: SharedMemoryPool | None = None,
+        threaded: ThreadedAnonymizer | None = None,
+    ) -> None:
+        """
+        Initialize the bulk anonymizer.
+
+        :param anonymizer: The anonymizer to use
+        :param deduplicator: The deduplicator of the streams, None to disable it
+        :param cache: The persistent result cache, None to disable it
+        :param records: Whether to write records instead of anonymized statements
+        :param batch_size: Number of lines anonymized together
+        :param intern: Whether the statements of a chunk share their equal keys and
+            string values, for a smaller chunk in memory
+        :param pool: The worker processes anonymizing the statements, None to
+            anonymize them in this process
+        :param threaded: The threads anonymizing the statements in this process,
+            with the same anonymizer, None to anonymize them in the calling thread
+        """
+        self.anonymizer = anonymizer
+        self.deduplicator = deduplicator
+        self.cache = cache
+        self.records = records
+        self.batch_size = batch_size
+        self._decoder = utils_json.InterningDecoder() if intern else None
+        self.pool = pool
+        self.threaded = threaded
+
+    def run(
+        self,
+        source: TextIO,
+        target: TextIO,
+        previous: PreviousRecords | None = None,
+    ) -> BulkStats:
+        """
+        Anonymize a stream of statements.
+
+        :param source: The statements to anonymize, one JSON object per line
+        :param target: Where the anonymized statements are written, one per line
+        :param previous: Records of an earlier run over the same statements, whose
+            outputs are reused when no rule change may affect them, in records mode
+        :return: The counts of the run
+        :raises ValueError: If previous records are given outside of records mode
+        """
+        if previous and not self.records:
+            raise ValueError("Previous records are only reused in records mode")
+        stats = BulkStats()
+        if self.records:
+            target.write(
+                utils_json.dump_compact(
+                    {
+                        "fingerprint": self.anonymizer.fingerprint,
+                        "rules": self.anonymizer.rules,
+                    },
+                )
+                + "\n",
+            )
+        lines = (
+            (number, line)
+            for number, line in enumerate(source, start=1)
+            if line.strip()
+        )
+        with dedup_scope(self.deduplicator):
+            for chunk in itertools.batched(lines, self.batch_size, strict=False):
+                stats.statements += len(chunk)
+                results = self._anonymize_chunk(
+                    lines=[line for _, line in chunk],
+                    previous=previous,
+                )
+                for (number, _), (key, output) in zip(chunk, results, strict=True):
+                    if isinstance(output, StatementOutput):
+                        target.write(self._format(key=key, output=output))
+                        continue
+                    stats.failed += 1
+                    self.anonymizer.logger.warning(
+                        "Statement left out",
+                        {"line": number, "error": str(output)},
+                    )
+                    if self.records:
+                        target.write(
+                            utils_json.dump_compact({"key": key, "error": str(output)})
+                            + "\n",
+                        )
+                if self._decoder:
+                    self._decoder.clear()
+        stats.skipped = previous.reused if previous else 0
+        return stats
+
+    def _anonymize_chunk(
+        self,
+        lines: Sequence[str],
+        previous: PreviousRecords | None,
+    ) -> list[tuple[str | None, StatementOutput | Exception]]:
+        """
+        Anonymize the statements of a chunk together, except those with a known output.
+
+        :param lines: The JSON text of each statement
+        :param previous: Records of an earlier run over the same statements, if any
+        :return: The content hash of each statement, if computed, and its output or
+            the error that left it out
+        """
+        keys: list[str | None] = [None] * len(lines)
+        results: list[StatementOutput | Exception | None] = [None] * len(lines)
+        pending: list[tuple[int, Trace | None]] = []
+        duplicates: dict[int, int] = {}
+        for index, line in enumerate(lines):
+            record = previous.next_record() if previous else None
+            try:
+                keys[index], found = self._look_up(
+                    line=line,
+                    record=record,
+                    previous=previous,
+                )
+            except (ValueError, InvalidTraceError) as e:
+                results[index] = e
+                continue
+            if found is None or isinstance(found, Trace):
+                pending.append((index, found))
+                if self.deduplicator:
+                    self.deduplicator.put(keys[index], PendingResult(index=index))
+            elif isinstance(found, PendingResult):
+                duplicates[index] = found.index
+            else:
+                results[index] = found
+        self._anonymize_traces(pending=pending, lines=lines, keys=keys, results=results)
+
+        # Duplicates of a statement past its deadline are anonymized on their own
+        retried = []
+        for index, first in duplicates.items():
+            output = results[first]
+            if isinstance(output, StatementOutput) and not output.final:
+                retried.append((index, self._trace(lines[index])))
+            else:
+                results[index] = output
+        self._anonymize_traces(pending=retried, lines=lines, keys=keys, results=results)
+        return list(zip(keys, results, strict=True))
+
+    def _look_up(
+        self,
+        line: str,
+        record: dict[str, Any] | None,
+        previous: PreviousRecords | None,
+    ) -> tuple[str | None, StatementOutput | PendingResult | Trace | None]:
+        """
+        Parse a statement, and look up its output.
+
+        Outputs are looked up in the previous records first, then in the
+        deduplicator, then in the result cache. With the pool and nothing to
+        look up, the statement is left to the workers, which parse it and report
+        it if invalid.
+
+        :param line: The JSON text of the statement
+        :param record: The previous record of the statement, if any
+        :param previous: Records of an earlier run over the same statements, if any
+        :return: The content hash of the statement, None without deduplicator,
+            result cache nor records, and its output, the placeholder of an
+            identical statement of the chunk, or the trace to anonymize, None
+            when the pool validates it
+        :raises ValueError: If the line is not valid JSON
+        :raises InvalidTraceError: If the statement is not a valid xAPI trace
+        """
+        keyed = bool(self.records or self.deduplicator or self.cache)
+        if self.pool and not keyed:
+            return None, None
+        data = self._parse(line)
+        key = utils_json.content_hash(data) if keyed else None
+        if previous and (
+            output := previous.reuse(
+                record=record,
+                anonymizer=self.anonymizer,
+                data=data,
+                key=key,
+            )
+        ):
+            return key, output
+        if self.deduplicator and (found := self.deduplicator.get(key)) is not None:
+            return key, found
+        if self.cache and (
+            text := self.cache.get(key=key, fingerprint=self.anonymizer.fingerprint)
+        ):
+            output = StatementOutput(text=text, applied=None)
+            if self.deduplicator:
+                self.deduplicator.put(key, output)
+            return key, output
+        return key, None if self.pool else Trace.model_validate({"data": data})
+
+    def _trace(self, line: str) -> Trace | None:
+        """
+        Parse the trace of a statement to anonymize again.
+
+        :param line: The JSON text of the statement
+        :return: The trace, None when the pool parses it
+        """
+        if self.pool:
+            return None
+        return Trace.model_validate({"data": self._parse(line)})
+
+    def _parse(self, line: str) -> Any:
+        """
+        Parse the JSON text of a statement, sharing strings with the others of the chunk.
+
+        :param line: The JSON text
+        :return: The statement data
+        :raises ValueError: If the line is not valid JSON
+        """
+        if self._decoder:
+            return self._decoder.loads(line)
+        return json.loads(line)
+
+    def _anonymize_traces(
+        self,
+        pending: Sequence[tuple[int, Trace | None]],
+        lines: Sequence[str],
+        keys: Sequence[str | None],
+        results: list[StatementOutput | Exception | None],
+    ) -> None:
+        """
+        Anonymize traces of a chunk together, and keep their outputs for later ones.
+
+        :param pending: The position of each trace in the chunk, and the trace,
+            None when the pool parses it
+        :param lines: The JSON text of each statement of the chunk
+        :param keys: The content hash of each statement of the chunk, if computed
+        :param results: The output of each statement of the chunk, or its error,
+            set for the traces anonymized
+        """
+        if not pending:
+            return
+        if self.pool:
+            outputs = [
+                output
+                if isinstance(output, AnonymizationError)
+                else StatementOutput(
+                    text=output.text,
+                    applied=output.applied,
+                    final=output.final,
+                )
+                for output in self.pool.anonymize(
+                    lines=[lines[index] for index, _ in pending],
+                )
+            ]
+        else:
+            outputs = self._anonymize_locally(pending=pending, lines=lines)
+        for (index, _), output in zip(pending, outputs, strict=True):
+            key = keys[index]
+            results[index] = output
+            if isinstance(output, AnonymizationError) or not output.final:
+                if self.deduplicator:
+                    self.deduplicator.discard(key)
+                continue
+            if self.cache:
+                self.cache.put(
+                    key=key,
+                    fingerprint=self.anonymizer.fingerprint,
+                    output=output.text,
+                )
+            if self.deduplicator:
+                self.deduplicator.put(key, output)
+
+    def _anonymize_locally(
+        self,
+        pending: Sequence[tuple[int, Trace]],
+        lines: Sequence[str],
+    ) -> list[StatementOutput | AnonymizationError]:
+        """
+        Anonymize traces of a chunk together, in this process.
+
+        :param pending: The position of each trace in the chunk, and the trace
+        :param lines: The JSON text of each statement of the chunk
+        :return: The output of each trace, or the error that left it out
+        """
+        anonymizer = self.anonymizer
+        reports = (self.threaded or anonymizer).anonymize_batch(
+            traces=[trace for _, trace in pending],
+            raws=[lines[index] for index, _ in pending],
+        )
+        return [
+            report
+            if isinstance(report, AnonymizationError)
+            else StatementOutput(
+                text=utils_json.dump_compact(trace.data),
+                applied=[name for name in anonymizer.rules if name in report.applied],
+                final=report.final,
+            )
+            for (_, trace), report in zip(pending, reports, strict=True)
+        ]
+
+    def _format(self, key: str | None, output: StatementOutput) -> str:
+        """
+        Format the line of a statement.
+
+        :param key: The content hash of the statement
+        :param output: The output of the statement
+        :return: The anonymized statement, or its record in records mode, with a
+            line break
+        """
+        if not self.records:
+            return output.text + "\n"
+        fingerprint = self.anonymizer.fingerprint if output.final else None
+        # The anonymized data is embedded as is, rather than parsed again
+        return (
+            f'{{"key":{json.dumps(key)},"fingerprint":{json.dumps(fingerprint)},'
+            f'"applied":{json.dumps(output.applied)},"data":{output.text}}}\n'
+        )
+
+
+def _build_worker_anonymizer() -> Anonymizer:
+    """
+    Build the anonymizer of a worker process, with the settings of the service.
+
+    :return: The anonymizer
+    """
+    config = Settings()
+    logger = LoguruLogger(level=config.get_log_level())
+    targeting = load_adaptive_targeting(config=config, logger=logger)
+    if targeting is not None:
+        # Worker processes exit without running atexit handlers, but with their
+        # multiprocessing finalizers
+        multiprocessing.util.Finalize(targeting, targeting.close, exitpriority=0)
+    return build_anonymizer(
+        config=config,
+        logger=logger,
+        adaptive_targeting=targeting,
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Anonymize a JSON Lines file of statements, with the strategies of the service.
+
+    :param argv: Command-line arguments, defaults to those of the process
+    :return: The exit status, 1 if any statement was left out
+    """
+    config = Settings()
+    parser = argparse.ArgumentParser(
+        description="Anonymize xAPI statements, one JSON object per line.",
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        type=argparse.FileType("r", encoding="utf-8"),
+        default=sys.stdin,
+        help="JSON Lines file of statements, defaults to the standard input",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=argparse.FileType("w", encoding="utf-8"),
+        default=sys.stdout,
+        help="JSON Lines file of anonymized statements, defaults to the standard output",
+    )
+    parser.add_argument(
+        "--dedup-window",
+        type=int,
+        default=config.get_dedup_window(),
+        help="Distinct statements whose results are kept for duplicates, 0 to disable",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Statements anonymized together, strategy by strategy",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Worker processes anonymizing the statements of each chunk",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help=(
+            "Threads anonymizing the statements of each chunk, for free-threaded "
+            "builds of Python"
+        ),
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=config.get_result_cache_file(),
+        help="SQLite file of the persistent result cache, defaults to no cache",
+    )
+    parser.add_argument(
+        "--records",
+        action="store_true",
+        help=(
+            "Write records with the rule-set fingerprint and the strategies that "
+            "changed each statement, to reprocess them when rules change"
+        ),
+    )
+    parser.add_argument(
+        "--previous",
+        type=argparse.FileType("r", encoding="utf-8"),
+        help=(
+            "Records of an earlier run over the same input: statements no rule "
+            "change may affect keep their previous output. Implies --records"
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.processes > 1 and args.threads > 1:
+        parser.error("--processes and --threads cannot be combined")
+
+    logger = LoguruLogger(level=config.get_log_level())
+    anonymizer = build_anonymizer(
+        config=config,
+        logger=logger,
+        adaptive_targeting=load_adaptive_targeting(config=config, logger=logger),
+    )
+    deduplicator = (
+        BatchDeduplicator(window=args.dedup_window) if args.dedup_window else None
+    )
+    cache = (
+        ResultCache(path=args.cache, max_size=config.get_result_cache_max_size())
+        if args.cache
+        else None
+    )
+    pool = (
+        SharedMemoryPool(factory=_build_worker_anonymizer, processes=args.processes)
+        if args.processes > 1
+        else None
+    )
+    threaded = (
+        ThreadedAnonymizer(anonymizer=anonymizer, threads=args.threads)
+        if args.threads > 1
+        else None
+    )
+    bulk = BulkAnonymizer(
+        anonymizer=anonymizer,
+        deduplicator=deduplicator,
+        cache=cache,
+        records=args.records or args.previous is not None,
+        batch_size=args.batch_size,
+        pool=pool,
+        threaded=threaded,
+    )
+    previous = None
+    if args.previous is not None:
+        try:
+            previous = PreviousRecords(source=args.previous)
+        except ValueError as e:
+            parser.error(f"{args.previous.name}: {e}")
+    with args.input as source, args.output as target:
+        stats = bulk.run(source=source, target=target, previous=previous)
+    if args.previous is not None:
+        args.previous.close()
+    if cache:
+        cache.close()
+    if pool:
+        pool.close()
+    if threaded:
+        threaded.close()
+    logger.info(
+        "Bulk anonymization done",
+        {
+            "statements": stats.statements,
+            "failed": stats.failed,
+            "skipped": stats.skipped,
+            "statement_dedup_ratio": (
+                deduplicator.stats.statement_ratio if deduplicator else 0.0
+            ),
+            "value_dedup_ratio": deduplicator.stats.value_ratio
+            if deduplicator
+            else 0.0,
+            "cache_hit_rate": cache.stats.hit_rate if cache else 0.0,
+        },
+    )
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
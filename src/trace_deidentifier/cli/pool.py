@@ -0,0 +1,244 @@
+import itertools
+import json
+import multiprocessing
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from types import TracebackType
+from typing import Self
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.exceptions import AnonymizationError
+from src.trace_deidentifier.common.exceptions import InvalidTraceError
+from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.utils import utils_json
+
+# Fewest statements handed to a worker, so that the round trip of a slice stays
+# small compared to its anonymization
+MIN_SLICE_SIZE = 16
+
+# Errors of the text, kept so that lone surrogates escaped in JSON round-trip
+_ENCODING_ERRORS = "surrogatepass"
+
+# Anonymizer of the worker process, built once by the pool initializer
+_worker: dict[str, Anonymizer] = {}
+
+
+@dataclass(frozen=True, slots=True)
+class PooledOutput:
+    """
+    Output of a statement anonymized by a worker process.
+
+    :param text: The JSON text of the anonymized statement
+    :param applied: Names of the strategies that changed the statement
+    :param final: Whether the output holds for the rule set, False when the
+        processing deadline was exceeded
+    """
+
+    text: str
+    applied: list[str]
+    final: bool
+
+
+class SharedMemoryPool:
+    """
+    Worker processes anonymizing statements received as JSON text in shared memory.
+
+    The statements of a call are written once in a shared memory segment, and
+    split into contiguous slices, one per worker. Each worker parses and
+    anonymizes its slice as a batch, and writes the outputs in a segment of its
+    own, so only segment names, offsets and lengths cross the process pipes,
+    rather than pickled statements. Segments are unlinked by the calling
+    process once read.
+    """
+
+    def __init__(self, factory: Callable[[], Anonymizer], processes: int) -> None:
+        """
+        Start the worker processes.
+
+        :param factory: Function building the anonymizer of each worker, which
+            must be importable by name, as workers are spawned
+        :param processes: Number of worker processes
+        """
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(factory,),
+        )
+
+    def anonymize(
+        self,
+        lines: Sequence[str],
+    ) -> list[PooledOutput | AnonymizationError]:
+        """
+        Anonymize statements in the worker processes.
+
+        :param lines: The JSON text of each statement, on a single line
+        :return: The output of each statement, or the error that left it out,
+            as an AnonymizationError holding its message
+        """
+        if not lines:
+            return []
+        encoded = [line.strip().encode("utf-8", _ENCODING_ERRORS) for line in lines]
+        # Offset of each line in the buffer, with that of the end of the buffer
+        starts = [0, *itertools.accumulate(len(line) + 1 for line in encoded)]
+        slices = max(1, min(self.processes, len(lines) // MIN_SLICE_SIZE))
+        bounds = [len(lines) * i // slices for i in range(slices + 1)]
+        buffer = b"\n".join(encoded)
+        segment = shared_memory.SharedMemory(create=True, size=max(len(buffer), 1))
+        try:
+            segment.buf[: len(buffer)] = buffer
+            futures = [
+                self._executor.submit(
+                    _anonymize_slice,
+                    segment.name,
+                    starts[first],
+                    starts[last] - starts[first] - 1,
+                )
+                for first, last in itertools.pairwise(bounds)
+            ]
+            outputs = []
+            for future in futures:
+                name, size = future.result()
+                outputs.extend(_read_outputs(name=name, size=size))
+        finally:
+            segment.close()
+            segment.unlink()
+        return outputs
+
+    def close(self) -> None:
+        """Stop the worker processes, once their pending slices are done."""
+        self._executor.shutdown()
+
+    def __enter__(self) -> Self:
+        """
+        Enter the context of the pool.
+
+        :return: The pool
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """
+        Stop the worker processes when leaving the context.
+
+        :param exc_type: Type of the exception raised in the context, if any
+        :param exc_value: Exception raised in the context, if any
+        :param traceback: Traceback of the exception, if any
+        """
+        self.close()
+
+
+def _init_worker(factory: Callable[[], Anonymizer]) -> None:
+    """
+    Build the anonymizer of a worker process.
+
+    :param factory: Function building the anonymizer
+    """
+    _worker["anonymizer"] = factory()
+
+
+def _anonymize_slice(name: str, offset: int, length: int) -> tuple[str, int]:
+    """
+    Anonymize a slice of statements, in a worker process.
+
+    :param name: Name of the shared memory segment holding the statements
+    :param offset: Offset of the slice in the segment
+    :param length: Length of the slice, in bytes
+    :return: The name of the segment holding the outputs, which the caller must
+        unlink, and their length in bytes
+    """
+    segment = shared_memory.SharedMemory(name=name, track=False)
+    try:
+        with segment.buf[offset : offset + length] as view:
+            lines = str(view, "utf-8", _ENCODING_ERRORS).split("\n")
+    finally:
+        segment.close()
+    text = _anonymize_lines(anonymizer=_worker["anonymizer"], lines=lines)
+    encoded = text.encode("utf-8", _ENCODING_ERRORS)
+    # Left to the caller, which unlinks it once read
+    output = shared_memory.SharedMemory(
+        create=True,
+        size=max(len(encoded), 1),
+        track=False,
+    )
+    output.buf[: len(encoded)] = encoded
+    output.close()
+    return output.name, len(encoded)
+
+
+def _anonymize_lines(anonymizer: Anonymizer, lines: Sequence[str]) -> str:
+    """
+    Anonymize statements as a batch, and format their outputs.
+
+    Each statement gives two lines: a header with the strategies that changed
+    it and whether its output is final, or with its error, then its anonymized
+    data, empty for an error.
+
+    :param anonymizer: The anonymizer to use
+    :param lines: The JSON text of each statement
+    :return: The outputs, without a final line break
+    """
+    errors: dict[int, str] = {}
+    pending: list[tuple[int, Trace]] = []
+    for index, line in enumerate(lines):
+        try:
+            pending.append((index, Trace.model_validate({"data": json.loads(line)})))
+        except (ValueError, InvalidTraceError) as e:
+            errors[index] = str(e)
+    reports = anonymizer.anonymize_batch(
+        traces=[trace for _, trace in pending],
+        raws=[lines[index] for index, _ in pending],
+    )
+    outputs = [""] * (len(lines) * 2)
+    for index, message in errors.items():
+        outputs[index * 2] = json.dumps({"error": message})
+    for (index, trace), report in zip(pending, reports, strict=True):
+        if isinstance(report, AnonymizationError):
+            outputs[index * 2] = json.dumps({"error": str(report)})
+            continue
+        outputs[index * 2] = json.dumps(
+            {
+                "applied": [
+                    name for name in anonymizer.rules if name in report.applied
+                ],
+                "final": report.final,
+            },
+        )
+        outputs[index * 2 + 1] = utils_json.dump_compact(trace.data)
+    return "\n".join(outputs)
+
+
+def _read_outputs(name: str, size: int) -> list[PooledOutput | AnonymizationError]:
+    """
+    Read the outputs written by a worker, and unlink their segment.
+
+    :param name: Name of the shared memory segment holding the outputs
+    :param size: Length of the outputs, in bytes
+    :return: The output of each statement of the slice, or its error
+    """
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        with segment.buf[:size] as view:
+            lines = str(view, "utf-8", _ENCODING_ERRORS).split("\n")
+    finally:
+        segment.close()
+        segment.unlink()
+    outputs: list[PooledOutput | AnonymizationError] = []
+    for header, text in itertools.batched(lines, 2, strict=True):
+        meta = json.loads(header)
+        if "error" in meta:
+            outputs.append(AnonymizationError(meta["error"]))
+        else:
+            outputs.append(
+                PooledOutput(text=text, applied=meta["applied"], final=meta["final"]),
+            )
+    return outputs
@@ -0,0 +1,123 @@
+import threading
+from collections.abc import Iterator, Sequence
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()) -> None:
+        """
+        Initialize the counter.
+
+        :param name: Metric name, in Prometheus format
+        :param description: Human-readable description of the metric
+        :param labels: Names of the labels splitting the counter
+        """
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Increment the counter.
+
+        :param amount: Value to add, must not be negative
+        :param labels: Value of each label of the counter
+        :raises ValueError: If the amount is negative or the labels don't match
+        """
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """
+        Get the current value of the counter.
+
+        :param labels: Value of each label of the counter
+        :return: The value, 0 if never incremented
+        :raises ValueError: If the labels don't match
+        """
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[dict[str, str], float]]:
+        """
+        Iterate over the values of the counter.
+
+        :return: An iterator over (labels, value) tuples
+        """
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield dict(zip(self.labels, key, strict=True)), value
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        """
+        Build the storage key of a set of label values.
+
+        :param labels: Value of each label of the counter
+        :return: The label values, in declaration order
+        :raises ValueError: If the labels don't match
+        """
+        if set(labels) != set(self.labels):
+            raise ValueError(
+                f"Metric {self.name} expects labels {list(self.labels)}, got {sorted(labels)}",
+            )
+        return tuple(str(labels[label]) for label in self.labels)
+
+
+class MetricsRegistry:
+    """In-process registry of metrics, rendered in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def counter(
+        self,
+        name: str,
+        description: str,
+        labels: Sequence[str] = (),
+    ) -> Counter:
+        """
+        Get a counter, creating it on first use.
+
+        :param name: Metric name, in Prometheus format
+        :param description: Human-readable description of the metric
+        :param labels: Names of the labels splitting the counter
+        :return: The registered counter
+        """
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(
+                    name=name,
+                    description=description,
+                    labels=labels,
+                )
+            return self._metrics[name]
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        :return: The metrics, one sample per line
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} counter")
+            for labels, value in metric.samples():
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{metric.name}{suffix} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Registry shared by the whole process
+REGISTRY = MetricsRegistry()
@@ -1,4 +1,17 @@
 from collections.abc import Mapping
-from typing import Any
+from typing import Any, Protocol
 
 type JsonType = Mapping[str, Any]
+
+
+class Substituter(Protocol):
+    """Object replacing the matches of a pattern in a string, such as a compiled regex."""
+
+    def sub(self, repl: str, string: str) -> str:
+        """
+        Replace all matches of the pattern in a string.
+
+        :param repl: Replacement string
+        :param string: The string to process
+        :return: The string with all matches replaced
+        """
@@ -0,0 +1,302 @@
+from collections.abc import Iterator, MutableMapping, MutableSequence
+from typing import Any
+
+type CowNode = CowDict | CowList
+
+# Marker of a missing key, never equal to a value
+_MISSING = object()
+
+
+def wrap(value: Any) -> Any:
+    """
+    Wrap a JSON value in a copy-on-write view, leaving scalars as is.
+
+    :param value: The JSON value
+    :return: A view of dictionaries and lists, the value itself otherwise
+    """
+    if isinstance(value, dict):
+        return CowDict(value)
+    if isinstance(value, list):
+        return CowList(value)
+    return value
+
+
+class CowDict(MutableMapping):
+    """
+    Mutable view of a dictionary, which is never modified.
+
+    The dictionary is copied, shallowly, on the first change of the view, and
+    nested dictionaries and lists are handed out as views themselves, always the
+    same for a given key. Once changes are done, `build` gives the resulting
+    dictionary, which shares every unchanged nested value with the original.
+    """
+
+    __slots__ = ("_children", "_copied", "_data", "_source")
+
+    def __init__(self, source: dict) -> None:
+        """
+        Initialize the view.
+
+        :param source: The dictionary to view
+        """
+        self._source = source
+        self._data = source  # The source, then its copy once changed
+        self._copied = False
+        self._children: dict[Any, CowNode] = {}
+
+    def _writable(self) -> dict:
+        """
+        Get the copy of the source, making it on first call.
+
+        :return: The copy
+        """
+        if not self._copied:
+            self._data = dict(self._source)
+            self._copied = True
+        return self._data
+
+    def __getitem__(self, key: Any) -> Any:
+        """
+        Get a value, as a view if it is a dictionary or a list.
+
+        :param key: The key of the value
+        :return: The value
+        :raises KeyError: If the key is missing
+        """
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        value = self._data[key]
+        if isinstance(value, dict | list):
+            child = self._children[key] = wrap(value)
+            return child
+        return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        """
+        Set a value, copying the source first if the value differs.
+
+        :param key: The key of the value
+        :param value: The new value, possibly a view
+        """
+        current = self._children.get(key)
+        if current is None:
+            current = self._data.get(key, _MISSING)
+        if value is current or (isinstance(value, str) and value == current):
+            return
+        if isinstance(value, CowDict | CowList):
+            self._children[key] = value
+            self._writable()[key] = value.source
+        else:
+            self._children.pop(key, None)
+            self._writable()[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        """
+        Delete a value, copying the source first.
+
+        :param key: The key of the value
+        :raises KeyError: If the key is missing
+        """
+        del self._writable()[key]
+        self._children.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        """
+        Check whether a key is present.
+
+        :param key: The key
+        :return: True if present
+        """
+        return key in self._data
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Iterate over the keys.
+
+        :return: An iterator over the keys
+        """
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        """
+        Get the number of keys.
+
+        :return: The number of keys
+        """
+        return len(self._data)
+
+    @property
+    def source(self) -> dict:
+        """
+        Get the dictionary viewed.
+
+        :return: The original dictionary, never modified
+        """
+        return self._source
+
+    def build(self) -> dict:
+        """
+        Get the dictionary resulting from the changes.
+
+        :return: The source itself if nothing changed, otherwise a new dictionary
+            sharing every unchanged value with the source
+        """
+        result = self._data if self._copied else None
+        for key, child in self._children.items():
+            built = child.build()
+            if built is not child.source or result is not None:
+                if result is None:
+                    result = dict(self._source)
+                result[key] = built
+        return self._source if result is None else result
+
+
+class CowList(MutableSequence):
+    """
+    Mutable view of a list, which is never modified.
+
+    It behaves as CowDict, with indices instead of keys. Slices are not supported.
+    """
+
+    __slots__ = ("_children", "_copied", "_data", "_source")
+
+    def __init__(self, source: list) -> None:
+        """
+        Initialize the view.
+
+        :param source: The list to view
+        """
+        self._source = source
+        self._data = source  # The source, then its copy once changed
+        self._copied = False
+        self._children: dict[int, CowNode] = {}
+
+    def _writable(self) -> list:
+        """
+        Get the copy of the source, making it on first call.
+
+        :return: The copy
+        """
+        if not self._copied:
+            self._data = list(self._source)
+            self._copied = True
+        return self._data
+
+    def _index(self, index: int) -> int:
+        """
+        Normalize an index, which may be negative.
+
+        :param index: The index
+        :return: The positive index
+        :raises TypeError: If the index is a slice
+        :raises IndexError: If the index is out of range
+        """
+        if not isinstance(index, int):
+            raise TypeError("Copy-on-write lists only support integer indices")
+        if index < 0:
+            index += len(self._data)
+            if index < 0:
+                raise IndexError("list index out of range")
+        return index
+
+    def __getitem__(self, index: int) -> Any:
+        """
+        Get an item, as a view if it is a dictionary or a list.
+
+        :param index: The index of the item
+        :return: The item
+        :raises IndexError: If the index is out of range
+        """
+        index = self._index(index)
+        child = self._children.get(index)
+        if child is not None:
+            return child
+        value = self._data[index]
+        if isinstance(value, dict | list):
+            child = self._children[index] = wrap(value)
+            return child
+        return value
+
+    def __setitem__(self, index: int, value: Any) -> None:
+        """
+        Set an item, copying the source first if the item differs.
+
+        :param index: The index of the item
+        :param value: The new item, possibly a view
+        :raises IndexError: If the index is out of range
+        """
+        index = self._index(index)
+        current = self._children.get(index)
+        if current is None:
+            current = self._data[index]
+        if value is current or (isinstance(value, str) and value == current):
+            return
+        if isinstance(value, CowDict | CowList):
+            self._children[index] = value
+            self._writable()[index] = value.source
+        else:
+            self._children.pop(index, None)
+            self._writable()[index] = value
+
+    def __delitem__(self, index: int) -> None:
+        """
+        Delete an item, copying the source first and shifting the following views.
+
+        :param index: The index of the item
+        :raises IndexError: If the index is out of range
+        """
+        index = self._index(index)
+        del self._writable()[index]
+        self._children = {
+            i - (i > index): child for i, child in self._children.items() if i != index
+        }
+
+    def insert(self, index: int, value: Any) -> None:
+        """
+        Insert an item, copying the source first and shifting the following views.
+
+        :param index: The index of the item
+        :param value: The item to insert, possibly a view
+        """
+        length = len(self._data)
+        index = max(0, min(length, index + length if index < 0 else index))
+        self._children = {i + (i >= index): c for i, c in self._children.items()}
+        if isinstance(value, CowDict | CowList):
+            self._writable().insert(index, value.source)
+            self._children[index] = value
+        else:
+            self._writable().insert(index, value)
+
+    def __len__(self) -> int:
+        """
+        Get the number of items.
+
+        :return: The number of items
+        """
+        return len(self._data)
+
+    @property
+    def source(self) -> list:
+        """
+        Get the list viewed.
+
+        :return: The original list, never modified
+        """
+        return self._source
+
+    def build(self) -> list:
+        """
+        Get the list resulting from the changes.
+
+        :return: The source itself if nothing changed, otherwise a new list
+            sharing every unchanged item with the source
+        """
+        result = self._data if self._copied else None
+        for index, child in self._children.items():
+            built = child.build()
+            if built is not child.source or result is not None:
+                if result is None:
+                    result = list(self._source)
+                result[index] = built
+        return self._source if result is None else result
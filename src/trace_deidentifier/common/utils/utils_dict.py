@@ -1,7 +1,19 @@
-import re
-from collections.abc import MutableMapping, MutableSequence, Sequence
+from collections.abc import (
+    Callable,
+    Hashable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    MutableSequence,
+    Sequence,
+)
+from collections.abc import Set as AbstractSet
 from typing import Any
 
+from src.trace_deidentifier.common.types import Substituter
+
+WILDCARD = "*"
+
 
 def get_nested_field(
     data: MutableMapping[str, Any],
@@ -22,6 +34,53 @@ def get_nested_field(
     return data
 
 
+def iter_nested_fields(data: Any, keys: Sequence[str]) -> Iterator[Any]:
+    """
+    Yield every nested field matching a path of keys, where '*' is a wildcard.
+
+    The wildcard matches any value of a dictionary or any element of a list,
+    so a single path can address repeated structures such as
+    ``context.contextActivities.*.*.definition``.
+
+    :param data: The structure to traverse
+    :param keys: A list of keys, possibly containing wildcards
+    :return: An iterator over the values found at the end of the path
+    """
+    if not keys:
+        yield data
+        return
+
+    key, rest = keys[0], keys[1:]
+    if key == WILDCARD:
+        if isinstance(data, MutableMapping):
+            children = list(data.values())
+        elif isinstance(data, MutableSequence):
+            children = list(data)
+        else:
+            return
+        for child in children:
+            yield from iter_nested_fields(data=child, keys=rest)
+    elif isinstance(data, MutableMapping) and key in data:
+        yield from iter_nested_fields(data=data[key], keys=rest)
+
+
+def iter_strings(data: Any) -> Iterator[str]:
+    """
+    Yield every string value of a structure, keys excluded.
+
+    :param data: The structure to traverse
+    :return: An iterator over the string values
+    """
+    if isinstance(data, str):
+        yield data
+    elif isinstance(data, Mapping):
+        for item in data.values():
+            yield from iter_strings(item)
+    elif isinstance(data, Sequence):
+        for item in data:
+            yield from iter_strings(item)
+
+
 def replace_nested_field(
     data: MutableMapping[str, Any],
     keys: Sequence[str],
@@ -51,13 +110,23 @@ def replace_nested_field(
     return False
 
 
-def regex_replace(data: Any, pattern: re.Pattern, value: Any) -> Any:
+def regex_replace(
+    data: Any,
+    pattern: Substituter,
+    value: Any,
+    skip: AbstractSet[tuple[int, Hashable]] = frozenset(),
+    on_replace: Callable[[Any, Hashable], None] | None = None,
+) -> Any:
     """
     Recursively replace a value, which can be a string, dict, or list.
 
     :param data: Input data (str, dict, or list) to process
-    :param pattern: Compiled regex pattern to search for
+    :param pattern: Compiled regex pattern, or any scanner, to search for
     :param value: Replacement string
+    :param skip: Fields left as is, subtrees included, as the identity of their
+        container and their key or index
+    :param on_replace: Called with the container and the key or index of every
+        string changed by a replacement
     :return: The modified data with replacements applied
     """
     if isinstance(data, str):
@@ -66,20 +135,29 @@ def regex_replace(data: Any, pattern: re.Pattern, value: Any) -> Any:
 
     if isinstance(data, MutableMapping):
         # Replace each value in the dictionary
-        for key in data:
-            data[key] = regex_replace(
-                data=data[key],
-                pattern=pattern,
-                value=value,
-            )
-
+        keys = iter(data)
     elif isinstance(data, MutableSequence):
         # Replace each element in the list
-        for i in range(len(data)):
-            data[i] = regex_replace(
-                data=data[i],
-                pattern=pattern,
-                value=value,
-            )
+        keys = range(len(data))
+    else:
+        return data
+
+    for key in keys:
+        if skip and (id(data), key) in skip:
+            continue
+        item = data[key]
+        replaced = regex_replace(
+            data=item,
+            pattern=pattern,
+            value=value,
+            skip=skip,
+            on_replace=on_replace,
+        )
+        if replaced is item:
+            # Nested containers are changed in place, unchanged strings kept
+            continue
+        data[key] = replaced
+        if on_replace is not None and isinstance(item, str) and replaced != item:
+            on_replace(data, key)
 
     return data
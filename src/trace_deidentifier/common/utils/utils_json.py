@@ -0,0 +1,130 @@
+import hashlib
+import json
+import re
+from collections.abc import Sequence
+from typing import Any
+
+from src.trace_deidentifier.common.types import Substituter
+
+# A JSON string, and the colon following it when it is an object key
+STRING_TOKEN = re.compile(r'"([^"\\]*+(?:\\.[^"\\]*+)*+)"(\s*:)?')
+
+
+def regex_replace_json(
+    text: str,
+    replacements: Sequence[tuple[Substituter, str]],
+) -> str:
+    r"""
+    Replace patterns in every string value of a JSON text, without parsing it.
+
+    Only string values are scanned, keys, numbers and literals are left as is.
+    Strings with escape sequences, such as '\n' or '\u00e9', are decoded before
+    being scanned, and every changed string is encoded again. The result parses
+    to the same data as `utils_dict.regex_replace` applied to the parsed text
+    with each pattern in turn.
+
+    :param text: Valid JSON text
+    :param replacements: Compiled regex patterns, or any scanners, to search for,
+        with their replacement string, applied in order to each string
+    :return: The JSON text with replacements applied
+    """
+    parts = []
+    last = 0
+    for token in STRING_TOKEN.finditer(text):
+        if token.group(2) is not None:
+            # Object key
+            continue
+        content = token.group(1)
+        string = json.loads(token.group(0)) if "\\" in content else content
+        replaced = string
+        for pattern, value in replacements:
+            replaced = pattern.sub(repl=value, string=replaced)
+        if replaced != string:
+            parts.append(text[last : token.start()])
+            parts.append(json.dumps(replaced, ensure_ascii=False))
+            last = token.end(1) + 1
+
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def content_hash(data: Any) -> str:
+    """
+    Get the hash of a JSON value, the same for any order of its object keys.
+
+    :param data: The JSON value
+    :return: The SHA-256 digest of its canonical JSON text, in hexadecimal
+    """
+    return hashlib.sha256(dump_compact(data, sort_keys=True).encode()).hexdigest()
+
+
+def dump_compact(data: Any, sort_keys: bool = False) -> str:
+    """
+    Serialize a JSON value on a single line, without whitespace nor escaped characters.
+
+    :param data: The JSON value
+    :param sort_keys: Whether to sort object keys, for a canonical text
+    :return: The JSON text
+    """
+    return json.dumps(
+        data,
+        sort_keys=sort_keys,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+class InterningDecoder:
+    """
+    JSON decoder sharing equal keys and string values across the documents it parses.
+
+    Statements of a batch repeat the same keys, such as 'objectType' or extension
+    IRIs, and many values, such as verb and activity IDs or activity definitions.
+    Each document parsed on its own gets new string objects for them, while this
+    decoder gives every equal string the same object, from a table kept until it
+    is cleared, so a batch holds one copy of each.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the decoder, with an empty table."""
+        self._table: dict[str, str] = {}
+        self._decoder = json.JSONDecoder(object_pairs_hook=self._build_object)
+
+    def __len__(self) -> int:
+        """
+        Get the number of distinct strings in the table.
+
+        :return: The number of strings
+        """
+        return len(self._table)
+
+    def loads(self, text: str) -> Any:
+        """
+        Parse a JSON text, reusing the strings of the table.
+
+        :param text: The JSON text
+        :return: The parsed value
+        :raises ValueError: If the text is not valid JSON
+        """
+        return self._decoder.decode(text)
+
+    def clear(self) -> None:
+        """Empty the table, once the documents sharing its strings are released."""
+        self._table.clear()
+
+    def _build_object(self, pairs: list[tuple[str, Any]]) -> dict[str, Any]:
+        """
+        Build an object from its members, with keys and string values from the table.
+
+        :param pairs: The members of the object, in order
+        :return: The object
+        """
+        table = self._table
+        return {
+            table.setdefault(key, key): (
+                table.setdefault(value, value) if value.__class__ is str else value
+            )
+            for key, value in pairs
+        }
@@ -1,5 +1,202 @@
+from abc import abstractmethod
+from pathlib import Path
+
 from configcore import ConfigContract as CoreConfigContract
 
+from src.trace_deidentifier.anonymizer.deadline import DeadlinePolicy
+from src.trace_deidentifier.anonymizer.opaque import OpaqueKind, OpaquePolicy
+from src.trace_deidentifier.anonymizer.scanners.base import DetectionEngine
+from src.trace_deidentifier.anonymizer.scanners.budget import BudgetPolicy
+
 
 class ConfigContract(CoreConfigContract):
     """Abstract base class defining the contract for configuration management."""
+
+    @abstractmethod
+    def get_extension_rules_file(self) -> Path | None:
+        """
+        Get the path of the JSON file with additional extension removal rules.
+
+        :return: The file path, or None to only use the built-in rules
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_detection_schema_file(self) -> Path | None:
+        """
+        Get the path of the JSON file with detection policies of trace fields.
+
+        :return: The file path, or None to only use the built-in policies
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_opaque_min_length(self) -> int:
+        """
+        Get the length from which strings are checked for opaque payloads.
+
+        :return: The length in characters
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_opaque_policies(self) -> dict[OpaqueKind, OpaquePolicy]:
+        """
+        Get the treatment of each kind of opaque payload before detection.
+
+        :return: The policy of each kind of payload
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_detection_engine(self) -> DetectionEngine:
+        """
+        Get the engine used by detection strategies that support several ones.
+
+        :return: The detection engine
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_scan_max_length(self) -> int | None:
+        """
+        Get the longest string a detection pattern scans in one call.
+
+        :return: The length in characters, or None for no limit
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_scan_budget_policy(self) -> BudgetPolicy:
+        """
+        Get the fallback applied to strings longer than the scan limit.
+
+        :return: The budget policy
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_scan_chunk_length(self) -> int | None:
+        """
+        Get the length above which strings are scanned in windows.
+
+        :return: The length in characters, or None to scan strings whole
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_processing_deadline(self) -> float | None:
+        """
+        Get the time budget of each statement.
+
+        :return: The budget in seconds, or None for no limit
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_deadline_policy(self) -> DeadlinePolicy:
+        """
+        Get the fail-safe applied to statements exceeding their time budget.
+
+        :return: The deadline policy
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_detection_prescreen(self) -> bool:
+        """
+        Get whether detection is skipped for statements with nothing to detect.
+
+        :return: True to prescreen statements
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_adaptive_targeting(self) -> bool:
+        """
+        Get whether detection is restricted to the fields learned per statement shape.
+
+        :return: True to enable adaptive targeting
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_adaptive_sample_rate(self) -> float:
+        """
+        Get the fraction of statements of learned shapes that are still fully scanned.
+
+        :return: The fraction, between 0 and 1
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_adaptive_state_file(self) -> Path | None:
+        """
+        Get the path of the JSON file where adaptive targeting keeps its learned state.
+
+        :return: The file path, or None to keep it in memory only
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_idempotency_key(self) -> bytes | None:
+        """
+        Get the secret key of the idempotency markers of anonymized statements.
+
+        :return: The key, or None to neither stamp nor trust markers
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_dedup_window(self) -> int:
+        """
+        Get the number of distinct statements of a batch whose results are kept for duplicates.
+
+        :return: The number of statements, 0 to disable deduplication
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_batch_time_slice(self) -> float:
+        """
+        Get the time a batch is processed for before letting other requests run.
+
+        :return: The time slice, in seconds, 0 to process batches at once
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_micro_batch_delay(self) -> float:
+        """
+        Get the longest time a single trace waits to be anonymized with others.
+
+        :return: The delay, in seconds, 0 to anonymize single traces on their own
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_micro_batch_max_size(self) -> int:
+        """
+        Get the most single traces anonymized together.
+
+        :return: The number of traces
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_result_cache_file(self) -> Path | None:
+        """
+        Get the path of the SQLite file of the persistent result cache.
+
+        :return: The file path, or None to disable the cache
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_result_cache_max_size(self) -> int:
+        """
+        Get the maximum size of the outputs kept by the result cache.
+
+        :return: The size in bytes
+        """
+        raise NotImplementedError
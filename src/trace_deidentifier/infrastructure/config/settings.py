@@ -1,7 +1,137 @@
+from pathlib import Path
+
 from configcore import Settings as CoreSettings
+from pydantic import (
+    Field,
+    FilePath,
+    NonNegativeFloat,
+    NonNegativeInt,
+    PositiveFloat,
+    PositiveInt,
+    SecretStr,
+)
+
+from src.trace_deidentifier.anonymizer.deadline import DeadlinePolicy
+from src.trace_deidentifier.anonymizer.opaque import OpaqueKind, OpaquePolicy
+from src.trace_deidentifier.anonymizer.scanners.base import DetectionEngine
+from src.trace_deidentifier.anonymizer.scanners.budget import BudgetPolicy
 
 from .contract import ConfigContract
 
 
 class Settings(CoreSettings, ConfigContract):
     """Application settings loaded from environment variables, via Pydantic model."""
+
+    extension_rules_file: FilePath | None = None
+    detection_schema_file: FilePath | None = None
+    opaque_min_length: PositiveInt = 256
+    hex_policy: OpaquePolicy = OpaquePolicy.SKIP
+    base64_policy: OpaquePolicy = OpaquePolicy.SKIP
+    binary_policy: OpaquePolicy = OpaquePolicy.SCAN
+    detection_engine: DetectionEngine = DetectionEngine.REGEX
+    scan_max_length: PositiveInt | None = 4096
+    scan_budget_policy: BudgetPolicy = BudgetPolicy.CHUNK
+    scan_chunk_length: PositiveInt | None = None
+    processing_deadline: PositiveFloat | None = None
+    deadline_policy: DeadlinePolicy = DeadlinePolicy.REDACT
+    detection_prescreen: bool = True
+    adaptive_targeting: bool = False
+    adaptive_sample_rate: float = Field(default=0.05, ge=0, le=1)
+    adaptive_state_file: Path | None = None
+    idempotency_key: SecretStr | None = None
+    dedup_window: NonNegativeInt = 1024
+    batch_time_slice: NonNegativeFloat = 0.02
+    micro_batch_delay: NonNegativeFloat = 0
+    micro_batch_max_size: PositiveInt = 64
+    result_cache_file: Path | None = None
+    result_cache_max_size: PositiveInt = 256  # In MB
+
+    def get_extension_rules_file(self) -> Path | None:
+        """Inherited from ConfigContract.get_extension_rules_file."""
+        return self.extension_rules_file
+
+    def get_detection_schema_file(self) -> Path | None:
+        """Inherited from ConfigContract.get_detection_schema_file."""
+        return self.detection_schema_file
+
+    def get_opaque_min_length(self) -> int:
+        """Inherited from ConfigContract.get_opaque_min_length."""
+        return self.opaque_min_length
+
+    def get_opaque_policies(self) -> dict[OpaqueKind, OpaquePolicy]:
+        """Inherited from ConfigContract.get_opaque_policies."""
+        return {
+            OpaqueKind.HEX: self.hex_policy,
+            OpaqueKind.BASE64: self.base64_policy,
+            OpaqueKind.BINARY: self.binary_policy,
+        }
+
+    def get_detection_engine(self) -> DetectionEngine:
+        """Inherited from ConfigContract.get_detection_engine."""
+        return self.detection_engine
+
+    def get_scan_max_length(self) -> int | None:
+        """Inherited from ConfigContract.get_scan_max_length."""
+        return self.scan_max_length
+
+    def get_scan_budget_policy(self) -> BudgetPolicy:
+        """Inherited from ConfigContract.get_scan_budget_policy."""
+        return self.scan_budget_policy
+
+    def get_scan_chunk_length(self) -> int | None:
+        """Inherited from ConfigContract.get_scan_chunk_length."""
+        return self.scan_chunk_length
+
+    def get_processing_deadline(self) -> float | None:
+        """Inherited from ConfigContract.get_processing_deadline."""
+        return self.processing_deadline
+
+    def get_deadline_policy(self) -> DeadlinePolicy:
+        """Inherited from ConfigContract.get_deadline_policy."""
+        return self.deadline_policy
+
+    def get_detection_prescreen(self) -> bool:
+        """Inherited from ConfigContract.get_detection_prescreen."""
+        return self.detection_prescreen
+
+    def get_adaptive_targeting(self) -> bool:
+        """Inherited from ConfigContract.get_adaptive_targeting."""
+        return self.adaptive_targeting
+
+    def get_adaptive_sample_rate(self) -> float:
+        """Inherited from ConfigContract.get_adaptive_sample_rate."""
+        return self.adaptive_sample_rate
+
+    def get_adaptive_state_file(self) -> Path | None:
+        """Inherited from ConfigContract.get_adaptive_state_file."""
+        return self.adaptive_state_file
+
+    def get_idempotency_key(self) -> bytes | None:
+        """Inherited from ConfigContract.get_idempotency_key."""
+        if self.idempotency_key is None:
+            return None
+        return self.idempotency_key.get_secret_value().encode()
+
+    def get_dedup_window(self) -> int:
+        """Inherited from ConfigContract.get_dedup_window."""
+        return self.dedup_window
+
+    def get_batch_time_slice(self) -> float:
+        """Inherited from ConfigContract.get_batch_time_slice."""
+        return self.batch_time_slice
+
+    def get_micro_batch_delay(self) -> float:
+        """Inherited from ConfigContract.get_micro_batch_delay."""
+        return self.micro_batch_delay
+
+    def get_micro_batch_max_size(self) -> int:
+        """Inherited from ConfigContract.get_micro_batch_max_size."""
+        return self.micro_batch_max_size
+
+    def get_result_cache_file(self) -> Path | None:
+        """Inherited from ConfigContract.get_result_cache_file."""
+        return self.result_cache_file
+
+    def get_result_cache_max_size(self) -> int:
+        """Inherited from ConfigContract.get_result_cache_max_size."""
+        return self.result_cache_max_size * 1024 * 1024
@@ -0,0 +1,199 @@
+import random
+import re
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.scanners.base import (
+    DetectionEngine,
+    RegexScanner,
+    Scanner,
+)
+from src.trace_deidentifier.anonymizer.scanners.batch import (
+    BatchSubstituter,
+    scan_joined,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.regex_detect import (
+    RegexDetectionStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+# Values with a match at their start or end, where joining could change look-arounds
+SAMPLES = [
+    "john.doe@company.com",
+    "Ask a@b.org, or c@d.org.",
+    "@start a@",
+    "10.0.0.1",
+    "1234.5.6.7 and 1.2.3.4567",
+    "fe80::1 ::1 :: ::ffff:192.0.2.1",
+    "1:2:3:4:5:6:7:8:9",
+    "a:b ::",
+    "1.2.3.4.",
+    "",
+]
+
+# Characters of every pattern, so that matches run up to the ends of strings
+ALPHABETS = ["ab9-.@ _é+", "0a:f. g_é٣", "1.2 ", "a@.:1 "]
+
+
+def corpus(size: int, seed: int) -> list[str]:
+    """
+    Generate a reproducible corpus of short strings.
+
+    :param size: Number of random strings per alphabet
+    :param seed: Seed of the random choices
+    :return: The samples, followed by the random strings
+    """
+    rng = random.Random(seed)  # noqa: S311
+    strings = list(SAMPLES)
+    for alphabet in ALPHABETS:
+        strings.extend(
+            "".join(rng.choices(alphabet, k=rng.randint(0, 70))) for _ in range(size)
+        )
+    strings.extend(
+        s[rng.randint(0, len(s)) :] for s in rng.choices(SAMPLES, k=size) if s
+    )
+    return list(dict.fromkeys(strings))
+
+
+def corpus_batches() -> list[list[str]]:
+    """
+    Split the corpus into the strings of statements.
+
+    :return: The strings of each statement
+    """
+    strings = corpus(size=50, seed=4)
+    return [strings[i : i + 10] for i in range(0, len(strings), 10)]
+
+
+def corpus_data() -> list[dict]:
+    """
+    Build statements from the corpus, holding each string in a result extension.
+
+    :return: The statement data
+    """
+    return [{"result": {"extensions": dict(enumerate(s))}} for s in corpus_batches()]
+
+
+def scanners() -> list[tuple[RegexDetectionStrategy, Scanner]]:
+    """
+    Build the detection strategies with a separator, with each of their engines.
+
+    :return: The strategies, with the scanner they use
+    """
+    strategies = [
+        EmailDetectionStrategy(engine=DetectionEngine.REGEX),
+        EmailDetectionStrategy(engine=DetectionEngine.SCANNER),
+        Ipv4DetectionStrategy(),
+        Ipv6DetectionStrategy(engine=DetectionEngine.REGEX),
+        Ipv6DetectionStrategy(engine=DetectionEngine.SCANNER),
+    ]
+    return [(strategy, strategy.scanner) for strategy in strategies]
+
+
+@pytest.mark.parametrize(
+    ("strategy", "scanner"),
+    [
+        pytest.param(
+            strategy,
+            scanner,
+            id=f"{type(strategy).__name__}-{type(scanner).__name__}",
+        )
+        for strategy, scanner in scanners()
+    ],
+)
+class TestJoinedDifferential:
+    """Check that scanning strings within a joined buffer gives the same results as one by one."""
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_same_results(
+        self,
+        strategy: RegexDetectionStrategy,
+        scanner: Scanner,
+        seed: int,
+    ) -> None:
+        """
+        Test that every string gets the result of its own scan.
+
+        :param strategy: The detection strategy
+        :param scanner: The scanner of the strategy
+        :param seed: Seed of the random corpus
+        """
+        strings = corpus(size=400, seed=seed)
+
+        results = scan_joined(
+            scanner=scanner,
+            strings=strings,
+            repl=strategy.replacement,
+            separator=strategy.SEPARATOR,
+        )
+
+        assert results == {
+            string: scanner.sub(repl=strategy.replacement, string=string)
+            for string in strings
+        }
+        assert any(results[string] != string for string in strings)
+
+    def test_same_traces(
+        self,
+        strategy: RegexDetectionStrategy,
+        scanner: Scanner,  # noqa: ARG002
+    ) -> None:
+        """
+        Test that anonymizing traces together gives the same traces as one by one.
+
+        :param strategy: The detection strategy
+        :param scanner: The scanner of the strategy
+        """
+        expected = [Trace.model_construct(data=d) for d in corpus_data()]
+        for trace in expected:
+            strategy.anonymize(trace=trace)
+        traces = [Trace.model_construct(data=d) for d in corpus_data()]
+
+        strategy.anonymize_batch(traces=traces)
+
+        assert [t.data for t in traces] == [t.data for t in expected]
+
+
+class TestScanJoined:
+    """Test suite for the scan of strings within a joined buffer."""
+
+    def test_should_leave_strings_crossed_by_a_match(self) -> None:
+        """Test that strings covered by a match crossing the separator get no result."""
+        scanner = RegexScanner(pattern=re.compile(r"a\|b"))
+
+        results = scan_joined(
+            scanner=scanner,
+            strings=["xa", "b", "a|b"],
+            repl="_",
+            separator="|",
+        )
+
+        assert results == {"a|b": "_"}
+
+
+class TestBatchSubstituter:
+    """Test suite for the substituter reusing the results found for a batch."""
+
+    def test_should_only_reuse_results_within_scope(self) -> None:
+        """Test that strings are scanned unless their result is known in the current scope."""
+        pattern = EmailDetectionStrategy().pattern
+        substituter = BatchSubstituter(substituter=pattern)
+        other = BatchSubstituter(substituter=pattern)
+
+        with substituter.scope(results={"plain": "plain", "a@b.c": "known"}):
+            assert substituter.sub(repl="x", string="plain") == "plain"
+            assert substituter.sub(repl="x", string="a@b.c") == "known"
+            # Strings of other substituters, or outside of the batch, are scanned
+            assert other.sub(repl="x", string="a@b.c") == "x"
+            assert substituter.sub(repl="x", string="c@d.e") == "x"
+
+        assert substituter.sub(repl="x", string="a@b.c") == "x"
@@ -0,0 +1,165 @@
+import re
+from unittest.mock import Mock
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.deadline import (
+    Deadline,
+    DeadlinePolicy,
+    deadline_scope,
+)
+from src.trace_deidentifier.anonymizer.exceptions import (
+    DeadlineExceededError,
+    ScanBudgetExceededError,
+)
+from src.trace_deidentifier.anonymizer.scanners.base import RegexScanner
+from src.trace_deidentifier.anonymizer.scanners.budget import (
+    REDACTED,
+    BudgetPolicy,
+    DeadlineGuard,
+    ScanBudget,
+    ScanGuard,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+
+class TestScanGuard:
+    """Test suite for ScanGuard."""
+
+    @pytest.fixture
+    def scanner(self) -> RegexScanner:
+        """
+        Create a scanner replacing digits.
+
+        :return: A scanner instance
+        """
+        return RegexScanner(pattern=re.compile(r"\d+"))
+
+    @pytest.mark.parametrize("policy", list(BudgetPolicy))
+    def test_should_scan_short_strings(
+        self,
+        scanner: RegexScanner,
+        policy: BudgetPolicy,
+    ) -> None:
+        """
+        Test that strings within the budget are scanned normally, whatever the policy.
+
+        :param scanner: Scanner fixture
+        :param policy: Budget policy
+        """
+        guard = ScanGuard(scanner=scanner, budget=ScanBudget(10, policy=policy))
+        assert guard.sub(repl="#", string="a1b22") == "a#b#"
+
+    @pytest.mark.parametrize(
+        ("policy", "expected"),
+        [
+            pytest.param(BudgetPolicy.REDACT, REDACTED, id="redact"),
+            pytest.param(BudgetPolicy.CHUNK, "a#b#" * 5, id="chunk"),
+        ],
+    )
+    def test_should_apply_policy_to_long_strings(
+        self,
+        scanner: RegexScanner,
+        policy: BudgetPolicy,
+        expected: str,
+    ) -> None:
+        """
+        Test the fallback of strings exceeding the budget.
+
+        :param scanner: Scanner fixture
+        :param policy: Budget policy
+        :param expected: Expected result
+        """
+        guard = ScanGuard(scanner=scanner, budget=ScanBudget(10, policy=policy))
+        assert guard.sub(repl="#", string="a1b22" * 5) == expected
+
+    def test_should_reject_long_strings(self, scanner: RegexScanner) -> None:
+        """
+        Test that the reject policy raises an error.
+
+        :param scanner: Scanner fixture
+        """
+        guard = ScanGuard(
+            scanner=scanner,
+            budget=ScanBudget(10, policy=BudgetPolicy.REJECT),
+        )
+        with pytest.raises(ScanBudgetExceededError, match="scan budget"):
+            guard.sub(repl="#", string="a" * 11)
+
+    def test_strategy_should_use_budget(self, mock_logger: Mock) -> None:
+        """
+        Test that a detection strategy applies its budget to every string.
+
+        :param mock_logger: Mocked logger
+        """
+        strategy = Ipv4DetectionStrategy(
+            budget=ScanBudget(20, policy=BudgetPolicy.REDACT),
+        )
+        strategy.logger = mock_logger
+        trace = Trace.model_construct(
+            data={"short": "ip 10.0.0.1", "long": ["ip 10.0.0.1" + " " * 20]},
+        )
+        strategy.anonymize(trace)
+        assert trace.data == {"short": "ip 0.0.0.0", "long": [REDACTED]}
+
+    def test_should_chunk_exactly_bounded_patterns(self) -> None:
+        """Test that the chunk policy splits no match when the pattern has a maximum length."""
+        strategy = Ipv4DetectionStrategy(budget=ScanBudget(3, overlap=0))
+        string = "10.0.0.1" * 10
+        assert strategy.substituter.sub(repl="#", string=string) == (
+            strategy.scanner.sub(repl="#", string=string)
+        )
+
+
+class TestDeadlineGuard:
+    """Test suite for DeadlineGuard."""
+
+    @pytest.fixture
+    def guard(self) -> DeadlineGuard:
+        """
+        Create a guard around a scanner replacing digits.
+
+        :return: A guard instance
+        """
+        return DeadlineGuard(substituter=RegexScanner(pattern=re.compile(r"\d+")))
+
+    def test_should_scan_without_deadline(self, guard: DeadlineGuard) -> None:
+        """
+        Test that strings are scanned when no deadline is set.
+
+        :param guard: Guard fixture
+        """
+        assert guard.sub(repl="#", string="a1") == "a#"
+
+    def test_should_scan_before_deadline(self, guard: DeadlineGuard) -> None:
+        """
+        Test that strings are scanned while the deadline is not exceeded.
+
+        :param guard: Guard fixture
+        """
+        with deadline_scope(Deadline(seconds=60.0)):
+            assert guard.sub(repl="#", string="a1") == "a#"
+
+    def test_should_redact_after_deadline(self, guard: DeadlineGuard) -> None:
+        """
+        Test that strings are redacted once the deadline is exceeded.
+
+        :param guard: Guard fixture
+        """
+        with deadline_scope(Deadline(seconds=0.0, policy=DeadlinePolicy.REDACT)):
+            assert guard.sub(repl="#", string="a1") == REDACTED
+
+    def test_should_reject_after_deadline(self, guard: DeadlineGuard) -> None:
+        """
+        Test that the reject policy raises once the deadline is exceeded.
+
+        :param guard: Guard fixture
+        """
+        with (
+            deadline_scope(Deadline(seconds=0.0, policy=DeadlinePolicy.REJECT)),
+            pytest.raises(DeadlineExceededError),
+        ):
+            guard.sub(repl="#", string="a1")
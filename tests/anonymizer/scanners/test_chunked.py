@@ -0,0 +1,202 @@
+import random
+import re
+from collections.abc import Iterator
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.deadline import Deadline, deadline_scope
+from src.trace_deidentifier.anonymizer.exceptions import DeadlineExceededError
+from src.trace_deidentifier.anonymizer.scanners.base import (
+    DetectionEngine,
+    RegexScanner,
+)
+from src.trace_deidentifier.anonymizer.scanners.chunked import ChunkedScanner
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.regex_detect import (
+    RegexDetectionStrategy,
+)
+
+# Realistic values, joined by separators to build long strings
+SAMPLES = [
+    "john.doe@company.com",
+    "192.168.1.1",
+    "2001:db8::8a2e:370:7334",
+    "45.123°N 2.345°E",
+    "48°51'24\"N 2°21'08\"E",
+    '{"lat": 45.123, "lng": 2.345}',
+    "31U 430959 5239573",
+    "some words, 12.5 and a:b",
+]
+SEPARATORS = ["", " ", ",", ";", "x", "\n"]
+
+# Alphabets without many boundary characters, so windows are rarely cut
+ALPHABETS = {
+    EmailDetectionStrategy: "ab9-.@ _é+!",
+    Ipv4DetectionStrategy: "12.9 .a1",
+    Ipv6DetectionStrategy: "0a:f. g_é٣1",
+    GeoLocationDetectionStrategy: "12.°NSEW ,-'\"{}latong:U \n",
+}
+
+
+def corpus(alphabet: str, size: int) -> list[str]:
+    """
+    Generate a reproducible corpus of strings.
+
+    :param alphabet: Alphabet to draw random characters from
+    :param size: Number of strings of each kind
+    :return: Random strings, followed by concatenated samples
+    """
+    rng = random.Random(42)  # noqa: S311
+    strings = [
+        "".join(rng.choices(alphabet, k=rng.randint(0, 80))) for _ in range(size)
+    ]
+    strings.extend(
+        "".join(
+            rng.choice(SAMPLES) + rng.choice(SEPARATORS)
+            for _ in range(rng.randint(1, 6))
+        )
+        for _ in range(size)
+    )
+    return strings
+
+
+class TestChunkedScanner:
+    """Test suite for ChunkedScanner."""
+
+    @pytest.mark.parametrize(
+        ("strategy_class", "engine"),
+        [
+            pytest.param(EmailDetectionStrategy, DetectionEngine.REGEX, id="email"),
+            pytest.param(
+                EmailDetectionStrategy,
+                DetectionEngine.SCANNER,
+                id="email-scanner",
+            ),
+            pytest.param(Ipv4DetectionStrategy, None, id="ipv4"),
+            pytest.param(Ipv6DetectionStrategy, DetectionEngine.REGEX, id="ipv6"),
+            pytest.param(
+                Ipv6DetectionStrategy,
+                DetectionEngine.SCANNER,
+                id="ipv6-scanner",
+            ),
+            pytest.param(GeoLocationDetectionStrategy, None, id="geo"),
+        ],
+    )
+    @pytest.mark.parametrize("chunk_length", [1, 3, 8])
+    def test_should_match_whole_string_scan(
+        self,
+        strategy_class: type[RegexDetectionStrategy],
+        engine: DetectionEngine | None,
+        chunk_length: int,
+    ) -> None:
+        """
+        Test that chunked detection gives the same results as a whole-string scan.
+
+        :param strategy_class: Strategy providing the pattern and its chunking hints
+        :param engine: Detection engine, None for strategies with a single engine
+        :param chunk_length: Length of the windows
+        """
+        options = {"engine": engine} if engine else {}
+        whole = strategy_class(**options)
+        chunked = strategy_class(chunk_length=chunk_length, **options)
+        for string in corpus(ALPHABETS[strategy_class], size=300):
+            assert chunked.substituter.sub(repl="X", string=string) == (
+                whole.scanner.sub(repl="X", string=string)
+            )
+
+    def test_should_approximate_long_matches_with_small_overlap(self) -> None:
+        """Test that matches longer than a bounded overlap may be split, but never missed."""
+        scanner = ChunkedScanner(
+            scanner=RegexScanner(pattern=re.compile("a+")),
+            window=4,
+            overlap=2,
+        )
+        assert list(scanner.spans("a" * 10)) == [(0, 6), (6, 10)]
+
+    def test_should_cut_windows_at_boundaries(self) -> None:
+        """Test that windows are cut at the first boundary past their end."""
+        seen = []
+
+        class RecordingScanner(RegexScanner):
+            def spans(
+                self,
+                string: str,
+                pos: int = 0,
+                endpos: int | None = None,
+            ) -> Iterator[tuple[int, int]]:
+                seen.append((pos, endpos))
+                return super().spans(string, pos, endpos)
+
+        scanner = ChunkedScanner(
+            scanner=RecordingScanner(pattern=re.compile("a+")),
+            window=2,
+            overlap=None,
+            boundary=re.compile(" "),
+        )
+        assert list(scanner.spans("aaaa aa a")) == [(0, 4), (5, 7), (8, 9)]
+        assert seen == [(0, 4), (4, 7), (7, 9)]
+
+    def test_should_bound_each_scan(self) -> None:
+        """Test that the underlying scanner never sees more than a window and its overlap."""
+        seen = []
+
+        class RecordingScanner(RegexScanner):
+            def spans(
+                self,
+                string: str,
+                pos: int = 0,
+                endpos: int | None = None,
+            ) -> Iterator[tuple[int, int]]:
+                seen.append(endpos - pos)
+                return super().spans(string, pos, endpos)
+
+        window, overlap = 10, 5
+        scanner = ChunkedScanner(
+            scanner=RecordingScanner(pattern=re.compile("a+")),
+            window=window,
+            overlap=overlap,
+        )
+        assert scanner.sub(repl="x", string="b" * 100) == "b" * 100
+        assert max(seen) == window + overlap
+
+    @pytest.mark.parametrize(
+        ("window", "overlap"),
+        [pytest.param(0, 1, id="empty-window"), pytest.param(1, -1, id="negative")],
+    )
+    def test_should_reject_invalid_sizes(self, window: int, overlap: int) -> None:
+        """
+        Test that invalid window sizes are rejected.
+
+        :param window: Size of the windows
+        :param overlap: Size of the overlap
+        """
+        with pytest.raises(ValueError, match="Chunk"):
+            ChunkedScanner(
+                scanner=RegexScanner(pattern=re.compile("a")),
+                window=window,
+                overlap=overlap,
+            )
+
+    def test_should_check_deadline_between_windows(self) -> None:
+        """Test that an exceeded deadline stops the scan of a long string."""
+        scanner = ChunkedScanner(
+            scanner=RegexScanner(pattern=re.compile("a")),
+            window=4,
+            overlap=1,
+        )
+        with (
+            deadline_scope(Deadline(seconds=0.0)),
+            pytest.raises(DeadlineExceededError),
+        ):
+            list(scanner.spans("a" * 100))
@@ -0,0 +1,141 @@
+import random
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.scanners.base import (
+    DetectionEngine,
+    RegexScanner,
+    Scanner,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.regex_detect import (
+    RegexDetectionStrategy,
+)
+
+# Realistic values, on top of which random strings are generated
+SAMPLES = [
+    "john.doe@company.com",
+    "Contact: first.last+tag@sub-domain.example.co.uk, or admin@localhost.",
+    "mailto:anonymous@anonymous.org",
+    "a@b",
+    "@@a@@b@",
+    "x@-bad.com y@good-.com z@" + "a" * 70 + ".com",
+    "2001:0db8:85a3:0000:0000:8a2e:0370:7334",
+    "fe80::1%eth0 ::1 :: ::ffff:192.0.2.1",
+    "1:2:3:4:5:6:7:8:9",
+    "2013-05-18T05:32:34.804+00:00",
+    "http://example.com/activities/course-001",
+    "https://test.com/path/with:colon",
+    "é::1 _::1 ٣::1",
+]
+
+# Alphabets designed to exercise boundaries of each pattern
+EMAIL_ALPHABETS = ["ab9-.@ _é+", "a-.@", 'aZ0.@"<>,;']
+IPV6_ALPHABETS = ["0a:f. g_é٣", "1:a", "12345:", "fF0:.:x "]
+
+
+def corpus(alphabets: list[str], size: int, max_length: int) -> list[str]:
+    """
+    Generate a reproducible corpus of strings.
+
+    :param alphabets: Alphabets to draw characters from
+    :param size: Number of random strings per alphabet
+    :param max_length: Maximum length of the random strings
+    :return: The samples, followed by the random strings
+    """
+    rng = random.Random(42)  # noqa: S311
+    strings = list(SAMPLES)
+    for alphabet in alphabets:
+        strings.extend(
+            "".join(rng.choices(alphabet, k=rng.randint(0, max_length)))
+            for _ in range(size)
+        )
+    strings.extend(" ".join(rng.sample(SAMPLES, k=3)) for _ in range(size))
+    return strings
+
+
+@pytest.mark.parametrize(
+    ("strategy", "alphabets", "max_length"),
+    [
+        pytest.param(EmailDetectionStrategy, EMAIL_ALPHABETS, 80, id="email"),
+        pytest.param(Ipv6DetectionStrategy, IPV6_ALPHABETS, 40, id="ipv6"),
+    ],
+)
+class TestScannerDifferential:
+    """Check that scanners find exactly the same matches as the regexes they replace."""
+
+    @staticmethod
+    def engines(strategy: type[RegexDetectionStrategy]) -> tuple[Scanner, Scanner]:
+        """
+        Build the regex and scanner engines of a strategy.
+
+        :param strategy: The detection strategy class
+        :return: The regex scanner and the hand-written scanner
+        """
+        regex = strategy(engine=DetectionEngine.REGEX).scanner
+        scanner = strategy(engine=DetectionEngine.SCANNER).scanner
+        assert isinstance(regex, RegexScanner)
+        assert not isinstance(scanner, RegexScanner)
+        return regex, scanner
+
+    def test_same_spans(
+        self,
+        strategy: type[RegexDetectionStrategy],
+        alphabets: list[str],
+        max_length: int,
+    ) -> None:
+        """
+        Test that both engines find the same spans on the whole corpus.
+
+        :param strategy: The detection strategy class
+        :param alphabets: Alphabets of the random corpus
+        :param max_length: Maximum length of the random strings
+        """
+        regex, scanner = self.engines(strategy)
+        for string in corpus(alphabets, size=3000, max_length=max_length):
+            assert list(scanner.spans(string)) == list(regex.spans(string)), string
+
+    def test_same_spans_with_bounds(
+        self,
+        strategy: type[RegexDetectionStrategy],
+        alphabets: list[str],
+        max_length: int,
+    ) -> None:
+        """
+        Test that both engines handle pos and endpos the same way.
+
+        :param strategy: The detection strategy class
+        :param alphabets: Alphabets of the random corpus
+        :param max_length: Maximum length of the random strings
+        """
+        regex, scanner = self.engines(strategy)
+        rng = random.Random(7)  # noqa: S311
+        for string in corpus(alphabets, size=1000, max_length=max_length):
+            pos = rng.randint(0, len(string))
+            endpos = rng.randint(pos, len(string))
+            assert list(scanner.spans(string, pos, endpos)) == list(
+                regex.spans(string, pos, endpos),
+            ), (string, pos, endpos)
+
+    def test_same_substitution(
+        self,
+        strategy: type[RegexDetectionStrategy],
+        alphabets: list[str],
+        max_length: int,
+    ) -> None:
+        """
+        Test that both engines produce the same replaced strings.
+
+        :param strategy: The detection strategy class
+        :param alphabets: Alphabets of the random corpus
+        :param max_length: Maximum length of the random strings
+        """
+        regex, scanner = self.engines(strategy)
+        for string in corpus(alphabets, size=500, max_length=max_length):
+            assert scanner.sub("<x>", string) == regex.sub("<x>", string), string
+            assert scanner.search(string) == regex.search(string), string
@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.scanners import prefilter
+from src.trace_deidentifier.anonymizer.scanners.budget import (
+    REDACTED,
+    BudgetPolicy,
+    ScanBudget,
+)
+from src.trace_deidentifier.anonymizer.scanners.prefilter import (
+    PrefilterRule,
+    candidate_mask,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.regex_detect import (
+    RegexDetectionStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+# Characters of the rules, and others, including outside of the BMP and a lone surrogate
+ALPHABET = "@.:°ab1 é\U0001f600\ud800"
+
+
+class TestCandidateMask:
+    """Test suite for the masks of the batch prefilter."""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_vectorized_mask_should_match_one_by_one(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        seed: int,
+    ) -> None:
+        """
+        Test that the NumPy masks are the same as those computed string by string.
+
+        :param monkeypatch: Pytest monkeypatch fixture
+        :param seed: Seed of the random strings
+        """
+        pytest.importorskip("numpy")
+        rng = random.Random(seed)  # noqa: S311
+        strings = [
+            "".join(rng.choices(ALPHABET, k=rng.randrange(12))) for _ in range(200)
+        ]
+        rules = (PrefilterRule("@"), PrefilterRule(".", count=3), PrefilterRule("°"))
+
+        monkeypatch.setattr(prefilter, "VECTORIZE_MIN_STRINGS", 0)
+        vectorized = candidate_mask(strings=strings, rules=rules)
+        monkeypatch.setattr(prefilter, "VECTORIZE_MIN_STRINGS", None)
+        one_by_one = candidate_mask(strings=strings, rules=rules)
+
+        assert vectorized == one_by_one
+        assert any(vectorized)
+        assert not all(vectorized)
+
+    def test_should_fall_back_without_numpy(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """
+        Test that masks are computed string by string when NumPy is not installed.
+
+        :param monkeypatch: Pytest monkeypatch fixture
+        """
+        monkeypatch.setattr(prefilter, "np", None)
+        monkeypatch.setattr(prefilter, "VECTORIZE_MIN_STRINGS", 0)
+
+        assert candidate_mask(
+            strings=["a.b.c.d", "a.b", "x:y"],
+            rules=(PrefilterRule(".", count=3),),
+        ) == [True, False, False]
+
+
+@pytest.mark.parametrize(
+    ("strategy", "value", "expected"),
+    [
+        (EmailDetectionStrategy(), "Ask a@b.org", "Ask anonymous@anonymous.org"),
+        (Ipv4DetectionStrategy(), "From 10.0.0.1", "From 0.0.0.0"),
+        (Ipv6DetectionStrategy(), "From ::1", "From ::"),
+    ],
+)
+def test_anonymize_batch_should_only_scan_candidates(
+    strategy: RegexDetectionStrategy,
+    value: str,
+    expected: str,
+) -> None:
+    """
+    Test that detection strategies give the same results with the prefilter.
+
+    :param strategy: The detection strategy, with a prefilter
+    :param value: A string with a match
+    :param expected: The string anonymized
+    """
+    traces = [
+        Trace.model_construct(data={"result": {"response": response}})
+        for response in (value, "Nothing to detect", value)
+    ]
+
+    strategy.anonymize_batch(traces=traces)
+
+    assert [t.data["result"]["response"] for t in traces] == [
+        expected,
+        "Nothing to detect",
+        expected,
+    ]
+
+
+def test_anonymize_batch_should_leave_strings_over_budget_to_it() -> None:
+    """Test that strings over a redacting scan budget are redacted, not cleared."""
+    strategy = EmailDetectionStrategy(
+        budget=ScanBudget(max_length=10, policy=BudgetPolicy.REDACT),
+    )
+    traces = [Trace.model_construct(data={"result": {"response": "x" * 20}})]
+
+    strategy.anonymize_batch(traces=traces)
+
+    assert traces[0].data["result"]["response"] == REDACTED
@@ -0,0 +1,146 @@
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+from src.trace_deidentifier.anonymizer.adaptive import (
+    ADAPTIVE_SCANS,
+    AdaptiveTargeting,
+    ScanMode,
+)
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.result_cache import ResultCache
+from src.trace_deidentifier.anonymizer.strategies.adaptive_targeting import (
+    AdaptiveTargetingStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.utils import utils_json
+
+
+class TestAdaptiveTargetingStrategy:
+    """Test suite for AdaptiveTargetingStrategy class."""
+
+    @staticmethod
+    def statement(response: str) -> dict:
+        """
+        Build a statement with a free-text response.
+
+        :param response: The response of the statement
+        :return: The statement data
+        """
+        return {
+            "verb": {"id": "http://adlnet.gov/expapi/verbs/answered"},
+            "result": {"response": response, "extensions": {"note": "none"}},
+        }
+
+    def test_should_learn_then_target_detection(self, mock_logger: Mock) -> None:
+        """
+        Test that detection only scans learned paths once a shape is learned.
+
+        :param mock_logger: Mocked logger
+        """
+        targeting = AdaptiveTargeting(sample_rate=0, warmup=1)
+        detector = EmailDetectionStrategy()
+        anonymizer = Anonymizer(
+            strategies=[AdaptiveTargetingStrategy(targeting=targeting), detector],
+            logger=mock_logger,
+        )
+        full = ADAPTIVE_SCANS.value(mode=ScanMode.FULL)
+        targeted = ADAPTIVE_SCANS.value(mode=ScanMode.TARGETED)
+
+        learned = Trace.model_construct(data=self.statement("john@doe.com"))
+        first = anonymizer.anonymize(trace=learned)
+        detector.substituter = Mock(wraps=detector.substituter)
+        trace = Trace.model_construct(data=self.statement("jane@doe.com"))
+        report = anonymizer.anonymize(trace=trace)
+
+        assert learned.data["result"]["response"] == "anonymous@anonymous.org"
+        assert trace.data["result"]["response"] == "anonymous@anonymous.org"
+        scanned = [c.kwargs["string"] for c in detector.substituter.sub.call_args_list]
+        assert scanned == ["jane@doe.com"]
+        assert first.final
+        assert report.targeted
+        assert not report.final
+        assert [entry["paths"] for entry in targeting.snapshot().values()] == [
+            ["result.response"],
+        ]
+        assert ADAPTIVE_SCANS.value(mode=ScanMode.FULL) == full + 1
+        assert ADAPTIVE_SCANS.value(mode=ScanMode.TARGETED) == targeted + 1
+
+    def test_should_not_learn_from_json_text(self, mock_logger: Mock) -> None:
+        """
+        Test that statements anonymized as JSON text are neither targeted nor learned from.
+
+        :param mock_logger: Mocked logger
+        """
+        targeting = AdaptiveTargeting(sample_rate=0, warmup=0)
+        anonymizer = Anonymizer(
+            strategies=[
+                AdaptiveTargetingStrategy(targeting=targeting),
+                EmailDetectionStrategy(),
+            ],
+            logger=mock_logger,
+        )
+
+        result = anonymizer.anonymize_json(json.dumps(self.statement("john@doe.com")))
+
+        assert "john@doe.com" not in result
+        assert targeting.snapshot() == {}
+
+    def test_should_change_the_fingerprint(self, mock_logger: Mock) -> None:
+        """
+        Test that adaptive targeting and its settings are part of the fingerprint.
+
+        :param mock_logger: Mocked logger
+        """
+
+        def fingerprint(*strategies: object) -> str:
+            return Anonymizer(
+                strategies=list(strategies),
+                logger=mock_logger,
+            ).fingerprint
+
+        full = fingerprint(EmailDetectionStrategy())
+        adaptive = fingerprint(
+            AdaptiveTargetingStrategy(targeting=AdaptiveTargeting(sample_rate=0.1)),
+            EmailDetectionStrategy(),
+        )
+        sampled = fingerprint(
+            AdaptiveTargetingStrategy(targeting=AdaptiveTargeting(sample_rate=0.5)),
+            EmailDetectionStrategy(),
+        )
+
+        assert len({full, adaptive, sampled}) == 3  # noqa: PLR2004
+
+    def test_should_not_cache_targeted_results(
+        self,
+        tmp_path: Path,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that the result of a targeted statement is not kept in the result cache.
+
+        :param tmp_path: Temporary directory
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[
+                AdaptiveTargetingStrategy(
+                    targeting=AdaptiveTargeting(sample_rate=0, warmup=1),
+                ),
+                EmailDetectionStrategy(),
+            ],
+            logger=mock_logger,
+        )
+        cache = ResultCache(path=tmp_path / "cache.sqlite", max_size=1 << 20)
+        learned = Trace.model_construct(data=self.statement("john@doe.com"))
+        targeted = Trace.model_construct(data=self.statement("jane@doe.com"))
+        keys = [utils_json.content_hash(t.data) for t in (learned, targeted)]
+
+        cache.anonymize(anonymizer=anonymizer, trace=learned)
+        cache.anonymize_batch(anonymizer=anonymizer, traces=[targeted])
+
+        assert cache.get(key=keys[0], fingerprint=anonymizer.fingerprint)
+        assert cache.get(key=keys[1], fingerprint=anonymizer.fingerprint) is None
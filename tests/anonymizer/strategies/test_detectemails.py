@@ -2,6 +2,7 @@ from unittest.mock import Mock
 
 import pytest
 
+from src.trace_deidentifier.anonymizer.scanners.base import DetectionEngine
 from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
     EmailDetectionStrategy,
 )
@@ -11,14 +12,18 @@ from src.trace_deidentifier.common.models.trace import Trace
 class TestEmailDetectionStrategy:
     """Tests email detection and replacement in traces."""
 
-    @pytest.fixture
-    def strategy(self, mock_logger: Mock) -> EmailDetectionStrategy:
+    @pytest.fixture(params=list(DetectionEngine))
+    def strategy(
+        self,
+        request: pytest.FixtureRequest,
+        mock_logger: Mock,
+    ) -> EmailDetectionStrategy:
         """
-        Create a EmailDetectionStrategy instance.
+        Create a EmailDetectionStrategy instance, for each detection engine.
 
         :return: A strategy instance
         """
-        strategy = EmailDetectionStrategy()
+        strategy = EmailDetectionStrategy(engine=request.param)
         strategy.logger = mock_logger
         return strategy
 
@@ -106,6 +106,12 @@ class TestGeoLocationDetectionStrategy:
                 },
                 id="mixed-content",
             ),
+            # Long digit runs used to backtrack in cubic time
+            pytest.param(
+                {"text": "1" * 5000 + "° 45.123°N 2.345°E"},
+                {"text": "1" * 5000 + '° {"lat":0,"lon":0}'},
+                id="long-digit-run",
+            ),
             # No coordinates
             pytest.param(
                 {"text": "Just some random text"},
@@ -90,3 +90,28 @@ class TestIpv4DetectionStrategy:
         trace = Trace.model_construct(data=input_data)
         strategy.anonymize(trace)
         assert trace.data == expected_data
+
+    def test_may_affect_should_prefilter_strings(
+        self,
+        strategy: Ipv4DetectionStrategy,
+    ) -> None:
+        """
+        Test that a new detector only affects traces with a string passing its prefilter.
+
+        :param strategy: The strategy to test
+        """
+        assert strategy.may_affect(
+            data={"a": ["at 10.0.0.1"]},
+            previous=None,
+            applied=False,
+        )
+        assert not strategy.may_affect(
+            data={"a": "no ip", "b": 1},
+            previous=None,
+            applied=False,
+        )
+        assert strategy.may_affect(
+            data={"a": "no ip"},
+            previous=strategy.describe_rules(),
+            applied=True,
+        )
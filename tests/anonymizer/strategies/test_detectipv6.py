@@ -2,6 +2,7 @@ from unittest.mock import Mock
 
 import pytest
 
+from src.trace_deidentifier.anonymizer.scanners.base import DetectionEngine
 from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
     Ipv6DetectionStrategy,
 )
@@ -12,14 +13,18 @@ from src.trace_deidentifier.common.types import JsonType
 class TestIpv6DetectionStrategy:
     """Test suite for IPv6 detection strategy."""
 
-    @pytest.fixture
-    def strategy(self, mock_logger: Mock) -> Ipv6DetectionStrategy:
+    @pytest.fixture(params=list(DetectionEngine))
+    def strategy(
+        self,
+        request: pytest.FixtureRequest,
+        mock_logger: Mock,
+    ) -> Ipv6DetectionStrategy:
         """
-        Create a Ipv6DetectionStrategy instance.
+        Create a Ipv6DetectionStrategy instance, for each detection engine.
 
         :return: A strategy instance
         """
-        strategy = Ipv6DetectionStrategy()
+        strategy = Ipv6DetectionStrategy(engine=request.param)
         strategy.logger = mock_logger
         return strategy
 
@@ -0,0 +1,152 @@
+import base64
+import hashlib
+from unittest.mock import Mock
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.opaque import OpaqueKind, OpaquePolicy
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.opaque_values import (
+    OpaqueValuesStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+BLOB = base64.b64encode(bytes(range(256)) * 4).decode()
+BINARY = "\x00\x01john@doe.com\x02" * 20
+DIGEST = f"sha256:{hashlib.sha256(BLOB.encode()).hexdigest()}"
+
+
+class TestOpaqueValuesStrategy:
+    """Test suite for OpaqueValuesStrategy class."""
+
+    @staticmethod
+    def anonymize(strategy: OpaqueValuesStrategy, logger: Mock) -> tuple[Trace, Mock]:
+        """
+        Anonymize a trace with opaque values, followed by email detection.
+
+        :param strategy: The strategy to test
+        :param logger: Mocked logger
+        :return: The anonymized trace, and the substituter of the email detection
+        """
+        detector = EmailDetectionStrategy()
+        detector.substituter = Mock(wraps=detector.substituter)
+        trace = Trace.model_construct(
+            data={
+                "result": {
+                    "response": "john@doe.com",
+                    "extensions": {
+                        "screenshot": BLOB,
+                        "frames": [BLOB, "short", BINARY],
+                    },
+                },
+            },
+        )
+        Anonymizer(strategies=[strategy, detector], logger=logger).anonymize(trace)
+        return trace, detector.substituter
+
+    def test_should_skip_base64_by_default(self, mock_logger: Mock) -> None:
+        """
+        Test that base64 strings are kept but not scanned, and binary-like ones scanned.
+
+        :param mock_logger: Mocked logger
+        """
+        trace, substituter = self.anonymize(OpaqueValuesStrategy(), mock_logger)
+
+        scanned = [c.kwargs["string"] for c in substituter.sub.call_args_list]
+        assert BLOB not in scanned
+        assert BINARY in scanned
+        assert trace.data["result"]["extensions"]["screenshot"] == BLOB
+
+    @pytest.mark.parametrize(
+        ("policy", "extensions"),
+        [
+            pytest.param(
+                OpaquePolicy.DROP,
+                {"frames": ["short"]},
+                id="drop",
+            ),
+            pytest.param(
+                OpaquePolicy.HASH,
+                {
+                    "screenshot": DIGEST,
+                    "frames": [
+                        DIGEST,
+                        "short",
+                        f"sha256:{hashlib.sha256(BINARY.encode()).hexdigest()}",
+                    ],
+                },
+                id="hash",
+            ),
+            pytest.param(
+                OpaquePolicy.SCAN,
+                {
+                    "screenshot": BLOB,
+                    "frames": [
+                        BLOB,
+                        "short",
+                        BINARY.replace("john@doe.com", "anonymous@anonymous.org"),
+                    ],
+                },
+                id="scan",
+            ),
+        ],
+    )
+    def test_policies(
+        self,
+        mock_logger: Mock,
+        policy: OpaquePolicy,
+        extensions: dict,
+    ) -> None:
+        """
+        Test that each policy is applied to opaque strings, and only to them.
+
+        :param mock_logger: Mocked logger
+        :param policy: Policy of every kind of payload
+        :param extensions: Expected extensions
+        """
+        strategy = OpaqueValuesStrategy(policies=dict.fromkeys(OpaqueKind, policy))
+
+        trace, substituter = self.anonymize(strategy, mock_logger)
+
+        scanned = [c.kwargs["string"] for c in substituter.sub.call_args_list]
+        assert trace.data["result"]["extensions"] == extensions
+        assert trace.data["result"]["response"] == "anonymous@anonymous.org"
+        assert DIGEST not in scanned
+
+    def test_should_scan_short_strings(self, mock_logger: Mock) -> None:
+        """
+        Test that strings shorter than the minimum length are never classified.
+
+        :param mock_logger: Mocked logger
+        """
+        strategy = OpaqueValuesStrategy(
+            policies={OpaqueKind.BASE64: OpaquePolicy.DROP},
+            min_length=len(BLOB) + 1,
+        )
+
+        trace, _ = self.anonymize(strategy, mock_logger)
+
+        assert trace.data["result"]["extensions"]["screenshot"] == BLOB
+
+    def test_should_mark_items_after_dropped_ones(self, mock_logger: Mock) -> None:
+        """
+        Test that list items shifted by dropped payloads are still scanned or skipped as expected.
+
+        :param mock_logger: Mocked logger
+        """
+        strategy = OpaqueValuesStrategy(
+            policies={OpaqueKind.BINARY: OpaquePolicy.DROP},
+            min_length=100,
+        )
+        detector = EmailDetectionStrategy()
+        frames = [BINARY, BLOB, "john@doe.com", BINARY, BLOB]
+        trace = Trace.model_construct(data={"frames": frames})
+
+        Anonymizer(strategies=[strategy, detector], logger=mock_logger).anonymize(
+            trace,
+        )
+
+        assert trace.data["frames"] == [BLOB, "anonymous@anonymous.org", BLOB]
@@ -3,6 +3,7 @@ from unittest.mock import Mock
 
 import pytest
 
+from src.trace_deidentifier.anonymizer.extension_rules import ExtensionRules
 from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
     RemoveFieldsStrategy,
 )
@@ -138,3 +139,145 @@ class TestRemoveFieldsStrategy:
         trace = Trace.model_construct(data={"context": {"extensions": extensions}})
         strategy.anonymize(trace=trace)
         assert trace.data.get("context").get("extensions") == expected
+
+    def test_should_remove_extensions_in_substatements_and_context_activities(
+        self,
+        strategy: RemoveFieldsStrategy,
+    ) -> None:
+        """
+        Test that extensions nested in SubStatements and context activities are removed.
+
+        :param strategy: The strategy to test
+        """
+        activity = {
+            "id": "https://example.com/activity",
+            "definition": {
+                "extensions": {
+                    "http://id.tincanapi.com/extension/location": "Paris",
+                    "safe-extension": "keep",
+                },
+            },
+        }
+        trace = Trace.model_construct(
+            data={
+                "context": {
+                    "contextActivities": {
+                        "parent": [activity],
+                        "grouping": {"definition": activity["definition"].copy()},
+                    },
+                },
+                "object": {
+                    "objectType": "SubStatement",
+                    "context": {
+                        "extensions": {
+                            "http://id.tincanapi.com/extension/ip-address": "1.2.3.4",
+                        },
+                    },
+                    "result": {
+                        "extensions": {
+                            "http://id.tincanapi.com/extension/tweet": "hello",
+                        },
+                    },
+                },
+            },
+        )
+        strategy.anonymize(trace=trace)
+        assert trace.data == {
+            "context": {
+                "contextActivities": {
+                    "parent": [
+                        {
+                            "id": "https://example.com/activity",
+                            "definition": {"extensions": {"safe-extension": "keep"}},
+                        },
+                    ],
+                    "grouping": {
+                        "definition": {"extensions": {"safe-extension": "keep"}},
+                    },
+                },
+            },
+            "object": {
+                "objectType": "SubStatement",
+                "context": {},
+                "result": {},
+            },
+        }
+
+    def test_should_apply_custom_rules(self, mock_logger: Mock) -> None:
+        """
+        Test that exact, prefix and suffix rules can be configured.
+
+        :param mock_logger: Mock logger to use with the strategy
+        """
+        strategy = RemoveFieldsStrategy(
+            rules=ExtensionRules(
+                exact=frozenset({"https://example.com/ext/session"}),
+                prefixes=frozenset({"https://tracker.example.org/"}),
+                suffixes=frozenset({"/device"}),
+            ),
+        )
+        strategy.logger = mock_logger
+        trace = Trace.model_construct(
+            data={
+                "result": {
+                    "extensions": {
+                        "https://example.com/ext/session": "remove",
+                        "https://example.com/ext/session-count": "keep",
+                        "https://tracker.example.org/any/thing": "remove",
+                        "https://example.com/ext/device": "remove",
+                        "http://id.tincanapi.com/extension/ip-address": "keep",
+                    },
+                },
+            },
+        )
+        strategy.anonymize(trace=trace)
+        assert trace.data == {
+            "result": {
+                "extensions": {
+                    "https://example.com/ext/session-count": "keep",
+                    "http://id.tincanapi.com/extension/ip-address": "keep",
+                },
+            },
+        }
+
+    def test_should_only_look_in_configured_paths(self, mock_logger: Mock) -> None:
+        """
+        Test that rules with explicit paths only inspect those paths.
+
+        :param mock_logger: Mock logger to use with the strategy
+        """
+        strategy = RemoveFieldsStrategy(
+            rules=ExtensionRules(suffixes=frozenset({"secret"}), paths=("result",)),
+        )
+        strategy.logger = mock_logger
+        trace = Trace.model_construct(
+            data={
+                "context": {"extensions": {"ext/secret": "keep"}},
+                "result": {"extensions": {"ext/secret": "remove", "ext/a": "keep"}},
+            },
+        )
+        strategy.anonymize(trace=trace)
+        assert trace.data == {
+            "context": {"extensions": {"ext/secret": "keep"}},
+            "result": {"extensions": {"ext/a": "keep"}},
+        }
+
+    def test_may_affect_should_only_flag_newly_matched_extensions(self) -> None:
+        """Test that only traces with an extension matched by one version of the rules are affected."""
+        strategy = RemoveFieldsStrategy(
+            rules=ExtensionRules(suffixes=frozenset({"secret", "tweet"})),
+        )
+        previous = RemoveFieldsStrategy(
+            rules=ExtensionRules(suffixes=frozenset({"secret"})),
+        ).describe_rules()
+
+        def may_affect(*extensions: str) -> bool:
+            return strategy.may_affect(
+                data={"result": {"extensions": dict.fromkeys(extensions, 1)}},
+                previous=previous,
+                applied=True,
+            )
+
+        assert not may_affect("ext/secret", "ext/a")
+        assert may_affect("ext/tweet")
+        assert strategy.may_affect(data={}, previous={"paths": []}, applied=False)
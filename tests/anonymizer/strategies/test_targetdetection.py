@@ -0,0 +1,68 @@
+from unittest.mock import Mock
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.detection_schema import DetectionSchema
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.target_detection import (
+    DetectionTargetingStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+STATEMENT_ID = "12345678-1234-1234-1234-123456789abc"
+
+
+class TestDetectionTargetingStrategy:
+    """Test suite for DetectionTargetingStrategy class."""
+
+    def test_detection_should_only_scan_targeted_fields(
+        self,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that detection skips fields following their format and scans the others.
+
+        :param mock_logger: Mocked logger
+        """
+        detector = Ipv6DetectionStrategy()
+        detector.substituter = Mock(wraps=detector.substituter)
+        anonymizer = Anonymizer(
+            strategies=[DetectionTargetingStrategy(), detector],
+            logger=mock_logger,
+        )
+        trace = Trace.model_construct(
+            data={
+                "id": STATEMENT_ID,
+                "timestamp": "2024-01-31T10:20:30+01:00",
+                "verb": {"id": "http://adlnet.gov/expapi/verbs/answered"},
+                "object": {"id": "http://[fe80::1]/activity"},
+                "result": {"response": "fe80::1"},
+            },
+        )
+
+        anonymizer.anonymize(trace=trace)
+
+        scanned = [c.kwargs["string"] for c in detector.substituter.sub.call_args_list]
+        assert scanned == ["http://[fe80::1]/activity", "fe80::1"]
+        assert trace.data["object"] == {"id": "http://[::]/activity"}
+        assert trace.data["result"] == {"response": "::"}
+        assert trace.data["id"] == STATEMENT_ID
+
+    def test_should_use_custom_schema(self, mock_logger: Mock) -> None:
+        """
+        Test that a stricter schema scans fields skipped by default.
+
+        :param mock_logger: Mocked logger
+        """
+        strategy = DetectionTargetingStrategy(
+            schema=DetectionTargetingStrategy.DEFAULT_SCHEMA.merge(
+                DetectionSchema.from_mapping({"id": "scan"}),
+            ),
+        )
+        strategy.logger = mock_logger
+        trace = Trace.model_construct(data={"id": STATEMENT_ID, "version": "1.0.0"})
+
+        skipped = [key for _, key in strategy.root.iter_skipped(trace.data)]
+
+        assert skipped == ["version"]
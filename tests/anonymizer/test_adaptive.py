@@ -0,0 +1,175 @@
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.adaptive import (
+    ADAPTIVE_DISCOVERED_PATHS,
+    AdaptiveTargeting,
+    iter_string_fields,
+    shape_of,
+)
+
+SHAPE = shape_of(["result.response", "verb.id"])
+
+
+class TestAdaptiveTargeting:
+    """Test suite for AdaptiveTargeting class."""
+
+    def test_iter_string_fields(self) -> None:
+        """Test that string fields are found with their generalized path."""
+        members = [{"name": "a"}, {"name": "b", "age": 3}]
+        data = {"actor": {"member": members}, "verb": {"id": "v"}, "score": 1}
+
+        fields = [(path, id(c), k) for path, c, k in iter_string_fields(data)]
+
+        assert fields == [
+            ("actor.member.*.name", id(members[0]), "name"),
+            ("actor.member.*.name", id(members[1]), "name"),
+            ("verb.id", id(data["verb"]), "id"),
+        ]
+
+    def test_shape_should_not_depend_on_order(self) -> None:
+        """Test that the shape only depends on the set of paths."""
+        assert shape_of(["verb.id", "result.response", "verb.id"]) == SHAPE
+        assert shape_of(["verb.id"]) != SHAPE
+
+    def test_should_scan_fully_until_warmed_up(self) -> None:
+        """Test that a shape is only targeted once fully scanned enough times."""
+        targeting = AdaptiveTargeting(sample_rate=0, warmup=2)
+
+        assert targeting.plan(SHAPE) is None
+        assert targeting.learn(SHAPE, ["result.response"]) == {"result.response"}
+        assert targeting.plan(SHAPE) is None
+        assert targeting.learn(SHAPE, ["result.response"]) == set()
+        assert targeting.plan(SHAPE) == frozenset({"result.response"})
+
+    def test_should_sample_full_scans(self) -> None:
+        """Test that learned shapes are still fully scanned at the sample rate."""
+        targeting = AdaptiveTargeting(sample_rate=1, warmup=0)
+        targeting.learn(SHAPE, [])
+
+        assert targeting.plan(SHAPE) is None
+
+    def test_should_count_discovered_paths(self) -> None:
+        """Test that paths found after the warmup are counted as discoveries."""
+        targeting = AdaptiveTargeting(sample_rate=0, warmup=1)
+        before = ADAPTIVE_DISCOVERED_PATHS.value()
+
+        targeting.learn(SHAPE, ["result.response"])
+        targeting.learn(SHAPE, ["verb.id"])
+
+        assert ADAPTIVE_DISCOVERED_PATHS.value() == before + 1
+
+    def test_should_persist_state(self, tmp_path: Path) -> None:
+        """
+        Test that the learned state is saved to its file and loaded back.
+
+        :param tmp_path: Temporary directory
+        """
+        state_file = tmp_path / "targeting.json"
+        targeting = AdaptiveTargeting(sample_rate=0, warmup=1, state_file=state_file)
+        targeting.learn(SHAPE, ["result.response"])
+        unsaved = state_file.exists()
+        targeting.close()
+
+        restored = AdaptiveTargeting(sample_rate=0, warmup=1, state_file=state_file)
+
+        assert not unsaved
+        assert json.loads(state_file.read_text()) == targeting.snapshot()
+        assert restored.snapshot() == {
+            SHAPE: {"scans": 1, "paths": ["result.response"]},
+        }
+        assert restored.plan(SHAPE) == frozenset({"result.response"})
+
+    def test_should_merge_state_of_processes_sharing_the_file(
+        self,
+        tmp_path: Path,
+    ) -> None:
+        """
+        Test that instances sharing a file keep the paths learned by each other.
+
+        :param tmp_path: Temporary directory
+        """
+        state_file = tmp_path / "targeting.json"
+        first, second = (
+            AdaptiveTargeting(sample_rate=0, warmup=1, state_file=state_file)
+            for _ in range(2)
+        )
+        first.learn(SHAPE, ["result.response"])
+        second.learn(SHAPE, ["verb.id"])
+        second.learn("other", ["actor.name"])
+
+        first.save()
+        second.save()
+
+        assert json.loads(state_file.read_text()) == {
+            SHAPE: {"scans": 1, "paths": ["result.response", "verb.id"]},
+            "other": {"scans": 1, "paths": ["actor.name"]},
+        }
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_should_log_failed_saves(self, tmp_path: Path, mock_logger: Mock) -> None:
+        """
+        Test that a state that cannot be saved is logged, and saved once possible.
+
+        :param tmp_path: Temporary directory
+        :param mock_logger: Mocked logger
+        """
+        state_file = tmp_path / "missing" / "targeting.json"
+        targeting = AdaptiveTargeting(
+            sample_rate=0,
+            warmup=1,
+            state_file=state_file,
+            logger=mock_logger,
+        )
+
+        assert targeting.learn(SHAPE, ["verb.id"]) == {"verb.id"}
+        targeting.save()
+        state_file.parent.mkdir()
+        targeting.close()
+
+        mock_logger.warning.assert_called_once()
+        assert json.loads(state_file.read_text()) == targeting.snapshot()
+
+    @pytest.mark.parametrize("content", ['{"shape": {"scans"', "[]", '{"a": {}}'])
+    def test_should_start_over_from_unreadable_state(
+        self,
+        tmp_path: Path,
+        mock_logger: Mock,
+        content: str,
+    ) -> None:
+        """
+        Test that a state file that cannot be read is logged, then replaced.
+
+        :param tmp_path: Temporary directory
+        :param mock_logger: Mocked logger
+        :param content: The content of the state file
+        """
+        state_file = tmp_path / "targeting.json"
+        state_file.write_text(content)
+        targeting = AdaptiveTargeting(
+            sample_rate=0,
+            warmup=1,
+            state_file=state_file,
+            logger=mock_logger,
+        )
+
+        assert targeting.snapshot() == {}
+        mock_logger.warning.assert_called_once()
+        targeting.learn(SHAPE, ["verb.id"])
+        targeting.close()
+        assert json.loads(state_file.read_text()) == targeting.snapshot()
+
+    @pytest.mark.parametrize("paths", [[], ["verb.id"]])
+    def test_snapshot(self, paths: list[str]) -> None:
+        """
+        Test that the snapshot lists the scans and learned paths of each shape.
+
+        :param paths: Paths learned from a scan
+        """
+        targeting = AdaptiveTargeting(sample_rate=0)
+        targeting.learn(SHAPE, paths)
+
+        assert targeting.snapshot() == {SHAPE: {"scans": 1, "paths": paths}}
@@ -1,14 +1,59 @@
+import json
+from copy import deepcopy
 from unittest.mock import Mock
 
 import pytest
 
 from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
-from src.trace_deidentifier.anonymizer.exceptions import AnonymizationError
+from src.trace_deidentifier.anonymizer.deadline import DEADLINE_EXCEEDED, DeadlinePolicy
+from src.trace_deidentifier.anonymizer.detection_schema import DetectionSchema
+from src.trace_deidentifier.anonymizer.exceptions import (
+    AnonymizationError,
+    DeadlineExceededError,
+    ScanBudgetExceededError,
+    StatementRejectedError,
+)
+from src.trace_deidentifier.anonymizer.extension_rules import ExtensionRules
+from src.trace_deidentifier.anonymizer.prescreen import (
+    PRESCREEN_TOTAL,
+    PrescreenOutcome,
+)
+from src.trace_deidentifier.anonymizer.report import AnonymizationReport
+from src.trace_deidentifier.anonymizer.scanners.budget import REDACTED
 from src.trace_deidentifier.anonymizer.strategies.base import BaseAnonymizationStrategy
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.target_detection import (
+    DetectionTargetingStrategy,
+)
 from src.trace_deidentifier.common.models.trace import Trace
 from src.trace_deidentifier.common.types import JsonType
 
 
+class FlaggedFailureStrategy(BaseAnonymizationStrategy):
+    """Strategy failing on traces flagged 'fail', and refusing those flagged 'reject'."""
+
+    def anonymize(self, trace: Trace) -> None:
+        """
+        Fail or refuse the trace when flagged.
+
+        :param trace: The trace
+        :raises ValueError: If the trace is flagged 'fail'
+        :raises StatementRejectedError: If the trace is flagged 'reject'
+        """
+        if trace.data.get("fail"):
+            raise ValueError("Strategy failed")
+        if trace.data.get("reject"):
+            raise StatementRejectedError("Refused")
+
+
 class TestAnonymizer:
     """Test suite for Anonymizer class."""
 
@@ -112,3 +157,480 @@ class TestAnonymizer:
         # Verify total number of strategy calls
         total_calls = sum(strategy.anonymize.call_count for strategy in strategies)
         assert total_calls == expected_calls
+
+    def test_should_stop_on_rejected_statement(
+        self,
+        mock_strategy: Mock,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that a rejected statement stops anonymization with its own error.
+
+        :param mock_strategy: Mock strategy fixture
+        :param mock_logger: Mocked logger
+        """
+        rejecting_strategy = Mock(spec=BaseAnonymizationStrategy)
+        rejecting_strategy.anonymize.side_effect = ScanBudgetExceededError("Too long")
+
+        anonymizer = Anonymizer(
+            strategies=[rejecting_strategy, mock_strategy],
+            logger=mock_logger,
+        )
+        trace = Trace.model_construct(data={"some": "data"})
+
+        with pytest.raises(ScanBudgetExceededError, match="Too long"):
+            anonymizer.anonymize(trace=trace)
+
+        mock_strategy.anonymize.assert_not_called()
+
+    def test_should_redact_after_deadline(self, mock_logger: Mock) -> None:
+        """
+        Test that strings left unscanned after the deadline are redacted, and the metric recorded.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[EmailDetectionStrategy()],
+            logger=mock_logger,
+            deadline=0.0,
+            deadline_policy=DeadlinePolicy.REDACT,
+        )
+        trace = Trace.model_construct(data={"a": "john@doe.com", "b": ["text"]})
+        before = DEADLINE_EXCEEDED.value(policy=DeadlinePolicy.REDACT)
+
+        report = anonymizer.anonymize(trace=trace)
+
+        assert trace.data == {"a": REDACTED, "b": [REDACTED]}
+        assert report.deadline_exceeded
+        assert DEADLINE_EXCEEDED.value(policy=DeadlinePolicy.REDACT) == before + 1
+
+    def test_should_reject_after_deadline(self, mock_logger: Mock) -> None:
+        """
+        Test that a statement exceeding its deadline is rejected with the reject policy.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[EmailDetectionStrategy()],
+            logger=mock_logger,
+            deadline=0.0,
+            deadline_policy=DeadlinePolicy.REJECT,
+        )
+        trace = Trace.model_construct(data={"a": "john@doe.com"})
+        before = DEADLINE_EXCEEDED.value(policy=DeadlinePolicy.REJECT)
+
+        with pytest.raises(DeadlineExceededError):
+            anonymizer.anonymize(trace=trace)
+
+        assert DEADLINE_EXCEEDED.value(policy=DeadlinePolicy.REJECT) == before + 1
+
+    def test_should_not_expire_within_deadline(self, mock_logger: Mock) -> None:
+        """
+        Test that a trace processed within its deadline is anonymized normally.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[EmailDetectionStrategy()],
+            logger=mock_logger,
+            deadline=60.0,
+        )
+        trace = Trace.model_construct(data={"a": "john@doe.com"})
+
+        anonymizer.anonymize(trace=trace)
+
+        assert trace.data == {"a": "anonymous@anonymous.org"}
+
+    @pytest.mark.parametrize(
+        ("mbox", "response", "outcome", "changed"),
+        [
+            pytest.param(
+                "mailto:john@doe.com",
+                "done",
+                PrescreenOutcome.SKIPPED,
+                True,
+                id="replaced-email",
+            ),
+            pytest.param(
+                "mailto:anonymous@anonymous.org",
+                "done",
+                PrescreenOutcome.SKIPPED,
+                False,
+                id="already-anonymous",
+            ),
+            pytest.param(
+                "mailto:john@doe.com",
+                "john@doe.com",
+                PrescreenOutcome.SCANNED,
+                True,
+                id="remaining-email",
+            ),
+        ],
+    )
+    def test_should_prescreen_detection(
+        self,
+        mock_logger: Mock,
+        mbox: str,
+        response: str,
+        outcome: PrescreenOutcome,
+        changed: bool,
+    ) -> None:
+        """
+        Test that detection is skipped when the JSON text has nothing left to detect.
+
+        :param mock_logger: Mocked logger
+        :param mbox: Email of the actor, replaced before detection
+        :param response: Free text of the result, scanned by detection
+        :param outcome: Expected prescreen outcome
+        :param changed: Whether the trace is expected to be altered
+        """
+        detector = EmailDetectionStrategy()
+        detector.anonymize = Mock(wraps=detector.anonymize)
+        anonymizer = Anonymizer(
+            strategies=[ReplaceSensitiveValuesStrategy(), detector],
+            logger=mock_logger,
+            prescreen=True,
+        )
+        data = {"actor": {"mbox": mbox}, "result": {"response": response}}
+        trace = Trace.model_construct(data=data)
+        before = PRESCREEN_TOTAL.value(outcome=outcome)
+
+        report = anonymizer.anonymize(trace=trace, raw=json.dumps(data))
+
+        assert report.prescreen == outcome
+        assert report.changed == changed
+        assert report.unchanged == (not changed and outcome == PrescreenOutcome.SKIPPED)
+        assert detector.anonymize.called == (outcome != PrescreenOutcome.SKIPPED)
+        assert PRESCREEN_TOTAL.value(outcome=outcome) == before + 1
+        assert trace.data["actor"]["mbox"] == "mailto:anonymous@anonymous.org"
+
+    def test_should_not_prescreen_without_json_text(self, mock_logger: Mock) -> None:
+        """
+        Test that detection always runs when the JSON text of the trace is unknown.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[EmailDetectionStrategy()],
+            logger=mock_logger,
+            prescreen=True,
+        )
+        trace = Trace.model_construct(data={"a": "john@doe.com"})
+
+        report = anonymizer.anonymize(trace=trace)
+
+        assert report.prescreen is None
+        assert trace.data == {"a": "anonymous@anonymous.org"}
+
+    def test_detection_should_skip_replaced_fields(self, mock_logger: Mock) -> None:
+        """
+        Test that detection strategies do not scan the values written by earlier strategies.
+
+        :param mock_logger: Mocked logger
+        """
+        detector = EmailDetectionStrategy()
+        detector.substituter = Mock(wraps=detector.substituter)
+        anonymizer = Anonymizer(
+            strategies=[ReplaceSensitiveValuesStrategy(), detector],
+            logger=mock_logger,
+        )
+        trace = Trace.model_construct(
+            data={
+                "actor": {"mbox": "mailto:john@doe.com", "name": "John"},
+                "result": {"response": "john@doe.com"},
+            },
+        )
+
+        report = anonymizer.anonymize(trace=trace)
+
+        scanned = [c.kwargs["string"] for c in detector.substituter.sub.call_args_list]
+        assert scanned == ["john@doe.com"]
+        assert report.clean == {
+            (id(trace.data["actor"]), "mbox"),
+            (id(trace.data["actor"]), "name"),
+        }
+        assert trace.data == {
+            "actor": {"mbox": "mailto:anonymous@anonymous.org", "name": "Anonymous"},
+            "result": {"response": "anonymous@anonymous.org"},
+        }
+
+    @pytest.mark.parametrize("prescreen", [True, False])
+    def test_anonymize_json_should_match_anonymize(
+        self,
+        mock_logger: Mock,
+        prescreen: bool,
+    ) -> None:
+        """
+        Test that anonymizing the JSON text gives the same data as anonymizing the trace.
+
+        :param mock_logger: Mocked logger
+        :param prescreen: Whether detection is prescreened
+        """
+        data = {
+            "actor": {"mbox": "mailto:john@doe.com", "name": "John"},
+            "result": {"response": "Write to jane\u0040doe.com", "score": 1.5},
+            "context": {"extensions": {"john@doe.com": ["jane@doe.com", None]}},
+        }
+        anonymizer = Anonymizer(
+            strategies=[ReplaceSensitiveValuesStrategy(), EmailDetectionStrategy()],
+            logger=mock_logger,
+            prescreen=prescreen,
+        )
+        trace = Trace.model_construct(data=json.loads(json.dumps(data)))
+        anonymizer.anonymize(trace=trace)
+
+        result = anonymizer.anonymize_json(text=json.dumps(data).encode())
+
+        assert json.loads(result) == trace.data
+        assert "john@doe.com" in result  # Keys are left as is
+
+    def test_anonymize_json_should_scan_skipped_fields(
+        self,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that fields given the skip policy are scanned on the JSON text only.
+
+        :param mock_logger: Mocked logger
+        """
+        data = {
+            "result": {"response": "john@doe.com"},
+            "context": {"extensions": {"note": "jane@doe.com"}},
+        }
+        schema = DetectionTargetingStrategy.DEFAULT_SCHEMA.merge(
+            DetectionSchema.from_mapping({"context.extensions": "skip"}),
+        )
+        anonymizer = Anonymizer(
+            strategies=[
+                DetectionTargetingStrategy(schema=schema),
+                EmailDetectionStrategy(),
+            ],
+            logger=mock_logger,
+        )
+        trace = Trace.model_construct(data=json.loads(json.dumps(data)))
+        anonymizer.anonymize(trace=trace)
+
+        result = json.loads(anonymizer.anonymize_json(text=json.dumps(data)))
+
+        assert trace.data["context"] == data["context"]
+        assert result["context"]["extensions"]["note"] == "anonymous@anonymous.org"
+        assert result["result"] == trace.data["result"]
+
+    def test_anonymize_copy_should_leave_trace_unchanged(
+        self,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that anonymizing a copy gives the in-place result without changing the trace.
+
+        :param mock_logger: Mocked logger
+        """
+        data = {
+            "actor": {"mbox": "mailto:john@doe.com", "name": "John"},
+            "result": {"response": "Write to jane@doe.com"},
+            "object": {"id": "http://example.com/activities/1"},
+        }
+        anonymizer = Anonymizer(
+            strategies=[ReplaceSensitiveValuesStrategy(), EmailDetectionStrategy()],
+            logger=mock_logger,
+        )
+        expected = Trace.model_construct(data=json.loads(json.dumps(data)))
+        anonymizer.anonymize(trace=expected)
+        trace = Trace.model_construct(data=json.loads(json.dumps(data)))
+
+        result, report = anonymizer.anonymize_copy(trace=trace)
+
+        assert trace.data == data
+        assert result.data == expected.data
+        assert result.data["object"] is trace.data["object"]
+        assert len(report.clean) == len(expected.data["actor"])
+
+    def test_fingerprint_should_follow_rules(self, mock_logger: Mock) -> None:
+        """
+        Test that the fingerprint of the rule set changes with the rules only.
+
+        :param mock_logger: Mocked logger
+        """
+
+        def fingerprint(*suffixes: str) -> str:
+            rules = ExtensionRules(suffixes=frozenset(suffixes))
+            return Anonymizer(
+                strategies=[
+                    RemoveFieldsStrategy(rules=rules),
+                    EmailDetectionStrategy(),
+                ],
+                logger=mock_logger,
+            ).fingerprint
+
+        assert fingerprint("a", "b") == fingerprint("b", "a")
+        assert fingerprint("a", "b") != fingerprint("a")
+
+    def test_should_report_strategies_that_changed_the_trace(
+        self,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that the report names the strategies that changed the trace, repeated classes numbered.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[
+                ReplaceSensitiveValuesStrategy(),
+                EmailDetectionStrategy(),
+                EmailDetectionStrategy(),
+                RemoveFieldsStrategy(),
+            ],
+            logger=mock_logger,
+        )
+        trace = Trace.model_construct(
+            data={"actor": {"name": "John"}, "result": {"response": "jane@doe.com"}},
+        )
+
+        report = anonymizer.anonymize(trace=trace)
+
+        assert list(anonymizer.rules) == [
+            "ReplaceSensitiveValuesStrategy",
+            "EmailDetectionStrategy",
+            "EmailDetectionStrategy#2",
+            "RemoveFieldsStrategy",
+        ]
+        assert report.applied == {
+            "ReplaceSensitiveValuesStrategy",
+            "EmailDetectionStrategy",
+        }
+
+    def test_may_affect_should_follow_rule_changes(self, mock_logger: Mock) -> None:
+        """
+        Test which traces a rule set may anonymize unlike a previous one.
+
+        :param mock_logger: Mocked logger
+        """
+        previous = Anonymizer(
+            strategies=[ReplaceSensitiveValuesStrategy(), EmailDetectionStrategy()],
+            logger=mock_logger,
+        ).rules
+        anonymizer = Anonymizer(
+            strategies=[ReplaceSensitiveValuesStrategy()],
+            logger=mock_logger,
+        )
+        data = {"result": {"response": "jane@doe.com"}}
+
+        assert not anonymizer.may_affect(data=data, previous_rules=previous, applied=[])
+        assert anonymizer.may_affect(
+            data=data,
+            previous_rules=previous,
+            applied=["EmailDetectionStrategy"],
+        )
+        assert not anonymizer.may_affect(
+            data=data,
+            previous_rules=anonymizer.rules,
+            applied=list(anonymizer.rules),
+        )
+
+    def test_anonymize_batch_should_match_anonymize(self, mock_logger: Mock) -> None:
+        """
+        Test that anonymizing traces together gives the same traces and reports as one by one.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[
+                ReplaceSensitiveValuesStrategy(),
+                RemoveFieldsStrategy(),
+                EmailDetectionStrategy(),
+            ],
+            logger=mock_logger,
+        )
+        data = [
+            {"actor": {"mbox": "mailto:john@doe.com"}},
+            {"result": {"extensions": {"http://example.com/ip-address": "1.2.3.4"}}},
+            {"result": {"response": "Ask jane@doe.com"}, "object": {"id": "a"}},
+        ]
+        expected = [Trace.model_construct(data=deepcopy(d)) for d in data]
+        reports = [anonymizer.anonymize(trace=trace) for trace in expected]
+        traces = [Trace.model_construct(data=deepcopy(d)) for d in data]
+
+        results = anonymizer.anonymize_batch(traces=traces)
+
+        assert [t.data for t in traces] == [t.data for t in expected]
+        assert [r.applied for r in results] == [r.applied for r in reports]
+        assert [r.changes for r in results] == [r.changes for r in reports]
+
+    def test_anonymize_batch_should_capture_errors_per_trace(
+        self,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that a failing or refused trace gets its error, without stopping the others.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[FlaggedFailureStrategy(), ReplaceSensitiveValuesStrategy()],
+            logger=mock_logger,
+        )
+        traces = [
+            Trace.model_construct(data={"actor": {"name": "John"}, **flag})
+            for flag in ({}, {"fail": True}, {"reject": True})
+        ]
+
+        results = anonymizer.anonymize_batch(traces=traces)
+
+        assert isinstance(results[0], AnonymizationReport)
+        assert isinstance(results[1], AnonymizationError)
+        assert "Strategy failed" in str(results[1])
+        assert isinstance(results[2], StatementRejectedError)
+        # Remaining strategies apply to failed traces, not to refused ones
+        assert [t.data["actor"]["name"] for t in traces] == [
+            "Anonymous",
+            "Anonymous",
+            "John",
+        ]
+
+    def test_anonymize_batch_should_count_deadline_per_trace(
+        self,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that each trace of a batch has its own deadline.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[EmailDetectionStrategy()],
+            logger=mock_logger,
+            deadline=0.0,
+            deadline_policy=DeadlinePolicy.REJECT,
+        )
+        traces = [
+            Trace.model_construct(data={"result": {"response": "jane@doe.com"}})
+            for _ in range(2)
+        ]
+
+        results = anonymizer.anonymize_batch(traces=traces)
+
+        assert all(isinstance(r, DeadlineExceededError) for r in results)
+
+    def test_should_log_strategies_with_its_own_logger(self) -> None:
+        """Test that anonymizers sharing a strategy each log with their logger, leaving it as is."""
+        strategy = ReplaceSensitiveValuesStrategy()
+        own_logger = Mock()
+        strategy.logger = own_logger
+        loggers = [Mock(), Mock()]
+        anonymizers = [
+            Anonymizer(strategies=[strategy], logger=logger) for logger in loggers
+        ]
+
+        for anonymizer in anonymizers:
+            anonymizer.anonymize(
+                trace=Trace.model_construct(data={"actor": {"name": "John"}}),
+            )
+        anonymizers[0].anonymize_batch(
+            traces=[Trace.model_construct(data={"actor": {"name": "John"}})],
+        )
+
+        assert strategy.logger is own_logger
+        own_logger.debug.assert_not_called()
+        assert loggers[0].debug.call_count == 2  # noqa: PLR2004
+        assert loggers[1].debug.call_count == 1
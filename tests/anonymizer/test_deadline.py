@@ -0,0 +1,79 @@
+import pytest
+
+from src.trace_deidentifier.anonymizer.deadline import (
+    Deadline,
+    DeadlinePolicy,
+    check_deadline,
+    current_deadline,
+    deadline_scope,
+)
+from src.trace_deidentifier.anonymizer.exceptions import DeadlineExceededError
+
+
+class FakeClock:
+    """Clock advanced manually by tests."""
+
+    def __init__(self) -> None:
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """
+        Get the current time.
+
+        :return: The time, in seconds
+        """
+        return self.now
+
+
+class TestDeadline:
+    """Test suite for Deadline."""
+
+    def test_should_expire_after_its_budget(self) -> None:
+        """Test that a deadline expires once its time budget is spent, and stays expired."""
+        clock = FakeClock()
+        deadline = Deadline(seconds=1.0, clock=clock)
+        assert not deadline.expired()
+
+        clock.now = 1.0
+        assert deadline.expired()
+        assert deadline.exceeded
+
+        clock.now = 0.0
+        assert deadline.expired()
+
+    def test_should_raise_when_checked_after_expiry(self) -> None:
+        """Test that checking an expired deadline raises an error."""
+        clock = FakeClock()
+        deadline = Deadline(seconds=1.0, policy=DeadlinePolicy.REJECT, clock=clock)
+        deadline.check()
+
+        clock.now = 2.0
+        with pytest.raises(DeadlineExceededError, match="deadline"):
+            deadline.check()
+
+    def test_should_not_count_paused_time(self) -> None:
+        """Test that the time spent paused is added to the budget."""
+        clock = FakeClock()
+        deadline = Deadline(seconds=1.0, clock=clock)
+        deadline.pause()
+        clock.now = 5.0
+        deadline.resume()
+
+        clock.now = 5.5
+        assert not deadline.expired()
+        clock.now = 6.0
+        assert deadline.expired()
+
+    def test_scope_should_set_current_deadline(self) -> None:
+        """Test that a scope makes its deadline current, and restores the previous one."""
+        deadline = Deadline(seconds=0.0)
+        assert current_deadline() is None
+        check_deadline()
+
+        with deadline_scope(deadline):
+            assert current_deadline() is deadline
+            with pytest.raises(DeadlineExceededError):
+                check_deadline()
+
+        assert current_deadline() is None
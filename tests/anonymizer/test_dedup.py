@@ -0,0 +1,88 @@
+from unittest.mock import Mock
+
+from src.trace_deidentifier.anonymizer.deadline import Deadline, deadline_scope
+from src.trace_deidentifier.anonymizer.dedup import (
+    DEDUP_TOTAL,
+    BatchDeduplicator,
+    DedupLevel,
+    DedupOutcome,
+    PendingResult,
+    dedup_scope,
+    deduplicated,
+)
+
+
+class TestBatchDeduplicator:
+    """Test suite for BatchDeduplicator class."""
+
+    def test_key_should_ignore_key_order(self) -> None:
+        """Test that statements differing by the order of their keys only have the same key."""
+        assert BatchDeduplicator.key({"a": 1, "b": [{"c": 2, "d": 3}]}) == (
+            BatchDeduplicator.key({"b": [{"d": 3, "c": 2}], "a": 1})
+        )
+        assert BatchDeduplicator.key({"a": 1}) != BatchDeduplicator.key({"a": 2})
+
+    def test_should_evict_oldest_statement(self) -> None:
+        """Test that only the results of the last statements of the window are kept."""
+        deduplicator = BatchDeduplicator(window=2)
+        for key in ("a", "b", "c"):
+            deduplicator.put(key, key.upper())
+
+        assert deduplicator.get("a") is None
+        assert deduplicator.get("c") == "C"
+        assert deduplicator.stats.statements == 2  # noqa: PLR2004
+        assert deduplicator.stats.statement_ratio == 0.5  # noqa: PLR2004
+
+    def test_should_forget_discarded_statement(self) -> None:
+        """Test that a pending statement can be forgotten once it must not be reused."""
+        deduplicator = BatchDeduplicator(window=2)
+        deduplicator.put("a", PendingResult(index=0))
+
+        deduplicator.discard("a")
+        deduplicator.discard("b")
+
+        assert deduplicator.get("a") is None
+
+    def test_should_scan_strings_once_per_substituter(self) -> None:
+        """Test that a string is scanned once by each substituter within the scope."""
+        first, second = Mock(), Mock()
+        first.sub.return_value = "x"
+        second.sub.return_value = "y"
+        deduplicator = BatchDeduplicator(window=4)
+        duplicates = DEDUP_TOTAL.value(
+            level=DedupLevel.VALUE,
+            outcome=DedupOutcome.DUPLICATE,
+        )
+
+        with dedup_scope(deduplicator):
+            results = [
+                deduplicated(substituter).sub(repl="r", string="s")
+                for substituter in (first, second, first, second)
+            ]
+
+        assert results == ["x", "y", "x", "y"]
+        assert first.sub.call_count == second.sub.call_count == 1
+        assert deduplicator.stats.value_ratio == 0.5  # noqa: PLR2004
+        assert (
+            DEDUP_TOTAL.value(level=DedupLevel.VALUE, outcome=DedupOutcome.DUPLICATE)
+            == duplicates + 2
+        )
+
+    def test_should_not_keep_results_past_deadline(self) -> None:
+        """Test that strings redacted past the deadline of a statement are scanned again."""
+        substituter = Mock()
+        substituter.sub.return_value = "[REDACTED]"
+        deadline = Deadline(seconds=0)
+        deadline.expired()
+
+        with dedup_scope(BatchDeduplicator(window=4)), deadline_scope(deadline):
+            for _ in range(2):
+                deduplicated(substituter).sub(repl="r", string="s")
+
+        assert substituter.sub.call_count == 2  # noqa: PLR2004
+
+    def test_should_not_deduplicate_outside_scope(self) -> None:
+        """Test that substituters are used as is outside of a batch."""
+        substituter = Mock()
+
+        assert deduplicated(substituter) is substituter
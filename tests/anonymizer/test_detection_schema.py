@@ -0,0 +1,210 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.detection_schema import (
+    FIELD_FORMATS,
+    DetectionSchema,
+    FieldPolicy,
+    SchemaNode,
+    compile_schema,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+
+
+class TestSchemaNode:
+    """Test suite for SchemaNode class."""
+
+    @pytest.fixture
+    def root(self) -> SchemaNode:
+        """
+        Compile a schema with named and wildcard paths.
+
+        :return: The root node
+        """
+        return SchemaNode.compile(
+            DetectionSchema.from_mapping(
+                {
+                    "id": "uuid",
+                    "context.contextActivities.*.id": "iri",
+                    "context.contextActivities.*.*.id": "iri",
+                    "context.contextActivities.parent.id": "scan",
+                    "context.platform": "skip",
+                },
+            ),
+        )
+
+    def test_iter_skipped(self, root: SchemaNode) -> None:
+        """
+        Test that only fields with a skip policy or following their format are yielded.
+
+        :param root: The compiled schema
+        """
+        parent = {"id": "https://example.com/parent"}
+        grouping = [{"id": "https://example.com/course"}, {"id": "mailto:a@b.c"}]
+        data = {
+            "id": "12345678-1234-1234-1234-123456789abc",
+            "context": {
+                "platform": {"name": "John"},
+                "contextActivities": {"parent": parent, "grouping": grouping},
+            },
+            "result": {"id": "12345678-1234-1234-1234-123456789abc"},
+        }
+
+        skipped = [(id(c), k) for c, k in root.iter_skipped(data)]
+
+        assert sorted(skipped, key=str) == sorted(
+            [
+                (id(data), "id"),
+                (id(data["context"]), "platform"),
+                (id(grouping[0]), "id"),
+            ],
+            key=str,
+        )
+
+    def test_named_path_should_take_precedence(self, root: SchemaNode) -> None:
+        """
+        Test that wildcard paths are merged below named ones without overriding them.
+
+        :param root: The compiled schema
+        """
+        activities = root.child("context").child("contextActivities")
+
+        assert activities.child("parent").child("id").policy == FieldPolicy.SCAN
+        assert activities.child("other").child("id").policy == FieldPolicy.IRI
+        assert activities.child("parent").child(0).child("id").policy == FieldPolicy.IRI
+        assert root.child("result") is None
+
+    def test_compile_schema_should_share_tree(self) -> None:
+        """Test that equal schemas are compiled only once."""
+        schema = DetectionSchema.from_mapping({"id": "uuid"})
+        assert compile_schema(schema) is compile_schema(
+            DetectionSchema.from_mapping({"id": "uuid"}),
+        )
+
+
+class TestFieldFormats:
+    """Test suite for the formats of check policies."""
+
+    @pytest.mark.parametrize(
+        ("policy", "value", "expected"),
+        [
+            (FieldPolicy.UUID, "12345678-1234-1234-1234-123456789abc", True),
+            (FieldPolicy.UUID, "john@doe.com", False),
+            (FieldPolicy.TIMESTAMP, "2024-01-31T10:20:30.123+01:00", True),
+            (FieldPolicy.TIMESTAMP, "2024-01-31T10:20:30Z", True),
+            (FieldPolicy.TIMESTAMP, "10:20:30", False),
+            (FieldPolicy.DURATION, "PT1H2M3.5S", True),
+            (FieldPolicy.VERSION, "1.0.3", True),
+            (FieldPolicy.VERSION, "10.0.0.1", False),
+            (FieldPolicy.IRI, "http://adlnet.gov/expapi/verbs/answered", True),
+            (FieldPolicy.IRI, "https://example.com:8080/a?b=c#d", True),
+            (FieldPolicy.IRI, "mailto:john@doe.com", False),
+            (FieldPolicy.IRI, "https://john@example.com/a", False),
+            (FieldPolicy.IRI, "http://10.0.0.1/a", False),
+            (FieldPolicy.IRI, "http://example.com/10.0.0.1", False),
+            (FieldPolicy.IRI, "http://[::1]/a", False),
+            (FieldPolicy.IRI, "http://example.com/a b", False),
+        ],
+    )
+    def test_format(self, policy: FieldPolicy, value: str, expected: bool) -> None:
+        """
+        Test values against the format of a check policy.
+
+        :param policy: The check policy
+        :param value: The value to check
+        :param expected: Whether the value follows the format
+        """
+        assert (FIELD_FORMATS[policy].fullmatch(value) is not None) is expected
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "12345678-1234-1234-1234-123456789abc",
+            "2024-01-31T10:20:30.123456789-05:00",
+            "P1Y2M3DT4H5M6S",
+            "255.255.255",
+            "https://a1.example-b.com:443/x/1.2.3/y?q=1.2.3&r=%40#f",
+        ],
+    )
+    def test_formatted_values_should_hold_nothing_to_detect(self, value: str) -> None:
+        """
+        Test that detection strategies leave values following a format unchanged.
+
+        :param value: A value following one of the formats
+        """
+        assert any(f.fullmatch(value) for f in FIELD_FORMATS.values())
+        for detector in (
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+            Ipv6DetectionStrategy(),
+            GeoLocationDetectionStrategy(),
+        ):
+            assert detector.pattern.sub(detector.replacement, value) == value
+
+
+class TestDetectionSchema:
+    """Test suite for DetectionSchema class."""
+
+    def test_from_file(self, tmp_path: Path) -> None:
+        """
+        Test loading a schema from a JSON file.
+
+        :param tmp_path: Temporary directory
+        """
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(json.dumps({"verb.id": "scan", "version": "skip"}))
+
+        schema = DetectionSchema.from_file(schema_file)
+
+        assert schema == DetectionSchema(
+            fields=(("verb.id", FieldPolicy.SCAN), ("version", FieldPolicy.SKIP)),
+        )
+
+    @pytest.mark.parametrize(
+        ("content", "error"),
+        [
+            pytest.param('["verb.id"]', TypeError, id="not-an-object"),
+            pytest.param('{"verb.id": "ignore"}', ValueError, id="unknown-policy"),
+        ],
+    )
+    def test_from_file_should_reject_invalid_content(
+        self,
+        tmp_path: Path,
+        content: str,
+        error: type[Exception],
+    ) -> None:
+        """
+        Test that invalid schema files are rejected.
+
+        :param tmp_path: Temporary directory
+        :param content: Content of the schema file
+        :param error: Expected exception type
+        """
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(content)
+        with pytest.raises(error):
+            DetectionSchema.from_file(schema_file)
+
+    def test_merge_should_override_policies(self) -> None:
+        """Test that merged policies override those of the same paths."""
+        schema = DetectionSchema.from_mapping({"id": "uuid", "verb.id": "iri"})
+
+        merged = schema.merge(DetectionSchema.from_mapping({"verb.id": "scan"}))
+
+        assert dict(merged.fields) == {
+            "id": FieldPolicy.UUID,
+            "verb.id": FieldPolicy.SCAN,
+        }
@@ -0,0 +1,46 @@
+import pytest
+
+from src.trace_deidentifier.anonymizer.document import TraceDocument
+from src.trace_deidentifier.common.models.trace import Trace
+
+
+class TestTraceDocument:
+    """Test suite for TraceDocument class."""
+
+    @pytest.mark.parametrize(
+        ("trace", "text"),
+        [
+            pytest.param(None, None, id="no-form"),
+            pytest.param(Trace.model_construct(data={}), "{}", id="both-forms"),
+        ],
+    )
+    def test_should_require_one_form(
+        self,
+        trace: Trace | None,
+        text: str | None,
+    ) -> None:
+        """
+        Test that exactly one form of the trace is required.
+
+        :param trace: The parsed trace
+        :param text: The JSON text
+        """
+        with pytest.raises(ValueError, match="Exactly one"):
+            TraceDocument(trace=trace, text=text)
+
+    def test_should_keep_the_same_trace(self) -> None:
+        """Test that the trace given is the one handed out, until the text is used."""
+        trace = Trace.model_construct(data={"a": "é"})
+        document = TraceDocument(trace=trace)
+
+        assert document.trace is trace
+        assert document.text == '{"a": "é"}'
+
+    def test_should_convert_between_forms(self) -> None:
+        """Test that edits made to one form are found in the other."""
+        document = TraceDocument(text='{"a": [1, "b"]}')
+
+        document.trace.data["a"].append("c")
+        document.text = document.text.replace('"b"', '"x"')
+
+        assert document.trace.data == {"a": [1, "x", "c"]}
@@ -0,0 +1,156 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.extension_rules import (
+    ExtensionRuleIndex,
+    ExtensionRules,
+    compile_rules,
+)
+
+
+class TestExtensionRuleIndex:
+    """Test suite for ExtensionRuleIndex class."""
+
+    @pytest.fixture
+    def index(self) -> ExtensionRuleIndex:
+        """
+        Create an index with one rule of each kind.
+
+        :return: A compiled index
+        """
+        return ExtensionRuleIndex(
+            rules=ExtensionRules(
+                exact=frozenset({"https://example.com/ext/secret"}),
+                suffixes=frozenset({"ip-address", "geojson"}),
+                prefixes=frozenset({"https://tracker.example.org/"}),
+            ),
+        )
+
+    @pytest.mark.parametrize(
+        ("iri", "expected"),
+        [
+            pytest.param("https://example.com/ext/secret", True, id="exact"),
+            pytest.param("https://example.com/ext/secret/more", False, id="exact-only"),
+            pytest.param(
+                "http://id.tincanapi.com/extension/ip-address",
+                True,
+                id="suffix",
+            ),
+            pytest.param("geojson", True, id="suffix-whole-iri"),
+            pytest.param(
+                "http://id.tincanapi.com/extension/geo",
+                False,
+                id="partial-suffix",
+            ),
+            pytest.param("https://tracker.example.org/session", True, id="prefix"),
+            pytest.param("https://tracker.example.org", False, id="partial-prefix"),
+            pytest.param("https://example.com/ext/safe", False, id="no-rule"),
+            pytest.param("", False, id="empty-iri"),
+        ],
+    )
+    def test_matches(self, index: ExtensionRuleIndex, iri: str, expected: bool) -> None:
+        """
+        Test rule evaluation for various IRIs.
+
+        :param index: The index to test
+        :param iri: The extension IRI to check
+        :param expected: Expected decision
+        """
+        assert index.matches(iri) is expected
+
+    def test_should_cache_decisions(self, index: ExtensionRuleIndex) -> None:
+        """
+        Test that decisions are memoized per IRI.
+
+        :param index: The index to test
+        """
+        index.matches("https://example.com/ext/safe")
+        index.matches("https://example.com/ext/safe")
+        assert index.matches.cache_info().hits == 1
+
+    def test_should_ignore_empty_rules(self) -> None:
+        """Test that empty suffixes or prefixes don't match every IRI."""
+        index = ExtensionRuleIndex(
+            rules=ExtensionRules(suffixes=frozenset({""}), prefixes=frozenset({""})),
+        )
+        assert not index.matches("https://example.com/ext")
+
+    def test_should_handle_many_rules(self) -> None:
+        """Test that lookups stay correct with hundreds of rules."""
+        suffixes = frozenset(f"extension/sensitive-{i}" for i in range(500))
+        index = ExtensionRuleIndex(rules=ExtensionRules(suffixes=suffixes))
+        assert index.matches("https://example.com/extension/sensitive-499")
+        assert not index.matches("https://example.com/extension/sensitive-500")
+
+    def test_compile_rules_should_share_index(self) -> None:
+        """Test that equal rules are compiled only once."""
+        rules = ExtensionRules(exact=frozenset({"a"}))
+        assert compile_rules(rules) is compile_rules(
+            ExtensionRules(exact=frozenset({"a"})),
+        )
+
+
+class TestExtensionRules:
+    """Test suite for ExtensionRules class."""
+
+    def test_from_file(self, tmp_path: Path) -> None:
+        """
+        Test loading rules from a JSON file.
+
+        :param tmp_path: Temporary directory
+        """
+        rules_file = tmp_path / "rules.json"
+        rules_file.write_text(
+            json.dumps(
+                {
+                    "exact": ["https://example.com/ext/secret"],
+                    "prefixes": ["https://tracker.example.org/"],
+                    "paths": ["context"],
+                },
+            ),
+        )
+        rules = ExtensionRules.from_file(rules_file)
+        assert rules == ExtensionRules(
+            exact=frozenset({"https://example.com/ext/secret"}),
+            prefixes=frozenset({"https://tracker.example.org/"}),
+            paths=("context",),
+        )
+
+    @pytest.mark.parametrize(
+        ("content", "error"),
+        [
+            pytest.param('["not", "an", "object"]', TypeError, id="not-an-object"),
+            pytest.param('{"unknown": []}', ValueError, id="unknown-key"),
+        ],
+    )
+    def test_from_file_should_reject_invalid_content(
+        self,
+        tmp_path: Path,
+        content: str,
+        error: type[Exception],
+    ) -> None:
+        """
+        Test that invalid rules files are rejected.
+
+        :param tmp_path: Temporary directory
+        :param content: Content of the rules file
+        :param error: Expected exception type
+        """
+        rules_file = tmp_path / "rules.json"
+        rules_file.write_text(content)
+        with pytest.raises(error, match=r"[Ee]xtension rule"):
+            ExtensionRules.from_file(rules_file)
+
+    def test_merge(self) -> None:
+        """Test that merging keeps the rules and paths of both rule sets."""
+        merged = ExtensionRules(
+            suffixes=frozenset({"a"}),
+            paths=("context", "result"),
+        ).merge(ExtensionRules(exact=frozenset({"b"}), paths=("result", "object")))
+        assert merged == ExtensionRules(
+            exact=frozenset({"b"}),
+            suffixes=frozenset({"a"}),
+            paths=("context", "result", "object"),
+        )
@@ -0,0 +1,147 @@
+import json
+from copy import deepcopy
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.idempotency import (
+    IDEMPOTENCY_MARKERS,
+    MARKER_EXTENSION,
+    IdempotencyMarker,
+    MarkerOutcome,
+)
+from src.trace_deidentifier.anonymizer.patch import PatchRecorder
+
+KEY = b"secret"
+FINGERPRINT = "f" * 64
+STATEMENT = {
+    "actor": {"mbox": "mailto:anonymous@anonymous.org"},
+    "verb": {"id": "http://example.com/verbs/completed"},
+    "object": {"id": "http://example.com/activities/1"},
+}
+
+
+class TestIdempotencyMarker:
+    """Test suite for IdempotencyMarker class."""
+
+    @pytest.fixture
+    def marker(self) -> IdempotencyMarker:
+        """
+        Provide a marker of a rule set.
+
+        :return: The marker
+        """
+        return IdempotencyMarker(key=KEY, fingerprint=FINGERPRINT)
+
+    @pytest.mark.parametrize(
+        ("context", "path"),
+        [
+            pytest.param(None, "/context", id="no-context"),
+            pytest.param({}, "/context/extensions", id="empty-context"),
+            pytest.param({"language": "fr"}, "/context/extensions", id="no-extensions"),
+            pytest.param(
+                {"extensions": {"http://example.com/e": 1}},
+                "/context/extensions/" + MARKER_EXTENSION.replace("/", "~1"),
+                id="extensions",
+            ),
+        ],
+    )
+    def test_should_verify_stamped_statement(
+        self,
+        marker: IdempotencyMarker,
+        context: dict | None,
+        path: str,
+    ) -> None:
+        """
+        Test that a stamped statement is verified, once sent back as JSON.
+
+        :param marker: The marker of the rule set
+        :param context: The context of the statement
+        :param path: Path of the field added by stamping
+        """
+        data = deepcopy(STATEMENT) | (
+            {"context": context} if context is not None else {}
+        )
+        patch = PatchRecorder(root=data)
+        verified = IDEMPOTENCY_MARKERS.value(outcome=MarkerOutcome.VERIFIED)
+
+        marker.stamp(data=data, patch=patch)
+
+        assert (
+            data["context"]["extensions"][MARKER_EXTENSION]["fingerprint"]
+            == FINGERPRINT
+        )
+        assert [(op["op"], op["path"]) for op in patch.operations] == [("add", path)]
+        assert marker.verify(json.loads(json.dumps(data)))
+        assert IDEMPOTENCY_MARKERS.value(outcome=MarkerOutcome.VERIFIED) == verified + 1
+
+    def test_should_not_verify_unmarked_statement(
+        self,
+        marker: IdempotencyMarker,
+    ) -> None:
+        """
+        Test that a statement without marker is neither verified nor counted.
+
+        :param marker: The marker of the rule set
+        """
+        mismatched = IDEMPOTENCY_MARKERS.value(outcome=MarkerOutcome.MISMATCHED)
+
+        assert not marker.verify(deepcopy(STATEMENT))
+        assert IDEMPOTENCY_MARKERS.value(outcome=MarkerOutcome.MISMATCHED) == mismatched
+
+    @pytest.mark.parametrize(
+        "other",
+        [
+            pytest.param(IdempotencyMarker(key=KEY, fingerprint="0" * 64), id="rules"),
+            pytest.param(
+                IdempotencyMarker(key=b"other", fingerprint=FINGERPRINT),
+                id="key",
+            ),
+        ],
+    )
+    def test_should_reject_marker_of_other_rules(
+        self,
+        marker: IdempotencyMarker,
+        other: IdempotencyMarker,
+    ) -> None:
+        """
+        Test that a marker of another rule set, or made with another key, is rejected.
+
+        :param marker: The marker of the rule set
+        :param other: The marker stamping the statement
+        """
+        data = deepcopy(STATEMENT)
+        other.stamp(data=data)
+        mismatched = IDEMPOTENCY_MARKERS.value(outcome=MarkerOutcome.MISMATCHED)
+
+        assert not marker.verify(data)
+        assert (
+            IDEMPOTENCY_MARKERS.value(outcome=MarkerOutcome.MISMATCHED)
+            == mismatched + 1
+        )
+
+    def test_should_reject_changed_content(self, marker: IdempotencyMarker) -> None:
+        """
+        Test that a marker does not cover a statement changed after being stamped.
+
+        :param marker: The marker of the rule set
+        """
+        data = deepcopy(STATEMENT)
+        marker.stamp(data=data)
+
+        data["actor"]["mbox"] = "mailto:john@doe.com"
+
+        assert not marker.verify(data)
+
+    def test_should_replace_other_marker(self, marker: IdempotencyMarker) -> None:
+        """
+        Test that stamping a statement replaces the marker of another rule set.
+
+        :param marker: The marker of the rule set
+        """
+        data = deepcopy(STATEMENT)
+        IdempotencyMarker(key=KEY, fingerprint="0" * 64).stamp(data=data)
+
+        marker.stamp(data=data)
+
+        assert marker.verify(data)
+        assert list(data["context"]["extensions"]) == [MARKER_EXTENSION]
@@ -0,0 +1,99 @@
+import base64
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.opaque import OpaqueKind, classify
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+
+PAYLOAD = bytes(range(256)) * 4
+
+
+class TestClassify:
+    """Test suite for the classify function."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            pytest.param(PAYLOAD.hex(), OpaqueKind.HEX, id="hex"),
+            pytest.param(
+                base64.b64encode(PAYLOAD).decode(),
+                OpaqueKind.BASE64,
+                id="base64",
+            ),
+            pytest.param(
+                base64.urlsafe_b64encode(PAYLOAD).decode(),
+                OpaqueKind.BASE64,
+                id="base64-url-safe",
+            ),
+            pytest.param(
+                "data:image/svg+xml;charset=utf-8;base64,"
+                + base64.b64encode(PAYLOAD).decode(),
+                OpaqueKind.BASE64,
+                id="data-uri",
+            ),
+            pytest.param(
+                "data:image/x.10.0.0.1;base64," + base64.b64encode(PAYLOAD).decode(),
+                None,
+                id="data-uri-with-ip",
+            ),
+            pytest.param(PAYLOAD.decode("latin-1"), OpaqueKind.BINARY, id="binary"),
+            pytest.param(
+                PAYLOAD.decode("utf-8", errors="replace"),
+                OpaqueKind.BINARY,
+                id="undecodable-bytes",
+            ),
+            pytest.param(
+                base64.encodebytes(PAYLOAD).decode(),
+                None,
+                id="line-wrapped-base64",
+            ),
+            pytest.param(
+                "Some free text, written by john@doe.com\n" * 20,
+                None,
+                id="text",
+            ),
+            pytest.param("", None, id="empty"),
+        ],
+    )
+    def test_classify(self, value: str, expected: OpaqueKind | None) -> None:
+        """
+        Test the classification of strings.
+
+        :param value: The string to classify
+        :param expected: Expected kind of payload
+        """
+        assert classify(value) == expected
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "0123456789abcdef" * 16,
+            base64.b64encode(b"john@doe.com 10.0.0.1 fe80::1 45.1\xc2\xb0N").decode(),
+            "data:application/vnd.ms-excel;base64,QUJD",
+        ],
+    )
+    def test_hex_and_base64_should_hold_nothing_to_detect(self, value: str) -> None:
+        """
+        Test that detection strategies leave hex and base64 strings unchanged.
+
+        :param value: A hex or base64 string
+        """
+        assert classify(value) in (OpaqueKind.HEX, OpaqueKind.BASE64)
+        for detector in (
+            EmailDetectionStrategy(),
+            Ipv4DetectionStrategy(),
+            Ipv6DetectionStrategy(),
+            GeoLocationDetectionStrategy(),
+        ):
+            assert detector.pattern.sub(detector.replacement, value) == value
@@ -0,0 +1,165 @@
+import base64
+import json
+from copy import deepcopy
+from typing import Any
+from unittest.mock import Mock
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.opaque import OpaqueKind, OpaquePolicy
+from src.trace_deidentifier.anonymizer.patch import PatchRecorder
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.opaque_values import (
+    OpaqueValuesStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+
+BLOB = base64.b64encode(bytes(range(256)) * 2).decode()
+
+
+def apply_patch(data: Any, operations: list[dict[str, Any]]) -> Any:
+    """
+    Apply the replace and remove operations of a JSON Patch.
+
+    :param data: The document to patch, changed in place
+    :param operations: The JSON Patch operations
+    :return: The patched document
+    """
+    for operation in operations:
+        if operation["path"] == "":
+            data = operation["value"]
+            continue
+        *parents, last = [
+            token.replace("~1", "/").replace("~0", "~")
+            for token in operation["path"].split("/")[1:]
+        ]
+        container = data
+        for token in parents:
+            container = container[int(token) if isinstance(container, list) else token]
+        key = int(last) if isinstance(container, list) else last
+        if operation["op"] == "replace":
+            assert key in container if isinstance(key, str) else key < len(container)
+            container[key] = operation["value"]
+        else:
+            del container[key]
+    return data
+
+
+class TestPatchRecorder:
+    """Test suite for PatchRecorder class."""
+
+    def test_should_escape_pointer_tokens(self) -> None:
+        """Test that keys holding '/' and '~' are escaped in paths."""
+        data = {"extensions": {"http://example.com/a~b": "x"}}
+        recorder = PatchRecorder(root=data)
+
+        recorder.replace(
+            container=data["extensions"],
+            key="http://example.com/a~b",
+            value="y",
+        )
+
+        assert recorder.operations == [
+            {
+                "op": "replace",
+                "path": "/extensions/http:~1~1example.com~1a~0b",
+                "value": "y",
+            },
+        ]
+
+    def test_should_follow_removed_list_items(self) -> None:
+        """Test that containers after a removed list item are located at their new index."""
+        data = {"items": ["blob", {"a": "x"}, {"b": "y"}]}
+        original = deepcopy(data)
+        recorder = PatchRecorder(root=data)
+        recorder.replace(container=data["items"][2], key="b", value="z")
+
+        del data["items"][0]
+        recorder.remove(container=data["items"], key=0)
+        data["items"][1]["b"] = "w"
+        recorder.replace(container=data["items"][1], key="b", value="w")
+
+        assert [op["path"] for op in recorder.operations] == [
+            "/items/2/b",
+            "/items/0",
+            "/items/1/b",
+        ]
+        assert apply_patch(original, recorder.operations) == data
+
+    def test_should_merge_repeated_replacements(self) -> None:
+        """Test that replacing a field again updates its operation."""
+        data = {"a": "x"}
+        recorder = PatchRecorder(root=data)
+
+        recorder.replace(container=data, key="a", value="y")
+        recorder.replace(container=data, key="a", value="z")
+
+        assert recorder.operations == [{"op": "replace", "path": "/a", "value": "z"}]
+
+    def test_should_replace_document_when_incomplete(self) -> None:
+        """Test that a change outside the document gives a patch replacing it whole."""
+        data = {"a": "x"}
+        recorder = PatchRecorder(root=data)
+
+        recorder.replace(container={"b": "y"}, key="b", value="z")
+
+        assert not recorder.complete
+        assert recorder.operations == [{"op": "replace", "path": "", "value": data}]
+
+    def test_patch_should_give_anonymized_trace(self, mock_logger: Mock) -> None:
+        """
+        Test that applying the patch of every strategy to the input gives the anonymized trace.
+
+        :param mock_logger: Mocked logger
+        """
+        data = {
+            "actor": {"mbox": "mailto:john@doe.com", "name": "John"},
+            "object": {
+                "id": "http://example.com/activities/1",
+                "definition": {
+                    "extensions": {
+                        "http://id.tincanapi.com/extension/ip-address": "10.0.0.1",
+                    },
+                },
+            },
+            "result": {
+                "response": "Ask jane@doe.com from 10.0.0.2",
+                "extensions": {
+                    "http://example.com/blobs": [BLOB, {"note": "jane@doe.com"}],
+                },
+            },
+        }
+        anonymizer = Anonymizer(
+            strategies=[
+                ReplaceSensitiveValuesStrategy(),
+                RemoveFieldsStrategy(),
+                OpaqueValuesStrategy(
+                    policies={OpaqueKind.BASE64: OpaquePolicy.DROP},
+                    min_length=64,
+                ),
+                EmailDetectionStrategy(),
+                Ipv4DetectionStrategy(),
+            ],
+            logger=mock_logger,
+        )
+        trace = Trace.model_construct(data=deepcopy(data))
+
+        report = anonymizer.anonymize(trace=trace, patch=True)
+
+        operations = json.loads(json.dumps(report.patch.operations))
+        assert report.patch.complete
+        assert apply_patch(deepcopy(data), operations) == trace.data
+        assert {
+            "op": "remove",
+            "path": "/result/extensions/http:~1~1example.com~1blobs/0",
+        } in operations
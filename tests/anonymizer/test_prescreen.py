@@ -0,0 +1,247 @@
+import copy
+import json
+import random
+from unittest.mock import Mock
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.prescreen import Prescreen, PrescreenOutcome
+from src.trace_deidentifier.anonymizer.scanners.budget import ScanBudget
+from src.trace_deidentifier.anonymizer.strategies.base import BaseAnonymizationStrategy
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_geolocations import (
+    GeoLocationDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv6 import (
+    Ipv6DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.types import JsonType
+
+DETECTORS = (
+    EmailDetectionStrategy,
+    Ipv4DetectionStrategy,
+    Ipv6DetectionStrategy,
+    GeoLocationDetectionStrategy,
+)
+
+# Values placed anywhere in generated statements, some matching detection patterns
+VALUES = [
+    "john.doe@company.com",
+    "mailto:john@doe.com",
+    "192.168.1.1",
+    "2001:db8::8a2e:370:7334",
+    "2013-05-18T05:32:34.804+00:00",
+    "45.123°N 2.345°E",
+    "{'lat': 45.1, 'lng': 2.3}",
+    "31U 430959 5239573",
+    "http://example.com:8080/a",
+    "version 1.0.3",
+    "::1",
+    "fe80::1ff:fe23:4567:890a",
+    "@2x",
+    "48°51'24\"N 2°21'08\"E",
+    "Anonymous",
+    "",
+]
+# Share of statements serialized with escape sequences, which are not prescreened
+ESCAPED_RATE = 0.2
+# Characters drawn for random strings, around those of detected values
+ALPHABET = "ab9-.@_é+:1f 0°NSE,'{}latngU\n"
+EXTENSION = "http://id.tincanapi.com/extension/ip-address"
+
+
+@pytest.fixture
+def prescreen() -> Prescreen:
+    """
+    Create a prescreen with the candidates of all detection strategies.
+
+    :return: The prescreen
+    """
+    return Prescreen(
+        patterns=[c for strategy in DETECTORS for c in strategy().candidates],
+    )
+
+
+def statement(rng: random.Random) -> JsonType:
+    """
+    Generate a random statement, with values in agents, extensions, keys and lists.
+
+    :param rng: Random generator
+    :return: The statement
+    """
+    return {
+        "actor": {"mbox": rng.choice(VALUES), "name": rng.choice(VALUES)},
+        "verb": {"id": "http://example.com/verbs/completed"},
+        "object": {
+            "id": "http://example.com/a",
+            "definition": {
+                "extensions": {
+                    EXTENSION: rng.choice(VALUES),
+                    rng.choice(VALUES): rng.choice(VALUES),
+                },
+            },
+        },
+        "result": {"response": rng.choice(VALUES)},
+        "context": {"extensions": {"http://example.com/list": rng.sample(VALUES, 2)}},
+        "timestamp": "2013-05-18T05:32:34.804+00:00",
+    }
+
+
+def strategies() -> list[BaseAnonymizationStrategy]:
+    """
+    Create the strategies of the API, in the same order.
+
+    :return: The strategies
+    """
+    budget = ScanBudget(max_length=4096)
+    return [
+        ReplaceSensitiveValuesStrategy(),
+        RemoveFieldsStrategy(),
+        *(strategy(budget=budget) for strategy in DETECTORS),
+    ]
+
+
+class TestPrescreen:
+    """Test suite for the detection prescreen."""
+
+    @pytest.mark.parametrize(
+        ("raw", "dropped", "expected"),
+        [
+            pytest.param(
+                '{"id": "http://example.com/a", "n": 1.5}',
+                [],
+                PrescreenOutcome.SKIPPED,
+                id="nothing-to-detect",
+            ),
+            pytest.param(
+                '{"timestamp": "2013-05-18T05:32:34.804+00:00", "v": "1.0.3"}',
+                [],
+                PrescreenOutcome.SKIPPED,
+                id="timestamp-and-version",
+            ),
+            pytest.param(
+                '{"response": "write to john@doe.com"}',
+                [],
+                PrescreenOutcome.SCANNED,
+                id="email-in-value",
+            ),
+            pytest.param(
+                '{"10.0.0.1": "host", "list": ["a", "b"]}',
+                [],
+                PrescreenOutcome.SKIPPED,
+                id="address-in-key",
+            ),
+            pytest.param(
+                '{"mbox": "mailto:john@doe.com"}',
+                ["mailto:john@doe.com"],
+                PrescreenOutcome.SKIPPED,
+                id="email-in-dropped-value",
+            ),
+            pytest.param(
+                '{"ext": {"a": ["1.2.3.4"]}, "b": "5.6.7.8"}',
+                [{"a": ["1.2.3.4"]}],
+                PrescreenOutcome.SCANNED,
+                id="address-in-dropped-and-remaining-values",
+            ),
+            pytest.param(
+                '{"response": "john\\u0040doe.com"}',
+                [],
+                PrescreenOutcome.UNSUPPORTED,
+                id="escape-sequence",
+            ),
+            pytest.param(
+                '{"response": "anything"}',
+                ["john@doe.com"],
+                PrescreenOutcome.SCANNED,
+                id="dropped-value-not-in-text",
+            ),
+            pytest.param(
+                b'{"geo": {"lat": 45.1, "lng": 2.3}}',
+                [],
+                PrescreenOutcome.SKIPPED,
+                id="coordinates-outside-strings",
+            ),
+        ],
+    )
+    def test_check(
+        self,
+        prescreen: Prescreen,
+        raw: str | bytes,
+        dropped: list,
+        expected: PrescreenOutcome,
+    ) -> None:
+        """
+        Test the outcome of the prescreen on serialized statements.
+
+        :param prescreen: The prescreen
+        :param raw: The JSON text of the statement
+        :param dropped: Values dropped from the statement
+        :param expected: Expected outcome
+        """
+        assert prescreen.check(raw=raw, dropped=dropped) == expected
+
+    def test_should_not_prescreen_long_strings(self) -> None:
+        """Test that a string longer than the maximum length disables the prescreen."""
+        prescreen = Prescreen(patterns=[EmailDetectionStrategy().pattern], max_length=8)
+
+        assert prescreen.check(raw='["short"]', dropped=[]) == PrescreenOutcome.SKIPPED
+        assert (
+            prescreen.check(raw='["longer string"]', dropped=[])
+            == PrescreenOutcome.UNSUPPORTED
+        )
+
+    def test_candidates_should_be_found_in_every_match(self) -> None:
+        """Test that candidates are a necessary condition for a match of the pattern."""
+        rng = random.Random(42)  # noqa: S311
+        strings = [
+            "".join(rng.choices(ALPHABET, k=rng.randint(1, 40))) for _ in range(5000)
+        ]
+        for strategy in DETECTORS:
+            detector = strategy()
+            for string in [*strings, *VALUES]:
+                if detector.pattern.search(string):
+                    assert any(c.search(string) for c in detector.candidates), string
+
+    def test_replacement_values_should_be_left_unchanged_by_detection(self) -> None:
+        """Test that skipping detection never leaves a replacement value unscanned."""
+        detectors = [strategy() for strategy in DETECTORS]
+        for value in ReplaceSensitiveValuesStrategy.FIELDS_TO_REPLACE.values():
+            for detector in detectors:
+                assert detector.substituter.sub(detector.replacement, value) == value
+
+    def test_should_match_full_detection(self, mock_logger: Mock) -> None:
+        """Test that prescreened statements are anonymized exactly like the others."""
+        rng = random.Random(42)  # noqa: S311
+        screened = Anonymizer(
+            strategies=strategies(),
+            logger=mock_logger,
+            prescreen=True,
+        )
+        unscreened = Anonymizer(strategies=strategies(), logger=mock_logger)
+
+        outcomes = set()
+        for _ in range(300):
+            data = statement(rng)
+            escaped = rng.random() < ESCAPED_RATE
+            raw = json.dumps({"trace": {"data": data}}, ensure_ascii=escaped)
+            expected = Trace.model_construct(data=copy.deepcopy(data))
+            unscreened.anonymize(trace=expected)
+            trace = Trace.model_construct(data=data)
+            report = screened.anonymize(trace=trace, raw=raw)
+
+            assert trace.data == expected.data
+            outcomes.add(report.prescreen)
+        assert outcomes == set(PrescreenOutcome)
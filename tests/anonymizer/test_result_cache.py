@@ -0,0 +1,225 @@
+import sqlite3
+from copy import deepcopy
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.trace_deidentifier.anonymizer import result_cache
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.result_cache import (
+    RESULT_CACHE_LOOKUPS,
+    CacheOutcome,
+    ResultCache,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.common.models.trace import Trace
+from src.trace_deidentifier.common.utils import utils_json
+
+DATA = {
+    "actor": {"mbox": "mailto:john@doe.com"},
+    "verb": {"id": "http://example.com/verbs/completed"},
+    "object": {"id": "http://example.com/a"},
+    "result": {"response": "Ask jane@doe.com"},
+}
+
+
+class TestResultCache:
+    """Test suite for ResultCache class."""
+
+    @pytest.fixture
+    def anonymizer(self, mock_logger: Mock) -> Anonymizer:
+        """
+        Provide an anonymizer replacing agents and detecting emails.
+
+        :param mock_logger: Mocked logger
+        :return: The anonymizer
+        """
+        return Anonymizer(
+            strategies=[ReplaceSensitiveValuesStrategy(), EmailDetectionStrategy()],
+            logger=mock_logger,
+        )
+
+    def test_should_reuse_output_across_instances(
+        self,
+        tmp_path: Path,
+        anonymizer: Anonymizer,
+    ) -> None:
+        """
+        Test that an output stored by a cache is reused by another one on the same file.
+
+        :param tmp_path: Temporary directory
+        :param anonymizer: The anonymizer
+        """
+        first = ResultCache(path=tmp_path / "cache.sqlite", max_size=1 << 20)
+        expected = Trace.model_construct(data=deepcopy(DATA))
+        first.anonymize(anonymizer=anonymizer, trace=expected)
+        first.close()
+        second = ResultCache(path=tmp_path / "cache.sqlite", max_size=1 << 20)
+        anonymizer.anonymize = Mock()
+        trace = Trace.model_construct(data=dict(reversed(deepcopy(DATA).items())))
+        hits = RESULT_CACHE_LOOKUPS.value(outcome=CacheOutcome.HIT)
+
+        report = second.anonymize(anonymizer=anonymizer, trace=trace)
+
+        assert trace.data == expected.data
+        assert report.changed
+        anonymizer.anonymize.assert_not_called()
+        assert second.stats.hit_rate == 1.0
+        assert RESULT_CACHE_LOOKUPS.value(outcome=CacheOutcome.HIT) == hits + 1
+
+    def test_anonymize_batch_should_only_anonymize_missed_traces(
+        self,
+        tmp_path: Path,
+        anonymizer: Anonymizer,
+    ) -> None:
+        """
+        Test that traces of a batch whose output is stored are not anonymized again.
+
+        :param tmp_path: Temporary directory
+        :param anonymizer: The anonymizer
+        """
+        cache = ResultCache(path=tmp_path / "cache.sqlite", max_size=1 << 20)
+        expected = Trace.model_construct(data=deepcopy(DATA))
+        cache.anonymize(anonymizer=anonymizer, trace=expected)
+        other = {**DATA, "verb": {"id": "http://example.com/verbs/failed"}}
+        traces = [
+            Trace.model_construct(data=deepcopy(DATA)),
+            Trace.model_construct(data=deepcopy(other)),
+        ]
+        batch = Mock(wraps=anonymizer.anonymize_batch)
+        anonymizer.anonymize_batch = batch
+
+        reports = cache.anonymize_batch(anonymizer=anonymizer, traces=traces)
+
+        assert traces[0].data == expected.data
+        assert traces[1].data["actor"] == expected.data["actor"]
+        assert all(report.changed for report in reports)
+        assert batch.call_args.kwargs["traces"] == [traces[1]]
+        assert cache.get(
+            key=utils_json.content_hash(other),
+            fingerprint=anonymizer.fingerprint,
+        )
+
+    def test_should_miss_for_other_rules(self, tmp_path: Path) -> None:
+        """
+        Test that an output is only reused for the rule set that gave it.
+
+        :param tmp_path: Temporary directory
+        """
+        cache = ResultCache(path=tmp_path / "cache.sqlite", max_size=1 << 20)
+        cache.put(key="k", fingerprint="a", output="{}")
+
+        assert cache.get(key="k", fingerprint="b") is None
+        assert cache.get(key="k", fingerprint="a") == "{}"
+        assert cache.stats.hit_rate == 0.5  # noqa: PLR2004
+
+    def test_should_evict_least_recently_used(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """
+        Test that the least recently used outputs are evicted beyond the maximum size.
+
+        :param tmp_path: Temporary directory
+        :param monkeypatch: Pytest fixture to record every use
+        """
+        monkeypatch.setattr(result_cache, "USE_RESOLUTION_NS", 0)
+        cache = ResultCache(path=tmp_path / "cache.sqlite", max_size=25)
+        for key in ("a", "b"):
+            cache.put(key=key, fingerprint="f", output="x" * 10)
+        cache.get(key="a", fingerprint="f")
+
+        cache.put(key="c", fingerprint="f", output="x" * 10)
+
+        assert cache.get(key="b", fingerprint="f") is None
+        assert cache.get(key="a", fingerprint="f") is not None
+        assert cache.get(key="c", fingerprint="f") is not None
+        assert cache.stats.evicted == 1
+
+    def test_should_not_count_outputs_stored_again(self, tmp_path: Path) -> None:
+        """
+        Test that storing an output again, from any process, does not trigger eviction.
+
+        :param tmp_path: Temporary directory
+        """
+        caches = [
+            ResultCache(path=tmp_path / "cache.sqlite", max_size=15) for _ in range(2)
+        ]
+
+        with patch.object(ResultCache, "_evict") as evict:
+            for cache in [*caches, *caches]:
+                cache.put(key="a", fingerprint="f", output="x" * 10)
+
+        evict.assert_not_called()
+
+    def test_should_record_uses_in_batches(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """
+        Test that hits only write the uses of outputs once they are old, by batches.
+
+        :param tmp_path: Temporary directory
+        :param monkeypatch: Pytest fixture to shorten the batches of uses
+        """
+        path = tmp_path / "cache.sqlite"
+        cache = ResultCache(path=path, max_size=1 << 20)
+        for key in ("a", "b", "c"):
+            cache.put(key=key, fingerprint="f", output="{}")
+
+        def uses() -> dict[str, int]:
+            with sqlite3.connect(path) as connection:
+                return dict(connection.execute("SELECT key, used FROM results"))
+
+        stored = uses()
+        cache.get(key="a", fingerprint="f")
+        recent = uses()
+        monkeypatch.setattr(result_cache, "USE_RESOLUTION_NS", 0)
+        monkeypatch.setattr(result_cache, "USE_BATCH_SIZE", 2)
+        cache.get(key="a", fingerprint="f")
+        pending = uses()
+        cache.get(key="b", fingerprint="f")
+        batched = uses()
+        cache.get(key="c", fingerprint="f")
+        cache.close()
+
+        assert recent == stored
+        assert pending == stored
+        assert batched["a"] > stored["a"]
+        assert batched["b"] > stored["b"]
+        assert batched["c"] == stored["c"]
+        assert uses()["c"] > stored["c"]
+
+    def test_should_not_store_output_past_deadline(
+        self,
+        tmp_path: Path,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that outputs of statements past their deadline are not stored.
+
+        :param tmp_path: Temporary directory
+        :param mock_logger: Mocked logger
+        """
+        cache = ResultCache(path=tmp_path / "cache.sqlite", max_size=1 << 20)
+        anonymizer = Anonymizer(
+            strategies=[EmailDetectionStrategy()],
+            logger=mock_logger,
+            deadline=0.0,
+        )
+
+        cache.anonymize(
+            anonymizer=anonymizer,
+            trace=Trace.model_construct(data=deepcopy(DATA)),
+        )
+
+        assert cache.stats.misses == 1
+        assert cache._stored_size() == 0  # noqa: SLF001
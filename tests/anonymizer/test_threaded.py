@@ -0,0 +1,104 @@
+from copy import deepcopy
+from unittest.mock import Mock
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.dedup import BatchDeduplicator, dedup_scope
+from src.trace_deidentifier.anonymizer.exceptions import StatementRejectedError
+from src.trace_deidentifier.anonymizer.report import AnonymizationReport
+from src.trace_deidentifier.anonymizer.strategies.base import BaseAnonymizationStrategy
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.anonymizer.threaded import ThreadedAnonymizer
+from src.trace_deidentifier.common.models.trace import Trace
+
+
+class RejectFlaggedStrategy(BaseAnonymizationStrategy):
+    """Strategy refusing traces flagged 'reject'."""
+
+    def anonymize(self, trace: Trace) -> None:
+        """
+        Refuse the trace when flagged.
+
+        :param trace: The trace
+        :raises StatementRejectedError: If the trace is flagged 'reject'
+        """
+        if trace.data.get("reject"):
+            raise StatementRejectedError("Refused")
+
+
+def batch_data() -> list[dict]:
+    """
+    Build the data of a batch, with repeated strings and a refused trace every ten.
+
+    :return: The data of each trace
+    """
+    return [
+        {
+            "actor": {"name": f"Learner {i}"},
+            "result": {"response": f"Ask tutor{i % 7}@doe.com"},
+            **({"reject": True} if i % 10 == 3 else {}),  # noqa: PLR2004
+        }
+        for i in range(100)
+    ]
+
+
+class TestThreadedAnonymizer:
+    """Test suite for the anonymization of batches on several threads."""
+
+    def test_should_match_anonymize_batch(self, mock_logger: Mock) -> None:
+        """
+        Test that threads give the traces and reports of a single batch, in order.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[
+                RejectFlaggedStrategy(),
+                ReplaceSensitiveValuesStrategy(),
+                EmailDetectionStrategy(),
+            ],
+            logger=mock_logger,
+        )
+        expected = [Trace.model_construct(data=d) for d in batch_data()]
+        reports = anonymizer.anonymize_batch(traces=expected)
+        traces = [Trace.model_construct(data=d) for d in batch_data()]
+
+        with ThreadedAnonymizer(anonymizer=anonymizer, threads=4) as threaded:
+            results = threaded.anonymize_batch(traces=traces)
+
+        assert [t.data for t in traces] == [t.data for t in expected]
+        assert [type(r) for r in results] == [type(r) for r in reports]
+        assert [r.applied for r in results if isinstance(r, AnonymizationReport)] == [
+            r.applied for r in reports if isinstance(r, AnonymizationReport)
+        ]
+
+    def test_should_run_in_the_context_of_the_caller(self, mock_logger: Mock) -> None:
+        """
+        Test that the deduplicator of the caller is shared by the threads.
+
+        :param mock_logger: Mocked logger
+        """
+        anonymizer = Anonymizer(
+            strategies=[EmailDetectionStrategy()],
+            logger=mock_logger,
+        )
+        data = [{"result": {"response": "Ask tutor@doe.com"}} for _ in range(64)]
+        traces = [Trace.model_construct(data=deepcopy(d)) for d in data]
+        deduplicator = BatchDeduplicator(window=16)
+
+        with (
+            ThreadedAnonymizer(anonymizer=anonymizer, threads=4) as threaded,
+            dedup_scope(deduplicator),
+        ):
+            threaded.anonymize_batch(traces=traces)
+
+        assert deduplicator.stats.values == len(data)
+        assert deduplicator.stats.duplicate_values >= len(data) - 4
+        assert all(
+            t.data["result"]["response"] == "Ask anonymous@anonymous.org"
+            for t in traces
+        )
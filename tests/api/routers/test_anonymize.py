@@ -1,3 +1,5 @@
+import json
+from pathlib import Path
 from unittest.mock import Mock
 
 import pytest
@@ -5,8 +7,35 @@ from fastapi import FastAPI, Request, status
 from fastapi.testclient import TestClient
 
 from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
-from src.trace_deidentifier.api.dependencies import get_anonymizer
+from src.trace_deidentifier.anonymizer.dedup import BatchDeduplicator
+from src.trace_deidentifier.anonymizer.idempotency import (
+    MARKER_EXTENSION,
+    IdempotencyMarker,
+)
+from src.trace_deidentifier.anonymizer.patch import PatchRecorder
+from src.trace_deidentifier.anonymizer.prescreen import PrescreenOutcome
+from src.trace_deidentifier.anonymizer.report import AnonymizationReport
+from src.trace_deidentifier.anonymizer.result_cache import ResultCache
+from src.trace_deidentifier.anonymizer.scanners.base import DetectionEngine
+from src.trace_deidentifier.api.dependencies import (
+    get_anonymizer,
+    get_deduplicator,
+    get_idempotency_marker,
+    get_micro_batcher,
+    get_result_cache,
+    get_time_slicer,
+)
+from src.trace_deidentifier.api.micro_batching import MicroBatcher
 from src.trace_deidentifier.api.routers.anonymize import router
+from src.trace_deidentifier.api.schemas import JSON_PATCH_MEDIA_TYPE
+from src.trace_deidentifier.api.time_slicing import TimeSlicer
+
+DATA = {
+    "actor": {"mbox": "mailto:john@doe.com"},
+    "verb": {"id": "http://example.com/verbs/completed"},
+    "object": {"id": "http://example.com/a"},
+}
+DEDUP_WINDOW = 16
 
 
 class TestAnonymize:
@@ -22,6 +51,23 @@ class TestAnonymize:
         """
         request = Mock(spec=Request)
         request.state.logger = mock_logger
+        request.state.config.get_extension_rules_file = Mock(return_value=None)
+        request.state.config.get_detection_schema_file = Mock(return_value=None)
+        request.state.config.get_opaque_policies = Mock(return_value={})
+        request.state.config.get_opaque_min_length = Mock(return_value=256)
+        request.state.config.get_detection_engine = Mock(
+            return_value=DetectionEngine.REGEX,
+        )
+        request.state.config.get_scan_max_length = Mock(return_value=None)
+        request.state.config.get_scan_chunk_length = Mock(return_value=None)
+        request.state.config.get_processing_deadline = Mock(return_value=None)
+        request.state.config.get_detection_prescreen = Mock(return_value=True)
+        request.state.config.get_adaptive_targeting = Mock(return_value=False)
+        request.state.config.get_idempotency_key = Mock(return_value=None)
+        request.state.config.get_dedup_window = Mock(return_value=DEDUP_WINDOW)
+        request.state.config.get_result_cache_file = Mock(return_value=None)
+        request.state.config.get_batch_time_slice = Mock(return_value=0.02)
+        request.state.config.get_micro_batch_delay = Mock(return_value=0)
         return request
 
     @pytest.fixture
@@ -31,7 +77,9 @@ class TestAnonymize:
 
         :return: Mocked Anonymizer with configured anonymize method
         """
-        return Mock(spec=Anonymizer)
+        anonymizer = Mock(spec=Anonymizer)
+        anonymizer.anonymize.return_value = AnonymizationReport()
+        return anonymizer
 
     @pytest.fixture
     def app(self, mock_anonymizer: Mock) -> FastAPI:
@@ -43,6 +91,13 @@ class TestAnonymize:
         """
         app = FastAPI()
         app.dependency_overrides[get_anonymizer] = lambda: mock_anonymizer
+        app.dependency_overrides[get_idempotency_marker] = lambda: None
+        app.dependency_overrides[get_result_cache] = lambda: None
+        app.dependency_overrides[get_time_slicer] = lambda: None
+        app.dependency_overrides[get_micro_batcher] = lambda: None
+        app.dependency_overrides[get_deduplicator] = lambda: BatchDeduplicator(
+            window=DEDUP_WINDOW,
+        )
         app.include_router(router)
         return app
 
@@ -69,6 +124,33 @@ class TestAnonymize:
         assert len(anonymizer.strategies) > 0
         assert anonymizer.logger == mock_request.state.logger
 
+    @pytest.mark.asyncio
+    async def test_get_anonymizer_with_adaptive_targeting(
+        self,
+        mock_request: Request,
+    ) -> None:
+        """
+        Test that adaptive targeting is applied before detection when enabled.
+
+        :param mock_request: Mocked request with logger
+        """
+        mock_request.state.config.get_adaptive_targeting = Mock(return_value=True)
+        mock_request.state.config.get_adaptive_sample_rate = Mock(return_value=0.5)
+        mock_request.state.config.get_adaptive_state_file = Mock(return_value=None)
+
+        anonymizer = await get_anonymizer(mock_request)
+        other = await get_anonymizer(mock_request)
+
+        names = [type(s).__name__ for s in anonymizer.strategies]
+        assert names.index("AdaptiveTargetingStrategy") < names.index(
+            "EmailDetectionStrategy",
+        )
+        strategy = anonymizer.strategies[names.index("AdaptiveTargetingStrategy")]
+        assert (
+            strategy.targeting
+            is other.strategies[names.index("AdaptiveTargetingStrategy")].targeting
+        )
+
     def test_anonymize_trace_success(
         self,
         client: TestClient,
@@ -114,3 +196,416 @@ class TestAnonymize:
 
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
         assert "detail" in response.json()
+
+    @pytest.mark.parametrize(
+        ("payload", "changed", "echoed"),
+        [
+            pytest.param({}, False, True, id="unchanged"),
+            pytest.param({}, True, False, id="changed"),
+            pytest.param({"extra": "john@doe.com"}, False, False, id="extra-field"),
+        ],
+    )
+    def test_anonymize_trace_echo(
+        self,
+        client: TestClient,
+        mock_anonymizer: Mock,
+        payload: dict,
+        changed: bool,
+        echoed: bool,
+    ) -> None:
+        """
+        Test that the request body is sent back as is when the trace needs no change.
+
+        :param client: FastAPI test client
+        :param mock_anonymizer: Mocked Anonymizer instance
+        :param payload: Extra fields of the request
+        :param changed: Whether the anonymizer altered the trace
+        :param echoed: Whether the body is expected to be sent back as is
+        """
+        mock_anonymizer.anonymize.return_value = AnonymizationReport(
+            changed=changed,
+            prescreen=PrescreenOutcome.SKIPPED,
+        )
+        data = {
+            "actor": {"mbox": "mailto:anonymous@anonymous.org"},
+            "verb": {"id": "http://example.com/verbs/completed"},
+            "object": {"id": "http://example.com/a"},
+        }
+        # Indented, so the body differs from a serialized response
+        body = json.dumps({"trace": {"data": data}, **payload}, indent=2).encode()
+
+        response = client.post(
+            "/anonymize",
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert (response.content == body) == echoed
+        assert response.json() == {"trace": {"data": data}}
+        assert mock_anonymizer.anonymize.call_args.kwargs["raw"] == body
+
+    @staticmethod
+    def patched_report(**kwargs: object) -> AnonymizationReport:
+        """
+        Build the report of a trace whose email was replaced, with its JSON Patch.
+
+        :param kwargs: Arguments of the anonymize call, holding the trace
+        :return: The report
+        """
+        patch = PatchRecorder(root=kwargs["trace"].data)
+        patch.replace(
+            container=kwargs["trace"].data["actor"],
+            key="mbox",
+            value="mailto:anonymous@anonymous.org",
+        )
+        return AnonymizationReport(changed=True, patch=patch)
+
+    @classmethod
+    def patched_reports(cls, **kwargs: object) -> list[AnonymizationReport]:
+        """
+        Build the reports of traces whose email was replaced, with their JSON Patch.
+
+        :param kwargs: Arguments of the anonymize_batch call, holding the traces
+        :return: The report of each trace
+        """
+        return [cls.patched_report(trace=trace) for trace in kwargs["traces"]]
+
+    @pytest.mark.parametrize(
+        ("params", "headers"),
+        [
+            pytest.param({"output": "patch"}, {}, id="query"),
+            pytest.param({}, {"Accept": JSON_PATCH_MEDIA_TYPE}, id="accept"),
+        ],
+    )
+    def test_anonymize_trace_patch(
+        self,
+        client: TestClient,
+        mock_anonymizer: Mock,
+        params: dict,
+        headers: dict,
+    ) -> None:
+        """
+        Test that a JSON Patch is returned instead of the trace when asked for.
+
+        :param client: FastAPI test client
+        :param mock_anonymizer: Mocked Anonymizer instance
+        :param params: Query parameters of the request
+        :param headers: Headers of the request
+        """
+        mock_anonymizer.anonymize.side_effect = self.patched_report
+
+        response = client.post(
+            "/anonymize",
+            json={"trace": {"data": DATA}},
+            params=params,
+            headers=headers,
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == JSON_PATCH_MEDIA_TYPE
+        assert response.json() == [
+            {
+                "op": "replace",
+                "path": "/actor/mbox",
+                "value": "mailto:anonymous@anonymous.org",
+            },
+        ]
+        assert mock_anonymizer.anonymize.call_args.kwargs["patch"]
+
+    @pytest.mark.parametrize("output", ["trace", "patch"])
+    def test_anonymize_batch(
+        self,
+        client: TestClient,
+        mock_anonymizer: Mock,
+        output: str,
+    ) -> None:
+        """
+        Test that the traces of a batch are anonymized together, in order.
+
+        :param client: FastAPI test client
+        :param mock_anonymizer: Mocked Anonymizer instance
+        :param output: Form of the anonymized traces
+        """
+        mock_anonymizer.anonymize_batch.side_effect = self.patched_reports
+        traces = [
+            {"data": DATA},
+            {"data": {**DATA, "verb": {"id": "http://example.com/verbs/failed"}}},
+        ]
+
+        response = client.post(
+            "/anonymize/batch",
+            json={"traces": traces},
+            params={"output": output},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_anonymizer.anonymize_batch.assert_called_once()
+        assert len(mock_anonymizer.anonymize_batch.call_args.kwargs["traces"]) == len(
+            traces,
+        )
+        if output == "patch":
+            assert response.json() == {
+                "patches": [
+                    [
+                        {
+                            "op": "replace",
+                            "path": "/actor/mbox",
+                            "value": "mailto:anonymous@anonymous.org",
+                        },
+                    ],
+                ]
+                * len(traces),
+            }
+        else:
+            assert response.json() == {"traces": traces}
+
+    def test_anonymize_batch_duplicates(
+        self,
+        client: TestClient,
+        mock_anonymizer: Mock,
+    ) -> None:
+        """
+        Test that identical traces of a batch, whatever the order of their keys, are anonymized once.
+
+        :param client: FastAPI test client
+        :param mock_anonymizer: Mocked Anonymizer instance
+        """
+        mock_anonymizer.anonymize_batch.side_effect = self.patched_reports
+        traces = [{"data": DATA}, {"data": dict(reversed(DATA.items()))}]
+
+        response = client.post(
+            "/anonymize/batch",
+            json={"traces": traces},
+            params={"output": "patch"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(mock_anonymizer.anonymize_batch.call_args.kwargs["traces"]) == 1
+        patches = response.json()["patches"]
+        assert len(patches) == len(traces)
+        assert patches[0] == patches[1]
+
+    @pytest.mark.asyncio
+    async def test_get_deduplicator(self, mock_request: Request) -> None:
+        """
+        Test that batches are deduplicated within the configured window, unless disabled.
+
+        :param mock_request: Mocked request with config
+        """
+        deduplicator = await get_deduplicator(mock_request)
+        mock_request.state.config.get_dedup_window = Mock(return_value=0)
+
+        assert deduplicator.window == DEDUP_WINDOW
+        assert await get_deduplicator(mock_request) is None
+
+    def test_anonymize_batch_time_sliced(
+        self,
+        app: FastAPI,
+        client: TestClient,
+        mock_anonymizer: Mock,
+    ) -> None:
+        """
+        Test that a time-sliced batch is anonymized in chunks, giving the same output.
+
+        :param app: FastAPI test app
+        :param client: FastAPI test client
+        :param mock_anonymizer: Mocked Anonymizer instance
+        """
+        app.dependency_overrides[get_time_slicer] = lambda: TimeSlicer(time_slice=0)
+        mock_anonymizer.anonymize_batch.side_effect = self.patched_reports
+        traces = [
+            {"data": {**DATA, "object": {"id": f"http://example.com/{i}"}}}
+            for i in range(20)
+        ]
+
+        response = client.post(
+            "/anonymize/batch",
+            json={"traces": traces},
+            params={"output": "patch"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_anonymizer.anonymize_batch.call_count > 1
+        assert len(response.json()["patches"]) == len(traces)
+
+    @pytest.mark.asyncio
+    async def test_get_time_slicer(self, mock_request: Request) -> None:
+        """
+        Test that the slicer is shared by the requests of the process, unless disabled.
+
+        :param mock_request: Mocked request with config
+        """
+        slicer = await get_time_slicer(mock_request)
+        shared = await get_time_slicer(mock_request)
+        mock_request.state.config.get_batch_time_slice = Mock(return_value=0)
+
+        assert slicer.time_slice == 0.02  # noqa: PLR2004
+        assert slicer is shared
+        assert await get_time_slicer(mock_request) is None
+
+    def test_anonymize_trace_micro_batched(
+        self,
+        app: FastAPI,
+        client: TestClient,
+        mock_anonymizer: Mock,
+    ) -> None:
+        """
+        Test that a micro-batched trace is anonymized by the batch engine.
+
+        :param app: FastAPI test app
+        :param client: FastAPI test client
+        :param mock_anonymizer: Mocked Anonymizer instance
+        """
+        batcher = MicroBatcher(max_delay=0.001, max_size=8)
+        app.dependency_overrides[get_micro_batcher] = lambda: batcher
+        mock_anonymizer.fingerprint = "f" * 64
+        mock_anonymizer.anonymize_batch.side_effect = self.patched_reports
+        body = json.dumps({"trace": {"data": DATA}}).encode()
+
+        response = client.post(
+            "/anonymize",
+            content=body,
+            headers={"Content-Type": "application/json"},
+            params={"output": "patch"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_anonymizer.anonymize.assert_not_called()
+        assert mock_anonymizer.anonymize_batch.call_args.kwargs["raws"] == [body]
+        assert response.json() == [
+            {
+                "op": "replace",
+                "path": "/actor/mbox",
+                "value": "mailto:anonymous@anonymous.org",
+            },
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_micro_batcher(self, mock_request: Request) -> None:
+        """
+        Test that the micro-batcher is shared by the requests of the process, once enabled.
+
+        :param mock_request: Mocked request with config
+        """
+        disabled = await get_micro_batcher(mock_request)
+        mock_request.state.config.get_micro_batch_delay = Mock(return_value=0.002)
+        mock_request.state.config.get_micro_batch_max_size = Mock(return_value=32)
+
+        batcher = await get_micro_batcher(mock_request)
+
+        assert disabled is None
+        assert batcher is await get_micro_batcher(mock_request)
+        assert batcher.max_delay == 0.002  # noqa: PLR2004
+        assert batcher.max_size == 32  # noqa: PLR2004
+
+    def test_anonymize_trace_result_cache(
+        self,
+        app: FastAPI,
+        client: TestClient,
+        mock_anonymizer: Mock,
+        tmp_path: Path,
+    ) -> None:
+        """
+        Test that a trace anonymized before with the same rules is given its stored output.
+
+        :param app: FastAPI test app
+        :param client: FastAPI test client
+        :param mock_anonymizer: Mocked Anonymizer instance
+        :param tmp_path: Temporary directory
+        """
+        cache = ResultCache(path=tmp_path / "cache.sqlite", max_size=1 << 20)
+        app.dependency_overrides[get_result_cache] = lambda: cache
+        mock_anonymizer.fingerprint = "f" * 64
+
+        def anonymize(**kwargs: object) -> AnonymizationReport:
+            kwargs["trace"].data["actor"]["mbox"] = "mailto:anonymous@anonymous.org"
+            return AnonymizationReport(changed=True)
+
+        mock_anonymizer.anonymize.side_effect = anonymize
+
+        responses = [
+            client.post("/anonymize", json={"trace": {"data": DATA}}) for _ in range(2)
+        ]
+
+        assert mock_anonymizer.anonymize.call_count == 1
+        assert responses[0].json() == responses[1].json()
+        assert (
+            responses[1].json()["trace"]["data"]["actor"]["mbox"]
+            == "mailto:anonymous@anonymous.org"
+        )
+        assert cache.stats.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_get_result_cache(
+        self,
+        mock_request: Request,
+        tmp_path: Path,
+    ) -> None:
+        """
+        Test that the result cache is shared by the requests of the process, once enabled.
+
+        :param mock_request: Mocked request with config
+        :param tmp_path: Temporary directory
+        """
+        disabled = await get_result_cache(mock_request)
+        mock_request.state.config.get_result_cache_file = Mock(
+            return_value=tmp_path / "cache.sqlite",
+        )
+        mock_request.state.config.get_result_cache_max_size = Mock(return_value=1024)
+
+        cache = await get_result_cache(mock_request)
+
+        assert disabled is None
+        assert cache is await get_result_cache(mock_request)
+        assert cache.max_size == 1024  # noqa: PLR2004
+
+    def test_anonymize_trace_idempotency(
+        self,
+        app: FastAPI,
+        client: TestClient,
+        mock_anonymizer: Mock,
+    ) -> None:
+        """
+        Test that an anonymized trace is stamped, and sent back untouched when received again.
+
+        :param app: FastAPI test app
+        :param client: FastAPI test client
+        :param mock_anonymizer: Mocked Anonymizer instance
+        """
+        marker = IdempotencyMarker(key=b"secret", fingerprint="f" * 64)
+        app.dependency_overrides[get_idempotency_marker] = lambda: marker
+
+        stamped = client.post("/anonymize", json={"trace": {"data": DATA}}).json()
+        body = json.dumps(stamped).encode()
+        response = client.post(
+            "/anonymize",
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+
+        assert MARKER_EXTENSION in stamped["trace"]["data"]["context"]["extensions"]
+        assert mock_anonymizer.anonymize.call_count == 1
+        assert response.content == body
+
+    def test_anonymize_trace_targeted_not_stamped(
+        self,
+        app: FastAPI,
+        client: TestClient,
+        mock_anonymizer: Mock,
+    ) -> None:
+        """
+        Test that a trace whose detection was targeted is not stamped.
+
+        :param app: FastAPI test app
+        :param client: FastAPI test client
+        :param mock_anonymizer: Mocked Anonymizer instance
+        """
+        marker = IdempotencyMarker(key=b"secret", fingerprint="f" * 64)
+        app.dependency_overrides[get_idempotency_marker] = lambda: marker
+        mock_anonymizer.anonymize.return_value = AnonymizationReport(targeted=True)
+
+        response = client.post("/anonymize", json={"trace": {"data": DATA}})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert MARKER_EXTENSION not in response.text
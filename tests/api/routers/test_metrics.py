@@ -0,0 +1,20 @@
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from src.trace_deidentifier.anonymizer.deadline import DEADLINE_EXCEEDED
+from src.trace_deidentifier.api.routers.metrics import router
+
+
+class TestMetrics:
+    """Test suite for the metrics endpoint."""
+
+    def test_should_expose_metrics(self) -> None:
+        """Test that registered metrics are exposed in the Prometheus format."""
+        app = FastAPI()
+        app.include_router(router)
+
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert f"# TYPE {DEADLINE_EXCEEDED.name} counter" in response.text
@@ -0,0 +1,41 @@
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from src.trace_deidentifier.anonymizer.adaptive import AdaptiveTargeting
+from src.trace_deidentifier.api.dependencies import get_adaptive_targeting
+from src.trace_deidentifier.api.routers.targeting import router
+
+
+class TestTargeting:
+    """Test suite for the adaptive targeting endpoint."""
+
+    @staticmethod
+    def client(targeting: AdaptiveTargeting | None) -> TestClient:
+        """
+        Create a test client serving a given learned state.
+
+        :param targeting: The learned state, or None if adaptive targeting is disabled
+        :return: Configured test client
+        """
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_adaptive_targeting] = lambda: targeting
+        return TestClient(app)
+
+    def test_should_expose_learned_state(self) -> None:
+        """Test that the learned paths of each shape are exposed."""
+        targeting = AdaptiveTargeting(sample_rate=0)
+        targeting.learn("shape", ["result.response"])
+
+        response = self.client(targeting).get("/targeting")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "shape": {"scans": 1, "paths": ["result.response"]},
+        }
+
+    def test_should_fail_when_disabled(self) -> None:
+        """Test that the endpoint is not found when adaptive targeting is disabled."""
+        response = self.client(None).get("/targeting")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -4,6 +4,7 @@ from unittest.mock import Mock
 import pytest
 from fastapi import Request, status
 
+from src.trace_deidentifier.anonymizer.exceptions import ScanBudgetExceededError
 from src.trace_deidentifier.api.exception_handler import ExceptionHandler
 from src.trace_deidentifier.common.exceptions import InvalidTraceError
 
@@ -51,6 +52,24 @@ class TestExceptionHandler:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert json.loads(response.body.decode()) == {"detail": error_message}
 
+    @pytest.mark.asyncio
+    async def test_rejected_statement(
+        self,
+        handler: ExceptionHandler,
+        mock_request: Request,
+    ) -> None:
+        """
+        Test that statements exceeding the scan budget are reported as unprocessable.
+
+        :param handler: ExceptionHandler instance
+        :param mock_request: Mocked FastAPI request
+        """
+        exc = ScanBudgetExceededError("Too long")
+
+        response = await handler.known_exception_handler(mock_request, exc)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
     @pytest.mark.asyncio
     async def test_unknown_exception(
         self,
@@ -0,0 +1,118 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.exceptions import StatementRejectedError
+from src.trace_deidentifier.anonymizer.report import AnonymizationReport
+from src.trace_deidentifier.anonymizer.strategies.base import BaseAnonymizationStrategy
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.api.micro_batching import MicroBatcher
+from src.trace_deidentifier.common.models.trace import Trace
+
+
+class RejectFlaggedStrategy(BaseAnonymizationStrategy):
+    """Strategy refusing traces flagged 'reject'."""
+
+    def anonymize(self, trace: Trace) -> None:
+        """
+        Refuse the trace when flagged.
+
+        :param trace: The trace
+        :raises StatementRejectedError: If the trace is flagged 'reject'
+        """
+        if trace.data.get("reject"):
+            raise StatementRejectedError("Refused")
+
+
+class TestMicroBatcher:
+    """Test suite for the anonymization of concurrent single traces together."""
+
+    @pytest.fixture
+    def anonymizer(self, mock_logger: Mock) -> Anonymizer:
+        """
+        Create an anonymizer counting its batches.
+
+        :param mock_logger: Mocked logger
+        :return: The anonymizer, whose anonymize_batch is wrapped in a Mock
+        """
+        anonymizer = Anonymizer(
+            strategies=[RejectFlaggedStrategy(), EmailDetectionStrategy()],
+            logger=mock_logger,
+        )
+        anonymizer.anonymize_batch = Mock(wraps=anonymizer.anonymize_batch)
+        return anonymizer
+
+    @pytest.mark.asyncio
+    async def test_should_anonymize_concurrent_traces_together(
+        self,
+        anonymizer: Anonymizer,
+    ) -> None:
+        """
+        Test that concurrent traces are anonymized in a batch, each getting its result.
+
+        :param anonymizer: The anonymizer
+        """
+        batcher = MicroBatcher(max_delay=0.01, max_size=64)
+        traces = [
+            Trace.model_construct(
+                data={"result": {"response": f"Ask tutor{i}@doe.com"}},
+            )
+            for i in range(5)
+        ]
+        rejected = Trace.model_construct(data={"reject": True})
+
+        results = await asyncio.gather(
+            *(
+                batcher.anonymize(
+                    anonymizer=anonymizer,
+                    cache=None,
+                    trace=trace,
+                    raw=None,
+                    patch=False,
+                )
+                for trace in [*traces, rejected]
+            ),
+            return_exceptions=True,
+        )
+
+        anonymizer.anonymize_batch.assert_called_once()
+        assert all(isinstance(r, AnonymizationReport) for r in results[:-1])
+        assert isinstance(results[-1], StatementRejectedError)
+        assert all(
+            t.data["result"]["response"] == "Ask anonymous@anonymous.org"
+            for t in traces
+        )
+
+    @pytest.mark.asyncio
+    async def test_should_flush_full_micro_batches(
+        self,
+        anonymizer: Anonymizer,
+    ) -> None:
+        """
+        Test that micro-batches are anonymized once full, apart for each output.
+
+        :param anonymizer: The anonymizer
+        """
+        batcher = MicroBatcher(max_delay=60, max_size=2)
+
+        async def anonymize(patch: bool) -> AnonymizationReport:
+            return await batcher.anonymize(
+                anonymizer=anonymizer,
+                cache=None,
+                trace=Trace.model_construct(data={"mbox": "mailto:john@doe.com"}),
+                raw=None,
+                patch=patch,
+            )
+
+        outputs = [True, False, True, False]
+        results = await asyncio.wait_for(
+            asyncio.gather(*(anonymize(patch=patch) for patch in outputs)),
+            timeout=5,
+        )
+
+        assert anonymizer.anonymize_batch.call_count == 2  # noqa: PLR2004
+        assert [r.patch is not None for r in results] == outputs
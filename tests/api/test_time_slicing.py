@@ -0,0 +1,70 @@
+import asyncio
+from collections.abc import Sequence
+
+import pytest
+
+from src.trace_deidentifier.api.time_slicing import (
+    INITIAL_CHUNK_SIZE,
+    MAX_CHUNK_SIZE,
+    TimeSlicer,
+)
+
+
+class FakeClock:
+    """Clock advanced by hand."""
+
+    def __init__(self) -> None:
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """
+        Read the clock.
+
+        :return: The current time, in seconds
+        """
+        return self.now
+
+
+class TestTimeSlicer:
+    """Test suite for the processing of batches in time slices."""
+
+    @pytest.mark.asyncio
+    async def test_should_size_chunks_to_the_time_slice(self) -> None:
+        """Test that chunks follow the time an item takes, within bounds."""
+        clock = FakeClock()
+        slicer = TimeSlicer(time_slice=0.01, clock=clock)
+        sizes = []
+
+        def process(chunk: Sequence[int]) -> list[int]:
+            sizes.append(len(chunk))
+            clock.now += 0.001 * len(chunk)
+            return [item * 2 for item in chunk]
+
+        results = await slicer.run(items=list(range(30)), process=process)
+
+        assert results == [item * 2 for item in range(30)]
+        assert sizes == [INITIAL_CHUNK_SIZE, 10, 10, 2]
+        slicer.item_time = 1e-9
+        assert slicer.chunk_size == MAX_CHUNK_SIZE
+
+    @pytest.mark.asyncio
+    async def test_should_let_other_tasks_run_between_chunks(self) -> None:
+        """Test that another task runs while a batch is processed."""
+        slicer = TimeSlicer(time_slice=0)
+        events = []
+
+        def process(chunk: Sequence[int]) -> list[int]:
+            events.append("chunk")
+            return list(chunk)
+
+        async def other() -> None:
+            events.append("other")
+
+        task = asyncio.create_task(other())
+        await slicer.run(items=list(range(INITIAL_CHUNK_SIZE + 2)), process=process)
+        await task
+
+        assert events[0] == "chunk"
+        assert events[1] == "other"
+        assert events.count("chunk") > 1
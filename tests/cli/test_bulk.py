@@ -0,0 +1,309 @@
+import io
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.dedup import BatchDeduplicator
+from src.trace_deidentifier.anonymizer.extension_rules import ExtensionRules
+from src.trace_deidentifier.anonymizer.result_cache import ResultCache
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.detect_ipsv4 import (
+    Ipv4DetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.remove_fields import (
+    RemoveFieldsStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.anonymizer.threaded import ThreadedAnonymizer
+from src.trace_deidentifier.cli.bulk import BulkAnonymizer, PreviousRecords
+
+DATA = {
+    "actor": {"mbox": "mailto:john@doe.com"},
+    "verb": {"id": "http://example.com/verbs/completed"},
+    "object": {
+        "id": "http://example.com/a",
+        "definition": {"description": {"en": "Ask jane@doe.com"}},
+    },
+}
+
+
+class TestBulkAnonymizer:
+    """Test suite for the bulk anonymization of JSON Lines streams."""
+
+    @pytest.fixture
+    def anonymizer(self, mock_logger: Mock) -> Anonymizer:
+        """
+        Provide an anonymizer replacing agents and detecting emails.
+
+        :param mock_logger: Mocked logger
+        :return: The anonymizer
+        """
+        return Anonymizer(
+            strategies=[ReplaceSensitiveValuesStrategy(), EmailDetectionStrategy()],
+            logger=mock_logger,
+        )
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 256])
+    @pytest.mark.parametrize("window", [0, 16])
+    def test_should_anonymize_each_line(
+        self,
+        anonymizer: Anonymizer,
+        window: int,
+        batch_size: int,
+    ) -> None:
+        """
+        Test that every statement is anonymized, in order, with or without deduplication.
+
+        :param anonymizer: The anonymizer
+        :param window: Window of the deduplicator, 0 to disable it
+        :param batch_size: Number of statements anonymized together
+        """
+        other = {**DATA, "verb": {"id": "http://example.com/verbs/failed"}}
+        lines = [json.dumps(DATA), json.dumps(other), "", json.dumps(DATA)]
+        target = io.StringIO()
+        deduplicator = BatchDeduplicator(window=window) if window else None
+
+        stats = BulkAnonymizer(
+            anonymizer=anonymizer,
+            deduplicator=deduplicator,
+            batch_size=batch_size,
+        ).run(source=io.StringIO("\n".join(lines) + "\n"), target=target)
+
+        results = [json.loads(line) for line in target.getvalue().splitlines()]
+        assert stats.statements == len(results)
+        assert stats.failed == 0
+        assert [r["verb"] for r in results] == [
+            DATA["verb"],
+            other["verb"],
+            DATA["verb"],
+        ]
+        assert all(
+            r["object"]["definition"]["description"]["en"]
+            == "Ask anonymous@anonymous.org"
+            for r in results
+        )
+        if deduplicator:
+            assert deduplicator.stats.duplicate_statements == 1
+            assert deduplicator.stats.duplicate_values > 0
+
+    def test_should_give_the_same_output_without_interning(
+        self,
+        anonymizer: Anonymizer,
+    ) -> None:
+        """
+        Test that sharing strings across the statements of a chunk does not change outputs.
+
+        :param anonymizer: The anonymizer
+        """
+        other = {**DATA, "verb": {"id": "http://example.com/verbs/failed"}}
+        text = "\n".join(json.dumps(d) for d in (DATA, other, DATA)) + "\n"
+        outputs = []
+        for intern in (True, False):
+            target = io.StringIO()
+            BulkAnonymizer(anonymizer=anonymizer, batch_size=2, intern=intern).run(
+                source=io.StringIO(text),
+                target=target,
+            )
+            outputs.append(target.getvalue())
+
+        assert outputs[0] == outputs[1]
+        assert len(outputs[0].splitlines()) == 3  # noqa: PLR2004
+
+    def test_should_give_the_same_output_with_threads(
+        self,
+        anonymizer: Anonymizer,
+    ) -> None:
+        """
+        Test that splitting the statements of a chunk between threads does not change outputs.
+
+        :param anonymizer: The anonymizer
+        """
+        text = "".join(
+            json.dumps({**DATA, "object": {"id": f"http://example.com/{i}"}}) + "\n"
+            for i in range(40)
+        )
+        outputs = []
+        for threads in (None, ThreadedAnonymizer(anonymizer=anonymizer, threads=2)):
+            target = io.StringIO()
+            BulkAnonymizer(anonymizer=anonymizer, threaded=threads).run(
+                source=io.StringIO(text),
+                target=target,
+            )
+            outputs.append(target.getvalue())
+            if threads:
+                threads.close()
+
+        assert outputs[0] == outputs[1]
+        assert "john@doe.com" not in outputs[1]
+
+    def test_should_reuse_cached_outputs(
+        self,
+        anonymizer: Anonymizer,
+        tmp_path: Path,
+    ) -> None:
+        """
+        Test that a rerun over the same statements reads their outputs from the cache.
+
+        :param anonymizer: The anonymizer
+        :param tmp_path: Temporary directory
+        """
+        text = json.dumps(DATA) + "\n"
+        cache = ResultCache(path=tmp_path / "cache.sqlite", max_size=1 << 20)
+        outputs = []
+        for _ in range(2):
+            target = io.StringIO()
+            BulkAnonymizer(anonymizer=anonymizer, cache=cache).run(
+                source=io.StringIO(text),
+                target=target,
+            )
+            outputs.append(target.getvalue())
+            anonymizer.anonymize = Mock(side_effect=AssertionError)
+
+        assert outputs[0] == outputs[1]
+        assert "john@doe.com" not in outputs[1]
+        assert cache.stats.hits == 1
+
+    def test_should_leave_out_invalid_lines(
+        self,
+        anonymizer: Anonymizer,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that lines that are not valid statements are logged and left out.
+
+        :param anonymizer: The anonymizer
+        :param mock_logger: Mocked logger
+        """
+        lines = ["{not json", json.dumps({"actor": {}}), json.dumps(DATA)]
+        target = io.StringIO()
+
+        stats = BulkAnonymizer(anonymizer=anonymizer).run(
+            source=io.StringIO("\n".join(lines)),
+            target=target,
+        )
+
+        assert stats.failed == len(lines) - 1
+        assert len(target.getvalue().splitlines()) == 1
+        assert [c.args[1]["line"] for c in mock_logger.warning.call_args_list] == [1, 2]
+
+    def test_should_write_aligned_records(self, anonymizer: Anonymizer) -> None:
+        """
+        Test that records mode writes a header, then one record per statement, failed ones included.
+
+        :param anonymizer: The anonymizer
+        """
+        other = {**DATA, "object": {"id": "http://example.com/b"}}
+        lines = [json.dumps(DATA), "{not json", json.dumps(other)]
+        target = io.StringIO()
+
+        BulkAnonymizer(anonymizer=anonymizer, records=True).run(
+            source=io.StringIO("\n".join(lines)),
+            target=target,
+        )
+
+        header, *records = map(json.loads, target.getvalue().splitlines())
+        assert header == {
+            "fingerprint": anonymizer.fingerprint,
+            "rules": anonymizer.rules,
+        }
+        assert len(records) == len(lines)
+        assert records[0]["fingerprint"] == anonymizer.fingerprint
+        assert records[0]["applied"] == [
+            "ReplaceSensitiveValuesStrategy",
+            "EmailDetectionStrategy",
+        ]
+        assert records[1] == {"key": None, "error": records[1]["error"]}
+        assert records[2]["applied"] == ["ReplaceSensitiveValuesStrategy"]
+        assert records[2]["data"]["object"] == other["object"]
+
+    def test_should_only_reprocess_statements_affected_by_rule_changes(
+        self,
+        mock_logger: Mock,
+    ) -> None:
+        """
+        Test that reprocessing skips statements that no added rule can affect.
+
+        :param mock_logger: Mocked logger
+        """
+        statements = [
+            {**DATA, "context": {"extensions": {"http://example.com/tweet": "Hi"}}},
+            {**DATA, "context": {"extensions": {"http://example.com/ip-address": 1}}},
+            {**DATA, "result": {"response": "From 10.0.0.1"}},
+        ]
+        source = "\n".join(map(json.dumps, statements))
+        previous = io.StringIO()
+        BulkAnonymizer(
+            anonymizer=Anonymizer(
+                strategies=[
+                    ReplaceSensitiveValuesStrategy(),
+                    RemoveFieldsStrategy(
+                        rules=ExtensionRules(suffixes=frozenset({"ip-address"})),
+                    ),
+                ],
+                logger=mock_logger,
+            ),
+            records=True,
+        ).run(source=io.StringIO(source), target=previous)
+        anonymizer = Anonymizer(
+            strategies=[
+                ReplaceSensitiveValuesStrategy(),
+                RemoveFieldsStrategy(
+                    rules=ExtensionRules(suffixes=frozenset({"ip-address", "tweet"})),
+                ),
+                Ipv4DetectionStrategy(),
+            ],
+            logger=mock_logger,
+        )
+        target = io.StringIO()
+        previous.seek(0)
+
+        stats = BulkAnonymizer(anonymizer=anonymizer, records=True).run(
+            source=io.StringIO(source),
+            target=target,
+            previous=PreviousRecords(source=previous),
+        )
+
+        assert stats.skipped == 1
+        _, *records = map(json.loads, target.getvalue().splitlines())
+        assert all(r["fingerprint"] == anonymizer.fingerprint for r in records)
+        assert records[0]["data"]["context"] == {}
+        assert records[1]["data"]["context"] == {}
+        assert records[2]["data"]["result"]["response"] == "From 0.0.0.0"
+        assert records[2]["applied"] == [
+            "ReplaceSensitiveValuesStrategy",
+            "Ipv4DetectionStrategy",
+        ]
+
+    def test_should_reprocess_changed_statements(self, anonymizer: Anonymizer) -> None:
+        """
+        Test that statements whose content differs from their record are reprocessed.
+
+        :param anonymizer: The anonymizer
+        """
+        previous = io.StringIO()
+        bulk = BulkAnonymizer(anonymizer=anonymizer, records=True)
+        bulk.run(source=io.StringIO(json.dumps(DATA)), target=previous)
+        other = {**DATA, "result": {"response": "Ask jane@doe.com"}}
+        target = io.StringIO()
+        previous.seek(0)
+
+        stats = bulk.run(
+            source=io.StringIO(json.dumps(other)),
+            target=target,
+            previous=PreviousRecords(source=previous),
+        )
+
+        assert stats.skipped == 0
+        assert "result" in json.loads(target.getvalue().splitlines()[1])["data"]
+
+    def test_should_reject_files_without_header(self) -> None:
+        """Test that previous records must start with their header."""
+        with pytest.raises(ValueError, match="not a records file"):
+            PreviousRecords(source=io.StringIO(json.dumps(DATA)))
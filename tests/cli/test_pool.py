@@ -0,0 +1,153 @@
+import io
+import json
+from collections.abc import Iterator
+from unittest.mock import Mock, patch
+
+import pytest
+from logger import LoggerContract
+
+from src.trace_deidentifier.anonymizer.anonymizer import Anonymizer
+from src.trace_deidentifier.anonymizer.dedup import BatchDeduplicator
+from src.trace_deidentifier.anonymizer.exceptions import AnonymizationError
+from src.trace_deidentifier.anonymizer.strategies.detect_emails import (
+    EmailDetectionStrategy,
+)
+from src.trace_deidentifier.anonymizer.strategies.replace_values import (
+    ReplaceSensitiveValuesStrategy,
+)
+from src.trace_deidentifier.cli.bulk import BulkAnonymizer
+from src.trace_deidentifier.cli.pool import PooledOutput, SharedMemoryPool
+
+
+def build_anonymizer() -> Anonymizer:
+    """
+    Build an anonymizer replacing agents and detecting emails, in a worker process.
+
+    :return: The anonymizer
+    """
+    return Anonymizer(
+        strategies=[ReplaceSensitiveValuesStrategy(), EmailDetectionStrategy()],
+        logger=Mock(spec=LoggerContract),
+    )
+
+
+def statement(index: int) -> str:
+    """
+    Build the JSON text of a distinct statement, with emails and non-ASCII text.
+
+    :param index: Index of the statement
+    :return: The JSON text
+    """
+    return json.dumps(
+        {
+            "actor": {"mbox": f"mailto:learner{index}@doe.com"},
+            "verb": {"id": "http://example.com/verbs/answered"},
+            "object": {"id": f"http://example.com/q/{index}"},
+            "result": {"response": f"Écrire à tutor{index}@doe.com"},
+        },
+    )
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[SharedMemoryPool]:
+    """
+    Provide a pool of two worker processes.
+
+    :yield: The pool
+    """
+    with SharedMemoryPool(factory=build_anonymizer, processes=2) as pool:
+        yield pool
+
+
+class TestSharedMemoryPool:
+    """Test suite for the worker processes anonymizing statements in shared memory."""
+
+    @pytest.mark.parametrize("size", [0, 1, 40])
+    def test_should_give_the_outputs_of_this_process(
+        self,
+        pool: SharedMemoryPool,
+        size: int,
+    ) -> None:
+        """
+        Test that statements split between workers give the outputs of a local run, in order.
+
+        :param pool: The pool
+        :param size: Number of statements
+        """
+        lines = [statement(i) for i in range(size)]
+        expected = []
+        anonymizer = build_anonymizer()
+        for line in lines:
+            target = io.StringIO()
+            BulkAnonymizer(anonymizer=anonymizer).run(
+                source=io.StringIO(line),
+                target=target,
+            )
+            expected.append(target.getvalue().rstrip("\n"))
+
+        outputs = pool.anonymize(lines=lines)
+
+        assert [o.text for o in outputs] == expected
+        assert all(
+            isinstance(o, PooledOutput)
+            and o.final
+            and o.applied
+            == ["ReplaceSensitiveValuesStrategy", "EmailDetectionStrategy"]
+            for o in outputs
+        )
+
+    def test_should_give_errors_of_invalid_statements(
+        self,
+        pool: SharedMemoryPool,
+    ) -> None:
+        """
+        Test that statements that cannot be parsed give their error, in place.
+
+        :param pool: The pool
+        """
+        outputs = pool.anonymize(lines=[statement(0), "{not json", statement(1)])
+
+        assert isinstance(outputs[0], PooledOutput)
+        assert isinstance(outputs[1], AnonymizationError)
+        assert isinstance(outputs[2], PooledOutput)
+
+    def test_bulk_should_anonymize_in_workers(self, pool: SharedMemoryPool) -> None:
+        """
+        Test that a deduplicated bulk run with the pool writes the outputs of a local run.
+
+        :param pool: The pool
+        """
+        text = "\n".join([statement(i % 20) for i in range(50)] + ["[]"]) + "\n"
+        outputs = []
+        for bulk_pool in (None, pool):
+            target = io.StringIO()
+            stats = BulkAnonymizer(
+                anonymizer=build_anonymizer(),
+                deduplicator=BatchDeduplicator(window=16),
+                batch_size=32,
+                pool=bulk_pool,
+            ).run(source=io.StringIO(text), target=target)
+            outputs.append(target.getvalue())
+
+        assert outputs[0] == outputs[1]
+        assert stats.failed == 1
+
+    def test_bulk_should_leave_parsing_to_workers(
+        self,
+        pool: SharedMemoryPool,
+    ) -> None:
+        """
+        Test that without anything to look up, statements are only parsed by workers.
+
+        :param pool: The pool
+        """
+        text = "\n".join([statement(0), "{not json", statement(1)]) + "\n"
+        bulk = BulkAnonymizer(anonymizer=build_anonymizer(), pool=pool)
+        target = io.StringIO()
+
+        with patch.object(BulkAnonymizer, "_parse") as parse:
+            stats = bulk.run(source=io.StringIO(text), target=target)
+
+        parse.assert_not_called()
+        assert len(target.getvalue().splitlines()) == 2  # noqa: PLR2004
+        assert stats.failed == 1
@@ -0,0 +1,65 @@
+import pytest
+
+from src.trace_deidentifier.common.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test suite for MetricsRegistry and its counters."""
+
+    def test_counter_should_accumulate_per_label(self) -> None:
+        """Test that a counter keeps one value per label set."""
+        registry = MetricsRegistry()
+        counter = registry.counter("events_total", "Events", labels=("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        counter.inc(kind="b")
+
+        assert counter.value(kind="a") == 3.0  # noqa: PLR2004
+        assert counter.value(kind="b") == 1.0
+        assert counter.value(kind="c") == 0.0
+
+    def test_counter_should_be_registered_once(self) -> None:
+        """Test that a counter is shared by every caller using its name."""
+        registry = MetricsRegistry()
+        assert registry.counter("events_total", "Events") is registry.counter(
+            "events_total",
+            "Events",
+        )
+
+    @pytest.mark.parametrize(
+        ("amount", "labels"),
+        [
+            pytest.param(-1, {"kind": "a"}, id="negative"),
+            pytest.param(1, {}, id="missing-label"),
+            pytest.param(1, {"kind": "a", "other": "b"}, id="unknown-label"),
+        ],
+    )
+    def test_counter_should_reject_invalid_increments(
+        self,
+        amount: float,
+        labels: dict[str, str],
+    ) -> None:
+        """
+        Test that invalid increments are rejected.
+
+        :param amount: Value to add
+        :param labels: Label values
+        """
+        counter = MetricsRegistry().counter("events_total", "Events", labels=("kind",))
+        with pytest.raises(ValueError, match=r"[Cc]ounter|labels"):
+            counter.inc(amount, **labels)
+
+    def test_should_render_prometheus_format(self) -> None:
+        """Test the text exposition format."""
+        registry = MetricsRegistry()
+        registry.counter("plain_total", "Plain").inc()
+        registry.counter("split_total", "Split", labels=("kind",)).inc(kind="a")
+
+        assert registry.render() == (
+            "# HELP plain_total Plain\n"
+            "# TYPE plain_total counter\n"
+            "plain_total 1.0\n"
+            "# HELP split_total Split\n"
+            "# TYPE split_total counter\n"
+            'split_total{kind="a"} 1.0\n'
+        )
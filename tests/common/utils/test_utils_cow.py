@@ -0,0 +1,109 @@
+import re
+from copy import deepcopy
+
+import pytest
+
+from src.trace_deidentifier.common.utils import utils_cow, utils_dict
+
+
+class TestCopyOnWrite:
+    """Test suite for copy-on-write views."""
+
+    @pytest.fixture
+    def data(self) -> dict:
+        """
+        Provide nested data to view.
+
+        :return: The data
+        """
+        return {
+            "actor": {"name": "John", "account": {"name": "john"}},
+            "result": {"response": ["a", {"b": "c"}, "d"]},
+            "score": 1,
+        }
+
+    def test_should_return_source_when_unchanged(self, data: dict) -> None:
+        """
+        Test that reading a view, even deeply, does not copy anything.
+
+        :param data: The data to view
+        """
+        view = utils_cow.wrap(data)
+        assert view["actor"]["account"]["name"] == "john"
+        view["actor"]["name"] = "John"
+
+        assert view.build() is data
+
+    def test_should_share_unchanged_subtrees(self, data: dict) -> None:
+        """
+        Test that only the containers along changed paths are copied.
+
+        :param data: The data to view
+        """
+        original = deepcopy(data)
+        view = utils_cow.wrap(data)
+
+        view["actor"]["account"]["name"] = "anonymous"
+        result = view.build()
+
+        assert data == original
+        assert result == {
+            **original,
+            "actor": {"name": "John", "account": {"name": "anonymous"}},
+        }
+        assert result is not data
+        assert result["actor"] is not data["actor"]
+        assert result["result"] is data["result"]
+
+    def test_should_keep_views_aligned_on_list_changes(self, data: dict) -> None:
+        """
+        Test that deleting and inserting list items keeps each view on its item.
+
+        :param data: The data to view
+        """
+        original = deepcopy(data)
+        view = utils_cow.wrap(data)
+        response = view["result"]["response"]
+        item = response[1]
+
+        del response[0]
+        response.insert(0, "x")
+        response.append(utils_cow.wrap({"e": "f"}))
+        item["b"] = "anonymous"
+
+        assert response[1] is item
+        assert data == original
+        assert view.build()["result"]["response"] == [
+            "x",
+            {"b": "anonymous"},
+            "d",
+            {"e": "f"},
+        ]
+
+    def test_should_match_in_place_replacement(self, data: dict) -> None:
+        """
+        Test that a replacement through a view gives the same data as in place.
+
+        :param data: The data to view
+        """
+        original = deepcopy(data)
+        expected = utils_dict.regex_replace(
+            deepcopy(data),
+            re.compile(r"john"),
+            "anonymous",
+        )
+        view = utils_cow.wrap(data)
+
+        utils_dict.regex_replace(view, re.compile(r"john"), "anonymous")
+
+        assert view.build() == expected
+        assert data == original
+
+    def test_should_reject_slices(self, data: dict) -> None:
+        """
+        Test that list views refuse slices rather than copying the source.
+
+        :param data: The data to view
+        """
+        with pytest.raises(TypeError):
+            utils_cow.wrap(data)["result"]["response"][0:1]
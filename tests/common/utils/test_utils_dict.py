@@ -86,6 +86,81 @@ class TestGetNestedField:
         assert utils_dict.get_nested_field(data=data, keys=keys) == expected
 
 
+class TestIterNestedFields:
+    """Test suite for iter_nested_fields function."""
+
+    @pytest.mark.parametrize(
+        ("data", "keys", "expected"),
+        [
+            pytest.param(
+                {"a": {"b": "value"}},
+                ["a", "b"],
+                ["value"],
+                id="plain-path",
+            ),
+            pytest.param(
+                {"a": {"x": {"b": 1}, "y": {"b": 2}, "z": "no-b"}},
+                ["a", "*", "b"],
+                [1, 2],
+                id="wildcard-dict",
+            ),
+            pytest.param(
+                {"a": [{"b": 1}, {"c": 2}, {"b": 3}]},
+                ["a", "*", "b"],
+                [1, 3],
+                id="wildcard-list",
+            ),
+            pytest.param(
+                {"a": {"p": [{"b": 1}], "q": [{"b": 2}, {"b": 3}]}},
+                ["a", "*", "*", "b"],
+                [1, 2, 3],
+                id="nested-wildcards",
+            ),
+            pytest.param(
+                {"a": "scalar"},
+                ["a", "*"],
+                [],
+                id="wildcard-on-scalar",
+            ),
+            pytest.param(
+                {"a": {"b": "value"}},
+                ["x", "b"],
+                [],
+                id="missing-key",
+            ),
+            pytest.param(
+                {"a": 1},
+                [],
+                [{"a": 1}],
+                id="empty-path",
+            ),
+        ],
+    )
+    def test_iter_nested_fields(
+        self,
+        data: Mapping[str, Any],
+        keys: Sequence[str],
+        expected: list[Any],
+    ) -> None:
+        """
+        Test iterating over nested fields with wildcard paths.
+
+        :param data: Input dictionary
+        :param keys: Path to the nested fields
+        :param expected: Expected values, in traversal order
+        """
+        assert list(utils_dict.iter_nested_fields(data=data, keys=keys)) == expected
+
+
+class TestIterStrings:
+    """Test suite for iter_strings function."""
+
+    def test_iter_strings(self) -> None:
+        """Test iterating over the string values of a structure, keys excluded."""
+        data = {"a": "x", "b": [1, "y", {"c": "z"}], "d": None}
+        assert list(utils_dict.iter_strings(data)) == ["x", "y", "z"]
+
+
 class TestReplaceNestedField:
     """Test suite for replace_nested_field function."""
 
@@ -287,3 +362,36 @@ class TestRegexReplace:
         """
         result = utils_dict.regex_replace(data=data, pattern=pattern, value=replacement)
         assert result == expected
+
+    def test_regex_replace_should_skip_fields(self) -> None:
+        """Test that skipped fields and their subtrees are left as is."""
+        items = ["test@email.com", "test@email.com"]
+        data = {"a": "test@email.com", "b": {"c": "test@email.com"}, "d": items}
+
+        result = utils_dict.regex_replace(
+            data=data,
+            pattern=re.compile(r"test@email\.com"),
+            value="anon@anon.com",
+            skip={(id(data), "b"), (id(items), 1)},
+        )
+
+        assert result == {
+            "a": "anon@anon.com",
+            "b": {"c": "test@email.com"},
+            "d": ["anon@anon.com", "test@email.com"],
+        }
+
+    def test_regex_replace_should_report_replaced_fields(self) -> None:
+        """Test that every string changed by a replacement is reported with its container."""
+        items = ["test@email.com", "toto"]
+        data = {"a": "test@email.com", "b": {"c": "tata"}, "d": items}
+        replaced = []
+
+        utils_dict.regex_replace(
+            data=data,
+            pattern=re.compile(r"test@email\.com"),
+            value="anon@anon.com",
+            on_replace=lambda container, key: replaced.append((id(container), key)),
+        )
+
+        assert replaced == [(id(data), "a"), (id(items), 0)]
@@ -0,0 +1,141 @@
+import json
+import random
+import re
+from copy import deepcopy
+from typing import Any
+
+import pytest
+
+from src.trace_deidentifier.common.utils import utils_dict, utils_json
+
+EMAIL = re.compile(r"[a-z.]+@[a-z]+\.[a-z]+")
+DOMAIN = re.compile(r"@[a-z]+")
+
+# Strings drawn for random documents, with characters escaped by JSON
+STRINGS = [
+    "john@doe.com",
+    "contact: jane.doe@example.org, or john@doe.com",
+    'quoted "john@doe.com"',
+    "back\\slash john@doe.com",
+    "line\nbreak\tjohn@doe.com",
+    "accentué é john@doe.com",
+    "emoji 😀 john@doe.com",
+    "nothing here",
+    "",
+]
+MAX_DEPTH = 3
+
+
+def document(rng: random.Random, depth: int = 0) -> Any:
+    """
+    Generate a random JSON document.
+
+    :param rng: Random generator
+    :param depth: Nesting depth of the document
+    :return: The document
+    """
+    kind = rng.choice(["dict", "list", "scalar"] if depth < MAX_DEPTH else ["scalar"])
+    if kind == "dict":
+        return {
+            rng.choice(STRINGS) + str(i): document(rng, depth + 1)
+            for i in range(rng.randint(0, 4))
+        }
+    if kind == "list":
+        return [document(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return rng.choice([*STRINGS, 1, -2.5, True, None])
+
+
+class TestRegexReplaceJson:
+    """Test suite for regex_replace_json function."""
+
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            pytest.param(
+                '{"a": "mail john@doe.com"}',
+                '{"a": "mail x"}',
+                id="value",
+            ),
+            pytest.param(
+                '{"john@doe.com": "john@doe.com" , "b":1}',
+                '{"john@doe.com": "x" , "b":1}',
+                id="key-left-as-is",
+            ),
+            pytest.param(
+                '["john\\u0040doe.com", "a\\"b"]',
+                '["x", "a\\"b"]',
+                id="unicode-escape",
+            ),
+            pytest.param(
+                '{"a": "\\ud83d\\ude00 john@doe.com"}',
+                '{"a": "😀 x"}',
+                id="surrogate-pair",
+            ),
+            pytest.param(
+                '{"a" :\n  ["nothing", 1.5e3, null]}',
+                '{"a" :\n  ["nothing", 1.5e3, null]}',
+                id="no-match",
+            ),
+        ],
+    )
+    def test_replace(self, text: str, expected: str) -> None:
+        """
+        Test that only string values are replaced, in place.
+
+        :param text: The JSON text
+        :param expected: Expected JSON text
+        """
+        assert (
+            utils_json.regex_replace_json(text, replacements=[(EMAIL, "x")]) == expected
+        )
+
+    def test_should_match_parsed_replacement(self) -> None:
+        """Test that the result parses to the same data as a replacement on the parsed text."""
+        rng = random.Random(42)  # noqa: S311
+        for _ in range(500):
+            data = document(rng)
+            text = json.dumps(
+                data,
+                ensure_ascii=rng.choice([True, False]),
+                indent=rng.choice([None, 2]),
+            )
+            expected = utils_dict.regex_replace(deepcopy(data), DOMAIN, "@a.b")
+            expected = utils_dict.regex_replace(expected, EMAIL, "x")
+
+            result = utils_json.regex_replace_json(
+                text,
+                replacements=[(DOMAIN, "@a.b"), (EMAIL, "x")],
+            )
+
+            assert json.loads(result) == expected
+
+
+class TestInterningDecoder:
+    """Test suite for the decoder sharing strings across documents."""
+
+    def test_should_share_equal_strings_across_documents(self) -> None:
+        """Test that documents get the same objects for equal keys and string values."""
+        decoder = utils_json.InterningDecoder()
+        texts = [
+            json.dumps(
+                {"verb": {"id": "http://example.com/verbs/" + "answered"}, "n": i},
+            )
+            for i in range(2)
+        ]
+
+        first, second = (decoder.loads(text) for text in texts)
+
+        assert [first, second] == [json.loads(text) for text in texts]
+        assert first["verb"]["id"] is second["verb"]["id"]
+        assert next(iter(first["verb"])) is next(iter(second["verb"]))
+
+    def test_clear_should_empty_the_table(self) -> None:
+        """Test that strings parsed before the table was emptied are not reused."""
+        decoder = utils_json.InterningDecoder()
+        first = decoder.loads('{"id": "a"}')
+
+        decoder.clear()
+        second = decoder.loads('{"id": "a"}')
+
+        assert len(decoder) == 2  # noqa: PLR2004
+        assert first == second